@@ -49,6 +49,16 @@ def analizar_archivo_validacion(filepath: str) -> Dict[str, Any]:
             # Esto indica que se ejecutó AdvancedQualityValidator
             metricas['num_llamadas_llm'] += 1
 
+        # Resultados v5 con medición por puesto (IntegratedValidator: "uso_llm")
+        uso_llm = data.get('uso_llm')
+        if isinstance(uso_llm, dict):
+            metricas['tokens_input'] = uso_llm.get('prompt_tokens', 0)
+            metricas['tokens_output'] = uso_llm.get('completion_tokens', 0)
+            metricas['tokens_total'] = uso_llm.get('total_tokens', 0)
+            metricas['num_llamadas_llm'] = uso_llm.get('calls', 0)
+            metricas['costo_usd'] = uso_llm.get('cost', 0.0)
+            return metricas
+
         # Buscar usage info en cualquier nivel del JSON
         def buscar_usage(obj, path=""):
             if isinstance(obj, dict):
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de la capa de providers LLM contra un servidor stub local.
+
+No consume API real: levanta un servidor HTTP local compatible con
+/v1/chat/completions que responde JSON fijo, y mide el overhead por llamada.
+
+Uso:
+    python scripts/benchmark_llm_provider.py pool [--calls 200]
+    python scripts/benchmark_llm_provider.py async [--calls 200] [--concurrency 32] [--latency-ms 200]
+    python scripts/benchmark_llm_provider.py ratelimit [--quota-rps 20] [--workers 32] [--seconds 20]
+    python scripts/benchmark_llm_provider.py json [--functions 200] [--repeat 5]
+    python scripts/benchmark_llm_provider.py hedging [--calls 400] [--workers 16] [--latency-ms 40] [--http]
+    python scripts/benchmark_llm_provider.py router [--calls 400] [--workers 16] [--latency-ms 20] [--http]
+
+Subcomandos:
+    pool    Provider nuevo por llamada (comportamiento anterior de
+            robust_openai_call) vs provider compartido del registro
+    async   Llamadas síncronas en serie vs acomplete_json con
+            BoundedLLMExecutor (latencia simulada en el stub)
+    ratelimit
+            Simulación contra un stub que impone cuota (429 + Retry-After):
+            backoff fijo vs AdaptiveRateLimiter compartido
+    json    Rescate de JSON en salidas grandes mal formadas: regex anidados
+            anteriores vs json_scanner (tiempo lineal)
+    hedging Latencia de cola con FakeLLMProvider de latencia Pareto (cola
+            pesada): sin hedging vs HedgingPolicy; con --http pasa por
+            FakeOpenAIServer + OpenAIProvider(hedging=...)
+    router  Dos endpoints falsos (uno 3x más lento): un solo endpoint vs
+            LLMRouter ponderado y least-outstanding; a mitad de la corrida
+            el endpoint rápido cae y el router hace failover. Con --http
+            son dos FakeOpenAIServer (la caída es detener el servidor)
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.interfaces.llm_provider import LLMRequest
+from src.providers.openai_provider import OpenAIProvider
+from src.providers.provider_registry import ProviderRegistry
+from src.providers.bounded_executor import BoundedLLMExecutor
+from src.providers.rate_limiter import AdaptiveRateLimiter
+from src.providers.hedging import HedgingPolicy
+from src.providers.llm_router import LLMRouter, RouterEndpoint, http_health_check
+from src.providers.retry_policy import RetryPolicy
+from src.providers.fake_llm_provider import FakeLLMProvider, FakeOpenAIServer, LatencyProfile
+from src.interfaces.llm_provider import LLMProviderError
+from src.utils.json_scanner import extract_json
+
+
+STUB_MODEL = "openai/stub-model"
+STUB_API_KEY = "sk-stub"
+
+
+class _StubChatHandler(BaseHTTPRequestHandler):
+    """Responde cualquier POST con una completion JSON fija (HTTP/1.1 keep-alive)"""
+
+    protocol_version = "HTTP/1.1"
+    latency_s = 0.0
+    quota = None  # _ServerQuota opcional
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if self.quota is not None:
+            retry_after = self.quota.try_consume()
+            if retry_after is not None:
+                self._send_rate_limited(retry_after)
+                return
+
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub-model",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": '{"ok": true}'},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_rate_limited(self, retry_after: float):
+        body = json.dumps({
+            "error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}
+        }).encode()
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("retry-after-ms", str(int(retry_after * 1000)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ServerQuota:
+    """Cuota del lado del servidor: token bucket de requests/segundo"""
+
+    def __init__(self, requests_per_second: float):
+        self.rate = requests_per_second
+        self.level = requests_per_second
+        self.updated_at = time.monotonic()
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def try_consume(self):
+        """Retorna None si hay cuota, o los segundos hasta que la haya"""
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.rate, self.level + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.level >= 1:
+                self.level -= 1
+                return None
+            self.rejected += 1
+            return (1 - self.level) / self.rate
+
+
+def start_stub_server(latency_ms: float = 0.0, quota: "_ServerQuota" = None) -> ThreadingHTTPServer:
+    """Levanta el servidor stub en un puerto libre (hilo daemon)"""
+    handler = type("_StubHandler", (_StubChatHandler,), {"latency_s": latency_ms / 1000, "quota": quota})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _summarize(label: str, durations_ms: list) -> None:
+    """Imprime estadísticas de latencia"""
+    durations_ms = sorted(durations_ms)
+    p95 = durations_ms[int(len(durations_ms) * 0.95) - 1]
+    print(
+        f"{label:<28} media={statistics.mean(durations_ms):7.2f} ms  "
+        f"p50={statistics.median(durations_ms):7.2f} ms  p95={p95:7.2f} ms"
+    )
+
+
+def benchmark_pool(calls: int) -> None:
+    """Compara provider por llamada vs provider compartido del registro"""
+    server = start_stub_server()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    request = LLMRequest(prompt="ping", model=STUB_MODEL, max_tokens=10)
+
+    # Antes: un provider (y un pool HTTP) nuevo en cada llamada
+    before = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        provider = OpenAIProvider(
+            api_key=STUB_API_KEY, default_model=STUB_MODEL,
+            api_base=api_base, enable_logging=False
+        )
+        provider.complete_json(request)
+        provider.close()
+        before.append((time.perf_counter() - start) * 1000)
+
+    # Después: provider de larga vida obtenido del registro
+    registry = ProviderRegistry(enable_logging=False)
+    after = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        provider = registry.get(STUB_API_KEY, STUB_MODEL, api_base=api_base)
+        provider.complete_json(request)
+        after.append((time.perf_counter() - start) * 1000)
+
+    registry.clear()
+    server.shutdown()
+
+    print(f"\nOverhead por llamada contra stub local ({calls} llamadas)")
+    _summarize("Provider por llamada", before)
+    _summarize("Provider compartido", after)
+    print(f"Reducción media: {statistics.mean(before) - statistics.mean(after):.2f} ms/llamada")
+
+
+def benchmark_async(calls: int, concurrency: int, latency_ms: float) -> None:
+    """Compara llamadas síncronas en serie vs async con concurrencia acotada"""
+    server = start_stub_server(latency_ms)
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    request = LLMRequest(prompt="ping", model=STUB_MODEL, max_tokens=10)
+    provider = OpenAIProvider(
+        api_key=STUB_API_KEY, default_model=STUB_MODEL,
+        api_base=api_base, enable_logging=False, pool_connections=concurrency
+    )
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        provider.complete_json(request)
+    serial_s = time.perf_counter() - start
+
+    executor = BoundedLLMExecutor(max_concurrency=concurrency)
+
+    async def _run_async():
+        try:
+            return await executor.gather(
+                [lambda: provider.acomplete_json(request) for _ in range(calls)],
+                return_exceptions=False
+            )
+        finally:
+            # Cierra el cliente async en su propio loop (y el pool síncrono)
+            await provider.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(_run_async())
+    async_s = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(f"\n{calls} llamadas, latencia simulada {latency_ms:.0f} ms, concurrencia {concurrency}")
+    print(f"{'Síncrono en serie':<28} total={serial_s:7.2f} s  rendimiento={calls / serial_s:7.1f} llamadas/s")
+    print(f"{'Async acotado':<28} total={async_s:7.2f} s  rendimiento={calls / async_s:7.1f} llamadas/s")
+    print(f"Pico en vuelo: {executor.get_stats()['max_in_flight']}")
+
+
+def _run_quota_simulation(rate_limiter, quota_rps: float, workers: int, seconds: float) -> dict:
+    """Ejecuta `workers` hilos llamando al stub con cuota durante `seconds`"""
+    quota = _ServerQuota(quota_rps)
+    server = start_stub_server(latency_ms=50, quota=quota)
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    provider = OpenAIProvider(
+        api_key=STUB_API_KEY, default_model=STUB_MODEL, api_base=api_base,
+        enable_logging=False, max_retries=5, pool_connections=workers,
+        rate_limiter=rate_limiter
+    )
+    request = LLMRequest(prompt="ping", model=STUB_MODEL, max_tokens=10)
+
+    counters = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            try:
+                provider.complete(request)
+                outcome = "ok"
+            except LLMProviderError:
+                outcome = "failed"
+            with lock:
+                counters[outcome] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    provider.close()
+    server.shutdown()
+    return {**counters, "elapsed": elapsed, "rejected_429": quota.rejected}
+
+
+def benchmark_ratelimit(quota_rps: float, workers: int, seconds: float) -> None:
+    """Simulación de cuota: backoff fijo vs limitador adaptativo compartido"""
+    print(f"\nCuota del servidor: {quota_rps:.0f} req/s, {workers} workers, {seconds:.0f} s por escenario")
+
+    for label, limiter in (
+        ("Backoff fijo (sin limiter)", None),
+        ("AdaptiveRateLimiter (AIMD)", AdaptiveRateLimiter(initial_concurrency=4, max_concurrency=workers)),
+    ):
+        result = _run_quota_simulation(limiter, quota_rps, workers, seconds)
+        throughput = result["ok"] / result["elapsed"]
+        print(
+            f"{label:<28} éxitos={result['ok']:5d}  fallidas={result['failed']:4d}  "
+            f"429={result['rejected_429']:5d}  rendimiento={throughput:6.1f} req/s "
+            f"({throughput / quota_rps:.0%} de la cuota)"
+        )
+        if limiter is not None:
+            print(f"{'':<28} {limiter.get_stats()}")
+
+
+def _extract_json_legacy(content: str):
+    """Rescate anterior (regex de a lo más 2 niveles de anidación), como referencia"""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+    for pattern in (r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', r'\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]'):
+        for match in re.findall(pattern, content, re.DOTALL):
+            try:
+                return json.loads(match)
+            except json.JSONDecodeError:
+                continue
+    return None
+
+
+def _json_cases(functions: int) -> dict:
+    """Salidas LLM grandes: (contenido, objeto esperado o None)"""
+    evaluacion = {
+        "evaluaciones": [
+            {
+                "funcion_id": f"F{i}",
+                "criterio_verbo": {"score": 1.0, "reasoning": "Verbo {autorizado} para el nivel"},
+                "criterio_normativa": {"score": 0.7, "articulo_respaldo": "Art. [12]"},
+                "score_global": 0.85,
+                "clasificacion": "APROBADO"
+            }
+            for i in range(functions)
+        ]
+    }
+    payload = json.dumps(evaluacion, ensure_ascii=False)
+    return {
+        "JSON con texto alrededor": (f"Claro, aquí está:\n{payload}\nSaludos.", evaluacion),
+        "JSON truncado": (payload[: len(payload) * 2 // 3], None),
+        "Llaves sin cerrar": ("Análisis: " + "{\"a\": {\"b\": 1, " * (functions * 20), None),
+    }
+
+
+def benchmark_json(functions: int, repeat: int) -> None:
+    """Rescate de JSON: regex anteriores vs json_scanner"""
+    print(f"\nSalidas simuladas con {functions} funciones evaluadas, {repeat} repeticiones")
+
+    for case, (content, expected) in _json_cases(functions).items():
+        print(f"\n{case} ({len(content) / 1024:.0f} KB)")
+        for label, extractor in (("Regex anidados (anterior)", _extract_json_legacy), ("json_scanner", extract_json)):
+            durations_ms = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = extractor(content)
+                durations_ms.append((time.perf_counter() - start) * 1000)
+            if expected is None:
+                outcome = "sin JSON completo" if result is None else f"fragmento ({type(result).__name__})"
+            else:
+                outcome = "objeto completo" if result == expected else "fragmento interno (incorrecto)"
+            print(f"  {label:<26} media={statistics.mean(durations_ms):9.2f} ms  -> {outcome}")
+
+
+def _tail_summary(label: str, durations_ms: list) -> None:
+    """Imprime percentiles de cola"""
+    durations_ms = sorted(durations_ms)
+
+    def pct(q):
+        return durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * q))]
+
+    print(f"{label:<28} p50={pct(0.50):8.1f} ms  p95={pct(0.95):8.1f} ms  p99={pct(0.99):8.1f} ms  max={durations_ms[-1]:8.1f} ms")
+
+
+def _run_calls(call, calls: int, workers: int) -> list:
+    """Ejecuta call(i) desde varios hilos y retorna latencias (ms)"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def timed(i):
+        start = time.perf_counter()
+        call(i)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(timed, range(calls)))
+
+
+def benchmark_hedging(calls: int, workers: int, latency_ms: float, spread: float,
+                      percentile: float, max_rate: float, http: bool) -> None:
+    """Latencia de cola con y sin hedging contra un endpoint falso de cola pesada"""
+    fake = FakeLLMProvider(seed=7, latency=LatencyProfile(latency_ms, distribution="pareto", spread=spread))
+
+    def request(i):
+        return LLMRequest(prompt=f"ping {i}", model=STUB_MODEL, max_tokens=10, metadata={"prompt_family": "c3_impact"})
+
+    server = None
+    if http:
+        server = FakeOpenAIServer(fake).start()
+        baseline = OpenAIProvider(api_key=STUB_API_KEY, default_model=STUB_MODEL,
+                                  api_base=server.api_base, enable_logging=False)
+        hedging = HedgingPolicy(percentile=percentile, max_hedge_rate=max_rate)
+        hedged = OpenAIProvider(api_key=STUB_API_KEY, default_model=STUB_MODEL,
+                                api_base=server.api_base, enable_logging=False, hedging=hedging)
+        run_baseline = lambda i: baseline.complete(request(i))
+        run_hedged = lambda i: hedged.complete(request(i + calls))
+    else:
+        hedging = HedgingPolicy(percentile=percentile, max_hedge_rate=max_rate)
+        run_baseline = lambda i: fake.complete(request(i))
+        run_hedged = lambda i: hedging.call(
+            lambda: fake.complete(request(i + calls)),
+            key=(STUB_MODEL, "c3_impact"),
+            on_discard=lambda response: hedging.account_discarded(response.tokens_used.get("total", 0))
+        )
+
+    try:
+        without = _run_calls(run_baseline, calls, workers)
+        with_hedging = _run_calls(run_hedged, calls, workers)
+    finally:
+        if server is not None:
+            server.stop()
+
+    stats = hedging.get_stats()
+    print(f"\n{calls} llamadas, {workers} hilos, latencia Pareto base={latency_ms:.0f} ms spread={spread} "
+          f"({'HTTP' if http else 'en proceso'})")
+    _tail_summary("Sin hedging", without)
+    _tail_summary(f"Hedging p{percentile * 100:.0f}", with_hedging)
+    print(f"Duplicados: {stats['hedges_issued']} ({stats['hedge_rate']:.1%} de las llamadas, tope {max_rate:.0%}), "
+          f"ganados: {stats['hedges_won']}, suprimidos por presupuesto: {stats['hedges_suppressed']}")
+    print(f"Costo de hedging: {stats['discarded_responses']} respuestas descartadas, "
+          f"{stats['discarded_tokens']} tokens")
+
+
+def _router_endpoints(latency_ms: float, http: bool):
+    """
+    Dos endpoints falsos: "rapido" (latencia base) y "lento" (3x).
+
+    Returns:
+        (endpoints, caida) - caida() tumba el endpoint rápido
+    """
+    fakes = [
+        FakeLLMProvider(seed=1, latency=LatencyProfile(latency_ms), max_retries=1),
+        FakeLLMProvider(seed=2, latency=LatencyProfile(latency_ms * 3), max_retries=1)
+    ]
+    names = ["rapido", "lento"]
+
+    if not http:
+        def outage():
+            fakes[0].error_rate = 1.0
+        return [RouterEndpoint(name, fake) for name, fake in zip(names, fakes)], outage, lambda: None
+
+    servers = [FakeOpenAIServer(fake).start() for fake in fakes]
+    endpoints = [
+        RouterEndpoint(
+            name,
+            OpenAIProvider(api_key=STUB_API_KEY, default_model=STUB_MODEL, api_base=server.api_base,
+                           enable_logging=False, retry_policy=RetryPolicy(max_attempts=1)),
+            health_check=http_health_check(server.api_base, STUB_API_KEY, timeout=1.0)
+        )
+        for name, server in zip(names, servers)
+    ]
+
+    def stop_all():
+        for server in servers[1:]:
+            server.stop()
+
+    return endpoints, servers[0].stop, stop_all
+
+
+def benchmark_router(calls: int, workers: int, latency_ms: float, http: bool) -> None:
+    """Throughput y failover del router contra dos endpoints falsos"""
+    def request(i):
+        return LLMRequest(prompt=f"ping {i}", model=STUB_MODEL, max_tokens=10)
+
+    print(f"\n{calls} llamadas, {workers} hilos, endpoints de {latency_ms:.0f} y {latency_ms * 3:.0f} ms "
+          f"({'HTTP' if http else 'en proceso'}); el endpoint rápido cae a mitad de la corrida")
+
+    endpoints, outage, stop_all = _router_endpoints(latency_ms, http)
+    single = endpoints[0].provider
+    single_errors = []
+
+    def single_call(i):
+        try:
+            single.complete(request(i))
+        except LLMProviderError as e:
+            single_errors.append(e)
+
+    start = time.perf_counter()
+    durations = _run_calls(single_call, calls // 2, workers)
+    outage()
+    durations += _run_calls(lambda i: single_call(i + calls), calls - calls // 2, workers)
+    print(f"{'Un endpoint':<28} {calls / (time.perf_counter() - start):7.1f} llamadas/s, errores: {len(single_errors)}")
+    _tail_summary("", durations)
+    stop_all()
+
+    for strategy in ("weighted", "least_outstanding"):
+        endpoints, outage, stop_all = _router_endpoints(latency_ms, http)
+        router = LLMRouter(endpoints, strategy=strategy, retry_policy=RetryPolicy(max_attempts=3, base_delay=0.05),
+                           failure_threshold=3, recovery_timeout=60.0)
+        errors = []
+
+        def call(i):
+            try:
+                router.complete(request(i))
+            except LLMProviderError as e:
+                errors.append(e)
+
+        start = time.perf_counter()
+        durations = _run_calls(call, calls // 2, workers)
+        outage()
+        durations += _run_calls(lambda i: call(i + calls), calls - calls // 2, workers)
+        elapsed = time.perf_counter() - start
+
+        stats = router.get_stats()
+        print(f"{'Router ' + strategy:<28} {calls / elapsed:7.1f} llamadas/s, errores: {len(errors)}, "
+              f"failovers: {stats['failovers']}")
+        _tail_summary("", durations)
+        for name, endpoint in stats["endpoints"].items():
+            print(f"    {name:<8} éxitos={endpoint['successes']:>5}  fallas={endpoint['failures']:>3}  "
+                  f"circuito={endpoint['circuit']}")
+        if http:
+            print(f"    health check: {router.check_health()}")
+        router.close()
+        stop_all()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pool_parser = subparsers.add_parser("pool", help="Provider por llamada vs pool compartido")
+    pool_parser.add_argument("--calls", type=int, default=200)
+
+    async_parser = subparsers.add_parser("async", help="Serie síncrona vs async con concurrencia acotada")
+    async_parser.add_argument("--calls", type=int, default=200)
+    async_parser.add_argument("--concurrency", type=int, default=32)
+    async_parser.add_argument("--latency-ms", type=float, default=200.0)
+
+    ratelimit_parser = subparsers.add_parser("ratelimit", help="Simulación de cuota con 429 + Retry-After")
+    ratelimit_parser.add_argument("--quota-rps", type=float, default=20.0)
+    ratelimit_parser.add_argument("--workers", type=int, default=32)
+    ratelimit_parser.add_argument("--seconds", type=float, default=20.0)
+
+    json_parser = subparsers.add_parser("json", help="Rescate de JSON: regex vs json_scanner")
+    json_parser.add_argument("--functions", type=int, default=200)
+    json_parser.add_argument("--repeat", type=int, default=5)
+
+    hedging_parser = subparsers.add_parser("hedging", help="Latencia de cola con y sin hedging (latencia Pareto)")
+    hedging_parser.add_argument("--calls", type=int, default=400)
+    hedging_parser.add_argument("--workers", type=int, default=16)
+    hedging_parser.add_argument("--latency-ms", type=float, default=40.0)
+    hedging_parser.add_argument("--spread", type=float, default=0.6)
+    hedging_parser.add_argument("--percentile", type=float, default=0.90)
+    hedging_parser.add_argument("--max-rate", type=float, default=0.15)
+    hedging_parser.add_argument("--http", action="store_true")
+
+    router_parser = subparsers.add_parser("router", help="Balanceo y failover entre dos endpoints falsos")
+    router_parser.add_argument("--calls", type=int, default=400)
+    router_parser.add_argument("--workers", type=int, default=16)
+    router_parser.add_argument("--latency-ms", type=float, default=20.0)
+    router_parser.add_argument("--http", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "pool":
+        benchmark_pool(args.calls)
+    elif args.command == "async":
+        benchmark_async(args.calls, args.concurrency, args.latency_ms)
+    elif args.command == "ratelimit":
+        benchmark_ratelimit(args.quota_rps, args.workers, args.seconds)
+    elif args.command == "json":
+        benchmark_json(args.functions, args.repeat)
+    elif args.command == "hedging":
+        benchmark_hedging(args.calls, args.workers, args.latency_ms, args.spread,
+                          args.percentile, args.max_rate, args.http)
+    elif args.command == "router":
+        benchmark_router(args.calls, args.workers, args.latency_ms, args.http)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga end-to-end sin API real, con FakeLLMProvider.
+
+Instala el provider falso en el registro compartido (todas las llamadas de
+robust_openai_call lo usan) y ejecuta el pipeline completo con latencias,
+errores y 429 simulados. Reporta tiempo total, throughput, llamadas por
+familia de prompt y tokens.
+
+Uso:
+    python scripts/load_test_offline.py validate [--puestos 50] [--funciones 8] [--latency-ms 800] [--compact] [--prescreen cascade] [--offline-batch] [--concurrent-criteria] [--workers 8] [--executor thread]
+    python scripts/load_test_offline.py sidegor <archivo_excel> [--niveles G,H,I,J,K] [--latency-ms 800]
+    python scripts/load_test_offline.py journal-check [--puestos 6] [--funciones 4]
+
+Opciones comunes:
+    --latency-ms          Latencia base por llamada (default 0)
+    --latency-dist        fixed | uniform | lognormal (default lognormal)
+    --latency-spread      Dispersión de la distribución (default 0.4)
+    --per-token-ms        Latencia adicional por token de salida (default 0)
+    --error-rate          Probabilidad de error transitorio por intento
+    --rate-limit-rate     Probabilidad de 429 por intento
+    --retry-after         Retry-After de los 429 simulados (segundos)
+    --seed                Semilla (respuestas y latencias deterministas)
+    --http                Usa FakeOpenAIServer + OpenAIProvider real (ejercita
+                          reintentos, rate limiter, cache y single-flight HTTP)
+
+Subcomandos:
+    validate  Puestos sintéticos -> IntegratedValidator.validate_batch
+              (--offline-batch: validate_batch_offline por fases de batch
+              jobs sobre la Batch API simulada; con --http, vía HTTP;
+              --concurrent-criteria: calidad y criterios de cada puesto en
+              paralelo, con tiempo medio por rama; --workers/--executor:
+              puestos en paralelo en validate_batch)
+    sidegor   Excel Sidegor -> SidegorBatchProcessor.procesar_lote con
+              validación por APFExtractor sobre el provider falso
+    journal-check
+              Verifica que los resultados con llamadas LLM fallidas no entren
+              en bitácora ni almacén: corrida degradada (todas las llamadas
+              fallan) y corrida sana que reanuda de la misma bitácora.
+              Termina con código 1 si algo se reutilizó
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.providers.fake_llm_provider import (
+    FakeBatchService,
+    FakeLLMProvider,
+    FakeOpenAIServer,
+    LatencyProfile,
+    install_fake_provider
+)
+from src.providers.provider_registry import get_default_registry
+
+
+FAKE_API_KEY = "sk-fake"
+
+_VERBOS = ["Coordinar", "Supervisar", "Elaborar", "Dirigir", "Analizar", "Proponer", "Integrar", "Evaluar"]
+_NIVELES = ["G11", "H21", "J31", "K11", "L31", "M33", "N11", "O21", "P13"]
+
+
+def build_fake(args) -> FakeLLMProvider:
+    """Construye el provider falso a partir de los argumentos"""
+    return FakeLLMProvider(
+        seed=args.seed,
+        latency=LatencyProfile(
+            base_ms=args.latency_ms,
+            per_output_token_ms=args.per_token_ms,
+            distribution=args.latency_dist,
+            spread=args.latency_spread
+        ),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after
+    )
+
+
+def install(args):
+    """
+    Instala el fake en el registro.
+
+    Returns:
+        (fake, server) - server es None salvo con --http
+    """
+    fake = build_fake(args)
+    if not args.http:
+        return install_fake_provider(fake), None
+
+    from src.providers.openai_provider import OpenAIProvider
+
+    server = FakeOpenAIServer(fake).start()
+    get_default_registry().set_provider_factory(
+        lambda **options: OpenAIProvider(**{**options, "api_base": server.api_base})
+    )
+    return fake, server
+
+
+def synthetic_puestos(count: int, funciones: int, seed: int):
+    """Puestos sintéticos con la estructura que espera IntegratedValidator"""
+    puestos = []
+    for i in range(count):
+        nivel = _NIVELES[(i + seed) % len(_NIVELES)]
+        puestos.append({
+            "codigo": f"27-100-1-{nivel}-{i:05d}",
+            "denominacion": f"PUESTO SINTÉTICO {i}",
+            "nivel_salarial": nivel,
+            "unidad_responsable": "100",
+            "objetivo_general": "Coordinar los programas institucionales a fin de cumplir las metas de la unidad",
+            "funciones": [
+                {
+                    "id": f"F{j + 1}",
+                    "verbo_accion": _VERBOS[(i + j) % len(_VERBOS)].lower(),
+                    "descripcion_completa": (
+                        f"{_VERBOS[(i + j) % len(_VERBOS)]} los procesos de la materia {j + 1} "
+                        f"del puesto {i} para asegurar el cumplimiento de la normativa aplicable"
+                    )
+                }
+                for j in range(funciones)
+            ]
+        })
+    return puestos
+
+
+def print_report(title: str, elapsed: float, units: int, fake: FakeLLMProvider):
+    """Imprime métricas de la corrida"""
+    stats = fake.get_stats()
+    print()
+    print("=" * 70)
+    print(f"📊 {title}")
+    print("=" * 70)
+    print(f"Tiempo total:           {elapsed:.2f}s")
+    print(f"Throughput:             {units / elapsed if elapsed else 0:.2f} puestos/s")
+    print(f"Llamadas exitosas:      {stats['calls']} ({stats['attempts']} intentos)")
+    print(f"Errores inyectados:     {stats['errors_injected']}")
+    print(f"429 inyectados:         {stats['rate_limits_injected']}")
+    print(f"Tokens prompt/cache/out: {stats['prompt_tokens']}/{stats['cached_tokens']}/{stats['completion_tokens']}")
+    print(f"Latencia simulada:      {stats['simulated_latency_s']:.2f}s acumulados")
+    print()
+    print("Por familia de prompt:")
+    for family, family_stats in sorted(stats["by_family"].items()):
+        print(f"  {family:<24} {family_stats['calls']:>5} llamadas  {family_stats['prompt_tokens']:>8} tokens prompt")
+
+    registry_stats = get_default_registry().get_stats()
+    print()
+    print("Registro de providers:")
+    print(json.dumps(registry_stats, indent=2, ensure_ascii=False, default=str))
+
+
+def build_batch_backend(fake: FakeLLMProvider, server):
+    """Batch API simulada: HTTP (SDK openai) con --http, en proceso sin él"""
+    from src.providers.offline_batch import LocalBatchBackend, OpenAIBatchBackend
+
+    if server is not None:
+        return OpenAIBatchBackend(api_key=FAKE_API_KEY, api_base=server.api_base)
+    return LocalBatchBackend(FakeBatchService(fake))
+
+
+def run_validate(args):
+    from src.validators.integrated_validator import IntegratedValidator
+
+    fake, server = install(args)
+    try:
+        puestos = synthetic_puestos(args.puestos, args.funciones, args.seed)
+        validator = IntegratedValidator(
+            openai_api_key=FAKE_API_KEY, compact_evaluation=args.compact, prescreen_mode=args.prescreen,
+            concurrent_criteria=args.concurrent_criteria,
+            batch_workers=args.workers,
+            batch_executor=args.executor
+        )
+
+        start = time.perf_counter()
+        if args.offline_batch:
+            results = validator.validate_batch_offline(
+                puestos,
+                work_dir=tempfile.mkdtemp(prefix="load_test_batch_"),
+                backend=build_batch_backend(fake, server),
+                poll_interval=0.05
+            )
+        else:
+            results = validator.validate_batch(puestos)
+        elapsed = time.perf_counter() - start
+
+        resultados = {}
+        for result in results:
+            resultado = result.get("validacion", {}).get("resultado", "?")
+            resultados[resultado] = resultados.get(resultado, 0) + 1
+        print_report(f"validate_batch: {len(puestos)} puestos × {args.funciones} funciones", elapsed, len(puestos), fake)
+        print(f"Resultados: {resultados}")
+
+        branch_times = {}
+        for result in results:
+            for name, seconds in result.get("ejecucion", {}).get("tiempos_ramas", {}).items():
+                branch_times.setdefault(name, []).append(seconds)
+        if branch_times:
+            print("Tiempo medio por rama: " + ", ".join(
+                f"{name}={sum(times) / len(times):.2f}s" for name, times in sorted(branch_times.items())
+            ))
+        if args.offline_batch:
+            print()
+            print("Fases offline:")
+            print(json.dumps(validator.context.get_data("lote_offline"), indent=2, ensure_ascii=False))
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def run_sidegor(args):
+    from src.adapters import SidegorAdapter, RHNetDocumentGenerator, SidegorBatchProcessor
+    from src.core.agente_extractor import APFExtractor
+    from src.filters import NivelSalarialFilter
+
+    fake, server = install(args)
+    try:
+        adapter = SidegorAdapter()
+        if not adapter.cargar_archivo(args.archivo_excel):
+            print("❌ Error cargando archivo")
+            return
+
+        provider = get_default_registry().get(FAKE_API_KEY, "openai/gpt-4o-mini") if args.http else fake
+        processor = SidegorBatchProcessor(
+            adapter=adapter,
+            document_generator=RHNetDocumentGenerator(template="default"),
+            validation_pipeline=APFExtractor(llm_provider=provider, enable_logging=False)
+        )
+        if args.niveles:
+            processor.add_filter(NivelSalarialFilter([n.strip().upper() for n in args.niveles.split(",")]))
+
+        output_dir = args.output_dir or tempfile.mkdtemp(prefix="load_test_sidegor_")
+        start = time.perf_counter()
+        resultado = processor.procesar_lote(
+            validar=True,
+            generar_documentos=True,
+            output_dir=output_dir,
+            guardar_intermedios=False
+        )
+        elapsed = time.perf_counter() - start
+
+        print_report(f"procesar_lote: {args.archivo_excel}", elapsed, resultado.procesados, fake)
+        print(f"Salida: {output_dir}")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def run_journal_check(args):
+    from src.utils.results_store import ValidationResultsStore
+    from src.validators.integrated_validator import IntegratedValidator
+
+    puestos = synthetic_puestos(args.puestos, args.funciones, args.seed)
+    work_dir = Path(tempfile.mkdtemp(prefix="load_test_journal_"))
+    journal_path = str(work_dir / "bitacora.jsonl")
+    failures = []
+
+    for label, error_rate, resume in (("degradada", 1.0, False), ("sana", 0.0, True)):
+        args.error_rate = error_rate
+        fake, server = install(args)
+        try:
+            validator = IntegratedValidator(
+                openai_api_key=FAKE_API_KEY, results_store=ValidationResultsStore(work_dir / "almacen")
+            )
+            results = validator.validate_batch(puestos, journal_path=journal_path, resume=resume)
+        finally:
+            if server is not None:
+                server.stop()
+
+        con_fallas = sum(1 for result in results if result.get("ejecucion", {}).get("fallas_llm"))
+        journal = validator.context.get_data("bitacora_lote") or {}
+        incremental = validator.context.get_data("revalidacion_incremental") or {}
+        print(
+            f"Corrida {label}: {con_fallas}/{len(results)} puestos con llamadas LLM fallidas, "
+            f"bitácora {journal.get('registros')} registros ({journal.get('reanudados')} reanudados), "
+            f"almacén {incremental.get('reutilizados')} reutilizados"
+        )
+
+        if label == "degradada":
+            if con_fallas != len(puestos):
+                failures.append(f"corrida degradada: {con_fallas}/{len(puestos)} puestos con fallas_llm")
+            if journal.get("registros"):
+                failures.append(f"corrida degradada: {journal['registros']} resultados de respaldo en bitácora")
+        else:
+            if con_fallas:
+                failures.append(f"corrida sana: {con_fallas} puestos con fallas_llm")
+            if journal.get("reanudados") or incremental.get("reutilizados"):
+                failures.append(
+                    f"corrida sana: {journal.get('reanudados')} reanudados de bitácora y "
+                    f"{incremental.get('reutilizados')} reutilizados del almacén"
+                )
+            if journal.get("registros") != len(puestos):
+                failures.append(f"corrida sana: {journal.get('registros')}/{len(puestos)} puestos en bitácora")
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Los resultados con llamadas LLM fallidas no se registran ni se reutilizan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga offline con FakeLLMProvider")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--latency-ms", type=float, default=0.0)
+    common.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    common.add_argument("--latency-spread", type=float, default=0.4)
+    common.add_argument("--per-token-ms", type=float, default=0.0)
+    common.add_argument("--error-rate", type=float, default=0.0)
+    common.add_argument("--rate-limit-rate", type=float, default=0.0)
+    common.add_argument("--retry-after", type=float, default=0.2)
+    common.add_argument("--seed", type=int, default=0)
+    common.add_argument("--http", action="store_true")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    validate = sub.add_parser("validate", parents=[common])
+    validate.add_argument("--puestos", type=int, default=50)
+    validate.add_argument("--funciones", type=int, default=8)
+    validate.add_argument("--compact", action="store_true", help="Evaluación compacta (razonamiento bajo demanda)")
+    validate.add_argument("--prescreen", choices=["off", "shadow", "cascade"], default="off",
+                          help="Pre-filtro local del Criterio 1")
+    validate.add_argument("--offline-batch", action="store_true", help="Modo offline por batch jobs (validate_batch_offline)")
+    validate.add_argument("--concurrent-criteria", action="store_true", help="Calidad y criterios de cada puesto en paralelo")
+    validate.add_argument("--workers", type=int, default=1, help="Puestos en paralelo en validate_batch")
+    validate.add_argument("--executor", choices=["thread", "process"], default="thread")
+    validate.set_defaults(func=run_validate)
+
+    sidegor = sub.add_parser("sidegor", parents=[common])
+    sidegor.add_argument("archivo_excel")
+    sidegor.add_argument("--niveles", default="G,H,I,J,K")
+    sidegor.add_argument("--output-dir", default=None)
+    sidegor.set_defaults(func=run_sidegor)
+
+    journal_check = sub.add_parser("journal-check", parents=[common])
+    journal_check.add_argument("--puestos", type=int, default=6)
+    journal_check.add_argument("--funciones", type=int, default=4)
+    journal_check.set_defaults(func=run_journal_check)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Concordancia del pre-filtro local del Criterio 1 contra corridas LLM completas.
+
+Lee resultados guardados (JSON de validate_batch / output/analisis) y, para
+cada función evaluada por el LLM, compara su clasificación contra el score
+estimado del pre-filtro en varias bandas (reject_below, approve_above):
+cobertura (llamadas LLM que se ahorrarían), concordancia y desacuerdos.
+
+Las corridas en modo shadow (APF_C1_PRESCREEN=shadow) traen el score del
+pre-filtro con fragmentos normativos; en otras corridas se recalcula sin
+normativa (aproximado: el criterio normativa queda en valor neutral). Las
+funciones resueltas localmente en modo cascade no tienen clasificación LLM
+y se omiten, igual que las reutilizadas del memo de funciones (repetirían
+la misma clasificación LLM).
+
+Uso:
+    python scripts/prescreen_agreement.py output/analisis/analisis_*.json [--min-agreement 0.98] [--json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Agregar paths
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.validators.function_prescreen import (
+    FunctionPrescreener,
+    prescreen_agreement_report,
+    suggest_band
+)
+
+
+def iter_functions(node: Any, nivel: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """Recorre el JSON y produce (función evaluada, nivel del puesto)"""
+    if isinstance(node, list):
+        for item in node:
+            yield from iter_functions(item, nivel)
+        return
+    if not isinstance(node, dict):
+        return
+
+    puesto = node.get("puesto")
+    if isinstance(puesto, dict) and puesto.get("nivel"):
+        nivel = str(puesto["nivel"])
+
+    if "funcion_text" in node and "clasificacion" in node:
+        # Omitidas por terminación temprana: sin clasificación que comparar
+        if node["clasificacion"] != "NO_EVALUADA":
+            yield node, nivel or "P"
+        return
+
+    for value in node.values():
+        yield from iter_functions(value, nivel)
+
+
+def collect_pairs(paths: List[Path]) -> Tuple[List[Tuple[float, str]], Dict[str, int]]:
+    """Pares (score del pre-filtro, clasificación LLM) de los archivos"""
+    prescreener = FunctionPrescreener()
+    pairs = []
+    counts = {"shadow": 0, "recalculadas": 0, "omitidas_cascade": 0, "omitidas_memo": 0}
+
+    for path in paths:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for funcion, nivel in iter_functions(data):
+            if funcion.get("memo", {}).get("reutilizada"):
+                counts["omitidas_memo"] += 1
+                continue
+            prescreen = funcion.get("prescreen")
+            if prescreen and prescreen.get("resuelta_localmente"):
+                counts["omitidas_cascade"] += 1
+                continue
+            if prescreen:
+                score = prescreen["score"]
+                counts["shadow"] += 1
+            else:
+                score = prescreener.evaluate(funcion["funcion_text"], funcion.get("verbo", ""), nivel[:1]).score
+                counts["recalculadas"] += 1
+            pairs.append((score, funcion["clasificacion"]))
+
+    return pairs, counts
+
+
+def print_report(report: Dict[str, Any], counts: Dict[str, int], min_agreement: float) -> None:
+    print(
+        f"{report['total']} funciones con clasificación LLM "
+        f"(shadow: {counts['shadow']}, recalculadas sin normativa: {counts['recalculadas']}, "
+        f"omitidas por cascade: {counts['omitidas_cascade']}, reutilizadas del memo: {counts['omitidas_memo']})"
+    )
+    print(f"\n{'banda':<13} {'resueltas':>9} {'cobertura':>9} {'concord.':>9} {'falsos APROB':>12} {'falsos RECH':>11}")
+    for row in report["bands"]:
+        print(
+            f"{row['reject_below']:.2f}-{row['approve_above']:.2f}    {row['decided']:>9} "
+            f"{row['coverage']:>9.1%} {row['agreement']:>9.1%} "
+            f"{row['false_approvals']:>12} {row['false_rejections']:>11}"
+        )
+
+    best = suggest_band(report, min_agreement)
+    if best is None:
+        print(f"\nNinguna banda alcanza {min_agreement:.0%} de concordancia: mantener APF_C1_PRESCREEN=shadow/off")
+    else:
+        print(
+            f"\nBanda sugerida (concordancia >= {min_agreement:.0%}): "
+            f"APF_C1_PRESCREEN_BAND={best['reject_below']:.2f},{best['approve_above']:.2f} "
+            f"-> {best['coverage']:.1%} de llamadas C1 evitadas, concordancia {best['agreement']:.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concordancia del pre-filtro C1 contra corridas LLM")
+    parser.add_argument("archivos", nargs="+", type=Path, help="JSON de resultados guardados")
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Concordancia mínima para sugerir banda")
+    parser.add_argument("--json", action="store_true", help="Imprime el reporte como JSON")
+    args = parser.parse_args()
+
+    pairs, counts = collect_pairs(args.archivos)
+    report = prescreen_agreement_report(pairs)
+
+    if args.json:
+        report["suggested"] = suggest_band(report, args.min_agreement)
+        report["counts"] = counts
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, counts, args.min_agreement)
+
+
+if __name__ == "__main__":
+    main()
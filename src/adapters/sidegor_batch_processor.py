@@ -12,6 +12,7 @@ from datetime import datetime
 from .sidegor_adapter import SidegorAdapter
 from .rhnet_document_generator import RHNetDocumentGenerator
 from ..filters.base_filter import PuestoFilter
+from ..utils.batch_journal import BatchJournal
 
 
 @dataclass
@@ -80,6 +81,36 @@ Filtros aplicados ({len(self.filtros_aplicados)}):
 
         print(f"✅ Resultado exportado a: {archivo}")
 
+    @classmethod
+    def desde_journal(cls, journal_path: str, filtros_aplicados: Optional[List[str]] = None) -> "BatchProcessingResult":
+        """
+        Reconstruye el resultado consolidado desde una bitácora de procesar_lote.
+
+        Útil si el proceso se interrumpió y solo se necesita el consolidado de
+        los puestos ya completados (sin volver a cargar el Excel).
+
+        Args:
+            journal_path: Bitácora JSONL de procesar_lote
+            filtros_aplicados: Descripción de los filtros de la corrida
+
+        Returns:
+            BatchProcessingResult con los puestos registrados
+        """
+        resultados = BatchJournal(journal_path, resume=True).results()
+        exitosos = sum(1 for r in resultados if r.get("status") == "success")
+        ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        return cls(
+            total_puestos=len(resultados),
+            procesados=len(resultados),
+            exitosos=exitosos,
+            fallidos=len(resultados) - exitosos,
+            resultados=resultados,
+            filtros_aplicados=filtros_aplicados or [],
+            tiempo_inicio=ahora,
+            tiempo_fin=ahora
+        )
+
 
 class SidegorBatchProcessor:
     """
@@ -148,15 +179,26 @@ class SidegorBatchProcessor:
                      validar: bool = False,
                      generar_documentos: bool = True,
                      output_dir: str = "output/batch",
-                     guardar_intermedios: bool = True) -> BatchProcessingResult:
+                     guardar_intermedios: bool = True,
+                     journal_path: Optional[str] = None,
+                     resume: bool = False) -> BatchProcessingResult:
         """
         Procesa lote completo de puestos filtrados.
 
+        Con journal_path, cada puesto procesado con éxito se registra en una
+        bitácora JSONL al terminar; con resume=True, los puestos ya
+        registrados (mismo contenido y opciones) se toman de la bitácora y
+        el resultado consolidado incluye ambos. Un puesto cuya validación
+        falló o usó respaldos por llamadas LLM fallidas no se registra: se
+        reprocesa al reanudar.
+
         Args:
             validar: Si ejecutar validación con pipeline (requiere pipeline configurado)
             generar_documentos: Si generar documentos RHNet
             output_dir: Directorio de salida
             guardar_intermedios: Si guardar archivos intermedios (docs RHNet, JSONs APF)
+            journal_path: Bitácora JSONL de puestos completados (None = sin bitácora)
+            resume: Si True, reanuda desde la bitácora; si False, la reinicia
 
         Returns:
             BatchProcessingResult con estadísticas y resultados
@@ -204,11 +246,26 @@ class SidegorBatchProcessor:
         print("PROCESANDO PUESTOS")
         print(f"{'='*70}\n")
 
+        journal = BatchJournal(journal_path, resume=resume) if journal_path else None
+        opciones = {
+            "validar": validar,
+            "generar_documentos": generar_documentos,
+            "output_dir": str(output_dir)
+        }
+
         # Procesar cada puesto
         resultados = []
 
         for i, puesto_data in enumerate(puestos, 1):
             codigo = puesto_data.get('CÓDIGO_DE_PUESTO', 'UNKNOWN')
+            journal_input = {"puesto": puesto_data, "opciones": opciones}
+
+            if journal is not None:
+                registrado = journal.get(codigo, journal_input)
+                if registrado is not None:
+                    print(f"[{i}/{len(puestos)}] ♻️ Reanudado desde bitácora: {codigo}")
+                    resultados.append(registrado)
+                    continue
 
             print(f"[{i}/{len(puestos)}] Procesando: {codigo}")
 
@@ -258,7 +315,7 @@ class SidegorBatchProcessor:
                         resultado_validacion = {"error": str(e)}
 
                 # Consolidar resultado
-                resultados.append({
+                resultado = {
                     "codigo": codigo,
                     "denominacion": datos_apf.get("identificacion_puesto", {}).get("denominacion_puesto"),
                     "nivel": puesto_data.get('GRADO'),
@@ -268,7 +325,10 @@ class SidegorBatchProcessor:
                     "num_funciones": len(datos_apf.get("funciones", [])),
                     "documento_path": str(doc_path) if doc_path else None,
                     "validacion": resultado_validacion
-                })
+                }
+                resultados.append(resultado)
+                if journal is not None and self._validacion_reutilizable(resultado_validacion):
+                    journal.record(codigo, journal_input, resultado)
 
                 print(f"  ✅ Completado\n")
 
@@ -299,6 +359,15 @@ class SidegorBatchProcessor:
 
         return resultado_final
 
+    @staticmethod
+    def _validacion_reutilizable(resultado_validacion: Optional[Dict[str, Any]]) -> bool:
+        """False si la validación falló o tuvo llamadas LLM fallidas (ejecucion.fallas_llm)"""
+        if resultado_validacion is None:
+            return True
+        if "error" in resultado_validacion:
+            return False
+        return not resultado_validacion.get("ejecucion", {}).get("fallas_llm")
+
     def _consolidar_resultados(self,
                                resultados: List[Dict],
                                puestos_originales: List[Dict],
@@ -15,7 +15,7 @@ import json
 
 from ..interfaces.llm_provider import ILLMProvider, LLMRequest
 from .file_reader import FileReader, FileContent
-from .prompt_builder import PromptBuilder, ExtractionMode
+from .prompt_builder import PromptBuilder, ExtractionMode, EXTRACTION_RESPONSE_SCHEMA
 from .data_validator import DataValidator, ValidationResult
 
 
@@ -113,7 +113,9 @@ class APFExtractor:
             request = LLMRequest(
                 prompt=prompt,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                response_schema=EXTRACTION_RESPONSE_SCHEMA,
+                metadata={"prompt_family": "extraction"}
             )
 
             extracted_data = self.llm_provider.complete_json(request)
@@ -202,7 +204,9 @@ class APFExtractor:
             request = LLMRequest(
                 prompt=prompt,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                response_schema=EXTRACTION_RESPONSE_SCHEMA,
+                metadata={"prompt_family": "extraction"}
             )
 
             extracted_data = self.llm_provider.complete_json(request)
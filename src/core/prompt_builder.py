@@ -11,6 +11,47 @@ from typing import Optional, Dict, Any
 from enum import Enum
 
 
+def _nullable_strings(*names: str) -> Dict[str, Any]:
+    return {name: {"type": ["string", "null"]} for name in names}
+
+
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+# JSON schema de la salida de extracción (structured outputs, modo estricto).
+# Mismos campos que "ESTRUCTURA DEL JSON DE SALIDA"; los datos que pueden
+# no encontrarse en el documento son nullable.
+EXTRACTION_RESPONSE_SCHEMA = {
+    "name": "puesto_extraction",
+    "schema": _strict_object({
+        "identificacion_puesto": _strict_object({
+            **_nullable_strings("codigo_puesto", "denominacion_puesto"),
+            "nivel_salarial": _strict_object(_nullable_strings("codigo", "descripcion")),
+            **_nullable_strings("caracter_ocupacional", "estatus")
+        }),
+        "objetivo_general": _strict_object(
+            _nullable_strings("descripcion_completa", "verbo_accion", "objeto_contribucion", "finalidad")
+        ),
+        "funciones": {
+            "type": "array",
+            "items": _strict_object({
+                "numero": {"type": "integer"},
+                **_nullable_strings(
+                    "verbo_accion", "descripcion_completa", "que_hace",
+                    "para_que_lo_hace", "fundamento_normativo"
+                )
+            })
+        }
+    })
+}
+
+
 class ExtractionMode(Enum):
     """Modos de extracción disponibles"""
     FAST = "fast"
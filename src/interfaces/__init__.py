@@ -11,12 +11,14 @@ from .llm_provider import ILLMProvider
 from .cache_provider import ICacheProvider
 from .logger import ILogger
 from .normativa_source import INormativaSource
+from .batch_job_backend import IBatchJobBackend
 
 __all__ = [
     'ILLMProvider',
     'ICacheProvider',
     'ILogger',
-    'INormativaSource'
+    'INormativaSource',
+    'IBatchJobBackend'
 ]
 
 __version__ = '5.0.0'
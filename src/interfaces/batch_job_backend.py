@@ -0,0 +1,64 @@
+"""
+Interface para backends de batch jobs LLM
+
+Un batch job recibe un archivo JSONL de requests (formato de la Batch API
+de OpenAI: custom_id, method, url, body) y, de forma asíncrona, produce un
+JSONL con una respuesta por custom_id. Permite diferentes implementaciones:
+- Batch API de OpenAI (o endpoints compatibles)
+- Stand-in local para pruebas (FakeBatchService)
+"""
+
+from typing import Protocol, Dict, Any
+from pathlib import Path
+
+
+# Estados terminales de un batch job
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class IBatchJobBackend(Protocol):
+    """
+    Interface para backends de batch jobs.
+
+    Los estados siguen la Batch API de OpenAI: validating, in_progress,
+    finalizing, completed, failed, expired, cancelling, cancelled.
+    """
+
+    def submit(self, input_path: Path) -> str:
+        """
+        Sube el JSONL de requests y crea el batch job.
+
+        Args:
+            input_path: Archivo JSONL (una línea por request)
+
+        Returns:
+            ID del batch job
+        """
+        ...
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Consulta el estado de un batch job.
+
+        Args:
+            job_id: ID del batch job
+
+        Returns:
+            Dict con status, total, completed, failed y errors
+        """
+        ...
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        """
+        Descarga las respuestas de un batch job terminado.
+
+        Incluye las líneas exitosas y las fallidas (archivo de errores).
+
+        Args:
+            job_id: ID del batch job
+            output_path: Archivo JSONL destino
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        ...
@@ -16,14 +16,24 @@ class LLMResponse:
     """Respuesta estandarizada de un LLM"""
     content: str
     model: str
-    tokens_used: Dict[str, int]  # {"prompt": X, "completion": Y, "total": Z}
+    tokens_used: Dict[str, int]  # {"prompt": X, "completion": Y, "total": Z, "cached": W}
     finish_reason: str
     metadata: Optional[Dict[str, Any]] = None
 
 
 @dataclass
 class LLMRequest:
-    """Request estandarizado para un LLM"""
+    """
+    Request estandarizado para un LLM.
+
+    Para aprovechar el prefix cache del proveedor, el texto estático
+    (instrucciones, rúbricas) va en system_message y los datos variables
+    (funciones, puesto) en prompt.
+
+    response_schema ({"name", "schema"}) pide salida estructurada: el
+    provider la usa de forma nativa si el backend la soporta (ver
+    src/validators/response_schemas.py).
+    """
     prompt: str
     model: Optional[str] = None
     temperature: float = 0.0
@@ -31,6 +41,7 @@ class LLMRequest:
     system_message: Optional[str] = None
     stop_sequences: Optional[List[str]] = None
     metadata: Optional[Dict[str, Any]] = None
+    response_schema: Optional[Dict[str, Any]] = None
 
 
 class ILLMProvider(Protocol):
@@ -74,6 +85,39 @@ class ILLMProvider(Protocol):
         """
         ...
 
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Versión asíncrona de complete().
+
+        No debe bloquear el event loop (ni en la llamada ni en los reintentos),
+        de modo que un proceso pueda mantener muchas llamadas en vuelo.
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            LLMResponse con el contenido generado y metadatos
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada al LLM
+        """
+        ...
+
+    async def acomplete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        """
+        Versión asíncrona de complete_json().
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            Dict parseado del JSON generado
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada o parsing JSON
+        """
+        ...
+
     def get_model_info(self) -> Dict[str, Any]:
         """
         Retorna información del modelo configurado.
@@ -108,6 +152,80 @@ class LLMProviderAuthError(LLMProviderError):
     pass
 
 
-class LLMProviderRateLimitError(LLMProviderError):
-    """Error de rate limit del proveedor"""
+class LLMProviderBadRequestError(LLMProviderError):
+    """Request rechazado por el proveedor (400/404/422): reintentarlo no cambia el resultado"""
     pass
+
+
+class LLMProviderRateLimitError(LLMProviderError):
+    """
+    Error de rate limit del proveedor.
+
+    Attributes:
+        retry_after: Segundos de espera sugeridos por el servidor (Retry-After),
+            o None si no se indicó
+    """
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProviderJSONError(LLMProviderError):
+    """
+    La respuesta llegó pero su contenido no es JSON recuperable.
+
+    Conserva la respuesta para que el llamador la registre o la rescate
+    sin pagar una segunda llamada.
+
+    Attributes:
+        raw_content: Contenido crudo devuelto por el modelo
+        response: LLMResponse original (tokens, metadatos), si existe
+    """
+
+    def __init__(self, message: str = "", raw_content: str = "", response: Optional[LLMResponse] = None):
+        super().__init__(message)
+        self.raw_content = raw_content
+        self.response = response
+
+
+class LLMProviderBudgetError(LLMProviderError):
+    """
+    Presupuesto de tokens o costo agotado: la llamada no se envió.
+
+    Attributes:
+        scope: Nombre del presupuesto agotado (ej: "lote", "puesto:ABC-123")
+    """
+
+    def __init__(self, message: str = "", scope: Optional[str] = None):
+        super().__init__(message)
+        self.scope = scope
+
+
+class LLMProviderCircuitOpenError(LLMProviderError):
+    """
+    Circuit breaker abierto: el endpoint falló repetidamente y la llamada
+    no se envió.
+
+    Attributes:
+        retry_after: Segundos hasta que el breaker admita una llamada de prueba
+    """
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProviderDeferredError(LLMProviderError):
+    """
+    La llamada no se envió: el request quedó registrado para un batch job
+    del proveedor (modo offline, ver providers/offline_batch.py) y su
+    respuesta se servirá en una fase posterior.
+
+    Attributes:
+        request_key: Llave del request diferido (build_request_key)
+    """
+
+    def __init__(self, message: str = "", request_key: Optional[str] = None):
+        super().__init__(message)
+        self.request_key = request_key
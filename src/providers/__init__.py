@@ -8,11 +8,97 @@ Implementa el principio de Dependency Inversion (DIP):
 
 Providers disponibles:
 - openai_provider: Implementación para OpenAI (GPT-4, GPT-3.5)
+- provider_registry: Pool de providers de larga vida por (api_key, modelo, timeout)
+- bounded_executor: Concurrencia acotada para llamadas LLM asíncronas
+- llm_response_cache: Cache persistente (SQLite) de respuestas LLM
+- rate_limiter: Limitador de cuota con concurrencia adaptativa (AIMD)
+- single_flight: Coalescencia de requests LLM idénticos en vuelo
+- retry_policy: Reintentos clasificados (full jitter, deadline) y circuit breaker
+- hedging: Requests duplicados ante latencia de cola (percentil por modelo y familia)
+- llm_router: Balanceo entre varios endpoints/keys con health checks y failover
+- usage_meter: Medición de tokens/costo por llamada y presupuestos por ámbito
+- offline_batch: Modo offline de validate_batch sobre batch jobs del proveedor (por fases)
+- fake_llm_provider: Provider determinista local (servidor HTTP y Batch API) para pruebas de carga
 - memory_cache_provider: Cache en memoria
 - file_logger: Logger basado en archivos
 """
 
 from .openai_provider import OpenAIProvider
+from .provider_registry import (
+    ProviderRegistry,
+    get_default_registry,
+    get_pooled_provider,
+    configure_provider_pool
+)
+from .bounded_executor import BoundedLLMExecutor
+from .llm_response_cache import LLMResponseCache, build_request_key, response_cache_from_env
+from .rate_limiter import AdaptiveRateLimiter, rate_limiter_from_env
+from .single_flight import SingleFlight
+from .retry_policy import RetryPolicy, CircuitBreaker, retry_policy_from_env, circuit_breaker_from_env
+from .hedging import HedgingPolicy, LatencyTracker, hedging_policy_from_env
+from .llm_router import LLMRouter, RouterEndpoint, RouterFactory, http_health_check, llm_router_factory_from_env
+from .usage_meter import (
+    UsageMeter,
+    UsageLedger,
+    BudgetLimits,
+    PriceTable,
+    LLMCallRecord,
+    current_ledger,
+    use_ledger,
+    usage_meter_from_env,
+    budget_limits_from_env
+)
+from .offline_batch import BatchCollectingProvider, OpenAIBatchBackend, LocalBatchBackend, OfflineBatchRunner
+from .fake_llm_provider import (
+    FakeLLMProvider,
+    FakeOpenAIServer,
+    FakeBatchService,
+    LatencyProfile,
+    install_fake_provider
+)
 
 __version__ = '5.0.0'
-__all__ = ['OpenAIProvider']
+__all__ = [
+    'OpenAIProvider',
+    'ProviderRegistry',
+    'get_default_registry',
+    'get_pooled_provider',
+    'configure_provider_pool',
+    'BoundedLLMExecutor',
+    'LLMResponseCache',
+    'build_request_key',
+    'response_cache_from_env',
+    'AdaptiveRateLimiter',
+    'rate_limiter_from_env',
+    'SingleFlight',
+    'RetryPolicy',
+    'CircuitBreaker',
+    'retry_policy_from_env',
+    'circuit_breaker_from_env',
+    'HedgingPolicy',
+    'LatencyTracker',
+    'hedging_policy_from_env',
+    'LLMRouter',
+    'RouterEndpoint',
+    'RouterFactory',
+    'http_health_check',
+    'llm_router_factory_from_env',
+    'UsageMeter',
+    'UsageLedger',
+    'BudgetLimits',
+    'PriceTable',
+    'LLMCallRecord',
+    'current_ledger',
+    'use_ledger',
+    'usage_meter_from_env',
+    'budget_limits_from_env',
+    'FakeLLMProvider',
+    'BatchCollectingProvider',
+    'OpenAIBatchBackend',
+    'LocalBatchBackend',
+    'OfflineBatchRunner',
+    'FakeOpenAIServer',
+    'FakeBatchService',
+    'LatencyProfile',
+    'install_fake_provider'
+]
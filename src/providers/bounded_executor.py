@@ -0,0 +1,166 @@
+"""
+Bounded LLM Executor - Concurrencia acotada para llamadas LLM asíncronas
+
+Permite que un solo proceso mantenga decenas de llamadas en vuelo mientras
+procesa un lote, sin exceder un máximo de concurrencia configurable:
+- Corrutinas (ej: provider.acomplete_json, robust_openai_call_async)
+- Funciones síncronas existentes (ej: validadores v4), ejecutadas en hilos
+
+Los resultados se devuelven en el mismo orden de entrada.
+"""
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+class BoundedLLMExecutor:
+    """
+    Ejecutor de llamadas LLM con concurrencia acotada por semáforo.
+
+    Ejemplo:
+        >>> executor = BoundedLLMExecutor(max_concurrency=32)
+        >>> results = executor.run_all([
+        ...     lambda: provider.acomplete_json(req) for req in requests
+        ... ])
+    """
+
+    def __init__(self, max_concurrency: int = 16):
+        """
+        Inicializa el ejecutor.
+
+        Args:
+            max_concurrency: Máximo de llamadas simultáneas en vuelo
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser >= 1")
+
+        self.max_concurrency = max_concurrency
+
+        # El semáforo se crea por event loop (asyncio.Semaphore queda ligado al loop)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "max_in_flight": 0
+        }
+
+    async def run(self, coro_factory: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """
+        Ejecuta una corrutina respetando el límite de concurrencia.
+
+        Se recibe una factory (no la corrutina ya creada) para que la llamada
+        no inicie hasta obtener un lugar en el semáforo.
+
+        Args:
+            coro_factory: Función async (o que retorna un awaitable)
+            *args, **kwargs: Argumentos para coro_factory
+
+        Returns:
+            Resultado de la corrutina
+        """
+        async with self._get_semaphore():
+            self._enter()
+            try:
+                result = await coro_factory(*args, **kwargs)
+            except BaseException:
+                self._exit(failed=True)
+                raise
+            self._exit(failed=False)
+            return result
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Ejecuta una función síncrona en un hilo respetando el límite de concurrencia.
+
+        Útil para paralelizar validadores v4 que usan robust_openai_call.
+
+        Args:
+            func: Función síncrona
+            *args, **kwargs: Argumentos para func
+
+        Returns:
+            Resultado de la función
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await self.run(lambda: loop.run_in_executor(None, call))
+
+    async def gather(
+        self,
+        coro_factories: Iterable[Callable[[], Awaitable[Any]]],
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Ejecuta varias corrutinas con concurrencia acotada.
+
+        Args:
+            coro_factories: Factories sin argumentos que retornan awaitables
+            return_exceptions: Si True, las excepciones se devuelven en la
+                posición correspondiente en lugar de propagarse
+
+        Returns:
+            Lista de resultados en el orden de entrada
+        """
+        tasks = [self.run(factory) for factory in coro_factories]
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+    def run_all(
+        self,
+        coro_factories: Iterable[Callable[[], Awaitable[Any]]],
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Punto de entrada síncrono: ejecuta gather() en un event loop nuevo.
+
+        No debe llamarse desde dentro de un event loop en ejecución.
+
+        Args:
+            coro_factories: Factories sin argumentos que retornan awaitables
+            return_exceptions: Ver gather()
+
+        Returns:
+            Lista de resultados en el orden de entrada
+        """
+        return asyncio.run(self.gather(list(coro_factories), return_exceptions))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de ejecución.
+
+        Returns:
+            Dict con llamadas enviadas, completadas, fallidas y pico en vuelo
+        """
+        with self._stats_lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                **self._stats
+            }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Obtiene el semáforo del event loop actual"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _enter(self) -> None:
+        """Registra una llamada en vuelo"""
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            self._in_flight += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+
+    def _exit(self, failed: bool) -> None:
+        """Registra el fin de una llamada"""
+        with self._stats_lock:
+            self._in_flight -= 1
+            self._stats["failed" if failed else "completed"] += 1
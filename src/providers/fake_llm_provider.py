@@ -0,0 +1,1085 @@
+"""
+Fake LLM Provider - Provider determinista local para pruebas de carga y latencia
+
+Permite medir el pipeline completo (IntegratedValidator.validate_batch,
+SidegorBatchProcessor.procesar_lote) sin consumir API real:
+
+- FakeLLMProvider: implementación de ILLMProvider que responde JSON válido
+  para cada familia de prompt de los validadores (evaluación de funciones,
+  impacto, respaldo normativo, validación contextual global, calidad,
+  sinónimos, extracción...), con latencia configurable por distribución,
+  inyección de errores y de 429, y conteo de tokens (incluido prefix cache
+  simulado del system message)
+- FakeOpenAIServer: servidor HTTP local compatible con /v1/chat/completions
+  que usa el mismo simulador; permite ejercitar el OpenAIProvider real
+  (reintentos, rate limiter, cache, single-flight) contra él
+- FakeBatchService: stand-in local de la Batch API (/v1/files, /v1/batches)
+  que resuelve los JSONL de requests con el mismo simulador; FakeOpenAIServer
+  lo expone por HTTP y LocalBatchBackend lo usa en proceso (modo offline,
+  ver offline_batch.py)
+- install_fake_provider(): instala el fake en el registro de providers, de
+  modo que robust_openai_call lo use sin cambios en los validadores
+
+Las respuestas y latencias son deterministas por (seed, request): el mismo
+prompt produce siempre la misma respuesta, sin importar el orden de hilos.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..interfaces.llm_provider import (
+    LLMRequest,
+    LLMResponse,
+    LLMProviderError,
+    LLMProviderRateLimitError,
+    LLMProviderJSONError
+)
+from ..utils.json_scanner import parse_json_response
+
+
+FAKE_MODEL = "fake/apf-model"
+
+# Marcadores de cada familia de prompt (si el request no trae metadata["prompt_family"]).
+# El orden importa: las variantes por lotes van antes que las individuales.
+FAMILY_MARKERS: List[Tuple[str, str]] = [
+    ("c1_reasoning_batch", '"razonamientos"'),
+    ("c1_function_eval_compact_batch", '"evaluaciones_compactas"'),
+    ("c1_function_eval_compact", '"verbo_codigo"'),
+    ("c1_function_eval_batch", '"evaluaciones"'),
+    ("c1_function_eval", '"criterio_verbo"'),
+    ("c3_impact_batch", '"analisis"'),
+    ("c3_impact", '"scope_level"'),
+    ("c3_backing_batch", '"respaldos"'),
+    ("c3_backing", '"has_backing"'),
+    ("c2_global_validation", '"alignment_level"'),
+    ("c2_function_detail", '"normative_backed"'),
+    ("quality_holistic", '"duplicacion"'),
+    ("verb_synonyms", '"synonyms"'),
+    ("verb_ambiguity", '"is_weak"'),
+    ("verb_level", '"alternative_if_inappropriate"'),
+    ("extraction", '"identificacion_puesto"'),
+]
+
+# Tamaño mínimo de prefijo que el proveedor real cachea (tokens)
+PREFIX_CACHE_MIN_TOKENS = 1024
+
+_VERBS = ["coordinar", "supervisar", "elaborar", "dirigir", "analizar", "proponer", "integrar", "evaluar"]
+_SCOPES = ["local", "institutional", "interinstitutional", "strategic_national"]
+_CONSEQUENCES = ["operational", "tactical", "strategic", "systemic"]
+_COMPLEXITIES = ["routine", "analytical", "strategic", "transformational", "innovative"]
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Distribución de latencia simulada de una llamada.
+
+    latencia = base_ms (según distribución) + per_output_token_ms × tokens de salida
+
+    distribution:
+        fixed: siempre base_ms
+        uniform: base_ms × U(1 - spread, 1 + spread)
+        lognormal: base_ms × lognormal(0, spread) (cola larga, como APIs reales)
+        pareto: base_ms × Pareto(alpha = 1 / spread) (cola pesada: pocas
+            llamadas muy lentas, ej. spread=0.6 → alpha≈1.7)
+    """
+    base_ms: float = 0.0
+    per_output_token_ms: float = 0.0
+    distribution: str = "fixed"
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random, output_tokens: int = 0) -> float:
+        """Latencia en segundos"""
+        base = self.base_ms
+        if self.distribution == "uniform" and self.spread:
+            base *= rng.uniform(1 - self.spread, 1 + self.spread)
+        elif self.distribution == "lognormal" and self.spread:
+            base *= rng.lognormvariate(0.0, self.spread)
+        elif self.distribution == "pareto" and self.spread:
+            base *= rng.paretovariate(1.0 / self.spread)
+        elif self.distribution not in ("fixed", "uniform", "lognormal", "pareto"):
+            raise ValueError(f"Distribución de latencia desconocida: {self.distribution}")
+
+        return max(0.0, base + self.per_output_token_ms * output_tokens) / 1000
+
+
+@dataclass
+class SimulatedCall:
+    """Resultado de simular una llamada (compartido por provider y servidor HTTP)"""
+    family: str
+    content: str
+    tokens_used: Dict[str, int]
+    latency_s: float
+    injected: Optional[str] = None  # None | "error" | "rate_limit"
+    malformed: bool = False
+
+
+class FakeLLMProvider:
+    """
+    Provider LLM falso, determinista y sin red.
+
+    Ejemplo:
+        >>> fake = FakeLLMProvider(latency=LatencyProfile(800, distribution="lognormal", spread=0.4),
+        ...                        rate_limit_rate=0.02)
+        >>> install_fake_provider(fake)
+        >>> IntegratedValidator(...).validate_batch(puestos)  # sin API real
+        >>> fake.get_stats()
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: Optional[LatencyProfile] = None,
+        family_latency: Optional[Dict[str, LatencyProfile]] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        retry_after: float = 1.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.05,
+        default_model: str = FAKE_MODEL,
+        responders: Optional[Dict[str, Callable[[random.Random, str], Dict[str, Any]]]] = None,
+        usage_meter: Optional[Any] = None,
+        **_provider_options: Any
+    ):
+        """
+        Inicializa el provider falso.
+
+        Args:
+            seed: Semilla (respuestas y latencias deterministas por request)
+            latency: Latencia por defecto (default: sin latencia)
+            family_latency: Latencia por familia de prompt (sobrescribe latency)
+            error_rate: Probabilidad de error transitorio por intento
+            rate_limit_rate: Probabilidad de 429 por intento
+            malformed_rate: Probabilidad de envolver el JSON en texto libre
+                (como hacen los modelos a veces); requiere rescate del JSON.
+                No aplica a requests con response_schema
+            retry_after: Retry-After sugerido en los 429 inyectados (segundos)
+            max_retries: Intentos por llamada (como OpenAIProvider)
+            retry_backoff: Espera base entre reintentos por error (segundos)
+            default_model: Modelo reportado si el request no indica uno
+            responders: Generadores de respuesta adicionales o de reemplazo por
+                familia: f(rng, texto_del_prompt) -> dict
+            usage_meter: UsageMeter para registrar uso y respetar presupuestos
+            **_provider_options: Opciones del registro que no aplican al fake
+                (api_key, timeout, response_cache, rate_limiter...)
+        """
+        self.seed = seed
+        self.latency = latency or LatencyProfile()
+        self.family_latency = family_latency or {}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.default_model = default_model
+        self.usage_meter = usage_meter
+
+        self.responders: Dict[str, Callable[[random.Random, str], Dict[str, Any]]] = {
+            "c1_function_eval": _respond_function_eval,
+            "c1_function_eval_batch": _respond_function_eval_batch,
+            "c1_function_eval_compact": _respond_function_eval_compact,
+            "c1_function_eval_compact_batch": _respond_function_eval_compact_batch,
+            "c1_reasoning_batch": _respond_reasoning_batch,
+            "c3_impact": _respond_impact,
+            "c3_impact_batch": _respond_impact_batch,
+            "c3_backing": _respond_backing,
+            "c3_backing_batch": _respond_backing_batch,
+            "c2_global_validation": _respond_global_validation,
+            "c2_function_detail": _respond_function_detail,
+            "quality_holistic": _respond_quality,
+            "verb_synonyms": _respond_synonyms,
+            "verb_ambiguity": _respond_ambiguity,
+            "verb_level": _respond_verb_level,
+            "extraction": _respond_extraction,
+            "generic": lambda rng, text: {"ok": True},
+            **(responders or {})
+        }
+
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._seen_prefixes = set()
+        self._stats: Dict[str, Any] = {
+            "calls": 0,
+            "attempts": 0,
+            "errors_injected": 0,
+            "rate_limits_injected": 0,
+            "malformed_injected": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "simulated_latency_s": 0.0,
+            "by_family": {}
+        }
+
+    # ------------------------------------------------------------------
+    # ILLMProvider
+    # ------------------------------------------------------------------
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        """Completion simulada (bloquea durante la latencia simulada)"""
+        model = request.model or self.default_model
+        if self.usage_meter is not None:
+            self.usage_meter.check_budget(request, model)
+
+        start = time.time()
+        for attempt in range(self.max_retries):
+            call = self.simulate(request)
+            time.sleep(call.latency_s)
+            if call.injected is None:
+                return self._finish(request, model, call, start, attempt)
+            error = self._injected_error(call)
+            if attempt == self.max_retries - 1:
+                raise error
+            time.sleep(self._retry_wait(error, attempt))
+
+        raise LLMProviderError("Error desconocido en FakeLLMProvider")
+
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """Versión asíncrona de complete() (la latencia usa asyncio.sleep)"""
+        model = request.model or self.default_model
+        if self.usage_meter is not None:
+            self.usage_meter.check_budget(request, model)
+
+        start = time.time()
+        for attempt in range(self.max_retries):
+            call = self.simulate(request)
+            await asyncio.sleep(call.latency_s)
+            if call.injected is None:
+                return self._finish(request, model, call, start, attempt)
+            error = self._injected_error(call)
+            if attempt == self.max_retries - 1:
+                raise error
+            await asyncio.sleep(self._retry_wait(error, attempt))
+
+        raise LLMProviderError("Error desconocido en FakeLLMProvider")
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return self.complete_json_with_response(request)[0]
+
+    def complete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        response = self.complete(request)
+        return self._parse_json_content(response), response
+
+    async def acomplete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return (await self.acomplete_json_with_response(request))[0]
+
+    async def acomplete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        response = await self.acomplete(request)
+        return self._parse_json_content(response), response
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "Fake",
+            "default_model": self.default_model,
+            "seed": self.seed,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+            "malformed_rate": self.malformed_rate,
+            "stats": self.get_stats()
+        }
+
+    def is_available(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    # ------------------------------------------------------------------
+    # Simulación
+    # ------------------------------------------------------------------
+
+    def detect_family(self, request: LLMRequest) -> str:
+        """Familia del prompt: metadata["prompt_family"] o marcadores del texto"""
+        family = (request.metadata or {}).get("prompt_family")
+        if family in self.responders:
+            return family
+
+        text = f"{request.system_message or ''}\n{request.prompt}"
+        for family, marker in FAMILY_MARKERS:
+            if marker in text:
+                return family
+        return "generic"
+
+    def simulate(self, request: LLMRequest) -> SimulatedCall:
+        """
+        Simula un intento de llamada (sin dormir).
+
+        Returns:
+            SimulatedCall con contenido, tokens, latencia y error inyectado (si aplica)
+        """
+        key = hashlib.sha256(
+            f"{request.model}\x00{request.system_message or ''}\x00{request.prompt}".encode("utf-8")
+        ).hexdigest()
+
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+
+        # Contenido: determinista por request; fallas: por request e intento
+        content_rng = random.Random(f"{self.seed}:{key}")
+        fault_rng = random.Random(f"{self.seed}:{key}:{attempt}")
+
+        family = self.detect_family(request)
+        text = f"{request.system_message or ''}\n{request.prompt}"
+        content = json.dumps(self.responders[family](content_rng, text), ensure_ascii=False)
+        # Con response_schema el backend garantiza JSON (salida estructurada nativa)
+        malformed = not request.response_schema and content_rng.random() < self.malformed_rate
+        if malformed:
+            content = f"Claro, aquí está el análisis solicitado:\n{content}\nEspero que sea útil."
+
+        prompt_tokens = len(text) // 4
+        completion_tokens = len(content) // 4
+        cached_tokens = self._cached_prefix_tokens(request.system_message)
+        latency_profile = self.family_latency.get(family, self.latency)
+
+        roll = fault_rng.random()
+        injected = None
+        if roll < self.rate_limit_rate:
+            injected = "rate_limit"
+            completion_tokens = 0
+        elif roll < self.rate_limit_rate + self.error_rate:
+            injected = "error"
+            completion_tokens = 0
+
+        call = SimulatedCall(
+            family=family,
+            content=content,
+            tokens_used={
+                "prompt": prompt_tokens,
+                "completion": completion_tokens,
+                "total": prompt_tokens + completion_tokens,
+                "cached": cached_tokens
+            },
+            latency_s=latency_profile.sample(fault_rng, completion_tokens),
+            injected=injected,
+            malformed=malformed
+        )
+        self._record_attempt(call)
+        return call
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Llamadas, fallas inyectadas, tokens y latencia simulada (total y por familia)"""
+        with self._lock:
+            return {
+                **{key: value for key, value in self._stats.items() if key != "by_family"},
+                "by_family": {family: dict(stats) for family, stats in self._stats["by_family"].items()}
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _cached_prefix_tokens(self, system_message: Optional[str]) -> int:
+        """Simula el prefix cache del proveedor: system messages largos ya vistos"""
+        if not system_message:
+            return 0
+
+        tokens = len(system_message) // 4
+        if tokens < PREFIX_CACHE_MIN_TOKENS:
+            return 0
+
+        digest = hashlib.sha256(system_message.encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = digest in self._seen_prefixes
+            self._seen_prefixes.add(digest)
+        # El proveedor cachea en bloques de 128 tokens
+        return (tokens // 128) * 128 if seen else 0
+
+    def _record_attempt(self, call: SimulatedCall) -> None:
+        with self._lock:
+            family_stats = self._stats["by_family"].setdefault(
+                call.family, {"attempts": 0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            self._stats["attempts"] += 1
+            family_stats["attempts"] += 1
+            self._stats["simulated_latency_s"] += call.latency_s
+
+            if call.injected == "rate_limit":
+                self._stats["rate_limits_injected"] += 1
+            elif call.injected == "error":
+                self._stats["errors_injected"] += 1
+            else:
+                self._stats["calls"] += 1
+                self._stats["malformed_injected"] += int(call.malformed)
+                family_stats["calls"] += 1
+                self._stats["prompt_tokens"] += call.tokens_used["prompt"]
+                self._stats["cached_tokens"] += call.tokens_used["cached"]
+                self._stats["completion_tokens"] += call.tokens_used["completion"]
+                family_stats["prompt_tokens"] += call.tokens_used["prompt"]
+                family_stats["completion_tokens"] += call.tokens_used["completion"]
+
+    def _finish(self, request: LLMRequest, model: str, call: SimulatedCall, start: float, attempt: int) -> LLMResponse:
+        response = LLMResponse(
+            content=call.content,
+            model=model,
+            tokens_used=dict(call.tokens_used),
+            finish_reason="stop",
+            metadata={
+                "duration": time.time() - start,
+                "attempt": attempt + 1,
+                "fake": True,
+                "prompt_family": call.family
+            }
+        )
+        if self.usage_meter is not None:
+            record = self.usage_meter.record(response, model, (request.metadata or {}).get("prompt_family") or call.family)
+            response.metadata["cost"] = record.cost
+        return response
+
+    def _parse_json_content(self, response: LLMResponse) -> Dict[str, Any]:
+        """Mismo rescate que OpenAIProvider (json_scanner)"""
+        parsed, method = parse_json_response(response.content)
+        response.metadata = {**(response.metadata or {}), "json_parse": method}
+        if parsed is None:
+            raise LLMProviderJSONError(
+                "No se pudo parsear JSON", raw_content=response.content, response=response
+            )
+        return parsed
+
+    def _injected_error(self, call: SimulatedCall) -> LLMProviderError:
+        if call.injected == "rate_limit":
+            return LLMProviderRateLimitError("Rate limit inyectado por FakeLLMProvider", retry_after=self.retry_after)
+        return LLMProviderError("Error transitorio inyectado por FakeLLMProvider")
+
+    def _retry_wait(self, error: LLMProviderError, attempt: int) -> float:
+        if isinstance(error, LLMProviderRateLimitError) and error.retry_after is not None:
+            return error.retry_after
+        return self.retry_backoff * (2 ** attempt)
+
+
+# ==========================================
+# SERVIDOR HTTP COMPATIBLE CON OPENAI
+# ==========================================
+
+class FakeOpenAIServer:
+    """
+    Servidor local compatible con POST /v1/chat/completions.
+
+    Usa el simulador de un FakeLLMProvider (respuestas, latencia, 429 con
+    retry-after-ms, 500, usage con prompt_tokens_details.cached_tokens).
+    Expone además GET /v1/models y la Batch API (POST /v1/files, POST
+    /v1/batches, GET /v1/batches/{id}, GET /v1/files/{id}/content) sobre un
+    FakeBatchService.
+
+    Ejemplo:
+        >>> with FakeOpenAIServer(FakeLLMProvider(rate_limit_rate=0.05)) as server:
+        ...     provider = OpenAIProvider(api_key="sk-fake", api_base=server.api_base)
+    """
+
+    def __init__(
+        self,
+        fake: Optional[FakeLLMProvider] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_service: Optional["FakeBatchService"] = None
+    ):
+        """
+        Args:
+            fake: Simulador a usar (default: FakeLLMProvider())
+            host: Interfaz de escucha
+            port: Puerto (0 = libre)
+            batch_service: Batch API simulada (default: FakeBatchService(fake))
+        """
+        self.fake = fake or FakeLLMProvider()
+        self.batch_service = batch_service or FakeBatchService(self.fake)
+        handler = type("_FakeChatHandler", (_FakeChatHandler,), {
+            "fake": self.fake,
+            "batch_service": self.batch_service
+        })
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_base(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        """Inicia el servidor en un hilo daemon"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class _FakeChatHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 keep-alive de /v1/chat/completions y de la Batch API"""
+
+    protocol_version = "HTTP/1.1"
+    fake: FakeLLMProvider = None
+    batch_service: "FakeBatchService" = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length)
+        path = self.path.split("?")[0].rstrip("/")
+
+        if path.endswith("/files"):
+            self._upload_file(raw_body)
+            return
+
+        try:
+            body = json.loads(raw_body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "JSON inválido", "type": "invalid_request_error"}})
+            return
+
+        if path.endswith("/batches"):
+            self._create_batch(body)
+            return
+
+        request = _request_from_body(body)
+        call = self.fake.simulate(request)
+        time.sleep(call.latency_s)
+
+        if call.injected == "rate_limit":
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"retry-after-ms": str(int(self.fake.retry_after * 1000))}
+            )
+            return
+        if call.injected == "error":
+            self._send_json(500, {"error": {"message": "Error transitorio simulado", "type": "server_error"}})
+            return
+
+        self._send_json(200, _completion_body(call, body.get("model", FAKE_MODEL)))
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        parts = path.split("/")
+
+        # GET /v1/models (health check de routers)
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": FAKE_MODEL, "object": "model", "owned_by": "fake"}]})
+            return
+
+        # GET /v1/files/{id}/content
+        if len(parts) >= 3 and parts[-1] == "content" and parts[-3] == "files":
+            content = self.batch_service.file_content(parts[-2])
+            if content is None:
+                self._send_json(404, {"error": {"message": "Archivo no encontrado", "type": "invalid_request_error"}})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+
+        # GET /v1/batches/{id}
+        if len(parts) >= 2 and parts[-2] == "batches":
+            batch = self.batch_service.retrieve_batch(parts[-1])
+            if batch is None:
+                self._send_json(404, {"error": {"message": "Batch no encontrado", "type": "invalid_request_error"}})
+                return
+            self._send_json(200, batch)
+            return
+
+        self._send_json(404, {"error": {"message": f"Ruta desconocida: {path}", "type": "invalid_request_error"}})
+
+    def _upload_file(self, raw_body: bytes):
+        """POST /v1/files (multipart/form-data con campos purpose y file)"""
+        content_type = self.headers.get("Content-Type", "")
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + raw_body
+        )
+        fields = {}
+        if message.is_multipart():
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                fields[name] = part.get_payload(decode=True) or b""
+
+        if "file" not in fields:
+            self._send_json(400, {"error": {"message": "Falta el campo file", "type": "invalid_request_error"}})
+            return
+
+        purpose = fields.get("purpose", b"batch").decode("utf-8")
+        self._send_json(200, self.batch_service.upload_file(fields["file"], purpose))
+
+    def _create_batch(self, body: Dict[str, Any]):
+        """POST /v1/batches"""
+        try:
+            batch = self.batch_service.create_batch(
+                body.get("input_file_id", ""),
+                endpoint=body.get("endpoint", "/v1/chat/completions"),
+                completion_window=body.get("completion_window", "24h"),
+                metadata=body.get("metadata")
+            )
+        except KeyError as e:
+            self._send_json(404, {"error": {"message": str(e), "type": "invalid_request_error"}})
+            return
+        self._send_json(200, batch)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _request_from_body(body: Dict[str, Any]) -> LLMRequest:
+    """LLMRequest equivalente al body de /v1/chat/completions"""
+    messages = body.get("messages", [])
+    return LLMRequest(
+        prompt="\n".join(m.get("content", "") for m in messages if m.get("role") != "system"),
+        system_message="\n".join(m.get("content", "") for m in messages if m.get("role") == "system") or None,
+        model=body.get("model"),
+        max_tokens=body.get("max_tokens", 1000),
+        temperature=body.get("temperature", 0.7),
+        response_schema=(body.get("response_format") or {}).get("json_schema")
+    )
+
+
+def _completion_body(call: SimulatedCall, model: str) -> Dict[str, Any]:
+    """Body de chat.completion para una llamada simulada exitosa"""
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": call.content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": call.tokens_used["prompt"],
+            "completion_tokens": call.tokens_used["completion"],
+            "total_tokens": call.tokens_used["total"],
+            "prompt_tokens_details": {"cached_tokens": call.tokens_used["cached"]}
+        }
+    }
+
+
+# ==========================================
+# BATCH API SIMULADA
+# ==========================================
+
+class FakeBatchService:
+    """
+    Stand-in local de la Batch API de OpenAI (archivos y batch jobs).
+
+    Cada job se resuelve en un hilo daemon tras completion_delay segundos:
+    las líneas del JSONL de entrada pasan por el simulador del
+    FakeLLMProvider (sin su latencia por llamada); los errores inyectados
+    (500/429) quedan en el archivo de errores del job, como en la API real.
+
+    Ejemplo:
+        >>> service = FakeBatchService(FakeLLMProvider(), completion_delay=0.1)
+        >>> file_id = service.upload_file(jsonl_bytes)["id"]
+        >>> batch = service.create_batch(file_id)
+        >>> service.retrieve_batch(batch["id"])["status"]
+        'in_progress'
+    """
+
+    def __init__(self, fake: Optional[FakeLLMProvider] = None, completion_delay: float = 0.0):
+        """
+        Args:
+            fake: Simulador a usar (default: FakeLLMProvider())
+            completion_delay: Segundos que tarda cada job en completarse
+        """
+        self.fake = fake or FakeLLMProvider()
+        self.completion_delay = completion_delay
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    def upload_file(self, data: bytes, purpose: str = "batch") -> Dict[str, Any]:
+        """Guarda un archivo; retorna el objeto file ({"id", "bytes", ...})"""
+        with self._lock:
+            file_id = f"file-fake-{next(self._ids)}"
+            self._files[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "purpose": purpose, "created_at": int(time.time())}
+
+    def create_batch(
+        self,
+        input_file_id: str,
+        endpoint: str = "/v1/chat/completions",
+        completion_window: str = "24h",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Crea un batch job y lo resuelve en segundo plano.
+
+        Raises:
+            KeyError: Si input_file_id no existe
+        """
+        with self._lock:
+            if input_file_id not in self._files:
+                raise KeyError(f"Archivo no encontrado: {input_file_id}")
+            batch_id = f"batch-fake-{next(self._ids)}"
+            batch = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "completion_window": completion_window,
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "errors": None,
+                "created_at": int(time.time()),
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                "metadata": metadata
+            }
+            self._batches[batch_id] = batch
+
+        threading.Thread(target=self._run_batch, args=(batch_id,), name="fake-batch", daemon=True).start()
+        return dict(batch)
+
+    def retrieve_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Objeto batch (None si no existe)"""
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            return json.loads(json.dumps(batch)) if batch is not None else None
+
+    def file_content(self, file_id: str) -> Optional[bytes]:
+        """Contenido de un archivo (None si no existe)"""
+        with self._lock:
+            return self._files.get(file_id)
+
+    def _run_batch(self, batch_id: str) -> None:
+        time.sleep(self.completion_delay)
+        with self._lock:
+            batch = self._batches[batch_id]
+            data = self._files[batch["input_file_id"]]
+
+        outputs, errors = [], []
+        for line in data.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                body = item["body"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                with self._lock:
+                    batch.update(status="failed", errors={"data": [{"code": "invalid_json_line", "line": line[:80]}]})
+                return
+
+            call = self.fake.simulate(_request_from_body(body))
+            result = {"id": f"batch_req_{next(self._ids)}", "custom_id": item.get("custom_id")}
+            if call.injected is None:
+                result.update(
+                    response={"status_code": 200, "request_id": result["id"], "body": _completion_body(call, body.get("model", FAKE_MODEL))},
+                    error=None
+                )
+                outputs.append(result)
+            else:
+                status_code = 429 if call.injected == "rate_limit" else 500
+                result.update(
+                    response={"status_code": status_code, "request_id": result["id"], "body": {
+                        "error": {"message": f"Error simulado ({call.injected})", "type": "server_error"}
+                    }},
+                    error=None
+                )
+                errors.append(result)
+
+        output_file_id = self.upload_file(_jsonl(outputs), "batch_output")["id"] if outputs else None
+        error_file_id = self.upload_file(_jsonl(errors), "batch_output")["id"] if errors else None
+        with self._lock:
+            batch.update(
+                status="completed",
+                output_file_id=output_file_id,
+                error_file_id=error_file_id,
+                completed_at=int(time.time()),
+                request_counts={"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+            )
+
+
+def _jsonl(items: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+
+
+def install_fake_provider(fake: Optional[FakeLLMProvider] = None, registry: Optional[Any] = None) -> FakeLLMProvider:
+    """
+    Instala un FakeLLMProvider en el registro de providers.
+
+    Todas las llamadas vía robust_openai_call (cualquier api_key/modelo) usan
+    la misma instancia, de modo que sus estadísticas cubren el proceso.
+    Si el fake no trae usage_meter, usa el del registro (presupuestos activos).
+
+    Args:
+        fake: Provider a instalar (default: FakeLLMProvider())
+        registry: Registro (default: get_default_registry())
+
+    Returns:
+        El FakeLLMProvider instalado
+    """
+    from .provider_registry import get_default_registry
+
+    registry = registry or get_default_registry()
+    fake = fake or FakeLLMProvider()
+    if fake.usage_meter is None:
+        fake.usage_meter = registry.get_option("usage_meter")
+
+    registry.set_provider_factory(lambda **_options: fake)
+    return fake
+
+
+# ==========================================
+# GENERADORES DE RESPUESTA POR FAMILIA
+# ==========================================
+
+def _function_ids(text: str) -> List[str]:
+    """IDs [F1], [F2]... presentes en el prompt (en orden, sin repetir)"""
+    return list(dict.fromkeys(re.findall(r"\[(F\d+)\]", text))) or ["F1"]
+
+
+def _respond_function_eval(rng: random.Random, text: str) -> Dict[str, Any]:
+    scores = {
+        "verbo": rng.choice([1.0, 1.0, 0.5, 0.0]),
+        "normativa": rng.choice([1.0, 0.7, 0.7, 0.4, 0.0]),
+        "estructura": rng.choice([1.0, 0.7, 0.4]),
+        "semantica": rng.choice([1.0, 0.7, 0.4, 0.0]),
+        "jerarquica": rng.choice([1.0, 1.0, 1.0, 0.5, 0.0])
+    }
+    score_global = round(
+        scores["verbo"] * 0.25 + scores["normativa"] * 0.25 + scores["estructura"] * 0.20
+        + scores["semantica"] * 0.20 + scores["jerarquica"] * 0.10, 3
+    )
+    if scores["jerarquica"] == 0.0 or score_global < 0.60:
+        clasificacion = "RECHAZADO"
+    elif score_global >= 0.85:
+        clasificacion = "APROBADO"
+    else:
+        clasificacion = "OBSERVACION"
+
+    return {
+        "criterio_verbo": {
+            "score": scores["verbo"], "reasoning": "Evaluación simulada del verbo.",
+            "esta_autorizado": scores["verbo"] == 1.0, "tiene_excepcion_normativa": scores["verbo"] == 0.5
+        },
+        "criterio_normativa": {
+            "score": scores["normativa"], "reasoning": "Evaluación simulada del respaldo normativo.",
+            "articulo_respaldo": "Fragmento 1" if scores["normativa"] else None,
+            "tipo_correspondencia": {1.0: "DIRECTA", 0.7: "SEMANTICA", 0.4: "LEJANA"}.get(scores["normativa"], "NINGUNA")
+        },
+        "criterio_estructura": {
+            "score": scores["estructura"], "reasoning": "Evaluación simulada de la estructura.",
+            "tiene_verbo": True, "tiene_complemento": scores["estructura"] >= 0.7, "tiene_resultado": scores["estructura"] == 1.0
+        },
+        "criterio_semantica": {
+            "score": scores["semantica"], "reasoning": "Evaluación simulada de la semántica.",
+            "nucleo_semantico": "núcleo simulado de la función", "nucleo_normativo": "núcleo simulado de la normativa",
+            "tipo_alineacion": {1.0: "EQUIVALENTE", 0.7: "SUPERPONE_CLARA", 0.4: "SUPERPONE_DEBIL"}.get(scores["semantica"], "DISTINTA")
+        },
+        "criterio_jerarquica": {
+            "score": scores["jerarquica"], "reasoning": "Evaluación simulada del nivel jerárquico.",
+            "corresponde_nivel": scores["jerarquica"] == 1.0, "hay_inversion_jerarquica": scores["jerarquica"] == 0.0
+        },
+        "score_global": score_global,
+        "clasificacion": clasificacion,
+        "razonamiento_final": f"Evaluación simulada: {clasificacion} con score {score_global:.2f}."
+    }
+
+
+def _respond_function_eval_batch(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"evaluaciones": [{"funcion_id": fid, **_respond_function_eval(rng, text)} for fid in _function_ids(text)]}
+
+
+def _respond_function_eval_compact(rng: random.Random, text: str) -> Dict[str, Any]:
+    full = _respond_function_eval(rng, text)
+    verbo, normativa = full["criterio_verbo"], full["criterio_normativa"]
+    estructura, jerarquica = full["criterio_estructura"], full["criterio_jerarquica"]
+    componentes = "".join(
+        code for code, present in (
+            ("V", estructura["tiene_verbo"]), ("C", estructura["tiene_complemento"]), ("R", estructura["tiene_resultado"])
+        ) if present
+    )
+    return {
+        "verbo": verbo["score"],
+        "verbo_codigo": "AUTORIZADO" if verbo["esta_autorizado"] else "EXCEPCION" if verbo["tiene_excepcion_normativa"] else "NO_AUTORIZADO",
+        "normativa": normativa["score"],
+        "normativa_codigo": normativa["tipo_correspondencia"],
+        "fragmento_respaldo": 1 if normativa["articulo_respaldo"] else None,
+        "estructura": estructura["score"],
+        "estructura_codigo": componentes or "NINGUNO",
+        "semantica": full["criterio_semantica"]["score"],
+        "semantica_codigo": full["criterio_semantica"]["tipo_alineacion"],
+        "jerarquica": jerarquica["score"],
+        "jerarquica_codigo": {1.0: "CORRESPONDE", 0.5: "AJUSTE"}.get(jerarquica["score"], "INVERSION")
+    }
+
+
+def _respond_function_eval_compact_batch(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {
+        "evaluaciones_compactas": [
+            {"funcion_id": fid, **_respond_function_eval_compact(rng, text)} for fid in _function_ids(text)
+        ]
+    }
+
+
+def _respond_reasoning_batch(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"razonamientos": [{
+        "funcion_id": fid,
+        "verbo": "Razonamiento simulado del verbo.",
+        "normativa": "Razonamiento simulado del respaldo normativo.",
+        "estructura": "Razonamiento simulado de la estructura.",
+        "semantica": "Razonamiento simulado de la semántica.",
+        "jerarquica": "Razonamiento simulado del nivel jerárquico.",
+        "nucleo_semantico": "núcleo simulado de la función",
+        "nucleo_normativo": "núcleo simulado de la normativa",
+        "razonamiento_final": "Razonamiento final simulado."
+    } for fid in _function_ids(text)]}
+
+
+def _respond_impact(rng: random.Random, text: str) -> Dict[str, Any]:
+    is_appropriate = rng.random() < 0.8
+    return {
+        "scope_level": rng.choice(_SCOPES),
+        "consequences_level": rng.choice(_CONSEQUENCES),
+        "complexity_level": rng.choice(_COMPLEXITIES),
+        "is_appropriate": is_appropriate,
+        "confidence": round(rng.uniform(0.6, 0.95), 2),
+        "reasoning": "Análisis de impacto simulado.",
+        "issues": [] if is_appropriate else ["Impacto simulado fuera de rango"]
+    }
+
+
+def _respond_impact_batch(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"analisis": [{"funcion_id": fid, **_respond_impact(rng, text)} for fid in _function_ids(text)]}
+
+
+def _respond_backing(rng: random.Random, text: str) -> Dict[str, Any]:
+    has_backing = rng.random() < 0.5
+    return {
+        "has_backing": has_backing,
+        "backing_text": "Fragmento simulado que respalda la función" if has_backing else None,
+        "relevance_score": round(rng.uniform(0.7, 0.95) if has_backing else rng.uniform(0.0, 0.4), 2),
+        "reasoning": "Búsqueda de respaldo simulada."
+    }
+
+
+def _respond_backing_batch(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"respaldos": [{"funcion_id": fid, **_respond_backing(rng, text)} for fid in _function_ids(text)]}
+
+
+def _respond_global_validation(rng: random.Random, text: str) -> Dict[str, Any]:
+    level = rng.choice(["ALIGNED", "ALIGNED", "PARTIALLY_ALIGNED", "NOT_ALIGNED"])
+    return {
+        "alignment_level": level,
+        "confidence": round(rng.uniform(0.6, 0.95), 2),
+        "reasoning": "Validación contextual simulada.",
+        "institutional_references_match": level != "NOT_ALIGNED",
+        "references_found_in_puesto": ["Organismo simulado"],
+        "references_found_in_normativa": ["Organismo simulado"],
+        "has_hierarchical_backing": level == "PARTIALLY_ALIGNED",
+        "hierarchical_reasoning": "Herencia jerárquica simulada." if level == "PARTIALLY_ALIGNED" else "",
+        "normativa_mismatches": [] if level != "NOT_ALIGNED" else ["Desalineación simulada"],
+        "strengths": ["Aspecto simulado bien alineado"],
+        "improvement_areas": []
+    }
+
+
+def _respond_function_detail(rng: random.Random, text: str) -> Dict[str, Any]:
+    backed = rng.random() < 0.75
+    return {
+        "normative_backed": backed,
+        "backing_type": rng.choice(["DIRECT", "DERIVED", "HIERARCHICAL"]) if backed else "NOT_BACKED",
+        "normative_source": "Fragmento simulado" if backed else "",
+        "appropriate_for_level": backed,
+        "actual_alcance": rng.randint(1, 10),
+        "severity": "MINOR" if backed else rng.choice(["MODERATE", "CRITICAL"]),
+        "suggested_alternative": "" if backed else rng.choice(_VERBS),
+        "reasoning": "Validación detallada simulada.",
+        "confidence": round(rng.uniform(0.6, 0.95), 2)
+    }
+
+
+def _respond_quality(rng: random.Random, text: str) -> Dict[str, Any]:
+    has_duplicates = rng.random() < 0.2
+    return {
+        "duplicacion": {
+            "tiene_duplicados": has_duplicates,
+            "total_duplicados": int(has_duplicates),
+            "pares_duplicados": [{
+                "funcion_1_id": 1, "funcion_2_id": 2, "similitud_porcentaje": 85,
+                "descripcion": "Duplicación simulada", "sugerencia": "Fusionar funciones"
+            }] if has_duplicates else []
+        },
+        "malformacion": {"tiene_malformadas": False, "total_malformadas": 0, "funciones_problematicas": []},
+        "marco_legal": {"tiene_problemas": False, "total_problemas": 0, "problemas": []},
+        "objetivo_general": {"es_adecuado": True, "calificacion": round(rng.uniform(0.7, 1.0), 2), "problemas": []}
+    }
+
+
+def _respond_synonyms(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"synonyms": rng.sample(_VERBS, 3), "category": rng.choice(["estratégico", "táctico", "operativo"]),
+            "reasoning": "Sinónimos simulados."}
+
+
+def _respond_ambiguity(rng: random.Random, text: str) -> Dict[str, Any]:
+    return {"is_weak": rng.random() < 0.2, "confidence": round(rng.uniform(0.5, 0.9), 2),
+            "reasoning": "Análisis de ambigüedad simulado."}
+
+
+def _respond_verb_level(rng: random.Random, text: str) -> Dict[str, Any]:
+    is_appropriate = rng.random() < 0.8
+    return {"is_appropriate": is_appropriate, "confidence": round(rng.uniform(0.6, 0.95), 2),
+            "reasoning": "Análisis de verbo por nivel simulado.",
+            "alternative_if_inappropriate": [] if is_appropriate else rng.sample(_VERBS, 2)}
+
+
+def _respond_extraction(rng: random.Random, text: str) -> Dict[str, Any]:
+    funciones = []
+    for numero in range(1, rng.randint(4, 8) + 1):
+        verbo = rng.choice(_VERBS)
+        funciones.append({
+            "numero": numero,
+            "verbo_accion": verbo,
+            "descripcion_completa": f"{verbo.capitalize()} las actividades simuladas {numero} para el cumplimiento de objetivos",
+            "que_hace": f"{verbo} actividades simuladas",
+            "para_que_lo_hace": "para el cumplimiento de objetivos",
+            "fundamento_normativo": None
+        })
+
+    return {
+        "identificacion_puesto": {
+            "codigo_puesto": f"00-000-1-M1C0{rng.randint(10, 99)}P-0000000-E-X-V",
+            "denominacion_puesto": "PUESTO SIMULADO",
+            "nivel_salarial": {"codigo": rng.choice(["M33", "N11", "O21", "P13"]), "descripcion": "Nivel simulado"},
+            "caracter_ocupacional": "Confianza",
+            "estatus": "Activo"
+        },
+        "objetivo_general": {
+            "descripcion_completa": "Coordinar las actividades simuladas a fin de cumplir los objetivos institucionales",
+            "verbo_accion": "coordinar",
+            "objeto_contribucion": "actividades simuladas",
+            "finalidad": "cumplir los objetivos institucionales"
+        },
+        "funciones": funciones
+    }
@@ -0,0 +1,358 @@
+"""
+Hedging - Requests LLM duplicados para recortar la latencia de cola
+
+Unas pocas llamadas lentas (p. ej. un analyze_function_impact atascado)
+dominan el p99 de validate_puesto. Con HedgingPolicy, si una llamada no
+terminó tras el percentil configurado de la latencia observada para su
+(modelo, familia de prompt), se emite un duplicado y gana la primera
+respuesta exitosa.
+
+- LatencyTracker: ventana de latencias recientes por (modelo, familia)
+- HedgingPolicy: decide cuándo duplicar, acota la tasa de duplicados con
+  un presupuesto (fracción de las llamadas) y contabiliza su costo: tokens
+  y costo de las respuestas descartadas (la perdedora se deja terminar en
+  modo síncrono y se cancela en modo async)
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+
+class LatencyTracker:
+    """
+    Latencias recientes por llave (modelo, familia), thread-safe.
+
+    Ejemplo:
+        >>> tracker = LatencyTracker(window=200)
+        >>> tracker.record(("openai/gpt-4o-mini", "c3_impact"), 1.8)
+        >>> tracker.percentile(("openai/gpt-4o-mini", "c3_impact"), 0.95)
+    """
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: Muestras conservadas por llave
+        """
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        self._samples: Dict[Hashable, Deque[float]] = {}
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        """Agrega una muestra de latencia (segundos)"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, key: Hashable) -> int:
+        """Muestras disponibles para la llave"""
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def percentile(self, key: Hashable, q: float) -> Optional[float]:
+        """
+        Percentil q (0-1) de las latencias de la llave.
+
+        Returns:
+            Segundos, o None si no hay muestras
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(q * (len(samples) - 1)))))
+        return samples[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Muestras y p50/p95 por llave"""
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            "/".join(str(part) for part in key) if isinstance(key, tuple) else str(key): {
+                "samples": self.count(key),
+                "p50": self.percentile(key, 0.50),
+                "p95": self.percentile(key, 0.95)
+            }
+            for key in keys
+        }
+
+
+class HedgingPolicy:
+    """
+    Política de requests duplicados (hedged requests).
+
+    La llamada primaria corre en un hilo; si no termina antes del percentil
+    configurado de la latencia observada, y el presupuesto de duplicados lo
+    permite, se lanza un duplicado y gana la primera respuesta exitosa.
+    Mientras una llave no tenga min_samples muestras, no se duplica.
+
+    Ejemplo:
+        >>> hedging = HedgingPolicy(percentile=0.95, max_hedge_rate=0.05)
+        >>> response = hedging.call(
+        ...     lambda: completion(**params), key=(model, family),
+        ...     on_discard=lambda raw: account(raw))
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        max_hedge_rate: float = 0.05,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        window: int = 200,
+        burst: float = 5.0,
+        tracker: Optional[LatencyTracker] = None
+    ):
+        """
+        Args:
+            percentile: Percentil de latencia tras el cual se duplica (0-1)
+            max_hedge_rate: Duplicados máximos como fracción de las llamadas
+            min_samples: Muestras mínimas por llave antes de duplicar
+            min_delay: Espera mínima antes de duplicar (segundos)
+            window: Muestras de latencia conservadas por llave
+            burst: Duplicados acumulables (crédito máximo del presupuesto)
+            tracker: LatencyTracker compartido (default: uno propio)
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.burst = max(1.0, burst)
+        self.tracker = tracker or LatencyTracker(window)
+
+        self._lock = threading.Lock()
+        self._credit = 1.0
+        self._stats = {
+            "calls": 0,
+            "hedges_issued": 0,
+            "hedges_won": 0,
+            "hedges_suppressed": 0,
+            "discarded_responses": 0,
+            "discarded_cancelled": 0,
+            "discarded_tokens": 0,
+            "discarded_cost": 0.0
+        }
+
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        """
+        Segundos a esperar antes de duplicar una llamada con esta llave.
+
+        Returns:
+            Espera, o None si aún no hay suficientes muestras
+        """
+        if self.tracker.count(key) < self.min_samples:
+            return None
+        return max(self.min_delay, self.tracker.percentile(key, self.percentile))
+
+    def call(
+        self,
+        primary: Callable[[], Any],
+        key: Hashable,
+        hedge: Optional[Callable[[], Any]] = None,
+        on_discard: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        Ejecuta primary() con un duplicado si tarda más de hedge_delay(key).
+
+        Args:
+            primary: Llamada primaria
+            key: Llave de latencia (modelo, familia)
+            hedge: Llamada duplicada (default: primary)
+            on_discard: Recibe la respuesta perdedora cuando termina (para
+                contabilizar su costo con account_discarded)
+
+        Returns:
+            Resultado de la primera llamada exitosa
+
+        Raises:
+            La excepción de la primaria si ambas fallan
+        """
+        self._count_call()
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return self._timed(primary, key)()
+
+        primary_future = self._spawn(self._timed(primary, key))
+        done, _ = concurrent.futures.wait([primary_future], timeout=delay)
+        if done or not self._take_credit():
+            return primary_future.result()
+
+        hedge_future = self._spawn(self._timed(hedge or primary, key))
+        pending = {primary_future, hedge_future}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is None:
+                continue
+
+            if winner is hedge_future:
+                self._count("hedges_won")
+            for loser in (done | pending) - {winner}:
+                loser.add_done_callback(lambda future: self._discard(future, on_discard))
+            return winner.result()
+
+        raise primary_future.exception()
+
+    async def acall(
+        self,
+        primary: Callable[[], Awaitable[Any]],
+        key: Hashable,
+        hedge: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        Versión asíncrona de call(): la llamada perdedora se cancela.
+
+        Args:
+            primary: Fábrica de la corrutina primaria
+            key: Llave de latencia (modelo, familia)
+            hedge: Fábrica de la corrutina duplicada (default: primary)
+
+        Returns:
+            Resultado de la primera llamada exitosa
+        """
+        self._count_call()
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return await self._atimed(primary, key)
+
+        primary_task = asyncio.ensure_future(self._atimed(primary, key))
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done or not self._take_credit():
+            return await primary_task
+
+        hedge_task = asyncio.ensure_future(self._atimed(hedge or primary, key))
+        pending = {primary_task, hedge_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), None)
+            if winner is None:
+                continue
+
+            if winner is hedge_task:
+                self._count("hedges_won")
+            for loser in pending:
+                loser.cancel()
+                self._count("discarded_cancelled")
+            return winner.result()
+
+        return primary_task.result()  # Ambas fallaron: propaga el error de la primaria
+
+    def account_discarded(self, tokens: int, cost: float = 0.0) -> None:
+        """Suma al costo de hedging una respuesta descartada"""
+        with self._lock:
+            self._stats["discarded_responses"] += 1
+            self._stats["discarded_tokens"] += tokens
+            self._stats["discarded_cost"] += cost
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de hedging.
+
+        Returns:
+            Dict con llamadas, duplicados emitidos/ganados/suprimidos por
+            presupuesto, tasa de duplicados, costo de las respuestas
+            descartadas y latencias por llave
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_rate"] = stats["hedges_issued"] / stats["calls"] if stats["calls"] else 0.0
+        stats["latency"] = self.tracker.get_stats()
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _timed(self, func: Callable[[], Any], key: Hashable) -> Callable[[], Any]:
+        """Envuelve func para registrar su latencia si termina con éxito"""
+        def run():
+            start = time.monotonic()
+            result = func()
+            self.tracker.record(key, time.monotonic() - start)
+            return result
+        return run
+
+    async def _atimed(self, func: Callable[[], Awaitable[Any]], key: Hashable) -> Any:
+        start = time.monotonic()
+        result = await func()
+        self.tracker.record(key, time.monotonic() - start)
+        return result
+
+    @staticmethod
+    def _spawn(func: Callable[[], Any]) -> concurrent.futures.Future:
+        """
+        Ejecuta func en un hilo daemon propio (sin cola: la primaria nunca
+        espera a un worker libre), conservando el contexto (p. ej. el
+        ledger de presupuesto activo).
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        context = contextvars.copy_context()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(context.run(func))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="llm-hedge", daemon=True).start()
+        return future
+
+    def _discard(self, future: concurrent.futures.Future, on_discard: Optional[Callable[[Any], None]]) -> None:
+        """Contabiliza la respuesta perdedora (si terminó con éxito)"""
+        if future.cancelled() or future.exception() is not None or on_discard is None:
+            return
+        try:
+            on_discard(future.result())
+        except Exception:
+            pass
+
+    def _take_credit(self) -> bool:
+        """Consume un duplicado del presupuesto; False si no hay crédito"""
+        with self._lock:
+            if self._credit >= 1.0:
+                self._credit -= 1.0
+                self._stats["hedges_issued"] += 1
+                return True
+            self._stats["hedges_suppressed"] += 1
+            return False
+
+    def _count_call(self) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._credit = min(self.burst, self._credit + self.max_hedge_rate)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def hedging_policy_from_env() -> Optional[HedgingPolicy]:
+    """
+    Construye la política de hedging a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_HEDGE_PERCENTILE: Percentil de latencia para duplicar, 0-1
+            (sin definir = hedging desactivado)
+        APF_LLM_HEDGE_MAX_RATE: Duplicados máximos como fracción de las llamadas (default 0.05)
+        APF_LLM_HEDGE_MIN_SAMPLES: Muestras por (modelo, familia) antes de duplicar (default 20)
+
+    Returns:
+        HedgingPolicy, o None si está desactivado
+    """
+    percentile = os.getenv("APF_LLM_HEDGE_PERCENTILE")
+    if not percentile:
+        return None
+    return HedgingPolicy(
+        percentile=float(percentile),
+        max_hedge_rate=float(os.getenv("APF_LLM_HEDGE_MAX_RATE", "0.05")),
+        min_samples=int(os.getenv("APF_LLM_HEDGE_MIN_SAMPLES", "20"))
+    )
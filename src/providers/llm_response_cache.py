@@ -0,0 +1,369 @@
+"""
+LLM Response Cache - Cache persistente de respuestas LLM direccionado por contenido
+
+Cache en disco (SQLite en modo WAL) de respuestas de LLM, indexado por el hash
+de (modelo, temperature, max_tokens, system_message + prompt). Re-ejecutar
+los mismos exports de Sidegor contra el mismo reglamento sirve las
+respuestas ya pagadas desde disco.
+
+Características:
+- Implementa ICacheProvider (get, set, delete, exists, clear, get_stats)
+- Seguro entre hilos y entre procesos (bloqueos de SQLite + WAL)
+- Evicción LRU acotada por tamaño total
+- Expiración por TTL
+- Solo cachea requests con temperature <= max_cacheable_temperature
+- Estadísticas de hits, misses y bytes ahorrados
+
+Se habilita con la variable de entorno APF_LLM_CACHE_DIR (ver .env.example)
+o explícitamente vía configure_provider_pool(response_cache=LLMResponseCache(...)).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from ..interfaces.llm_provider import LLMRequest, LLMResponse
+
+
+CACHE_FILENAME = "llm_responses.sqlite3"
+
+
+def build_request_key(request: LLMRequest, model: str) -> str:
+    """
+    Construye la llave de cache de un request.
+
+    Args:
+        request: Request LLM
+        model: Modelo resuelto (request.model o default del provider)
+
+    Returns:
+        Hash SHA-256 hexadecimal de los parámetros que determinan la respuesta
+    """
+    fields = [
+        model,
+        round(float(request.temperature), 4),
+        request.max_tokens,
+        request.system_message or "",
+        request.prompt,
+        request.stop_sequences or []
+    ]
+    # Solo si hay schema, para no invalidar las llaves existentes
+    if request.response_schema:
+        fields.append(request.response_schema)
+
+    payload = json.dumps(fields, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache persistente de respuestas LLM (SQLite).
+
+    Ejemplo:
+        >>> cache = LLMResponseCache("./data/cache/llm")
+        >>> key = cache.build_key(request, "openai/gpt-4o")
+        >>> cache.get(key) or cache.set(key, provider.complete(request))
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_size_mb: float = 256.0,
+        ttl_hours: Optional[float] = 24 * 30,
+        max_cacheable_temperature: float = 0.2
+    ):
+        """
+        Inicializa el cache.
+
+        Args:
+            cache_dir: Directorio donde vive la base SQLite
+            max_size_mb: Tamaño máximo de contenido cacheado (evicción LRU)
+            ttl_hours: Tiempo de vida de cada entrada (None = sin expiración)
+            max_cacheable_temperature: Solo se cachean requests con
+                temperature <= este valor
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / CACHE_FILENAME
+
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+        self.max_cacheable_temperature = max_cacheable_temperature
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expired": 0,
+            "bytes_saved": 0
+        }
+
+        self._init_db()
+
+    # ------------------------------------------------------------------
+    # API de alto nivel para providers
+    # ------------------------------------------------------------------
+
+    def build_key(self, request: LLMRequest, model: str) -> str:
+        """Construye la llave de cache de un request (ver build_request_key)"""
+        return build_request_key(request, model)
+
+    def is_cacheable(self, request: LLMRequest) -> bool:
+        """
+        Indica si la respuesta de un request puede servirse desde cache.
+
+        Solo requests casi deterministas (temperature baja) son cacheables.
+        """
+        return request.temperature <= self.max_cacheable_temperature
+
+    # ------------------------------------------------------------------
+    # ICacheProvider
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        Obtiene una respuesta del cache.
+
+        Args:
+            key: Llave (build_key)
+
+        Returns:
+            LLMResponse cacheada o None si no existe o expiró
+        """
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT model, content, tokens_used, finish_reason, size_bytes, expires_at "
+            "FROM llm_responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None:
+            self._record("misses")
+            return None
+
+        model, content, tokens_used, finish_reason, size_bytes, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            with conn:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._record("expired")
+            self._record("misses")
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE llm_responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (now, key)
+            )
+
+        self._record("hits")
+        self._record("bytes_saved", size_bytes)
+
+        return LLMResponse(
+            content=content,
+            model=model,
+            tokens_used=json.loads(tokens_used),
+            finish_reason=finish_reason,
+            metadata={"cache_hit": True, "duration": 0.0, "attempt": 0}
+        )
+
+    def set(self, key: str, value: LLMResponse, ttl: Optional[timedelta] = None) -> None:
+        """
+        Almacena una respuesta en el cache.
+
+        Args:
+            key: Llave (build_key)
+            value: Respuesta a almacenar
+            ttl: Tiempo de vida (None = ttl por defecto del cache)
+        """
+        now = time.time()
+        ttl_seconds = ttl.total_seconds() if ttl is not None else self.ttl_seconds
+        expires_at = now + ttl_seconds if ttl_seconds else None
+
+        content = value.content or ""
+        size_bytes = len(content.encode("utf-8"))
+
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, model, content, tokens_used, finish_reason, size_bytes, "
+                " created_at, last_access, expires_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    key, value.model, content, json.dumps(value.tokens_used or {}),
+                    value.finish_reason, size_bytes, now, now, expires_at
+                )
+            )
+
+        self._record("sets")
+        self._evict_if_needed()
+
+    def delete(self, key: str) -> bool:
+        """Elimina una entrada. Retorna True si existía."""
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def exists(self, key: str) -> bool:
+        """Verifica si existe una entrada vigente (no actualiza LRU ni stats)"""
+        row = self._get_connection().execute(
+            "SELECT 1 FROM llm_responses WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self) -> None:
+        """Elimina todas las entradas del cache"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM llm_responses")
+
+    def purge_expired(self) -> int:
+        """
+        Elimina las entradas expiradas.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+        self._record("expired", cursor.rowcount)
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del cache.
+
+        Los contadores (hits, misses, bytes_saved...) son de este proceso;
+        entries y size_bytes reflejan la base compartida.
+
+        Returns:
+            Dict con estadísticas
+        """
+        entries, size_bytes = self._get_connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+        ).fetchone()
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "max_size_bytes": self.max_size_bytes,
+            "db_path": str(self.db_path)
+        })
+        return stats
+
+    def close(self) -> None:
+        """Cierra la conexión SQLite del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Conexión SQLite por hilo (las conexiones no se comparten entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        """Crea el esquema si no existe"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " content TEXT NOT NULL,"
+                " tokens_used TEXT,"
+                " finish_reason TEXT,"
+                " size_bytes INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " expires_at REAL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access "
+                "ON llm_responses (last_access)"
+            )
+
+    def _evict_if_needed(self) -> None:
+        """Evicción LRU hasta quedar por debajo del tamaño máximo"""
+        conn = self._get_connection()
+        with conn:
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+            ).fetchone()[0]
+            if total <= self.max_size_bytes:
+                return
+
+            evicted = 0
+            rows = conn.execute(
+                "SELECT key, size_bytes FROM llm_responses ORDER BY last_access ASC"
+            ).fetchall()
+            for key, size_bytes in rows:
+                if total <= self.max_size_bytes:
+                    break
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                total -= size_bytes
+                evicted += 1
+
+        self._record("evictions", evicted)
+
+    def _record(self, name: str, amount: int = 1) -> None:
+        """Incrementa un contador de estadísticas"""
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+def response_cache_from_env() -> Optional[LLMResponseCache]:
+    """
+    Construye el cache a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_CACHE_DIR: Directorio del cache (si no existe, cache deshabilitado)
+        APF_LLM_CACHE_MAX_MB: Tamaño máximo en MB (default 256)
+        APF_LLM_CACHE_TTL_HOURS: TTL en horas (default 720; 0 = sin expiración)
+        APF_LLM_CACHE_MAX_TEMPERATURE: Temperatura máxima cacheable (default 0.2)
+
+    Returns:
+        LLMResponseCache o None si no está configurado
+    """
+    cache_dir = os.getenv("APF_LLM_CACHE_DIR")
+    if not cache_dir:
+        return None
+
+    return LLMResponseCache(
+        cache_dir,
+        max_size_mb=float(os.getenv("APF_LLM_CACHE_MAX_MB", "256")),
+        ttl_hours=float(os.getenv("APF_LLM_CACHE_TTL_HOURS", "720")) or None,
+        max_cacheable_temperature=float(os.getenv("APF_LLM_CACHE_MAX_TEMPERATURE", "0.2"))
+    )
@@ -0,0 +1,621 @@
+"""
+LLM Router - Reparto de requests entre varios endpoints LLM con failover
+
+Un solo endpoint (una API key, un deployment) limita el throughput del
+proceso a su cuota. LLMRouter implementa ILLMProvider sobre varios
+endpoints (keys, deployments o servidores locales compatibles con OpenAI):
+
+- Balanceo ponderado (smooth weighted round robin) o por menor número de
+  requests en vuelo (least outstanding, normalizado por peso)
+- Health checks pasivos: un CircuitBreaker por endpoint (fallas de
+  conexión, 5xx y timeouts lo abren); un 429 pone al endpoint en pausa por
+  su Retry-After y una API key rechazada lo marca como no sano
+- Health checks activos opcionales (check_health / start_health_checks):
+  por defecto GET {api_base}/models
+- Failover automático: el request fallido se reenvía al siguiente endpoint
+  elegible; agotados todos, se reintenta con el backoff de la RetryPolicy
+
+Se habilita con APF_LLM_ENDPOINTS (ver llm_router_factory_from_env y
+.env.example) o construyendo el router con providers propios.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..interfaces.llm_provider import (
+    ILLMProvider,
+    LLMRequest,
+    LLMResponse,
+    LLMProviderError,
+    LLMProviderAuthError,
+    LLMProviderBadRequestError,
+    LLMProviderBudgetError,
+    LLMProviderCircuitOpenError,
+    LLMProviderDeferredError,
+    LLMProviderJSONError,
+    LLMProviderRateLimitError
+)
+from .retry_policy import CircuitBreaker, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+# Errores del request (no del endpoint): otro endpoint daría el mismo resultado
+NO_FAILOVER_ERRORS = (
+    LLMProviderBadRequestError,
+    LLMProviderBudgetError,
+    LLMProviderJSONError,
+    LLMProviderDeferredError
+)
+
+ROUTING_STRATEGIES = ("weighted", "least_outstanding")
+
+# Pausa de un endpoint tras un 429 sin Retry-After (segundos)
+DEFAULT_RATE_LIMIT_COOLDOWN = 1.0
+
+
+@dataclass
+class RouterEndpoint:
+    """
+    Endpoint del router.
+
+    model reemplaza request.model (deployment o modelo del servidor local);
+    health_check es la sonda activa (True = sano).
+    """
+    name: str
+    provider: ILLMProvider
+    weight: float = 1.0
+    model: Optional[str] = None
+    health_check: Optional[Callable[[], bool]] = None
+
+
+@dataclass
+class _EndpointState:
+    """Estado de ruteo de un endpoint (protegido por el lock del router)"""
+    endpoint: RouterEndpoint
+    breaker: CircuitBreaker
+    outstanding: int = 0
+    current_weight: float = 0.0
+    healthy: bool = True
+    unhealthy_reason: Optional[str] = None
+    cooldown_until: float = 0.0
+    stats: Dict[str, Any] = field(default_factory=lambda: {
+        "calls": 0,
+        "successes": 0,
+        "failures": 0,
+        "rate_limited": 0,
+        "latency_total": 0.0
+    })
+
+
+class LLMRouter:
+    """
+    Provider que reparte requests entre varios endpoints con failover.
+
+    Ejemplo:
+        >>> router = LLMRouter([
+        ...     RouterEndpoint("principal", OpenAIProvider(api_key=key_1), weight=3),
+        ...     RouterEndpoint("secundaria", OpenAIProvider(api_key=key_2)),
+        ...     RouterEndpoint("local", OpenAIProvider(api_base="http://localhost:8000/v1"),
+        ...                    model="openai/llama-3.1-8b")
+        ... ], strategy="least_outstanding")
+        >>> response = router.complete(request)
+    """
+
+    def __init__(
+        self,
+        endpoints: List[RouterEndpoint],
+        strategy: str = "weighted",
+        retry_policy: Optional[RetryPolicy] = None,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 30.0
+    ):
+        """
+        Args:
+            endpoints: Endpoints a balancear (al menos uno)
+            strategy: "weighted" o "least_outstanding"
+            retry_policy: Backoff y deadline al agotar todos los endpoints
+                (default: RetryPolicy())
+            failure_threshold: Fallas consecutivas que sacan a un endpoint de la rotación
+            recovery_timeout: Segundos fuera de rotación antes de una llamada de prueba
+        """
+        if not endpoints:
+            raise ValueError("LLMRouter requiere al menos un endpoint")
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Estrategia de ruteo desconocida: {strategy} (opciones: {ROUTING_STRATEGIES})")
+
+        self.strategy = strategy
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._states = [
+            _EndpointState(
+                endpoint=endpoint,
+                breaker=CircuitBreaker(failure_threshold, recovery_timeout, name=endpoint.name)
+            )
+            for endpoint in endpoints
+        ]
+        self._lock = threading.Lock()
+        self._health_stop: Optional[threading.Event] = None
+        self._stats = {"calls": 0, "failovers": 0, "exhausted": 0, "no_endpoint": 0}
+
+    # ------------------------------------------------------------------
+    # ILLMProvider
+    # ------------------------------------------------------------------
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        """Completion en el endpoint elegido, con failover"""
+        return self._route(request, lambda provider, routed: provider.complete(routed))
+
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """Versión asíncrona de complete()"""
+        return await self._aroute(request, lambda provider, routed: provider.acomplete(routed))
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return self.complete_json_with_response(request)[0]
+
+    def complete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], Optional[LLMResponse]]:
+        """complete_json del endpoint elegido (el parsing y su rescate son del endpoint)"""
+        return self._route(request, _complete_json_with_response)
+
+    async def acomplete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return (await self.acomplete_json_with_response(request))[0]
+
+    async def acomplete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], Optional[LLMResponse]]:
+        return await self._aroute(request, _acomplete_json_with_response)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "Router",
+            "strategy": self.strategy,
+            "endpoints": [state.endpoint.name for state in self._states],
+            "stats": self.get_stats()
+        }
+
+    def is_available(self) -> bool:
+        """True si algún endpoint está sano y con el circuito no abierto"""
+        with self._lock:
+            return any(
+                state.healthy and state.breaker.state != CircuitBreaker.OPEN
+                for state in self._states
+            )
+
+    def close(self) -> None:
+        """Detiene los health checks y cierra los providers de los endpoints"""
+        self.stop_health_checks()
+        for state in self._states:
+            close = getattr(state.endpoint.provider, "close", None)
+            if callable(close):
+                close()
+
+    async def aclose(self) -> None:
+        """Como close(), esperando el cierre de los clientes asíncronos de los endpoints"""
+        self.stop_health_checks()
+        for state in self._states:
+            aclose = getattr(state.endpoint.provider, "aclose", None)
+            close = getattr(state.endpoint.provider, "close", None)
+            if callable(aclose):
+                await aclose()
+            elif callable(close):
+                close()
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        Ejecuta la sonda activa de cada endpoint que la tenga.
+
+        Un endpoint que pasa la sonda vuelve a la rotación (y su circuito se
+        cierra); uno que falla sale de ella hasta la siguiente sonda exitosa.
+
+        Returns:
+            Dict nombre → sano
+        """
+        results = {}
+        for state in self._states:
+            probe = state.endpoint.health_check
+            if probe is None:
+                continue
+            try:
+                healthy = bool(probe())
+            except Exception:
+                healthy = False
+
+            with self._lock:
+                was_healthy = state.healthy
+                state.healthy = healthy
+                state.unhealthy_reason = None if healthy else "health check fallido"
+            if healthy and not was_healthy:
+                state.breaker.reset()
+                logger.info(f"[LLMRouter] Endpoint '{state.endpoint.name}' de vuelta en rotación")
+            elif was_healthy and not healthy:
+                logger.warning(f"[LLMRouter] Endpoint '{state.endpoint.name}' fuera de rotación (health check)")
+            results[state.endpoint.name] = healthy
+        return results
+
+    def start_health_checks(self, interval: float = 30.0) -> None:
+        """Ejecuta check_health() cada interval segundos en un hilo daemon"""
+        if self._health_stop is not None:
+            return
+        stop = self._health_stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.check_health()
+
+        threading.Thread(target=loop, name="llm-router-health", daemon=True).start()
+
+    def stop_health_checks(self) -> None:
+        """Detiene el hilo de health checks (si existe)"""
+        if self._health_stop is not None:
+            self._health_stop.set()
+            self._health_stop = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del router.
+
+        Returns:
+            Dict con llamadas, failovers, llamadas sin endpoint disponible o
+            con todos los endpoints agotados, y por endpoint: llamadas,
+            éxitos, fallas, 429, en vuelo, latencia media, salud y estado
+            del circuito
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            endpoints = {}
+            for state in self._states:
+                endpoint_stats = dict(state.stats)
+                latency_total = endpoint_stats.pop("latency_total")
+                endpoints[state.endpoint.name] = {
+                    **endpoint_stats,
+                    "weight": state.endpoint.weight,
+                    "outstanding": state.outstanding,
+                    "avg_latency": latency_total / endpoint_stats["successes"] if endpoint_stats["successes"] else 0.0,
+                    "healthy": state.healthy,
+                    "unhealthy_reason": state.unhealthy_reason,
+                    "cooling_down": state.cooldown_until > time.monotonic()
+                }
+        for state in self._states:
+            endpoints[state.endpoint.name]["circuit"] = state.breaker.state
+        stats["strategy"] = self.strategy
+        stats["endpoints"] = endpoints
+        return stats
+
+    # ------------------------------------------------------------------
+    # Ruteo
+    # ------------------------------------------------------------------
+
+    def _route(self, request: LLMRequest, call: Callable[[Any, LLMRequest], Any]) -> Any:
+        started_at = time.monotonic()
+        attempt = 0
+        tried: set = set()
+        last_error: Optional[LLMProviderError] = None
+        self._count("calls")
+
+        while True:
+            state = self._acquire(tried)
+            if state is None:
+                delay = self._next_round_delay(attempt, last_error, started_at)
+                time.sleep(delay)
+                attempt += 1
+                tried.clear()
+                continue
+
+            tried.add(state.endpoint.name)
+            start = time.monotonic()
+            try:
+                result = call(state.endpoint.provider, self._routed_request(state, request))
+            except NO_FAILOVER_ERRORS:
+                self._release(state, None, start)
+                raise
+            except LLMProviderError as e:
+                self._release(state, e, start)
+                last_error = e
+                self._count("failovers")
+                continue
+            self._release(state, None, start)
+            return result
+
+    async def _aroute(self, request: LLMRequest, call: Callable[[Any, LLMRequest], Any]) -> Any:
+        started_at = time.monotonic()
+        attempt = 0
+        tried: set = set()
+        last_error: Optional[LLMProviderError] = None
+        self._count("calls")
+
+        while True:
+            state = self._acquire(tried)
+            if state is None:
+                delay = self._next_round_delay(attempt, last_error, started_at)
+                await asyncio.sleep(delay)
+                attempt += 1
+                tried.clear()
+                continue
+
+            tried.add(state.endpoint.name)
+            start = time.monotonic()
+            try:
+                result = await call(state.endpoint.provider, self._routed_request(state, request))
+            except NO_FAILOVER_ERRORS:
+                self._release(state, None, start)
+                raise
+            except LLMProviderError as e:
+                self._release(state, e, start)
+                last_error = e
+                self._count("failovers")
+                continue
+            self._release(state, None, start)
+            return result
+
+    def _next_round_delay(self, attempt: int, last_error: Optional[LLMProviderError], started_at: float) -> float:
+        """
+        Espera antes de otra ronda por los endpoints.
+
+        Raises:
+            El último error si la RetryPolicy no admite otra ronda, o
+            LLMProviderCircuitOpenError si no hubo ningún endpoint elegible
+        """
+        if last_error is None:
+            self._count("no_endpoint")
+            raise LLMProviderCircuitOpenError(
+                "Ningún endpoint LLM disponible (circuitos abiertos, pausa por 429 o health check fallido)",
+                retry_after=self._soonest_available()
+            )
+
+        delay = self.retry_policy.next_delay(attempt, last_error, started_at)
+        if delay is None:
+            self._count("exhausted")
+            raise last_error
+        return delay
+
+    def _acquire(self, tried: set) -> Optional[_EndpointState]:
+        """Elige un endpoint elegible no intentado y lo marca en vuelo"""
+        excluded = set(tried)
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                candidates = [
+                    state for state in self._states
+                    if state.endpoint.name not in excluded and state.healthy and state.cooldown_until <= now
+                ]
+                state = self._pick(candidates)
+                if state is None:
+                    return None
+
+            try:
+                state.breaker.before_call()
+            except LLMProviderCircuitOpenError:
+                excluded.add(state.endpoint.name)
+                continue
+
+            with self._lock:
+                state.outstanding += 1
+                state.stats["calls"] += 1
+            return state
+
+    def _pick(self, candidates: List[_EndpointState]) -> Optional[_EndpointState]:
+        """Aplica la estrategia de balanceo (bajo lock)"""
+        if not candidates:
+            return None
+
+        if self.strategy == "least_outstanding":
+            return min(candidates, key=lambda state: (
+                (state.outstanding + 1) / max(state.endpoint.weight, 1e-9), state.stats["calls"]
+            ))
+
+        # Smooth weighted round robin: reparto proporcional al peso sin ráfagas
+        total = 0.0
+        best = None
+        for state in candidates:
+            state.current_weight += state.endpoint.weight
+            total += state.endpoint.weight
+            if best is None or state.current_weight > best.current_weight:
+                best = state
+        best.current_weight -= total
+        return best
+
+    def _release(self, state: _EndpointState, error: Optional[LLMProviderError], start: float) -> None:
+        """Registra el resultado del intento en el endpoint"""
+        state.breaker.record(error)
+        name = state.endpoint.name
+
+        with self._lock:
+            state.outstanding -= 1
+            if error is None:
+                state.stats["successes"] += 1
+                state.stats["latency_total"] += time.monotonic() - start
+                return
+
+            state.stats["failures"] += 1
+            if isinstance(error, LLMProviderRateLimitError):
+                state.stats["rate_limited"] += 1
+                state.cooldown_until = time.monotonic() + (error.retry_after or DEFAULT_RATE_LIMIT_COOLDOWN)
+            elif isinstance(error, LLMProviderAuthError):
+                state.healthy = False
+                state.unhealthy_reason = f"autenticación rechazada: {error}"
+
+        if isinstance(error, LLMProviderAuthError):
+            logger.error(f"[LLMRouter] Endpoint '{name}' fuera de rotación: {error}")
+        else:
+            logger.warning(f"[LLMRouter] Falla en endpoint '{name}', failover: {error}")
+
+    def _soonest_available(self) -> Optional[float]:
+        """Segundos hasta que vence la pausa por 429 más próxima (None si no hay)"""
+        now = time.monotonic()
+        with self._lock:
+            waits = [state.cooldown_until - now for state in self._states if state.cooldown_until > now]
+        return min(waits) if waits else None
+
+    @staticmethod
+    def _routed_request(state: _EndpointState, request: LLMRequest) -> LLMRequest:
+        """Request con el modelo del endpoint (si lo define)"""
+        if state.endpoint.model is None:
+            return request
+        return replace(request, model=state.endpoint.model)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _complete_json_with_response(provider: Any, request: LLMRequest) -> Tuple[Dict[str, Any], Optional[LLMResponse]]:
+    if hasattr(provider, "complete_json_with_response"):
+        return provider.complete_json_with_response(request)
+    return provider.complete_json(request), None
+
+
+async def _acomplete_json_with_response(provider: Any, request: LLMRequest) -> Tuple[Dict[str, Any], Optional[LLMResponse]]:
+    if hasattr(provider, "acomplete_json_with_response"):
+        return await provider.acomplete_json_with_response(request)
+    return await provider.acomplete_json(request), None
+
+
+def http_health_check(api_base: Optional[str], api_key: Optional[str] = None, timeout: float = 5.0) -> Callable[[], bool]:
+    """
+    Sonda activa para endpoints compatibles con OpenAI: GET {api_base}/models.
+
+    Args:
+        api_base: URL base (None = API de OpenAI)
+        api_key: API key para el header Authorization
+        timeout: Timeout de la sonda (segundos)
+
+    Returns:
+        Callable que retorna True si el endpoint responde 2xx
+    """
+    url = (api_base or "https://api.openai.com/v1").rstrip("/") + "/models"
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except (urllib.error.URLError, OSError):
+            return False
+
+    return probe
+
+
+def llm_router_factory_from_env() -> Optional[Callable[..., ILLMProvider]]:
+    """
+    Construye la factory de providers del registro a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_ENDPOINTS: Lista JSON de endpoints; cada uno con name y,
+            opcionales, api_base, api_key (o api_key_env: variable con la
+            key), model, weight, rpm y tpm (cuota propia del endpoint).
+            Ej: [{"name": "key-a", "api_key_env": "OPENAI_API_KEY_A", "weight": 2},
+                 {"name": "local", "api_base": "http://localhost:8000/v1",
+                  "api_key": "sk-local", "model": "openai/llama-3.1-8b"}]
+            (sin definir = un solo endpoint, sin router)
+        APF_LLM_ROUTING: weighted | least_outstanding (default weighted)
+        APF_LLM_HEALTH_INTERVAL: Segundos entre health checks activos
+            (default 0 = solo health checks pasivos)
+
+    Cada endpoint tiene su propio rate limiter (su cuota) y el router un
+    circuit breaker por endpoint; el resto de las opciones del registro
+    (cache, single-flight, usage_meter...) se comparten. Los providers de
+    los endpoints no reintentan: el router hace failover y aplica la
+    RetryPolicy del registro al agotar los endpoints.
+
+    Returns:
+        Factory para ProviderRegistry, o None si no hay endpoints configurados
+    """
+    raw = os.getenv("APF_LLM_ENDPOINTS")
+    if not raw:
+        return None
+
+    configs = json.loads(raw)
+    strategy = os.getenv("APF_LLM_ROUTING", "weighted")
+    health_interval = float(os.getenv("APF_LLM_HEALTH_INTERVAL", "0"))
+    return RouterFactory(configs, strategy=strategy, health_interval=health_interval)
+
+
+class RouterFactory:
+    """
+    Factory de LLMRouter para ProviderRegistry (ver llm_router_factory_from_env).
+
+    Los rate limiters de cada endpoint se crean una vez y se comparten entre
+    los routers del registro (uno por api_key/timeout), porque la cuota es
+    del endpoint y no del modelo.
+    """
+
+    def __init__(self, endpoint_configs: List[Dict[str, Any]], strategy: str = "weighted", health_interval: float = 0.0):
+        """
+        Args:
+            endpoint_configs: Configuración de cada endpoint (ver llm_router_factory_from_env)
+            strategy: Estrategia de balanceo
+            health_interval: Segundos entre health checks activos (0 = desactivados)
+        """
+        from .rate_limiter import AdaptiveRateLimiter
+
+        self.endpoint_configs = [dict(config) for config in endpoint_configs]
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self._rate_limiters = {
+            config["name"]: AdaptiveRateLimiter(
+                requests_per_minute=config.get("rpm"),
+                tokens_per_minute=config.get("tpm")
+            )
+            for config in self.endpoint_configs
+        }
+        self._lock = threading.Lock()
+        self._routers: Dict[Tuple[Optional[str], int], LLMRouter] = {}
+
+    def __call__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: str = "openai/gpt-4o",
+        timeout: int = 60,
+        api_base: Optional[str] = None,
+        **options: Any
+    ) -> LLMRouter:
+        with self._lock:
+            router = self._routers.get((api_key, timeout))
+            if router is None:
+                router = self._routers[(api_key, timeout)] = self._build(api_key, default_model, timeout, api_base, options)
+        if self.health_interval > 0:
+            router.start_health_checks(self.health_interval)  # idempotente; se detiene en close()
+        return router
+
+    def _build(
+        self,
+        api_key: Optional[str],
+        default_model: str,
+        timeout: int,
+        api_base: Optional[str],
+        options: Dict[str, Any]
+    ) -> LLMRouter:
+        from .openai_provider import OpenAIProvider
+
+        shared = {name: value for name, value in options.items() if name not in ("rate_limiter", "circuit_breaker", "retry_policy")}
+        endpoints = []
+        for config in self.endpoint_configs:
+            endpoint_key = config.get("api_key") or (os.getenv(config["api_key_env"]) if config.get("api_key_env") else None) or api_key
+            endpoint_base = config.get("api_base") or api_base
+            provider = OpenAIProvider(
+                api_key=endpoint_key,
+                default_model=config.get("model") or default_model,
+                timeout=timeout,
+                api_base=endpoint_base,
+                rate_limiter=self._rate_limiters[config["name"]],
+                retry_policy=RetryPolicy(max_attempts=1),
+                **shared
+            )
+            endpoints.append(RouterEndpoint(
+                name=config["name"],
+                provider=provider,
+                weight=float(config.get("weight", 1.0)),
+                model=config.get("model"),
+                health_check=http_health_check(endpoint_base, endpoint_key)
+            ))
+
+        return LLMRouter(endpoints, strategy=self.strategy, retry_policy=options.get("retry_policy"))
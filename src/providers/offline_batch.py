@@ -0,0 +1,668 @@
+"""
+Offline Batch - Ejecución de validate_batch vía batch jobs del proveedor
+
+En modo offline los validadores no llaman al LLM en línea: cada request se
+registra en un JSONL (formato de la Batch API de OpenAI), se envía como
+batch job (más barato y sin límites de cuota por minuto), se espera a que
+termine y la corrida se reanuda sirviendo las respuestas obtenidas.
+
+Hay llamadas que dependen de otras (el respaldo normativo del Criterio 3
+solo se pide para funciones con discrepancia en el análisis de impacto; el
+razonamiento del modo compacto, solo para funciones OBSERVACION/RECHAZADO),
+por lo que la ejecución es por fases: cada fase re-ejecuta la corrida,
+sirve las respuestas conocidas y difiere las nuevas. La corrida converge
+cuando una fase no difiere ningún request; sus resultados son los
+definitivos.
+
+- BatchCollectingProvider: ILLMProvider que sirve respuestas conocidas y
+  difiere (LLMProviderDeferredError) las desconocidas
+- OpenAIBatchBackend: Batch API de OpenAI (SDK openai; api_base permite
+  apuntar a FakeOpenAIServer)
+- LocalBatchBackend: stand-in en proceso sobre FakeBatchService (pruebas)
+- OfflineBatchRunner: ciclo de fases recolectar → enviar → esperar → reanudar
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+from ..interfaces.batch_job_backend import BATCH_TERMINAL_STATUSES, IBatchJobBackend
+from ..interfaces.llm_provider import (
+    LLMRequest,
+    LLMResponse,
+    LLMProviderError,
+    LLMProviderDeferredError,
+    LLMProviderJSONError
+)
+from ..utils.json_scanner import parse_json_response
+from .llm_response_cache import build_request_key
+from .usage_meter import current_ledger
+
+try:
+    from openai import OpenAI
+    OPENAI_SDK_AVAILABLE = True
+except ImportError:
+    OPENAI_SDK_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Familias que no se recolectan si alguna de las familias asociadas se
+# difirió antes en el mismo flujo (puesto), porque su request depende de esa
+# respuesta y en la fase siguiente será otro (o no ocurrirá):
+# - fallback individual de una variante por lotes diferida
+# - respaldo normativo (C3): depende de las discrepancias del análisis de impacto
+# - razonamiento bajo demanda (C1 compacto): depende de la clasificación
+_C1_EVALUATION = ("c1_function_eval_batch", "c1_function_eval", "c1_function_eval_compact_batch", "c1_function_eval_compact")
+_C3_IMPACT = ("c3_impact_batch", "c3_impact")
+
+DEFERRAL_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "c1_function_eval": ("c1_function_eval_batch",),
+    "c1_function_eval_compact": ("c1_function_eval_compact_batch",),
+    "c1_reasoning_batch": _C1_EVALUATION,
+    "c3_impact": ("c3_impact_batch",),
+    "c3_backing_batch": _C3_IMPACT,
+    "c3_backing": _C3_IMPACT + ("c3_backing_batch",),
+}
+
+
+class BatchCollectingProvider:
+    """
+    Provider que sirve respuestas de batch jobs y difiere las desconocidas.
+
+    Los requests que dependen de otro diferido en el mismo flujo (ver
+    DEFERRAL_DEPENDENCIES; el flujo es el ledger activo, uno por puesto)
+    también se difieren, pero no se recolectan.
+
+    Cada request se identifica por build_request_key (la misma llave del
+    cache de respuestas), de modo que la re-ejecución de una fase encuentra
+    la respuesta del request idéntico de la fase anterior. Los tokens de
+    cada respuesta se reportan (y se registran en usage_meter) solo la
+    primera vez que se sirve, aunque las fases siguientes la vuelvan a servir.
+
+    Ejemplo:
+        >>> collector = BatchCollectingProvider()
+        >>> collector.begin_phase()
+        >>> run_validators()  # los requests nuevos quedan en collector.pending_lines()
+        >>> collector.load_results("salida.jsonl")
+    """
+
+    def __init__(
+        self,
+        default_model: str = "openai/gpt-4o",
+        structured_output: str = "auto",
+        usage_meter: Optional[Any] = None,
+        max_request_failures: int = 2,
+        **_provider_options: Any
+    ):
+        """
+        Args:
+            default_model: Modelo de los requests sin model
+            structured_output: "auto"/"json_schema" (response_format con el
+                schema), "json_object" o "off"
+            usage_meter: UsageMeter donde registrar las respuestas servidas
+            max_request_failures: Veces que un request puede fallar en el
+                batch job antes de servir el error (antes se re-difiere)
+            **_provider_options: Opciones del registro no aplicables (ignoradas)
+        """
+        self.default_model = default_model
+        self.structured_output = structured_output
+        self.usage_meter = usage_meter
+        self.max_request_failures = max(1, max_request_failures)
+
+        self._lock = threading.Lock()
+        self._responses: Dict[str, LLMResponse] = {}
+        self._failures: Dict[str, Tuple[int, str]] = {}
+        self._billed: set = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_families: Counter = Counter()
+        self._deferred_flows: Dict[int, Tuple[Any, set]] = {}
+        self._stats = {
+            "served": 0,
+            "deferred": 0,
+            "suppressed_dependents": 0,
+            "failed_served": 0,
+            "responses_loaded": 0,
+            "failures_loaded": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Fases
+    # ------------------------------------------------------------------
+
+    def begin_phase(self) -> None:
+        """Vacía los requests diferidos de la fase anterior"""
+        with self._lock:
+            self._pending.clear()
+            self._pending_families.clear()
+            self._deferred_flows.clear()
+
+    def pending_lines(self) -> List[Dict[str, Any]]:
+        """Líneas JSONL (custom_id, method, url, body) diferidas en la fase"""
+        with self._lock:
+            return list(self._pending.values())
+
+    def pending_families(self) -> Dict[str, int]:
+        """Requests diferidos en la fase por familia de prompt"""
+        with self._lock:
+            return dict(self._pending_families)
+
+    def load_results(self, path: Union[str, Path]) -> Dict[str, int]:
+        """
+        Incorpora las respuestas de un batch job (JSONL de salida y errores).
+
+        Args:
+            path: Archivo JSONL descargado del backend
+
+        Returns:
+            Dict con responses y failures incorporadas
+        """
+        loaded = {"responses": 0, "failures": 0}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                key = item.get("custom_id")
+                if not key:
+                    continue
+
+                response, error = self._parse_result(item)
+                with self._lock:
+                    if response is not None:
+                        self._responses[key] = response
+                        self._failures.pop(key, None)
+                        loaded["responses"] += 1
+                    else:
+                        count = self._failures.get(key, (0, ""))[0]
+                        self._failures[key] = (count + 1, error)
+                        loaded["failures"] += 1
+
+        with self._lock:
+            self._stats["responses_loaded"] += loaded["responses"]
+            self._stats["failures_loaded"] += loaded["failures"]
+        return loaded
+
+    # ------------------------------------------------------------------
+    # ILLMProvider
+    # ------------------------------------------------------------------
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Sirve la respuesta del batch job o difiere el request.
+
+        Raises:
+            LLMProviderDeferredError: Si el request aún no tiene respuesta
+            LLMProviderError: Si el request falló en el batch job
+                max_request_failures veces
+        """
+        model = request.model or self.default_model
+        key = build_request_key(request, model)
+        family = (request.metadata or {}).get("prompt_family")
+
+        with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                return self._serve(key, response, request, model)
+
+            failures, error = self._failures.get(key, (0, ""))
+            if failures >= self.max_request_failures:
+                self._stats["failed_served"] += 1
+                raise LLMProviderError(f"Request fallido en batch job: {error}")
+
+            flow = current_ledger()
+            flow_families = self._deferred_flows.setdefault(id(flow), (flow, set()))[1]
+            if family:
+                suppressed = any(dependency in flow_families for dependency in DEFERRAL_DEPENDENCIES.get(family, ()))
+                flow_families.add(family)
+                if suppressed:
+                    self._stats["suppressed_dependents"] += 1
+                    raise LLMProviderDeferredError("Depende de un request diferido (no se recolecta)", request_key=key)
+
+            if key not in self._pending:
+                self._pending[key] = self._batch_line(key, request, model)
+                self._pending_families[family or "sin_familia"] += 1
+                self._stats["deferred"] += 1
+
+        raise LLMProviderDeferredError("Request diferido a batch job", request_key=key)
+
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """Igual que complete() (no hay E/S en línea)"""
+        return self.complete(request)
+
+    def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return self.complete_json_with_response(request)[0]
+
+    def complete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        response = self.complete(request)
+        return self._parse_json_content(response), response
+
+    async def acomplete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        return self.complete_json(request)
+
+    async def acomplete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        return self.complete_json_with_response(request)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        return {
+            "provider": "OfflineBatch",
+            "default_model": self.default_model,
+            "stats": self.get_stats()
+        }
+
+    def is_available(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Respuestas servidas/conocidas, requests diferidos y dependientes suprimidos"""
+        with self._lock:
+            return {
+                **self._stats,
+                "known_responses": len(self._responses),
+                "known_failures": len(self._failures),
+                "pending": len(self._pending)
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _serve(self, key: str, response: LLMResponse, request: LLMRequest, model: str) -> LLMResponse:
+        """Copia de la respuesta; tokens y costo solo la primera vez (bajo lock)"""
+        self._stats["served"] += 1
+        first = key not in self._billed
+        self._billed.add(key)
+
+        served = LLMResponse(
+            content=response.content,
+            model=response.model,
+            tokens_used=dict(response.tokens_used) if first else {"prompt": 0, "completion": 0, "total": 0, "cached": 0},
+            finish_reason=response.finish_reason,
+            metadata={**(response.metadata or {}), "cache_hit": not first}
+        )
+        if first and self.usage_meter is not None:
+            record = self.usage_meter.record(served, model, (request.metadata or {}).get("prompt_family"))
+            served.metadata["cost"] = record.cost
+        return served
+
+    def _batch_line(self, key: str, request: LLMRequest, model: str) -> Dict[str, Any]:
+        """Línea JSONL de la Batch API para el request"""
+        messages = []
+        if request.system_message:
+            messages.append({"role": "system", "content": request.system_message})
+        messages.append({"role": "user", "content": request.prompt})
+
+        body: Dict[str, Any] = {
+            "model": model[len("openai/"):] if model.startswith("openai/") else model,
+            "messages": messages,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature
+        }
+        if request.stop_sequences:
+            body["stop"] = request.stop_sequences
+
+        if request.response_schema and self.structured_output != "off":
+            if self.structured_output == "json_object":
+                body["response_format"] = {"type": "json_object"}
+            else:
+                body["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": request.response_schema.get("name", "response"),
+                        "schema": request.response_schema["schema"],
+                        "strict": request.response_schema.get("strict", True)
+                    }
+                }
+
+        return {"custom_id": key, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+    @staticmethod
+    def _parse_result(item: Dict[str, Any]) -> Tuple[Optional[LLMResponse], str]:
+        """(LLMResponse, "") de una línea exitosa o (None, error) de una fallida"""
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or body.get("error") or {}
+            return None, str(error.get("message") if isinstance(error, dict) else error)
+
+        try:
+            choice = body["choices"][0]
+            content = choice["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            return None, "Respuesta sin choices"
+        if not content:
+            return None, "Respuesta vacía"
+
+        usage = body.get("usage") or {}
+        return LLMResponse(
+            content=content,
+            model=body.get("model", ""),
+            tokens_used={
+                "prompt": usage.get("prompt_tokens", 0),
+                "completion": usage.get("completion_tokens", 0),
+                "total": usage.get("total_tokens", 0),
+                "cached": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+            },
+            finish_reason=choice.get("finish_reason", "stop"),
+            metadata={"offline_batch": True, "batch_request_id": response.get("request_id")}
+        ), ""
+
+    @staticmethod
+    def _parse_json_content(response: LLMResponse) -> Dict[str, Any]:
+        """Mismo rescate que OpenAIProvider (json_scanner)"""
+        parsed, method = parse_json_response(response.content)
+        response.metadata = {**(response.metadata or {}), "json_parse": method}
+        if parsed is None:
+            raise LLMProviderJSONError(
+                "No se pudo parsear JSON", raw_content=response.content, response=response
+            )
+        return parsed
+
+
+# ==========================================
+# BACKENDS DE BATCH JOBS
+# ==========================================
+
+def _normalize_batch(batch: Dict[str, Any]) -> Dict[str, Any]:
+    """Estado normalizado (IBatchJobBackend.status) de un objeto batch"""
+    counts = batch.get("request_counts") or {}
+    errors = (batch.get("errors") or {}).get("data") or []
+    return {
+        "id": batch.get("id"),
+        "status": batch.get("status"),
+        "total": counts.get("total", 0),
+        "completed": counts.get("completed", 0),
+        "failed": counts.get("failed", 0),
+        "output_file_id": batch.get("output_file_id"),
+        "error_file_id": batch.get("error_file_id"),
+        "errors": errors
+    }
+
+
+class OpenAIBatchBackend:
+    """
+    Batch jobs sobre la Batch API de OpenAI (o un endpoint compatible).
+
+    Ejemplo:
+        >>> backend = OpenAIBatchBackend(api_key="sk-...")
+        >>> job_id = backend.submit(Path("fase_1_entrada.jsonl"))
+        >>> backend.status(job_id)["status"]
+        'validating'
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
+        completion_window: str = "24h",
+        timeout: float = 60.0
+    ):
+        """
+        Args:
+            api_key: API key (None = variable de entorno OPENAI_API_KEY)
+            api_base: URL base de endpoint compatible (ej: FakeOpenAIServer.api_base)
+            completion_window: Ventana de la Batch API
+            timeout: Timeout de cada llamada HTTP (segundos)
+
+        Raises:
+            ImportError: Si el SDK openai no está instalado
+        """
+        if not OPENAI_SDK_AVAILABLE:
+            raise ImportError("El SDK openai es necesario para OpenAIBatchBackend. Instalar con: pip install openai")
+
+        self.completion_window = completion_window
+        self._client = OpenAI(api_key=api_key, base_url=api_base, timeout=timeout)
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self._client.files.create(file=f, purpose="batch")
+        batch = self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"origen": "apf-validate-batch"}
+        )
+        return batch.id
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        return _normalize_batch(self._client.batches.retrieve(job_id).model_dump())
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        state = self.status(job_id)
+        with open(output_path, "wb") as f:
+            for file_id in (state["output_file_id"], state["error_file_id"]):
+                if file_id:
+                    f.write(self._client.files.content(file_id).read())
+        return output_path
+
+
+class LocalBatchBackend:
+    """
+    Stand-in en proceso de la Batch API (FakeBatchService), para pruebas y
+    scripts sin red ni SDK. Con HTTP, usar OpenAIBatchBackend(api_base=
+    FakeOpenAIServer.api_base), que expone el mismo servicio.
+
+    Ejemplo:
+        >>> backend = LocalBatchBackend(FakeBatchService(FakeLLMProvider()))
+    """
+
+    def __init__(self, service: Optional[Any] = None):
+        """
+        Args:
+            service: FakeBatchService (default: uno sobre FakeLLMProvider())
+        """
+        if service is None:
+            from .fake_llm_provider import FakeBatchService
+            service = FakeBatchService()
+        self.service = service
+
+    def submit(self, input_path: Path) -> str:
+        input_file = self.service.upload_file(Path(input_path).read_bytes(), "batch")
+        return self.service.create_batch(input_file["id"], endpoint=BATCH_ENDPOINT)["id"]
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        batch = self.service.retrieve_batch(job_id)
+        if batch is None:
+            raise LLMProviderError(f"Batch job desconocido: {job_id}")
+        return _normalize_batch(batch)
+
+    def download(self, job_id: str, output_path: Path) -> Path:
+        state = self.status(job_id)
+        with open(output_path, "wb") as f:
+            for file_id in (state["output_file_id"], state["error_file_id"]):
+                if file_id:
+                    f.write(self.service.file_content(file_id) or b"")
+        return output_path
+
+
+# ==========================================
+# EJECUCIÓN POR FASES
+# ==========================================
+
+class OfflineBatchRunner:
+    """
+    Ejecuta una corrida (ej: validate_batch) por fases de batch jobs.
+
+    Instala un BatchCollectingProvider en el registro de providers mientras
+    dura run(); al terminar restaura la factory previa. Los archivos de cada
+    fase quedan en work_dir (fase_N_entrada.jsonl, fase_N_job.json,
+    fase_N_salida.jsonl); con resume=True las salidas existentes se cargan
+    antes de la primera fase y un job enviado sin salida se sigue esperando.
+
+    Ejemplo:
+        >>> runner = OfflineBatchRunner(LocalBatchBackend(), "./data/batch_jobs/lote_1")
+        >>> results = runner.run(lambda: validator.validate_batch(puestos))
+        >>> runner.get_report()["converged"]
+        True
+    """
+
+    def __init__(
+        self,
+        backend: IBatchJobBackend,
+        work_dir: Union[str, Path],
+        poll_interval: float = 30.0,
+        max_phases: int = 6,
+        job_timeout: Optional[float] = None,
+        resume: bool = True,
+        registry: Optional[Any] = None
+    ):
+        """
+        Args:
+            backend: Backend de batch jobs
+            work_dir: Directorio de los JSONL de cada fase
+            poll_interval: Segundos entre consultas de estado del job
+            max_phases: Máximo de fases (la última devuelve lo que haya)
+            job_timeout: Espera máxima por job en segundos (None = sin límite)
+            resume: Cargar las salidas de fases previas en work_dir
+            registry: Registro de providers (default: get_default_registry())
+        """
+        from .provider_registry import get_default_registry
+
+        self.backend = backend
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.max_phases = max(1, max_phases)
+        self.job_timeout = job_timeout
+        self.resume = resume
+        self.registry = registry or get_default_registry()
+
+        self.collector = BatchCollectingProvider(
+            structured_output=self.registry.get_option("structured_output", "auto"),
+            usage_meter=self.registry.get_option("usage_meter")
+        )
+        self._phases: List[Dict[str, Any]] = []
+        self._converged = False
+
+    def run(self, run_pass: Callable[[], T]) -> T:
+        """
+        Ejecuta run_pass por fases hasta que no difiera requests.
+
+        Args:
+            run_pass: Corrida completa (se invoca una vez por fase)
+
+        Returns:
+            Resultado de la última fase (la que convergió, o la fase
+            max_phases con los requests aún diferidos como errores)
+
+        Raises:
+            LLMProviderError: Si un batch job falla o excede job_timeout
+        """
+        previous_factory = self.registry.get_provider_factory()
+        collector = self.collector
+        # Todas las llaves del registro (api_key, modelo) comparten el recolector
+        self.registry.set_provider_factory(lambda **_options: collector)
+        try:
+            first_phase = self._resume() + 1 if self.resume else 1
+            for phase in range(first_phase, first_phase + self.max_phases):
+                collector.begin_phase()
+                start = time.perf_counter()
+                result = run_pass()
+                lines = collector.pending_lines()
+                record = {
+                    "phase": phase,
+                    "pass_seconds": round(time.perf_counter() - start, 3),
+                    "requests": len(lines),
+                    "families": collector.pending_families()
+                }
+                self._phases.append(record)
+
+                if not lines:
+                    self._converged = True
+                    logger.info(f"[OfflineBatch] Convergió en la fase {phase}")
+                    return result
+                if phase == first_phase + self.max_phases - 1:
+                    logger.warning(
+                        f"[OfflineBatch] {len(lines)} requests aún diferidos tras {self.max_phases} fases; "
+                        f"se retornan los resultados parciales"
+                    )
+                    return result
+
+                logger.info(f"[OfflineBatch] Fase {phase}: {len(lines)} requests → batch job")
+                record.update(self._run_job(phase, lines))
+        finally:
+            self.registry.set_provider_factory(previous_factory)
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Resumen de la ejecución offline.
+
+        Returns:
+            Dict con converged, fases (requests por familia, job, conteos y
+            tiempos de cada una) y estadísticas del provider recolector
+        """
+        return {
+            "converged": self._converged,
+            "phases": [dict(phase) for phase in self._phases],
+            "total_requests": sum(phase["requests"] for phase in self._phases),
+            "collector": self.collector.get_stats()
+        }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _run_job(self, phase: int, lines: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Envía las líneas de la fase, espera el job e incorpora la salida"""
+        input_path = self.work_dir / f"fase_{phase}_entrada.jsonl"
+        with open(input_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        job_id = self.backend.submit(input_path)
+        (self.work_dir / f"fase_{phase}_job.json").write_text(
+            json.dumps({"job_id": job_id, "requests": len(lines)}), encoding="utf-8"
+        )
+        return self._collect_job(phase, job_id)
+
+    def _collect_job(self, phase: int, job_id: str) -> Dict[str, Any]:
+        """Espera el job hasta un estado terminal y carga su salida"""
+        start = time.perf_counter()
+        while True:
+            state = self.backend.status(job_id)
+            if state["status"] in BATCH_TERMINAL_STATUSES:
+                break
+            if self.job_timeout is not None and time.perf_counter() - start > self.job_timeout:
+                raise LLMProviderError(f"Batch job {job_id} sin terminar tras {self.job_timeout}s")
+            time.sleep(self.poll_interval)
+
+        if state["status"] == "failed":
+            raise LLMProviderError(f"Batch job {job_id} falló: {state['errors']}")
+
+        # expired/cancelled: las respuestas parciales se cargan; el resto se re-difiere
+        output_path = self.backend.download(job_id, self.work_dir / f"fase_{phase}_salida.jsonl")
+        loaded = self.collector.load_results(output_path)
+        return {
+            "job_id": job_id,
+            "job_status": state["status"],
+            "job_seconds": round(time.perf_counter() - start, 3),
+            "responses": loaded["responses"],
+            "failures": loaded["failures"]
+        }
+
+    def _resume(self) -> int:
+        """Carga las salidas de fases previas; retorna la última fase existente"""
+        last_phase = 0
+        for job_path in sorted(self.work_dir.glob("fase_*_job.json"), key=lambda p: int(p.stem.split("_")[1])):
+            phase = int(job_path.stem.split("_")[1])
+            output_path = self.work_dir / f"fase_{phase}_salida.jsonl"
+            if output_path.exists():
+                loaded = self.collector.load_results(output_path)
+                self._phases.append({"phase": phase, "resumed": True, "requests": 0, **loaded})
+            else:
+                job_id = json.loads(job_path.read_text(encoding="utf-8"))["job_id"]
+                logger.info(f"[OfflineBatch] Reanudando espera del batch job {job_id} (fase {phase})")
+                self._phases.append({"phase": phase, "resumed": True, "requests": 0, **self._collect_job(phase, job_id)})
+            last_phase = phase
+        return last_phase
@@ -3,14 +3,23 @@ OpenAI Provider - Implementación de ILLMProvider para OpenAI
 
 Implementa la interface ILLMProvider usando LiteLLM para llamadas a OpenAI.
 Incluye manejo robusto de errores, parsing de JSON y reintentos.
+
+Cada instancia mantiene un cliente HTTP persistente (keep-alive) que se
+reutiliza entre llamadas. Las instancias son thread-safe y están pensadas
+para ser de larga vida (ver provider_registry.get_pooled_provider).
 """
 
-import json
-import re
+import asyncio
+import threading
 import time
-from typing import Dict, Any, Optional
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import replace
 
+from .llm_response_cache import build_request_key
+from .rate_limiter import estimate_request_tokens
+from .retry_policy import RetryPolicy
 from ..interfaces.llm_provider import (
     ILLMProvider,
     LLMRequest,
@@ -18,15 +27,31 @@ from ..interfaces.llm_provider import (
     LLMProviderError,
     LLMProviderTimeoutError,
     LLMProviderAuthError,
-    LLMProviderRateLimitError
+    LLMProviderBadRequestError,
+    LLMProviderRateLimitError,
+    LLMProviderBudgetError,
+    LLMProviderJSONError
 )
+from ..utils.json_scanner import parse_json_response, strip_markdown_fence
 
 try:
-    from litellm import completion
+    from litellm import completion, acompletion
     LITELLM_AVAILABLE = True
 except ImportError:
     LITELLM_AVAILABLE = False
 
+try:
+    from litellm import supports_response_schema
+except ImportError:
+    supports_response_schema = None
+
+try:
+    import httpx
+    from openai import OpenAI, AsyncOpenAI
+    POOLED_CLIENT_AVAILABLE = True
+except ImportError:
+    POOLED_CLIENT_AVAILABLE = False
+
 
 class OpenAIProvider:
     """
@@ -37,7 +62,17 @@ class OpenAIProvider:
     - Parsing robusto de JSON con fallbacks
     - Limpieza automática de markdown wrappers
     - Logging detallado de llamadas
-    - Manejo de errores con reintentos
+    - Reintentos clasificados con full jitter y deadline (retry_policy)
+    - Timeout por intento aplicado a cada llamada
+    - Pool de conexiones HTTP persistente (thread-safe)
+    - API asíncrona (acomplete / acomplete_json)
+    - Cache persistente de respuestas opcional (response_cache)
+    - Limitador de cuota adaptativo compartido opcional (rate_limiter)
+    - Coalescencia de requests idénticos en vuelo opcional (single_flight)
+    - Medición de tokens/costo y topes de presupuesto opcional (usage_meter)
+    - Circuit breaker compartido opcional (circuit_breaker)
+    - Requests duplicados ante latencia de cola opcional (hedging)
+    - Salida estructurada (JSON schema) nativa si el backend la soporta
     """
 
     def __init__(
@@ -46,7 +81,17 @@ class OpenAIProvider:
         default_model: str = "openai/gpt-4o",
         timeout: int = 60,
         max_retries: int = 3,
-        enable_logging: bool = True
+        enable_logging: bool = True,
+        api_base: Optional[str] = None,
+        pool_connections: int = 20,
+        response_cache: Optional[Any] = None,
+        rate_limiter: Optional[Any] = None,
+        single_flight: Optional[Any] = None,
+        usage_meter: Optional[Any] = None,
+        structured_output: str = "auto",
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[Any] = None,
+        hedging: Optional[Any] = None
     ):
         """
         Inicializa el provider de OpenAI.
@@ -54,9 +99,22 @@ class OpenAIProvider:
         Args:
             api_key: API key de OpenAI (si no se provee, usa variable de entorno)
             default_model: Modelo por defecto (ej: "openai/gpt-4o", "openai/gpt-3.5-turbo")
-            timeout: Timeout en segundos para llamadas
-            max_retries: Número máximo de reintentos en caso de error
+            timeout: Timeout en segundos por intento
+            max_retries: Intentos máximos por llamada (si no se da retry_policy)
             enable_logging: Habilitar logging de llamadas
+            api_base: URL base de un endpoint compatible con OpenAI (opcional)
+            pool_connections: Conexiones keep-alive máximas del pool HTTP
+            response_cache: Cache persistente de respuestas (LLMResponseCache, opcional)
+            rate_limiter: Limitador de cuota compartido (AdaptiveRateLimiter, opcional)
+            single_flight: Coalescencia de requests idénticos en vuelo (SingleFlight, opcional)
+            usage_meter: Medidor de tokens/costo con presupuestos (UsageMeter, opcional)
+            structured_output: Uso de request.response_schema:
+                "auto" (json_schema si el modelo lo soporta, si no JSON mode
+                en modelos OpenAI), "json_schema", "json_object" u "off"
+            retry_policy: Política de reintentos (RetryPolicy; default:
+                max_retries intentos con full jitter, sin deadline)
+            circuit_breaker: Circuit breaker compartido (CircuitBreaker, opcional)
+            hedging: Política de requests duplicados (HedgingPolicy, opcional)
         """
         if not LITELLM_AVAILABLE:
             raise LLMProviderError(
@@ -68,6 +126,34 @@ class OpenAIProvider:
         self.timeout = timeout
         self.max_retries = max_retries
         self.enable_logging = enable_logging
+        self.api_base = api_base
+        self.pool_connections = pool_connections
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        self.usage_meter = usage_meter
+        self.structured_output = structured_output
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=max_retries)
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
+
+        # Soporte de json_schema por modelo (consulta a LiteLLM, una vez por modelo)
+        self._schema_support: Dict[str, bool] = {}
+        self._json_lock = threading.Lock()
+        self._json_stats = {
+            "structured_requests": 0,
+            "parsed_direct": 0,
+            "recovered": 0,
+            "parse_failures": 0,
+            "completion_tokens": 0
+        }
+
+        # Cliente HTTP persistente, creado en la primera llamada
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # Clientes asíncronos, uno por event loop
+        self._async_clients = weakref.WeakKeyDictionary()
 
     def complete(self, request: LLMRequest) -> LLMResponse:
         """
@@ -89,68 +175,65 @@ class OpenAIProvider:
 
         start_time = time.time()
 
-        # Construir mensajes
-        messages = []
-        if request.system_message:
-            messages.append({"role": "system", "content": request.system_message})
-        messages.append({"role": "user", "content": request.prompt})
+        cache_key, cached = self._cache_lookup(request, model)
+        if cached is not None:
+            self._record_usage(cached, request, model, cache_hit=True)
+            return cached
 
-        # Parámetros de llamada
-        call_params = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": request.max_tokens,
-            "temperature": request.temperature
-        }
+        if self.single_flight is None:
+            return self._complete_with_retries(request, model, cache_key, start_time)
 
-        if request.stop_sequences:
-            call_params["stop"] = request.stop_sequences
+        # Llamadas idénticas concurrentes comparten una sola petición real
+        is_leader = []
 
-        # Intentar llamada con reintentos
-        last_error = None
-        for attempt in range(self.max_retries):
-            try:
-                response = completion(**call_params)
-                duration = time.time() - start_time
+        def _leader_call() -> LLMResponse:
+            is_leader.append(True)
+            return self._complete_with_retries(request, model, cache_key, start_time)
 
-                content = response.choices[0].message.content
-                if not content:
-                    raise LLMProviderError("OpenAI devolvió respuesta vacía")
+        flight_key = cache_key or build_request_key(request, model)
+        response = self.single_flight.do(flight_key, _leader_call)
+        return response if is_leader else self._mark_coalesced(response)
 
-                if self.enable_logging:
-                    print(f"[OpenAI] Respuesta recibida en {duration:.2f}s ({len(content)} chars)")
-
-                # Extraer tokens usados
-                usage = response.get('usage', {})
-                tokens_used = {
-                    "prompt": usage.get('prompt_tokens', 0),
-                    "completion": usage.get('completion_tokens', 0),
-                    "total": usage.get('total_tokens', 0)
-                }
-
-                return LLMResponse(
-                    content=content,
-                    model=model,
-                    tokens_used=tokens_used,
-                    finish_reason=response.choices[0].finish_reason,
-                    metadata={
-                        "duration": duration,
-                        "attempt": attempt + 1
-                    }
-                )
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Versión asíncrona de complete().
 
-            except Exception as e:
-                last_error = self._classify_error(e)
+        El backoff entre reintentos usa asyncio.sleep, por lo que no bloquea
+        el event loop mientras otras llamadas siguen en vuelo.
 
-                if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    if self.enable_logging:
-                        print(f"[OpenAI] Error en intento {attempt + 1}, reintentando en {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    raise last_error
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
 
-        raise last_error or LLMProviderError("Error desconocido en llamada a OpenAI")
+        Returns:
+            LLMResponse con el contenido generado
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada
+        """
+        model = request.model or self.default_model
+
+        if self.enable_logging:
+            print(f"[OpenAI] Llamada async iniciada - Model: {model}, Max tokens: {request.max_tokens}")
+
+        start_time = time.time()
+
+        cache_key, cached = self._cache_lookup(request, model)
+        if cached is not None:
+            self._record_usage(cached, request, model, cache_hit=True)
+            return cached
+
+        if self.single_flight is None:
+            return await self._acomplete_with_retries(request, model, cache_key, start_time)
+
+        is_leader = []
+
+        async def _leader_call() -> LLMResponse:
+            is_leader.append(True)
+            return await self._acomplete_with_retries(request, model, cache_key, start_time)
+
+        flight_key = cache_key or build_request_key(request, model)
+        response = await self.single_flight.ado(flight_key, _leader_call)
+        return response if is_leader else self._mark_coalesced(response)
 
     def complete_json(self, request: LLMRequest) -> Dict[str, Any]:
         """
@@ -165,26 +248,58 @@ class OpenAIProvider:
         Raises:
             LLMProviderError: Si hay error en la llamada o parsing
         """
+        return self.complete_json_with_response(request)[0]
+
+    def complete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        """
+        Igual que complete_json(), pero retorna también la LLMResponse.
+
+        Útil para conservar tokens usados (incluidos los cacheados) y metadatos.
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            Tupla (dict parseado, LLMResponse)
+
+        Raises:
+            LLMProviderJSONError: Si el contenido no es JSON recuperable
+            LLMProviderError: Si hay error en la llamada
+        """
         response = self.complete(request)
-        content = response.content.strip()
+        return self._parse_json_content(response.content, response), response
 
-        # Limpiar markdown wrapper si existe
-        content_cleaned = self._clean_markdown_wrapper(content)
+    async def acomplete_json(self, request: LLMRequest) -> Dict[str, Any]:
+        """
+        Versión asíncrona de complete_json().
 
-        # Intentar parsear JSON directamente
-        try:
-            return json.loads(content_cleaned)
-        except json.JSONDecodeError as e:
-            # Fallback: buscar JSON con regex
-            parsed_json = self._extract_json_with_regex(content_cleaned)
-            if parsed_json is not None:
-                return parsed_json
-
-            # Si todo falla, lanzar error con contenido original
-            raise LLMProviderError(
-                f"No se pudo parsear JSON: {str(e)}\n"
-                f"Contenido: {content_cleaned[:200]}..."
-            )
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            Dict parseado del JSON generado
+
+        Raises:
+            LLMProviderError: Si hay error en la llamada o parsing
+        """
+        return (await self.acomplete_json_with_response(request))[0]
+
+    async def acomplete_json_with_response(self, request: LLMRequest) -> Tuple[Dict[str, Any], LLMResponse]:
+        """
+        Versión asíncrona de complete_json_with_response().
+
+        Args:
+            request: Objeto LLMRequest con prompt y parámetros
+
+        Returns:
+            Tupla (dict parseado, LLMResponse)
+
+        Raises:
+            LLMProviderJSONError: Si el contenido no es JSON recuperable
+            LLMProviderError: Si hay error en la llamada
+        """
+        response = await self.acomplete(request)
+        return self._parse_json_content(response.content, response), response
 
     def get_model_info(self) -> Dict[str, Any]:
         """
@@ -198,9 +313,36 @@ class OpenAIProvider:
             "default_model": self.default_model,
             "timeout": self.timeout,
             "max_retries": self.max_retries,
+            "api_base": self.api_base,
+            "pooled_client": self._client is not None,
+            "response_cache": self.response_cache is not None,
+            "rate_limiter": self.rate_limiter.get_stats() if self.rate_limiter else None,
+            "single_flight": self.single_flight.get_stats() if self.single_flight else None,
+            "usage": self.usage_meter.get_stats() if self.usage_meter else None,
+            "retry_policy": self.retry_policy.get_stats(),
+            "circuit_breaker": self.circuit_breaker.get_stats() if self.circuit_breaker else None,
+            "hedging": self.hedging.get_stats() if self.hedging else None,
+            "json_parsing": self.get_json_stats(),
             "litellm_available": LITELLM_AVAILABLE
         }
 
+    def get_json_stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de parsing JSON de complete_json.
+
+        Returns:
+            Dict con requests con salida estructurada, respuestas parseadas
+            directo, rescatadas (markdown/bloque), fallidas, tasa de falla y
+            tokens de salida promedio
+        """
+        with self._json_lock:
+            stats = dict(self._json_stats)
+        total = stats["parsed_direct"] + stats["recovered"] + stats["parse_failures"]
+        stats["parse_failure_rate"] = stats["parse_failures"] / total if total else 0.0
+        stats["recovered_rate"] = stats["recovered"] / total if total else 0.0
+        stats["avg_completion_tokens"] = stats["completion_tokens"] / total if total else 0.0
+        return stats
+
     def is_available(self) -> bool:
         """
         Verifica si el proveedor está disponible.
@@ -210,59 +352,597 @@ class OpenAIProvider:
         """
         return LITELLM_AVAILABLE
 
+    def close(self) -> None:
+        """
+        Cierra el pool de conexiones HTTP del provider.
+
+        Solo es necesario al terminar el proceso o al descartar el provider;
+        la siguiente llamada crea un pool nuevo. Los clientes asíncronos no
+        pueden esperarse desde código síncrono: su cierre se programa en su
+        event loop si sigue corriendo y las referencias se sueltan siempre
+        (desde un event loop, usar aclose).
+        """
+        with self._client_lock:
+            client, self._client = self._client, None
+            async_clients = list(self._async_clients.items())
+            self._async_clients.clear()
+
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+        for loop, async_client in async_clients:
+            if loop.is_running():
+                try:
+                    asyncio.run_coroutine_threadsafe(async_client.close(), loop)
+                except RuntimeError:
+                    pass
+
+    async def aclose(self) -> None:
+        """
+        Cierra el cliente asíncrono del event loop actual y el resto de pools.
+
+        Debe esperarse desde el event loop que usó el provider (p. ej. al
+        final de la corrutina de asyncio.run, antes de que el loop se cierre);
+        el pool síncrono y los clientes de otros loops se cierran como en close().
+        """
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.pop(loop, None)
+
+        if client is not None:
+            try:
+                await client.close()
+            except Exception:
+                pass
+        self.close()
+
     # ==========================================
     # MÉTODOS PRIVADOS
     # ==========================================
 
-    def _clean_markdown_wrapper(self, content: str) -> str:
+    def _build_call_params(self, request: LLMRequest, model: str, client: Any) -> Dict[str, Any]:
         """
-        Limpia markdown code blocks que envuelven JSON.
+        Construye los parámetros de llamada a LiteLLM.
 
         Args:
-            content: Contenido a limpiar
+            request: Request a enviar
+            model: Modelo resuelto
+            client: Cliente OpenAI del pool (o None)
 
         Returns:
-            Contenido sin markdown wrapper
+            Dict de parámetros para completion()/acompletion()
         """
-        content = content.strip()
+        messages = []
+        if request.system_message:
+            messages.append({"role": "system", "content": request.system_message})
+        messages.append({"role": "user", "content": request.prompt})
+
+        call_params = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature
+        }
+
+        if request.stop_sequences:
+            call_params["stop"] = request.stop_sequences
+
+        response_format = self._response_format(request, model)
+        if response_format is not None:
+            call_params["response_format"] = response_format
+
+        if self.api_key:
+            call_params["api_key"] = self.api_key
+        if self.api_base:
+            call_params["api_base"] = self.api_base
+
+        if client is not None:
+            call_params["client"] = client
+
+        return call_params
+
+    def _complete_with_retries(
+        self,
+        request: LLMRequest,
+        model: str,
+        cache_key: Optional[str],
+        start_time: float
+    ) -> LLMResponse:
+        """Llamada real a LiteLLM con rate limiting, circuit breaker y reintentos"""
+        call_params = self._build_call_params(request, model, self._get_pooled_client(model))
+
+        # Presupuesto del ledger activo (lanza LLMProviderBudgetError sin enviar)
+        self._check_budget(request, model)
+
+        # Intentar llamada con reintentos
+        estimated_tokens = estimate_request_tokens(
+            request.prompt, request.system_message, request.max_tokens
+        )
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            call_params["timeout"] = self.retry_policy.attempt_timeout(self.timeout, started)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call()
+
+            permit = self.rate_limiter.acquire(estimated_tokens) if self.rate_limiter else None
+            try:
+                response = self._send(call_params, request, model, estimated_tokens)
+                llm_response = self._build_response(response, model, time.time() - start_time, attempt)
 
-        # Caso 1: ```json ... ```
-        if content.startswith('```json'):
-            content = content[7:]  # Remove ```json
-            if content.endswith('```'):
-                content = content[:-3]  # Remove ```
-            return content.strip()
+            except Exception as e:
+                error = self._classify_error(e)
+                self._release_permit(permit, error)
+                self._record_circuit(error)
 
-        # Caso 2: ``` ... ```
-        if content.startswith('```'):
-            lines = content.split('\n')
-            if len(lines) > 2 and lines[-1].strip() == '```':
-                return '\n'.join(lines[1:-1]).strip()
+                wait_time = self.retry_policy.next_delay(attempt, error, started)
+                if wait_time is None:
+                    raise error
+                if self.enable_logging:
+                    print(f"[OpenAI] Error en intento {attempt + 1}, reintentando en {wait_time:.1f}s...")
+                time.sleep(wait_time)
+                attempt += 1
+                continue
+
+            self._release_permit(permit, None, llm_response.tokens_used.get("total"))
+            self._record_circuit(None)
+            self._record_usage(llm_response, request, model)
+            self._cache_store(cache_key, llm_response)
+            return llm_response
+
+    async def _acomplete_with_retries(
+        self,
+        request: LLMRequest,
+        model: str,
+        cache_key: Optional[str],
+        start_time: float
+    ) -> LLMResponse:
+        """Versión asíncrona de _complete_with_retries()"""
+        call_params = self._build_call_params(request, model, self._get_async_pooled_client(model))
+
+        self._check_budget(request, model)
+
+        estimated_tokens = estimate_request_tokens(
+            request.prompt, request.system_message, request.max_tokens
+        )
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            call_params["timeout"] = self.retry_policy.attempt_timeout(self.timeout, started)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call()
+
+            permit = await self.rate_limiter.aacquire(estimated_tokens) if self.rate_limiter else None
+            try:
+                response = await self._asend(call_params, request, model, estimated_tokens)
+                llm_response = self._build_response(response, model, time.time() - start_time, attempt)
 
-        return content
+            except Exception as e:
+                error = self._classify_error(e)
+                self._release_permit(permit, error)
+                self._record_circuit(error)
+
+                wait_time = self.retry_policy.next_delay(attempt, error, started)
+                if wait_time is None:
+                    raise error
+                if self.enable_logging:
+                    print(f"[OpenAI] Error en intento async {attempt + 1}, reintentando en {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+                attempt += 1
+                continue
+
+            self._release_permit(permit, None, llm_response.tokens_used.get("total"))
+            self._record_circuit(None)
+            self._record_usage(llm_response, request, model)
+            self._cache_store(cache_key, llm_response)
+            return llm_response
+
+    def _send(self, call_params: Dict[str, Any], request: LLMRequest, model: str, estimated_tokens: int) -> Any:
+        """Un intento: completion() directo o con duplicado si hay hedging"""
+        if self.hedging is None:
+            return completion(**call_params)
+
+        def hedge_call():
+            # El duplicado toma su propio permiso del rate limiter
+            permit = self.rate_limiter.acquire(estimated_tokens) if self.rate_limiter else None
+            try:
+                response = completion(**call_params)
+            except Exception as e:
+                self._release_permit(permit, self._classify_error(e))
+                raise
+            self._release_permit(permit, None)
+            return response
+
+        return self.hedging.call(
+            lambda: completion(**call_params),
+            key=self._latency_key(request, model),
+            hedge=hedge_call,
+            on_discard=lambda response: self._account_discarded(response, request, model)
+        )
+
+    async def _asend(self, call_params: Dict[str, Any], request: LLMRequest, model: str, estimated_tokens: int) -> Any:
+        """Versión asíncrona de _send() (el duplicado perdedor se cancela)"""
+        if self.hedging is None:
+            return await acompletion(**call_params)
+
+        async def hedge_call():
+            permit = await self.rate_limiter.aacquire(estimated_tokens) if self.rate_limiter else None
+            try:
+                response = await acompletion(**call_params)
+            except BaseException as e:
+                self._release_permit(permit, self._classify_error(e) if isinstance(e, Exception) else None)
+                raise
+            self._release_permit(permit, None)
+            return response
+
+        return await self.hedging.acall(
+            lambda: acompletion(**call_params),
+            key=self._latency_key(request, model),
+            hedge=hedge_call
+        )
+
+    @staticmethod
+    def _latency_key(request: LLMRequest, model: str) -> Tuple[str, str]:
+        """Llave de latencia del hedging: (modelo, familia de prompt)"""
+        return model, (request.metadata or {}).get("prompt_family") or "sin_familia"
+
+    def _account_discarded(self, raw_response: Any, request: LLMRequest, model: str) -> None:
+        """Registra tokens y costo de la respuesta duplicada que perdió"""
+        response = self._build_response(raw_response, model, 0.0, 0)
+        self._record_usage(response, request, model)
+        self.hedging.account_discarded(
+            response.tokens_used.get("total", 0), (response.metadata or {}).get("cost", 0.0)
+        )
+
+    def _check_budget(self, request: LLMRequest, model: str) -> None:
+        """Verifica el presupuesto del ledger activo antes de una llamada real"""
+        if self.usage_meter is None:
+            return
 
-    def _extract_json_with_regex(self, content: str) -> Optional[Dict[str, Any]]:
+        try:
+            self.usage_meter.check_budget(request, model)
+        except LLMProviderBudgetError as e:
+            if self.enable_logging:
+                print(f"[OpenAI] Llamada no enviada: {e}")
+            raise
+
+    def _record_usage(self, response: LLMResponse, request: LLMRequest, model: str, cache_hit: bool = False) -> None:
+        """Registra tokens, latencia y costo de la llamada (el costo queda en metadata)"""
+        if self.usage_meter is None:
+            return
+
+        prompt_family = (request.metadata or {}).get("prompt_family")
+        record = self.usage_meter.record(response, model, prompt_family, cache_hit=cache_hit)
+        if response.metadata is not None:
+            response.metadata["cost"] = record.cost
+
+    def _mark_coalesced(self, response: LLMResponse) -> LLMResponse:
+        """Copia de una respuesta compartida por single-flight, marcada como coalescida"""
+        return replace(response, metadata={**(response.metadata or {}), "coalesced": True})
+
+    def _cache_lookup(self, request: LLMRequest, model: str):
+        """
+        Busca la respuesta del request en el cache persistente.
+
+        Returns:
+            Tupla (llave de cache o None si no es cacheable, respuesta cacheada o None)
         """
-        Intenta extraer JSON usando regex como fallback.
+        if self.response_cache is None or not self.response_cache.is_cacheable(request):
+            return None, None
+
+        try:
+            cache_key = self.response_cache.build_key(request, model)
+            cached = self.response_cache.get(cache_key)
+        except Exception as e:
+            # Un cache dañado o bloqueado nunca debe romper la llamada
+            if self.enable_logging:
+                print(f"[OpenAI] Cache no disponible: {e}")
+            return None, None
+
+        if cached is not None and self.enable_logging:
+            print(f"[OpenAI] Respuesta servida desde cache ({len(cached.content)} chars)")
+
+        return cache_key, cached
+
+    def _cache_store(self, cache_key: Optional[str], response: LLMResponse) -> None:
+        """Guarda una respuesta en el cache persistente (si aplica)"""
+        if cache_key is None or self.response_cache is None:
+            return
+
+        try:
+            self.response_cache.set(cache_key, response)
+        except Exception as e:
+            if self.enable_logging:
+                print(f"[OpenAI] No se pudo guardar en cache: {e}")
+
+    def _build_response(self, response: Any, model: str, duration: float, attempt: int) -> LLMResponse:
+        """
+        Convierte la respuesta de LiteLLM en LLMResponse.
+
+        Raises:
+            LLMProviderError: Si la respuesta viene vacía
+        """
+        content = response.choices[0].message.content
+        if not content:
+            raise LLMProviderError("OpenAI devolvió respuesta vacía")
+
+        if self.enable_logging:
+            print(f"[OpenAI] Respuesta recibida en {duration:.2f}s ({len(content)} chars)")
+
+        # Extraer tokens usados (incluye tokens de prompt servidos del prefix cache del proveedor)
+        usage = response.get('usage', {})
+        tokens_used = {
+            "prompt": usage.get('prompt_tokens', 0),
+            "completion": usage.get('completion_tokens', 0),
+            "total": usage.get('total_tokens', 0),
+            "cached": self._extract_cached_tokens(usage)
+        }
+
+        return LLMResponse(
+            content=content,
+            model=model,
+            tokens_used=tokens_used,
+            finish_reason=response.choices[0].finish_reason,
+            metadata={
+                "duration": duration,
+                "attempt": attempt + 1
+            }
+        )
+
+    def _extract_cached_tokens(self, usage: Any) -> int:
+        """Tokens de prompt servidos desde el prefix cache del proveedor (prompt_tokens_details.cached_tokens)"""
+        details = usage.get('prompt_tokens_details') if hasattr(usage, 'get') else None
+        if details is None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+        if details is None:
+            return 0
+
+        if isinstance(details, dict):
+            cached = details.get('cached_tokens')
+        else:
+            cached = getattr(details, 'cached_tokens', None)
+        return cached or 0
+
+    def _parse_json_content(self, content: str, response: Optional[LLMResponse] = None) -> Dict[str, Any]:
+        """
+        Parsea el contenido de una respuesta como JSON.
+
+        Limpia el wrapper markdown y, si json.loads falla, rescata el primer
+        bloque balanceado válido (json_scanner, tiempo lineal).
+
+        Raises:
+            LLMProviderJSONError: Si no hay JSON recuperable (incluye el
+                contenido crudo y la respuesta para no repetir la llamada)
+        """
+        parsed_json, method = parse_json_response(content)
+        self._record_json_parse(method, response)
+        if parsed_json is not None:
+            return parsed_json
+
+        content_cleaned = strip_markdown_fence(content)
+        raise LLMProviderJSONError(
+            f"No se pudo parsear JSON\n"
+            f"Contenido: {content_cleaned[:200]}...",
+            raw_content=content,
+            response=response
+        )
+
+    def _response_format(self, request: LLMRequest, model: str) -> Optional[Dict[str, Any]]:
+        """
+        response_format para request.response_schema según el soporte del backend.
+
+        Returns:
+            {"type": "json_schema", ...}, {"type": "json_object"} o None
+        """
+        if not request.response_schema or self.structured_output == "off":
+            return None
+
+        mode = self.structured_output
+        if mode == "auto":
+            if self._supports_json_schema(model):
+                mode = "json_schema"
+            elif model.startswith("openai/") or "/" not in model:
+                mode = "json_object"
+            else:
+                return None
+
+        with self._json_lock:
+            self._json_stats["structured_requests"] += 1
+
+        if mode == "json_object":
+            return {"type": "json_object"}
+
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": request.response_schema.get("name", "response"),
+                "schema": request.response_schema["schema"],
+                "strict": request.response_schema.get("strict", True)
+            }
+        }
+
+    def _supports_json_schema(self, model: str) -> bool:
+        """Consulta (con cache) si LiteLLM reporta soporte de json_schema para el modelo"""
+        if model not in self._schema_support:
+            supported = False
+            if supports_response_schema is not None:
+                try:
+                    supported = bool(supports_response_schema(model=model))
+                except Exception:
+                    supported = False
+            self._schema_support[model] = supported
+        return self._schema_support[model]
+
+    def _record_json_parse(self, method: str, response: Optional[LLMResponse]) -> None:
+        """Registra el método de parsing (direct/markdown/salvage/failed) y los tokens de salida"""
+        if response is not None:
+            response.metadata = {**(response.metadata or {}), "json_parse": method}
+
+        with self._json_lock:
+            if method == "direct":
+                self._json_stats["parsed_direct"] += 1
+            elif method == "failed":
+                self._json_stats["parse_failures"] += 1
+            else:
+                self._json_stats["recovered"] += 1
+            if response is not None:
+                self._json_stats["completion_tokens"] += (response.tokens_used or {}).get("completion", 0)
+
+    def _get_pooled_client(self, model: str):
+        """
+        Obtiene (o crea) el cliente OpenAI con pool keep-alive.
+
+        Solo aplica a modelos OpenAI (prefijo "openai/" o sin prefijo); para
+        otros backends LiteLLM maneja su propio cliente.
+
+        Args:
+            model: Modelo de la llamada
+
+        Returns:
+            Cliente OpenAI reutilizable o None si no aplica
+        """
+        if not POOLED_CLIENT_AVAILABLE:
+            return None
+
+        if "/" in model and not model.startswith("openai/"):
+            return None
+
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.pool_connections,
+                            max_keepalive_connections=self.pool_connections,
+                            keepalive_expiry=60.0
+                        )
+                    )
+                    try:
+                        # Los reintentos los maneja este provider, no el SDK
+                        self._client = OpenAI(
+                            api_key=self.api_key,
+                            base_url=self.api_base,
+                            max_retries=0,
+                            timeout=self.timeout,
+                            http_client=http_client
+                        )
+                    except Exception:
+                        # Sin API key resoluble: LiteLLM usa su cliente por defecto
+                        http_client.close()
+                        return None
+
+        return self._client
+
+    def _get_async_pooled_client(self, model: str):
+        """
+        Obtiene (o crea) el cliente AsyncOpenAI del event loop actual.
+
+        Los clientes asíncronos quedan ligados a su event loop, por lo que se
+        mantiene uno por loop (liberado automáticamente al destruirse el loop).
 
         Args:
-            content: Contenido donde buscar JSON
+            model: Modelo de la llamada
 
         Returns:
-            Dict parseado o None si no se encuentra
+            Cliente AsyncOpenAI reutilizable o None si no aplica
+        """
+        if not POOLED_CLIENT_AVAILABLE:
+            return None
+
+        if "/" in model and not model.startswith("openai/"):
+            return None
+
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.pool_connections,
+                        max_keepalive_connections=self.pool_connections,
+                        keepalive_expiry=60.0
+                    )
+                )
+                try:
+                    client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        base_url=self.api_base,
+                        max_retries=0,
+                        timeout=self.timeout,
+                        http_client=http_client
+                    )
+                except Exception:
+                    return None
+                self._async_clients[loop] = client
+
+        return client
+
+    def _release_permit(
+        self,
+        permit: Optional[Dict[str, Any]],
+        error: Optional[LLMProviderError],
+        tokens_used: Optional[int] = None
+    ) -> None:
+        """Libera el permiso del rate limiter informando el resultado de la llamada"""
+        if permit is None or self.rate_limiter is None:
+            return
+
+        if error is None:
+            self.rate_limiter.release(permit, success=True, tokens_used=tokens_used)
+        elif isinstance(error, LLMProviderRateLimitError):
+            self.rate_limiter.release(
+                permit, success=False, rate_limited=True, retry_after=error.retry_after
+            )
+        else:
+            self.rate_limiter.release(permit, success=False)
+
+    def _record_circuit(self, error: Optional[LLMProviderError]) -> None:
+        """Informa al circuit breaker el resultado de un intento"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(error)
+
+    def _extract_retry_after(self, error: Exception) -> Optional[float]:
+        """
+        Extrae el hint Retry-After (segundos) de la respuesta HTTP del error.
+
+        Soporta los headers retry-after-ms, retry-after (segundos o fecha HTTP)
+        y x-ratelimit-reset-requests/-tokens en formato "1.5s" / "20ms".
         """
-        json_patterns = [
-            r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # Objetos anidados
-            r'\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]'  # Arrays anidados
-        ]
+        headers = getattr(error, "litellm_response_headers", None)
+        if headers is None:
+            response = getattr(error, "response", None)
+            headers = getattr(response, "headers", None)
+        if not headers:
+            return None
 
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
+        try:
+            value = headers.get("retry-after-ms")
+            if value:
+                return float(value) / 1000.0
+
+            value = headers.get("retry-after")
+            if value:
                 try:
-                    return json.loads(match)
-                except:
-                    continue
+                    return max(0.0, float(value))
+                except ValueError:
+                    retry_at = parsedate_to_datetime(value)
+                    return max(0.0, retry_at.timestamp() - time.time())
+
+            for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+                value = headers.get(name)
+                if value:
+                    value = value.strip()
+                    if value.endswith("ms"):
+                        return float(value[:-2]) / 1000.0
+                    if value.endswith("s"):
+                        return float(value[:-1])
+        except (TypeError, ValueError):
+            return None
 
         return None
 
@@ -270,21 +950,36 @@ class OpenAIProvider:
         """
         Clasifica un error genérico en el tipo específico de LLMProviderError.
 
+        Usa primero el status HTTP del error (si existe) y luego el texto.
+
         Args:
             error: Excepción original
 
         Returns:
             LLMProviderError apropiado
         """
+        if isinstance(error, LLMProviderError):
+            return error
+
+        status_code = getattr(error, "status_code", None)
         error_str = str(error).lower()
 
-        if "timeout" in error_str or "timed out" in error_str:
+        if status_code == 429 or (status_code is None and ("rate limit" in error_str or "429" in error_str)):
+            return LLMProviderRateLimitError(
+                f"Rate limit excedido en OpenAI: {error}",
+                retry_after=self._extract_retry_after(error)
+            )
+
+        if status_code in (408, 504) or "timeout" in error_str or "timed out" in error_str:
             return LLMProviderTimeoutError(f"Timeout en llamada a OpenAI: {error}")
 
-        if "auth" in error_str or "api key" in error_str or "unauthorized" in error_str:
+        if status_code in (401, 403) or (
+            status_code is None and
+            ("auth" in error_str or "api key" in error_str or "unauthorized" in error_str)
+        ):
             return LLMProviderAuthError(f"Error de autenticación con OpenAI: {error}")
 
-        if "rate limit" in error_str or "429" in error_str:
-            return LLMProviderRateLimitError(f"Rate limit excedido en OpenAI: {error}")
+        if status_code in (400, 404, 422):
+            return LLMProviderBadRequestError(f"Request rechazado por OpenAI ({status_code}): {error}")
 
         return LLMProviderError(f"Error en llamada a OpenAI: {error}")
@@ -0,0 +1,272 @@
+"""
+Provider Registry - Pool de providers LLM de larga vida
+
+Mantiene una instancia de provider por combinación (api_key, modelo, timeout)
+para todo el proceso. Los validadores v4 (vía robust_openai_call) obtienen
+sus providers de aquí en lugar de construir uno nuevo por llamada, con lo que:
+- Se evita el costo de inicialización por llamada
+- Se reutilizan las conexiones HTTP keep-alive del provider
+- Todas las llamadas de un lote comparten el mismo pool
+
+Las instancias son thread-safe y pueden usarse desde múltiples hilos.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..interfaces.llm_provider import ILLMProvider
+from .openai_provider import OpenAIProvider
+from .llm_response_cache import response_cache_from_env
+from .rate_limiter import rate_limiter_from_env
+from .retry_policy import circuit_breaker_from_env, retry_policy_from_env
+from .hedging import hedging_policy_from_env
+from .llm_router import llm_router_factory_from_env
+from .single_flight import SingleFlight
+from .usage_meter import usage_meter_from_env
+
+
+ProviderKey = Tuple[str, str, int, Optional[str]]
+
+
+class ProviderRegistry:
+    """
+    Registro thread-safe de providers LLM reutilizables.
+
+    Ejemplo:
+        >>> registry = ProviderRegistry(enable_logging=False)
+        >>> provider = registry.get(api_key, "openai/gpt-4o-mini")
+        >>> provider is registry.get(api_key, "openai/gpt-4o-mini")
+        True
+    """
+
+    def __init__(
+        self,
+        provider_factory: Optional[Callable[..., ILLMProvider]] = None,
+        **provider_options: Any
+    ):
+        """
+        Inicializa el registro.
+
+        Args:
+            provider_factory: Callable que construye providers (default: OpenAIProvider).
+                Recibe api_key, default_model, timeout, api_base y provider_options.
+            **provider_options: Opciones adicionales para cada provider nuevo
+                (ej: enable_logging, max_retries, pool_connections)
+        """
+        self._provider_factory = provider_factory or OpenAIProvider
+        self._provider_options: Dict[str, Any] = dict(provider_options)
+        self._providers: Dict[ProviderKey, ILLMProvider] = {}
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0}
+
+    def get(
+        self,
+        api_key: Optional[str],
+        model: str,
+        timeout: int = 60,
+        api_base: Optional[str] = None
+    ) -> ILLMProvider:
+        """
+        Obtiene el provider para (api_key, model, timeout), creándolo si no existe.
+
+        Args:
+            api_key: API key (None = variable de entorno)
+            model: Modelo por defecto del provider
+            timeout: Timeout en segundos
+            api_base: URL base de endpoint compatible con OpenAI (opcional)
+
+        Returns:
+            Provider compartido y thread-safe
+        """
+        key = self._make_key(api_key, model, timeout, api_base)
+
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is not None:
+                self._stats["reused"] += 1
+                return provider
+
+            provider = self._provider_factory(
+                api_key=api_key,
+                default_model=model,
+                timeout=timeout,
+                api_base=api_base,
+                **self._provider_options
+            )
+            self._providers[key] = provider
+            self._stats["created"] += 1
+            return provider
+
+    def configure(self, **provider_options: Any) -> None:
+        """
+        Actualiza opciones de los providers.
+
+        Las opciones se aplican a los providers nuevos y, como atributo,
+        a los ya existentes en el pool.
+
+        Args:
+            **provider_options: Opciones a actualizar (ej: enable_logging=False)
+        """
+        with self._lock:
+            self._provider_options.update(provider_options)
+            for provider in self._providers.values():
+                for name, value in provider_options.items():
+                    if hasattr(provider, name):
+                        setattr(provider, name, value)
+
+    def get_option(self, name: str, default: Any = None) -> Any:
+        """
+        Obtiene una opción configurada para los providers.
+
+        Args:
+            name: Nombre de la opción (ej: "usage_meter")
+            default: Valor si no está configurada
+
+        Returns:
+            Valor de la opción
+        """
+        with self._lock:
+            return self._provider_options.get(name, default)
+
+    def get_provider_factory(self) -> Callable[..., ILLMProvider]:
+        """Retorna la factory de providers actual (para restaurarla después)"""
+        with self._lock:
+            return self._provider_factory
+
+    def set_provider_factory(self, provider_factory: Optional[Callable[..., ILLMProvider]]) -> None:
+        """
+        Reemplaza la factory de providers y vacía el pool.
+
+        Útil para inyectar providers alternativos (ej: fakes para benchmarks).
+
+        Args:
+            provider_factory: Nueva factory (None = OpenAIProvider)
+        """
+        self.clear()
+        with self._lock:
+            self._provider_factory = provider_factory or OpenAIProvider
+
+    def clear(self) -> None:
+        """Cierra y elimina todos los providers del pool"""
+        with self._lock:
+            providers = list(self._providers.values())
+            self._providers.clear()
+
+        for provider in providers:
+            close = getattr(provider, "close", None)
+            if callable(close):
+                close()
+
+    async def aclose(self) -> None:
+        """
+        Cierra y elimina todos los providers del pool desde un event loop.
+
+        Como clear(), pero espera el cierre de los clientes asíncronos del
+        loop actual (aclose de cada provider que lo tenga). Usar al terminar
+        código asíncrono, antes de que su event loop se cierre.
+        """
+        with self._lock:
+            providers = list(self._providers.values())
+            self._providers.clear()
+
+        for provider in providers:
+            aclose = getattr(provider, "aclose", None)
+            close = getattr(provider, "close", None)
+            if callable(aclose):
+                await aclose()
+            elif callable(close):
+                close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del pool.
+
+        Incluye las estadísticas de los componentes compartidos configurados
+        (ej: response_cache, rate_limiter, single_flight, usage_meter).
+
+        Returns:
+            Dict con providers activos, creados, reutilizados y stats de componentes
+        """
+        with self._lock:
+            stats = {
+                "active_providers": len(self._providers),
+                "created": self._stats["created"],
+                "reused": self._stats["reused"]
+            }
+            components = dict(self._provider_options)
+
+        for name, component in components.items():
+            get_stats = getattr(component, "get_stats", None)
+            if callable(get_stats):
+                stats[name] = get_stats()
+
+        return stats
+
+    @staticmethod
+    def _make_key(
+        api_key: Optional[str],
+        model: str,
+        timeout: int,
+        api_base: Optional[str]
+    ) -> ProviderKey:
+        """Construye la llave del pool sin guardar la API key en claro"""
+        key_digest = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else ""
+        return (key_digest, model, timeout, api_base)
+
+
+# Registro por defecto del proceso:
+# - Un único rate limiter y una única capa single-flight compartidos por todos sus providers
+# - Cache de respuestas si APF_LLM_CACHE_DIR está definido
+# - Un único medidor de tokens/costo (presupuestos vía usage_meter.use_ledger)
+# - Una política de reintentos y un circuit breaker compartidos (el endpoint es uno)
+# - Hedging de requests lentos si APF_LLM_HEDGE_PERCENTILE está definido
+# - Router entre varios endpoints si APF_LLM_ENDPOINTS está definido
+_default_registry = ProviderRegistry(
+    provider_factory=llm_router_factory_from_env(),
+    response_cache=response_cache_from_env(),
+    rate_limiter=rate_limiter_from_env(),
+    single_flight=SingleFlight(),
+    usage_meter=usage_meter_from_env(),
+    structured_output=os.getenv("APF_LLM_STRUCTURED_OUTPUT", "auto"),
+    retry_policy=retry_policy_from_env(),
+    circuit_breaker=circuit_breaker_from_env(),
+    hedging=hedging_policy_from_env()
+)
+
+
+def get_default_registry() -> ProviderRegistry:
+    """Retorna el registro de providers compartido por todo el proceso"""
+    return _default_registry
+
+
+def get_pooled_provider(
+    api_key: Optional[str] = None,
+    model: str = "openai/gpt-4o",
+    timeout: int = 60,
+    api_base: Optional[str] = None
+) -> ILLMProvider:
+    """
+    Obtiene un provider de larga vida del registro por defecto.
+
+    Args:
+        api_key: API key (None = variable de entorno)
+        model: Modelo por defecto
+        timeout: Timeout en segundos
+        api_base: URL base de endpoint compatible con OpenAI (opcional)
+
+    Returns:
+        Provider compartido y thread-safe
+    """
+    return _default_registry.get(api_key, model, timeout, api_base)
+
+
+def configure_provider_pool(**provider_options: Any) -> None:
+    """
+    Configura las opciones de los providers del registro por defecto.
+
+    Args:
+        **provider_options: Opciones (ej: enable_logging=False, retry_policy=RetryPolicy(max_attempts=2))
+    """
+    _default_registry.configure(**provider_options)
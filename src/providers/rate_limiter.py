@@ -0,0 +1,314 @@
+"""
+Adaptive Rate Limiter - Control de cuota y concurrencia para llamadas LLM
+
+Un único limitador compartido por todos los providers del registro:
+- Token buckets de requests/minuto y tokens/minuto (cuotas del proveedor)
+- Concurrencia adaptativa AIMD: incremento aditivo con cada éxito y
+  decremento multiplicativo ante LLMProviderRateLimitError
+- Respeta los hints Retry-After del servidor: ninguna llamada sale antes
+  de que venza la pausa indicada
+
+Así, al empujar lotes grandes, el throughput se mantiene cerca de la cuota
+sin quedarse ocioso ni provocar estampidas de reintentos.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket simple (no thread-safe; lo protege AdaptiveRateLimiter).
+
+    Permite deuda: una reserva que excede el saldo se concede y el tiempo de
+    espera se calcula a partir del saldo negativo resultante.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Args:
+            capacity: Saldo máximo (ráfaga permitida)
+            refill_per_second: Recarga por segundo
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._updated_at = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos hasta poder reservar `amount` (0 = disponible ya)"""
+        self._refill()
+        if self.level >= min(amount, self.capacity):
+            return 0.0
+        return (min(amount, self.capacity) - self.level) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        """Reserva `amount` del saldo"""
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Devuelve saldo (ej: tokens estimados de más)"""
+        self.level = min(self.capacity, self.level + amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+
+class AdaptiveRateLimiter:
+    """
+    Limitador de cuota con concurrencia adaptativa (AIMD).
+
+    Uso desde un provider:
+        >>> permit = limiter.acquire(estimated_tokens)
+        >>> try:
+        ...     response = completion(...)
+        ...     limiter.release(permit, tokens_used=response_tokens)
+        ... except LLMProviderRateLimitError as e:
+        ...     limiter.release(permit, rate_limited=True, retry_after=e.retry_after)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0
+    ):
+        """
+        Inicializa el limitador.
+
+        Args:
+            requests_per_minute: Cuota de requests/minuto (None = sin límite)
+            tokens_per_minute: Cuota de tokens/minuto (None = sin límite)
+            initial_concurrency: Llamadas simultáneas iniciales
+            min_concurrency: Piso de concurrencia
+            max_concurrency: Techo de concurrencia
+            increase_step: Incremento aditivo por "ventana" de éxitos
+                (se suma increase_step / limite_actual en cada éxito)
+            decrease_factor: Factor multiplicativo ante rate limit
+            decrease_cooldown: Segundos mínimos entre decrementos (una ráfaga
+                de 429 de la misma ventana cuenta como un solo evento)
+        """
+        self.requests_bucket = (
+            TokenBucket(requests_per_minute / 60.0 * 5, requests_per_minute / 60.0)
+            if requests_per_minute else None
+        )
+        self.tokens_bucket = (
+            TokenBucket(tokens_per_minute / 60.0 * 5, tokens_per_minute / 60.0)
+            if tokens_per_minute else None
+        )
+
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+
+        self.concurrency_limit = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+
+        self._cond = threading.Condition()
+        self._stats = {
+            "acquired": 0,
+            "successes": 0,
+            "failures": 0,
+            "rate_limited": 0,
+            "decreases": 0,
+            "wait_seconds": 0.0,
+            "retry_after_honored": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Adquisición
+    # ------------------------------------------------------------------
+
+    def acquire(self, estimated_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Bloquea hasta que haya cuota y lugar de concurrencia.
+
+        Args:
+            estimated_tokens: Tokens estimados de la llamada (prompt + max_tokens)
+
+        Returns:
+            Permiso a entregar en release()
+        """
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire(estimated_tokens)
+                if wait <= 0:
+                    break
+                self._cond.wait(timeout=wait)
+            self._stats["wait_seconds"] += time.monotonic() - start
+
+        return {"estimated_tokens": estimated_tokens}
+
+    async def aacquire(self, estimated_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Versión asíncrona de acquire() (no bloquea el event loop).
+
+        Args:
+            estimated_tokens: Tokens estimados de la llamada
+
+        Returns:
+            Permiso a entregar en release()
+        """
+        start = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(estimated_tokens)
+                if wait <= 0:
+                    self._stats["wait_seconds"] += time.monotonic() - start
+                    break
+            await asyncio.sleep(min(wait, 0.05))
+
+        return {"estimated_tokens": estimated_tokens}
+
+    def release(
+        self,
+        permit: Dict[str, Any],
+        success: bool = True,
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+        tokens_used: Optional[int] = None
+    ) -> None:
+        """
+        Libera el lugar de concurrencia y ajusta el límite (AIMD).
+
+        Args:
+            permit: Permiso devuelto por acquire()
+            success: Si la llamada fue exitosa
+            rate_limited: Si la llamada falló por rate limit (429)
+            retry_after: Pausa sugerida por el servidor (segundos)
+            tokens_used: Tokens reales consumidos (corrige la estimación)
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+
+            if tokens_used is not None and self.tokens_bucket is not None:
+                self.tokens_bucket.refund(permit.get("estimated_tokens", 0) - tokens_used)
+
+            if rate_limited:
+                self._on_rate_limit(retry_after)
+            elif success:
+                self._stats["successes"] += 1
+                self.concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self.concurrency_limit + self.increase_step / self.concurrency_limit
+                )
+            else:
+                self._stats["failures"] += 1
+
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del limitador.
+
+        Returns:
+            Dict con límite actual, llamadas en vuelo y contadores
+        """
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "in_flight": self._in_flight,
+                "blocked_for": max(0.0, self._blocked_until - time.monotonic()),
+                **self._stats
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (llamar con self._cond tomado)
+    # ------------------------------------------------------------------
+
+    def _try_acquire(self, estimated_tokens: int) -> float:
+        """Intenta tomar un lugar; retorna 0 si lo obtuvo o segundos a esperar"""
+        now = time.monotonic()
+        if self._blocked_until > now:
+            return self._blocked_until - now
+
+        if self._in_flight >= int(self.concurrency_limit):
+            # Se despierta con notify_all() al liberar; el timeout es de seguridad
+            return 0.05
+
+        wait = 0.0
+        if self.requests_bucket is not None:
+            wait = max(wait, self.requests_bucket.wait_time(1))
+        if self.tokens_bucket is not None and estimated_tokens:
+            wait = max(wait, self.tokens_bucket.wait_time(estimated_tokens))
+        if wait > 0:
+            return wait
+
+        if self.requests_bucket is not None:
+            self.requests_bucket.consume(1)
+        if self.tokens_bucket is not None and estimated_tokens:
+            self.tokens_bucket.consume(estimated_tokens)
+
+        self._in_flight += 1
+        self._stats["acquired"] += 1
+        return 0.0
+
+    def _on_rate_limit(self, retry_after: Optional[float]) -> None:
+        """Decremento multiplicativo y pausa global por Retry-After"""
+        now = time.monotonic()
+        self._stats["rate_limited"] += 1
+
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self.concurrency_limit = max(
+                float(self.min_concurrency),
+                self.concurrency_limit * self.decrease_factor
+            )
+            self._last_decrease = now
+            self._stats["decreases"] += 1
+
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._stats["retry_after_honored"] += 1
+
+
+def estimate_request_tokens(prompt: str, system_message: Optional[str], max_tokens: int) -> int:
+    """
+    Estimación barata de tokens de una llamada (~4 caracteres por token).
+
+    Args:
+        prompt: Prompt del usuario
+        system_message: Mensaje de sistema (opcional)
+        max_tokens: Tokens máximos de salida
+
+    Returns:
+        Tokens estimados (entrada + salida máxima)
+    """
+    chars = len(prompt or "") + len(system_message or "")
+    return chars // 4 + max_tokens
+
+
+def rate_limiter_from_env() -> AdaptiveRateLimiter:
+    """
+    Construye el limitador compartido a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_RPM: Cuota de requests/minuto (default: sin límite)
+        APF_LLM_TPM: Cuota de tokens/minuto (default: sin límite)
+        APF_LLM_MAX_CONCURRENCY: Techo de concurrencia (default 64)
+
+    Returns:
+        AdaptiveRateLimiter (la concurrencia AIMD y Retry-After siempre aplican)
+    """
+    rpm = os.getenv("APF_LLM_RPM")
+    tpm = os.getenv("APF_LLM_TPM")
+    return AdaptiveRateLimiter(
+        requests_per_minute=float(rpm) if rpm else None,
+        tokens_per_minute=float(tpm) if tpm else None,
+        max_concurrency=int(os.getenv("APF_LLM_MAX_CONCURRENCY", "64"))
+    )
@@ -0,0 +1,390 @@
+"""
+Retry Policy - Reintentos clasificados y circuit breaker para llamadas LLM
+
+RetryPolicy decide, por intento, si un error se reintenta y cuánto esperar:
+- Errores no reintentables (autenticación, request inválido, presupuesto,
+  circuito abierto) fallan de inmediato
+- Backoff exponencial con full jitter (espera uniforme en [0, base·2^n]),
+  respetando Retry-After de los 429
+- Timeout por intento acotado por un deadline total por llamada
+
+CircuitBreaker se comparte entre todos los providers del registro: tras N
+fallas consecutivas del endpoint (timeouts, 5xx, conexión) se abre y todas
+las llamadas fallan de inmediato con LLMProviderCircuitOpenError hasta que
+vence la pausa; entonces admite una llamada de prueba (half-open) que lo
+cierra o lo vuelve a abrir. Las transiciones quedan en get_stats().
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from ..interfaces.llm_provider import (
+    LLMProviderError,
+    LLMProviderAuthError,
+    LLMProviderBadRequestError,
+    LLMProviderBudgetError,
+    LLMProviderCircuitOpenError,
+    LLMProviderJSONError,
+    LLMProviderRateLimitError,
+    LLMProviderTimeoutError
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Errores en los que otro intento no cambia el resultado
+NON_RETRYABLE_ERRORS: Tuple[Type[LLMProviderError], ...] = (
+    LLMProviderAuthError,
+    LLMProviderBadRequestError,
+    LLMProviderBudgetError,
+    LLMProviderCircuitOpenError,
+    LLMProviderJSONError
+)
+
+
+class RetryPolicy:
+    """
+    Política de reintentos con clasificación de errores, full jitter y deadline.
+
+    Ejemplo:
+        >>> policy = RetryPolicy(max_attempts=4, deadline=120)
+        >>> started = time.monotonic()
+        >>> delay = policy.next_delay(attempt=0, error=error, started_at=started)
+        >>> if delay is None: raise error
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: Optional[float] = None,
+        non_retryable: Tuple[Type[LLMProviderError], ...] = NON_RETRYABLE_ERRORS,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Args:
+            max_attempts: Intentos máximos por llamada (incluye el primero)
+            base_delay: Espera base del backoff exponencial (segundos)
+            max_delay: Tope de la espera entre intentos (segundos)
+            deadline: Tiempo total máximo por llamada, incluidos reintentos
+                y esperas (segundos, None = sin deadline)
+            non_retryable: Tipos de error que no se reintentan
+            rng: Generador aleatorio del jitter (inyectable para pruebas)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.non_retryable = non_retryable
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats = {
+            "retries": 0,
+            "non_retryable": 0,
+            "exhausted": 0,
+            "deadline_exceeded": 0
+        }
+
+    def is_retryable(self, error: Exception) -> bool:
+        """True si vale la pena otro intento ante este error"""
+        return not isinstance(error, self.non_retryable)
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Espera antes del intento attempt + 1.
+
+        Retry-After del servidor (429) tiene prioridad; si no, full jitter:
+        uniforme en [0, min(max_delay, base_delay · 2^attempt)].
+        """
+        if isinstance(error, LLMProviderRateLimitError) and error.retry_after:
+            return error.retry_after
+
+        with self._lock:
+            return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def remaining(self, started_at: float) -> Optional[float]:
+        """Segundos que quedan del deadline (None = sin deadline)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() - started_at)
+
+    def attempt_timeout(self, timeout: float, started_at: float) -> float:
+        """
+        Timeout del siguiente intento: el del provider, acotado por el deadline.
+
+        Raises:
+            LLMProviderTimeoutError: Si el deadline ya se agotó
+        """
+        remaining = self.remaining(started_at)
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            self._count("deadline_exceeded")
+            raise LLMProviderTimeoutError(f"Deadline de {self.deadline:.0f}s agotado antes de enviar la llamada")
+        return min(timeout, remaining)
+
+    def next_delay(self, attempt: int, error: Exception, started_at: float) -> Optional[float]:
+        """
+        Decide si se reintenta tras el intento attempt (desde 0) fallido.
+
+        Args:
+            attempt: Intento que falló
+            error: Error clasificado del intento
+            started_at: time.monotonic() al inicio de la llamada
+
+        Returns:
+            Segundos a esperar antes de reintentar, o None si no se reintenta
+        """
+        if not self.is_retryable(error):
+            self._count("non_retryable")
+            return None
+
+        if attempt + 1 >= self.max_attempts:
+            self._count("exhausted")
+            return None
+
+        delay = self.backoff(attempt, error)
+        remaining = self.remaining(started_at)
+        if remaining is not None and delay >= remaining:
+            self._count("deadline_exceeded")
+            return None
+
+        self._count("retries")
+        return delay
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de la política.
+
+        Returns:
+            Dict con configuración y contadores de reintentos, errores no
+            reintentables, intentos agotados y deadlines excedidos
+        """
+        with self._lock:
+            return {
+                "max_attempts": self.max_attempts,
+                "deadline": self.deadline,
+                **self._stats
+            }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker compartido (closed → open → half_open → closed).
+
+    Solo cuentan como falla los errores que indican un endpoint caído o
+    degradado (timeouts y errores genéricos: 5xx, conexión). Una respuesta
+    de error del servidor (401, 400, 429) demuestra que el endpoint está
+    arriba y cuenta como éxito.
+
+    Ejemplo:
+        >>> breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30)
+        >>> breaker.before_call()       # lanza LLMProviderCircuitOpenError si está abierto
+        >>> breaker.record(error)       # error=None para éxito
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # Transiciones recientes conservadas en get_stats()
+    MAX_TRANSITIONS = 50
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "llm"
+    ):
+        """
+        Args:
+            failure_threshold: Fallas consecutivas que abren el circuito
+            recovery_timeout: Segundos abierto antes de admitir una prueba
+            half_open_max_calls: Llamadas de prueba simultáneas en half_open
+            name: Nombre del endpoint (logs y métricas)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._transitions: List[Dict[str, Any]] = []
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+            "half_opened": 0,
+            "closed": 0
+        }
+
+    @property
+    def state(self) -> str:
+        """Estado actual (pasa a half_open si ya venció la pausa)"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Admite o rechaza una llamada.
+
+        Raises:
+            LLMProviderCircuitOpenError: Si el circuito está abierto, o en
+                half_open con las llamadas de prueba ya en vuelo
+        """
+        with self._lock:
+            self._maybe_half_open()
+
+            if self._state == self.CLOSED:
+                return
+
+            if self._state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return
+
+            self._stats["rejected"] += 1
+            retry_after = max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+        raise LLMProviderCircuitOpenError(
+            f"Circuit breaker '{self.name}' abierto tras {self.failure_threshold} fallas consecutivas",
+            retry_after=retry_after
+        )
+
+    def record(self, error: Optional[Exception]) -> None:
+        """
+        Registra el resultado de una llamada admitida por before_call().
+
+        Args:
+            error: Error clasificado de la llamada, o None si tuvo éxito
+        """
+        failed = error is not None and self.is_failure(error)
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+            if not failed:
+                self._stats["successes"] += 1
+                self._consecutive_failures = 0
+                if self._state == self.HALF_OPEN:
+                    self._transition(self.CLOSED)
+                return
+
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    @staticmethod
+    def is_failure(error: Exception) -> bool:
+        """True si el error indica endpoint caído o degradado"""
+        if isinstance(error, LLMProviderTimeoutError):
+            return True
+        return type(error) is LLMProviderError
+
+    def reset(self) -> None:
+        """Cierra el circuito y limpia el conteo de fallas"""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._half_open_in_flight = 0
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del breaker.
+
+        Returns:
+            Dict con estado, fallas consecutivas, contadores por transición
+            (opened / half_opened / closed), llamadas rechazadas y las
+            transiciones recientes (estado origen/destino y timestamp)
+        """
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._stats,
+                "transitions": list(self._transitions)
+            }
+
+    # ------------------------------------------------------------------
+    # Internos (llamar con self._lock tomado)
+    # ------------------------------------------------------------------
+
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._half_open_in_flight = 0
+            self._transition(self.HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        self._stats[{self.OPEN: "opened", self.HALF_OPEN: "half_opened", self.CLOSED: "closed"}[state]] += 1
+        self._transitions.append({"from": previous, "to": state, "at": time.time()})
+        del self._transitions[:-self.MAX_TRANSITIONS]
+
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"[CircuitBreaker] '{self.name}': {previous} -> {state}")
+
+
+def retry_policy_from_env() -> RetryPolicy:
+    """
+    Construye la política de reintentos a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_MAX_ATTEMPTS: Intentos por llamada (default 3)
+        APF_LLM_RETRY_BASE_DELAY: Espera base del backoff en segundos (default 1)
+        APF_LLM_RETRY_MAX_DELAY: Tope de espera entre intentos (default 30)
+        APF_LLM_CALL_DEADLINE: Tiempo total máximo por llamada (default: sin deadline)
+
+    Returns:
+        RetryPolicy
+    """
+    deadline = os.getenv("APF_LLM_CALL_DEADLINE")
+    return RetryPolicy(
+        max_attempts=int(os.getenv("APF_LLM_MAX_ATTEMPTS", "3")),
+        base_delay=float(os.getenv("APF_LLM_RETRY_BASE_DELAY", "1")),
+        max_delay=float(os.getenv("APF_LLM_RETRY_MAX_DELAY", "30")),
+        deadline=float(deadline) if deadline else None
+    )
+
+
+def circuit_breaker_from_env() -> Optional[CircuitBreaker]:
+    """
+    Construye el circuit breaker compartido a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_CIRCUIT_FAILURES: Fallas consecutivas que abren el circuito
+            (default 5; 0 desactiva el breaker)
+        APF_LLM_CIRCUIT_RECOVERY: Segundos abierto antes de la prueba (default 30)
+
+    Returns:
+        CircuitBreaker, o None si está desactivado
+    """
+    failures = int(os.getenv("APF_LLM_CIRCUIT_FAILURES", "5"))
+    if failures <= 0:
+        return None
+    return CircuitBreaker(
+        failure_threshold=failures,
+        recovery_timeout=float(os.getenv("APF_LLM_CIRCUIT_RECOVERY", "30"))
+    )
@@ -0,0 +1,151 @@
+"""
+Single Flight - Coalescencia de llamadas LLM idénticas en vuelo
+
+Cuando varios puestos de un lote comparten el mismo verbo o texto de
+función, varios hilos (o tareas async) pueden lanzar el mismo prompt antes
+de que cualquier cache se haya poblado. Con SingleFlight, la primera llamada
+con una llave dada ("líder") hace la petición real y las concurrentes con la
+misma llave esperan y comparten su resultado (o su excepción).
+
+No es un cache: en cuanto la llamada líder termina, la llave se libera.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """Llamada en vuelo (modo síncrono)"""
+
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalescencia de llamadas concurrentes con la misma llave.
+
+    Ejemplo:
+        >>> flight = SingleFlight()
+        >>> response = flight.do(key, lambda: provider_call(request))
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # Futures async por event loop (un Future pertenece a un solo loop)
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._stats = {"leaders": 0, "coalesced": 0, "errors_shared": 0}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Ejecuta func() una sola vez por llave entre los llamadores concurrentes.
+
+        Args:
+            key: Llave del request (ej: build_request_key)
+            func: Función que hace la llamada real
+
+        Returns:
+            Resultado de func() (compartido entre llamadores)
+
+        Raises:
+            La excepción de func(), también para los llamadores coalescidos
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.error is not None and call.waiters:
+                    self._stats["errors_shared"] += call.waiters
+            call.event.set()
+
+    async def ado(self, key: str, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Versión asíncrona de do() para tareas del mismo event loop.
+
+        Args:
+            key: Llave del request
+            coro_factory: Factory sin argumentos que retorna la corrutina real
+
+        Returns:
+            Resultado compartido
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            future = calls.get(key)
+            if future is None:
+                future = loop.create_future()
+                calls[key] = future
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            # shield: cancelar a un seguidor no cancela la llamada del líder
+            return await asyncio.shield(future)
+
+        try:
+            result = await coro_factory()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Evita "exception was never retrieved" si no hay seguidores
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._async_calls.get(loop, {}).pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas de coalescencia.
+
+        Returns:
+            Dict con llamadas líderes (reales), coalescidas (ahorradas) y en vuelo
+        """
+        with self._lock:
+            in_flight = len(self._calls) + sum(len(calls) for calls in self._async_calls.values())
+            total = self._stats["leaders"] + self._stats["coalesced"]
+            return {
+                **self._stats,
+                "in_flight": in_flight,
+                "coalesced_rate": self._stats["coalesced"] / total if total else 0.0
+            }
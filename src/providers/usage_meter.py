@@ -0,0 +1,422 @@
+"""
+Usage Meter - Medición de tokens, latencia y costo de llamadas LLM
+
+Cada llamada real del provider se registra como un LLMCallRecord (tokens de
+prompt, completion y cacheados, latencia y costo según una tabla de precios
+por modelo). Los registros se acumulan en:
+- UsageMeter: totales del proceso (compartido por los providers del registro)
+- UsageLedger activo: libro de uso del contexto actual (ContextVar), que a su
+  vez acumula en su padre. IntegratedValidator usa un ledger por puesto
+  anidado en uno por lote.
+
+Los ledgers pueden tener topes duros (BudgetLimits) de tokens o de costo.
+Antes de cada llamada real el provider verifica el presupuesto con una
+estimación de la llamada; si se excedería, la llamada no se envía y se lanza
+LLMProviderBudgetError.
+
+Reemplaza el análisis a posteriori de analizar_uso_tokens.py.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, Optional
+
+from ..interfaces.llm_provider import LLMProviderBudgetError, LLMRequest, LLMResponse
+from .rate_limiter import estimate_request_tokens
+
+
+# Precios en USD por millón de tokens (input, input cacheado, output)
+DEFAULT_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50},
+}
+
+
+@dataclass
+class LLMCallRecord:
+    """Registro de una llamada LLM"""
+    model: str
+    prompt_family: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    duration: float
+    cost: float
+    cache_hit: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class BudgetLimits:
+    """Topes duros de un presupuesto (None = sin tope)"""
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+
+    def is_unlimited(self) -> bool:
+        return self.max_tokens is None and self.max_cost is None
+
+
+class PriceTable:
+    """
+    Tabla de precios por modelo.
+
+    Los nombres se normalizan sin prefijo de proveedor ("openai/gpt-4o-mini"
+    -> "gpt-4o-mini") y, si no hay coincidencia exacta, se usa el prefijo más
+    largo (ej: "gpt-4o-mini-2024-07-18" -> "gpt-4o-mini").
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Args:
+            prices: Precios que se agregan o sobreescriben a DEFAULT_MODEL_PRICES
+        """
+        self.prices = {**DEFAULT_MODEL_PRICES, **(prices or {})}
+
+    def price_for(self, model: str) -> Optional[Dict[str, float]]:
+        """Precios del modelo o None si no está en la tabla"""
+        name = model.split("/", 1)[-1]
+        if name in self.prices:
+            return self.prices[name]
+
+        matches = [known for known in self.prices if name.startswith(known)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        """
+        Costo en USD de una llamada.
+
+        Returns:
+            Costo (0.0 si el modelo no tiene precio)
+        """
+        price = self.price_for(model)
+        if price is None:
+            return 0.0
+
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        return (
+            (prompt_tokens - cached_tokens) * price["input"]
+            + cached_tokens * price.get("cached_input", price["input"])
+            + completion_tokens * price["output"]
+        ) / 1_000_000
+
+
+class UsageLedger:
+    """
+    Libro de uso LLM de un ámbito (puesto, lote...) con topes opcionales.
+
+    Thread-safe. Cada registro se acumula también en el ledger padre, igual
+    que las llamadas fallidas (record_failure): un ámbito con fallas tiene
+    resultados de respaldo, no evaluaciones del LLM.
+
+    Ejemplo:
+        >>> batch = UsageLedger("lote", BudgetLimits(max_cost=5.0))
+        >>> with use_ledger(UsageLedger("puesto:ABC", parent=batch)):
+        ...     validator.validate_puesto(puesto)
+    """
+
+    def __init__(self, name: str, limits: Optional[BudgetLimits] = None, parent: Optional["UsageLedger"] = None):
+        """
+        Args:
+            name: Nombre del ámbito (aparece en errores y resúmenes)
+            limits: Topes de tokens/costo (None = sin tope)
+            parent: Ledger que acumula también este uso
+        """
+        self.name = name
+        self.limits = limits or BudgetLimits()
+        self.parent = parent
+
+        self._lock = threading.Lock()
+        self._totals = {
+            "calls": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "cost": 0.0,
+            "duration": 0.0
+        }
+        self._by_model: Dict[str, Dict[str, Any]] = {}
+        self._by_family: Dict[str, Dict[str, Any]] = {}
+        self._failures: Dict[str, int] = {}
+        self.refused_calls = 0
+        self.exceeded_reason: Optional[str] = None
+
+    def record(self, record: LLMCallRecord) -> None:
+        """Acumula un registro en este ledger y en sus ancestros"""
+        with self._lock:
+            self._accumulate(self._totals, record)
+            self._accumulate(self._by_model.setdefault(record.model, self._empty_bucket()), record)
+            family = record.prompt_family or "sin_familia"
+            self._accumulate(self._by_family.setdefault(family, self._empty_bucket()), record)
+
+        if self.parent is not None:
+            self.parent.record(record)
+
+    def record_failure(self, kind: str) -> None:
+        """
+        Cuenta una llamada LLM sin respuesta utilizable en este ledger y en sus ancestros.
+
+        Args:
+            kind: Tipo de falla ("error", "respuesta_invalida", "presupuesto",
+                "circuito_abierto", "diferida")
+        """
+        with self._lock:
+            self._failures[kind] = self._failures.get(kind, 0) + 1
+
+        if self.parent is not None:
+            self.parent.record_failure(kind)
+
+    @property
+    def failed_calls(self) -> int:
+        """Llamadas LLM fallidas en este ámbito (el validador usó su respaldo)"""
+        with self._lock:
+            return sum(self._failures.values())
+
+    def check(self, estimated_tokens: int = 0, estimated_cost: float = 0.0) -> None:
+        """
+        Verifica que una llamada con el uso estimado quepa en el presupuesto.
+
+        Raises:
+            LLMProviderBudgetError: Si este ledger o un ancestro excedería su tope
+        """
+        reason = self._would_exceed(estimated_tokens, estimated_cost)
+        if reason is None and self.parent is not None:
+            try:
+                self.parent.check(estimated_tokens, estimated_cost)
+            except LLMProviderBudgetError as e:
+                self._refuse(str(e))
+                raise
+
+        if reason is not None:
+            self._refuse(reason)
+            raise LLMProviderBudgetError(reason, scope=self.name)
+
+    def is_exhausted(self) -> bool:
+        """True si este ledger o un ancestro ya rechazó llamadas por presupuesto"""
+        if self.exceeded_reason is not None:
+            return True
+        return self.parent.is_exhausted() if self.parent is not None else False
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Resumen del uso acumulado.
+
+        Returns:
+            Dict con totales, desglose por modelo y por familia de prompt,
+            topes, llamadas rechazadas y llamadas fallidas por tipo
+        """
+        with self._lock:
+            return {
+                "ambito": self.name,
+                **self._rounded(self._totals),
+                "por_modelo": {model: self._rounded(bucket) for model, bucket in self._by_model.items()},
+                "por_familia": {family: self._rounded(bucket) for family, bucket in self._by_family.items()},
+                "limites": asdict(self.limits),
+                "llamadas_rechazadas": self.refused_calls,
+                "presupuesto_excedido": self.exceeded_reason,
+                "llamadas_fallidas": sum(self._failures.values()),
+                "fallas_por_tipo": dict(self._failures)
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _would_exceed(self, estimated_tokens: int, estimated_cost: float) -> Optional[str]:
+        """Motivo si la llamada estimada excedería un tope de este ledger"""
+        with self._lock:
+            tokens = self._totals["total_tokens"]
+            cost = self._totals["cost"]
+
+        if self.limits.max_tokens is not None and tokens + estimated_tokens > self.limits.max_tokens:
+            return (
+                f"Presupuesto de tokens agotado en '{self.name}': "
+                f"{tokens} usados + {estimated_tokens} estimados > {self.limits.max_tokens}"
+            )
+        if self.limits.max_cost is not None and cost + estimated_cost > self.limits.max_cost:
+            return (
+                f"Presupuesto de costo agotado en '{self.name}': "
+                f"${cost:.4f} usados + ${estimated_cost:.4f} estimados > ${self.limits.max_cost:.4f}"
+            )
+        return None
+
+    def _refuse(self, reason: str) -> None:
+        with self._lock:
+            self.refused_calls += 1
+            if self.exceeded_reason is None:
+                self.exceeded_reason = reason
+
+    @staticmethod
+    def _rounded(bucket: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: round(value, 6) if isinstance(value, float) else value for key, value in bucket.items()}
+
+    @staticmethod
+    def _empty_bucket() -> Dict[str, Any]:
+        return {"calls": 0, "cache_hits": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                "completion_tokens": 0, "total_tokens": 0, "cost": 0.0, "duration": 0.0}
+
+    @staticmethod
+    def _accumulate(bucket: Dict[str, Any], record: LLMCallRecord) -> None:
+        bucket["calls"] += 1
+        bucket["cache_hits"] += int(record.cache_hit)
+        bucket["prompt_tokens"] += record.prompt_tokens
+        bucket["cached_tokens"] += record.cached_tokens
+        bucket["completion_tokens"] += record.completion_tokens
+        bucket["total_tokens"] += record.total_tokens
+        bucket["cost"] += record.cost
+        bucket["duration"] += record.duration
+
+
+# Ledger activo del contexto actual (hilo o tarea async)
+_current_ledger: contextvars.ContextVar = contextvars.ContextVar("apf_llm_usage_ledger", default=None)
+
+
+def current_ledger() -> Optional[UsageLedger]:
+    """Ledger activo del contexto actual (o None)"""
+    return _current_ledger.get()
+
+
+@contextmanager
+def use_ledger(ledger: UsageLedger) -> Iterator[UsageLedger]:
+    """
+    Activa un ledger para las llamadas LLM del bloque.
+
+    El ledger se propaga a tareas asyncio creadas dentro del bloque; para
+    hilos nuevos hay que copiar el contexto (contextvars.copy_context()).
+    """
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+class UsageMeter:
+    """
+    Medidor de uso LLM compartido por los providers.
+
+    El provider llama check_budget() antes de cada llamada real y record()
+    después de cada respuesta (incluidas las servidas desde cache local, que
+    se registran sin tokens ni costo).
+    """
+
+    def __init__(self, price_table: Optional[PriceTable] = None):
+        """
+        Args:
+            price_table: Tabla de precios (default: DEFAULT_MODEL_PRICES)
+        """
+        self.price_table = price_table or PriceTable()
+        self.totals = UsageLedger("proceso")
+
+    def check_budget(self, request: LLMRequest, model: str) -> None:
+        """
+        Verifica el presupuesto del ledger activo con una estimación de la llamada.
+
+        Raises:
+            LLMProviderBudgetError: Si la llamada excedería algún tope
+        """
+        ledger = current_ledger()
+        if ledger is None:
+            return
+
+        prompt_tokens = estimate_request_tokens(request.prompt, request.system_message, 0)
+        estimated_cost = self.price_table.cost(model, prompt_tokens, request.max_tokens)
+        ledger.check(prompt_tokens + request.max_tokens, estimated_cost)
+
+    def record(
+        self,
+        response: LLMResponse,
+        model: str,
+        prompt_family: Optional[str] = None,
+        cache_hit: bool = False
+    ) -> LLMCallRecord:
+        """
+        Registra una llamada en los totales del proceso y en el ledger activo.
+
+        Args:
+            response: Respuesta de la llamada
+            model: Modelo resuelto
+            prompt_family: Familia del prompt (request.metadata["prompt_family"])
+            cache_hit: Si la respuesta vino del cache local (sin tokens ni costo)
+
+        Returns:
+            LLMCallRecord registrado
+        """
+        tokens = response.tokens_used or {}
+        prompt_tokens = 0 if cache_hit else tokens.get("prompt", 0)
+        completion_tokens = 0 if cache_hit else tokens.get("completion", 0)
+        cached_tokens = 0 if cache_hit else tokens.get("cached", 0)
+
+        record = LLMCallRecord(
+            model=model,
+            prompt_family=prompt_family,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            duration=(response.metadata or {}).get("duration", 0.0),
+            cost=self.price_table.cost(model, prompt_tokens, completion_tokens, cached_tokens),
+            cache_hit=cache_hit
+        )
+
+        self.totals.record(record)
+        ledger = current_ledger()
+        if ledger is not None:
+            ledger.record(record)
+
+        return record
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Totales del proceso (ver UsageLedger.get_summary)"""
+        return self.totals.get_summary()
+
+
+def usage_meter_from_env() -> UsageMeter:
+    """
+    Construye el medidor compartido a partir de variables de entorno.
+
+    Variables:
+        APF_LLM_PRICES_FILE: JSON {"modelo": {"input", "cached_input", "output"}}
+            en USD por millón de tokens; se combina con DEFAULT_MODEL_PRICES
+
+    Returns:
+        UsageMeter
+    """
+    prices = None
+    prices_file = os.getenv("APF_LLM_PRICES_FILE")
+    if prices_file:
+        with open(prices_file, "r", encoding="utf-8") as f:
+            prices = json.load(f)
+
+    return UsageMeter(PriceTable(prices))
+
+
+def budget_limits_from_env(scope: str) -> BudgetLimits:
+    """
+    Topes de presupuesto a partir de variables de entorno.
+
+    Variables (scope = "BATCH" o "POSITION"):
+        APF_LLM_<scope>_MAX_TOKENS: Tope de tokens
+        APF_LLM_<scope>_MAX_COST: Tope de costo en USD
+
+    Returns:
+        BudgetLimits (sin topes si las variables no están definidas)
+    """
+    max_tokens = os.getenv(f"APF_LLM_{scope}_MAX_TOKENS")
+    max_cost = os.getenv(f"APF_LLM_{scope}_MAX_COST")
+    return BudgetLimits(
+        max_tokens=int(max_tokens) if max_tokens else None,
+        max_cost=float(max_cost) if max_cost else None
+    )
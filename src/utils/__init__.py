@@ -4,6 +4,9 @@ Utils - Utilidades compartidas
 Funciones y clases de utilidad:
 - text_processing: Procesamiento y limpieza de texto
 - json_helpers: Manejo de JSON
+- json_scanner: Extracción de JSON de respuestas LLM en tiempo lineal
+- batch_journal: Bitácora append-only para reanudar lotes interrumpidos
+- results_store: Almacén de resultados por hash de contenido (revalidación incremental)
 - stats_calculator: Cálculo de métricas y estadísticas
 - report_humanizer: Generación de reportes legibles
 - hierarchy_extractor: Extracción de jerarquías organizacionales
@@ -0,0 +1,174 @@
+"""
+Batch Journal - Bitácora append-only para reanudar lotes largos
+
+Registra en un archivo JSONL el resultado de cada puesto apenas termina
+(IntegratedValidator.validate_batch, SidegorBatchProcessor.procesar_lote).
+Si la sesión de Streamlit muere o el proceso se interrumpe, una corrida con
+resume=True omite los puestos ya completados y reconstruye el resultado
+consolidado desde la bitácora, sin repetir el trabajo LLM.
+
+- Cada línea: {"clave", "codigo", "hash_entrada", "registrado", "resultado"}
+- Clave = código del puesto + hash del contenido de entrada: si el puesto
+  (o la configuración incluida en el hash) cambia, se vuelve a procesar
+- Cada registro se escribe con flush + fsync; una última línea truncada por
+  una interrupción se ignora al cargar
+- Si una clave aparece varias veces, gana el último registro
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def input_hash(data: Any) -> str:
+    """
+    Hash estable del contenido de entrada de un puesto.
+
+    Args:
+        data: Datos serializables a JSON (valores no serializables como str)
+
+    Returns:
+        Primeros 16 caracteres hex del SHA-256 del JSON canónico
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchJournal:
+    """
+    Bitácora append-only (JSONL) de resultados de puestos de un lote.
+
+    Thread-safe: los workers de validate_batch pueden registrar en paralelo.
+
+    Ejemplo:
+        >>> journal = BatchJournal("output/journal/lote.jsonl", resume=True)
+        >>> cached = journal.get("27-100-1-M1C016P-0000001-E-X-V", puesto)
+        >>> if cached is None:
+        ...     journal.record("27-100-1-M1C016P-0000001-E-X-V", puesto, resultado)
+    """
+
+    def __init__(self, path: str, resume: bool = True):
+        """
+        Args:
+            path: Archivo JSONL de la bitácora (se crea si no existe)
+            resume: Si True, carga los registros existentes; si False, la
+                bitácora se reinicia (corrida nueva)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.skipped_lines = 0
+        self.hits = 0
+
+        if resume:
+            self._load()
+        elif self.path.exists():
+            self.path.write_text("", encoding="utf-8")
+
+    @staticmethod
+    def key(codigo: str, data: Any) -> str:
+        """Clave de un puesto: código + hash del contenido de entrada"""
+        return f"{codigo}:{input_hash(data)}"
+
+    def get(self, codigo: str, data: Any) -> Optional[Dict[str, Any]]:
+        """
+        Resultado registrado de un puesto con esta misma entrada.
+
+        Args:
+            codigo: Código del puesto
+            data: Contenido de entrada (el mismo que se pasó a record)
+
+        Returns:
+            Resultado registrado o None si el puesto no está completado
+        """
+        with self._lock:
+            entry = self._entries.get(self.key(codigo, data))
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry["resultado"]
+
+    def record(self, codigo: str, data: Any, resultado: Dict[str, Any]) -> None:
+        """
+        Agrega el resultado de un puesto completado a la bitácora.
+
+        Args:
+            codigo: Código del puesto
+            data: Contenido de entrada (define el hash de la clave)
+            resultado: Resultado del puesto (serializable a JSON)
+        """
+        entry = {
+            "clave": self.key(codigo, data),
+            "codigo": codigo,
+            "hash_entrada": input_hash(data),
+            "registrado": datetime.now().isoformat(),
+            "resultado": resultado
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[entry["clave"]] = entry
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Resultados registrados, en orden de registro (uno por clave)"""
+        with self._lock:
+            return [entry["resultado"] for entry in self._entries.values()]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.results())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la bitácora"""
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "registros": len(self._entries),
+                "reanudados": self.hits,
+                "lineas_descartadas": self.skipped_lines
+            }
+
+    def _load(self) -> None:
+        """Carga los registros existentes (descarta líneas truncadas o inválidas)"""
+        if not self.path.exists():
+            return
+
+        # Una interrupción a mitad de escritura deja la última línea sin salto:
+        # se cierra para que el siguiente registro empiece en línea propia
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._entries.pop(entry["clave"], None)
+                    self._entries[entry["clave"]] = entry
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    self.skipped_lines += 1
+                    logger.warning(f"[BatchJournal] Línea {line_number} inválida en {self.path} (descartada)")
+
+        logger.info(f"[BatchJournal] {len(self._entries)} puestos completados en {self.path}")
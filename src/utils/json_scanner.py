@@ -0,0 +1,155 @@
+"""
+JSON Scanner - Extracción de JSON de respuestas LLM en tiempo lineal
+
+Reemplaza los regex de objetos/arrays anidados (con backtracking y a lo más
+dos niveles de anidación) que estaban duplicados en OpenAIProvider y en
+robust_openai_call:
+- strip_markdown_fence: quita el wrapper ```json ... ``` de la respuesta
+- scan_json_spans: una sola pasada que encuentra los bloques {...} / [...]
+  balanceados, respetando strings y escapes
+- parse_json_response / extract_json: json.loads directo y, si falla,
+  rescate del primer bloque balanceado que sea JSON válido (de afuera
+  hacia adentro); parse_json_response indica además el método usado
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_SIGNIFICANT = re.compile(r'[{}\[\]"\\]')
+
+# Máximo de bloques candidatos a parsear en el rescate (acota el peor caso
+# de respuestas con cientos de fragmentos no parseables)
+MAX_CANDIDATES = 64
+
+
+def strip_markdown_fence(content: str) -> str:
+    """
+    Limpia markdown code blocks que envuelven JSON.
+
+    Args:
+        content: Contenido de la respuesta
+
+    Returns:
+        Contenido sin wrapper ```json / ```
+    """
+    content = content.strip()
+
+    # Caso 1: ```json ... ```
+    if content.startswith("```json"):
+        content = content[7:]
+        if content.endswith("```"):
+            content = content[:-3]
+        return content.strip()
+
+    # Caso 2: ``` ... ```
+    if content.startswith("```"):
+        lines = content.split("\n")
+        if len(lines) > 2 and lines[-1].strip() == "```":
+            return "\n".join(lines[1:-1]).strip()
+
+    return content
+
+
+def scan_json_spans(text: str) -> List[Tuple[int, int, int]]:
+    """
+    Encuentra los bloques {...} y [...] balanceados en una sola pasada.
+
+    Dentro de un bloque se respetan strings JSON (con escapes), de modo que
+    llaves o corchetes dentro de strings no cuentan. Un cierre que no
+    corresponde a la apertura pendiente descarta los bloques abiertos.
+
+    Args:
+        text: Texto a escanear
+
+    Returns:
+        Lista de (inicio, fin_exclusivo, profundidad), ordenada por
+        profundidad (externos primero), objetos antes que arrays y posición
+    """
+    spans = []
+    stack: List[Tuple[int, str]] = []
+    in_string = False
+    skip_to = -1
+
+    # Solo se visitan los caracteres significativos (el texto libre se salta en C)
+    for match in _SIGNIFICANT.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue
+        char = text[i]
+
+        if in_string:
+            if char == "\\":
+                skip_to = i + 2
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char in _CLOSERS:
+            stack.append((i, _CLOSERS[char]))
+        elif char == "}" or char == "]":
+            if stack and stack[-1][1] == char:
+                start, _ = stack.pop()
+                spans.append((start, i + 1, len(stack)))
+            else:
+                stack.clear()
+        elif char == '"' and stack:
+            in_string = True
+
+    spans.sort(key=lambda span: (span[2], text[span[0]] != "{", span[0]))
+    return spans
+
+
+def parse_json_response(content: str, max_candidates: int = MAX_CANDIDATES) -> Tuple[Optional[Any], str]:
+    """
+    Obtiene el JSON de una respuesta LLM sin volver a llamar al modelo.
+
+    Orden: json.loads directo; contenido sin wrapper markdown; primer bloque
+    balanceado (externos primero) que parsea.
+
+    Args:
+        content: Contenido crudo de la respuesta
+        max_candidates: Máximo de bloques a intentar en el rescate
+
+    Returns:
+        Tupla (objeto parseado o None, método): "direct", "markdown",
+        "salvage" o "failed"
+    """
+    if not content:
+        return None, "failed"
+
+    try:
+        return json.loads(content), "direct"
+    except json.JSONDecodeError:
+        pass
+
+    cleaned = strip_markdown_fence(content)
+    if cleaned != content.strip():
+        try:
+            return json.loads(cleaned), "markdown"
+        except json.JSONDecodeError:
+            pass
+
+    for start, end, _ in scan_json_spans(cleaned)[:max_candidates]:
+        try:
+            return json.loads(cleaned[start:end]), "salvage"
+        except json.JSONDecodeError:
+            continue
+
+    return None, "failed"
+
+
+def extract_json(content: str, max_candidates: int = MAX_CANDIDATES) -> Optional[Any]:
+    """
+    Igual que parse_json_response(), retornando solo el objeto.
+
+    Args:
+        content: Contenido crudo de la respuesta
+        max_candidates: Máximo de bloques a intentar en el rescate
+
+    Returns:
+        Objeto parseado, o None si no hay JSON recuperable
+    """
+    return parse_json_response(content, max_candidates)[0]
@@ -0,0 +1,291 @@
+"""
+Results Store - Almacén persistente de resultados de validación por puesto
+
+Almacén en disco (SQLite en modo WAL) de resultados de
+IntegratedValidator.validate_puesto, indexado por el hash de
+(datos normalizados del puesto, hash de la normativa, versión del
+validador/prompts, opciones que afectan el resultado). Los exports
+semanales de Sidegor cambian pocos puestos: validate_batch toma del almacén
+los puestos sin cambios y solo valida los nuevos o modificados.
+
+Diferencia con batch_journal: la bitácora es por corrida (reanudar un lote
+interrumpido); el almacén es acumulativo entre corridas y exports.
+
+Características:
+- Seguro entre hilos y entre procesos (bloqueos de SQLite + WAL)
+- Normalización de la entrada (espacios, Unicode) antes del hash: re-exportar
+  un puesto sin cambios de contenido reutiliza su resultado
+- Estadísticas de reutilizados, validados y tiempo ahorrado (según la
+  duración registrada de la validación original)
+
+Se habilita con la variable de entorno APF_RESULTS_STORE_DIR (ver
+.env.example) o explícitamente con IntegratedValidator(results_store=...).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+STORE_FILENAME = "validation_results.sqlite3"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_position(data: Any) -> Any:
+    """
+    Normaliza los datos de un puesto para el hash de contenido.
+
+    Los textos se pasan a Unicode NFC y se colapsan espacios (los exports de
+    Sidegor varían en saltos de línea y espacios finales sin cambiar el
+    contenido). Mayúsculas, puntuación y orden de funciones se conservan:
+    sí pueden cambiar el resultado.
+
+    Args:
+        data: Datos del puesto (dict/list/str/escalares)
+
+    Returns:
+        Copia normalizada de los datos
+    """
+    if isinstance(data, str):
+        return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", data)).strip()
+    if isinstance(data, dict):
+        return {str(key): normalize_position(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [normalize_position(item) for item in data]
+    return data
+
+
+def content_hash(data: Any) -> str:
+    """
+    Hash SHA-256 del contenido normalizado.
+
+    Args:
+        data: Datos serializables a JSON (valores no serializables como str)
+
+    Returns:
+        Hash SHA-256 hexadecimal del JSON canónico de normalize_position(data)
+    """
+    payload = json.dumps(
+        normalize_position(data), ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ValidationResultsStore:
+    """
+    Almacén persistente de resultados de validación (SQLite).
+
+    Ejemplo:
+        >>> store = ValidationResultsStore("./data/results")
+        >>> key = store.build_key(puesto, normativa_hash, "5.38", opciones)
+        >>> store.get(key) or store.set(key, codigo, validator.validate_puesto(puesto), duracion)
+    """
+
+    def __init__(self, store_dir: Union[str, Path]):
+        """
+        Inicializa el almacén.
+
+        Args:
+            store_dir: Directorio donde vive la base SQLite
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.store_dir / STORE_FILENAME
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "seconds_saved": 0.0
+        }
+
+        self._init_db()
+
+    @staticmethod
+    def build_key(
+        puesto: Dict[str, Any],
+        normativa_hash: str,
+        version: str,
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Construye la llave de un resultado.
+
+        Args:
+            puesto: Datos del puesto (se normalizan antes del hash)
+            normativa_hash: Hash de los documentos normativos
+                (NormativaLoader.documents_hash)
+            version: Versión del validador y sus prompts
+            options: Opciones de validación que cambian el resultado
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        return content_hash({
+            "puesto": puesto,
+            "normativa": normativa_hash,
+            "version": version,
+            "opciones": options or {}
+        })
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un resultado almacenado.
+
+        Args:
+            key: Llave (build_key)
+
+        Returns:
+            Resultado almacenado o None si el puesto cambió o es nuevo
+        """
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT result, duration FROM validation_results WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            with self._stats_lock:
+                self._stats["misses"] += 1
+            return None
+
+        try:
+            result = json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning(f"[ValidationResultsStore] Resultado corrupto para {key[:12]}... (se revalida)")
+            with self._stats_lock:
+                self._stats["misses"] += 1
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE validation_results SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+        with self._stats_lock:
+            self._stats["hits"] += 1
+            self._stats["seconds_saved"] += row[1] or 0.0
+        return result
+
+    def set(self, key: str, codigo: str, result: Dict[str, Any], duration: float = 0.0) -> None:
+        """
+        Guarda (o reemplaza) el resultado de un puesto.
+
+        Args:
+            key: Llave (build_key)
+            codigo: Código del puesto (consulta y depuración)
+            result: Resultado de validación (serializable a JSON)
+            duration: Segundos que tomó la validación (para el tiempo ahorrado)
+        """
+        content = json.dumps(result, ensure_ascii=False, default=str)
+        now = time.time()
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO validation_results "
+                "(key, codigo, result, duration, created_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, codigo, content, float(duration), now, now)
+            )
+        with self._stats_lock:
+            self._stats["sets"] += 1
+
+    def delete(self, key: str) -> bool:
+        """Elimina un resultado; True si existía"""
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM validation_results WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def clear(self) -> None:
+        """Elimina todos los resultados almacenados"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM validation_results")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la sesión y del almacén"""
+        conn = self._get_connection()
+        entries = conn.execute("SELECT COUNT(*) FROM validation_results").fetchone()[0]
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            "seconds_saved": round(stats["seconds_saved"], 3),
+            "entries": entries,
+            "db_path": str(self.db_path)
+        })
+        return stats
+
+    def close(self) -> None:
+        """Cierra la conexión SQLite del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Conexión SQLite por hilo (las conexiones no se comparten entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        """Crea el esquema si no existe"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS validation_results ("
+                " key TEXT PRIMARY KEY,"
+                " codigo TEXT,"
+                " result TEXT NOT NULL,"
+                " duration REAL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_validation_results_codigo "
+                "ON validation_results (codigo)"
+            )
+
+
+def results_store_from_env() -> Optional[ValidationResultsStore]:
+    """
+    Construye el almacén a partir de variables de entorno.
+
+    Variables:
+        APF_RESULTS_STORE_DIR: Directorio del almacén (si no existe, revalidación
+            incremental deshabilitada)
+
+    Returns:
+        ValidationResultsStore o None si no está configurado
+    """
+    store_dir = os.getenv("APF_RESULTS_STORE_DIR")
+    if not store_dir:
+        return None
+
+    return ValidationResultsStore(store_dir)
@@ -27,10 +27,164 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 
 from src.validators.shared_utilities import APFContext, robust_openai_call
+from src.validators.response_schemas import QUALITY_VALIDATION_SCHEMA
 
 logger = logging.getLogger(__name__)
 
 
+# Prefijo estático del análisis holístico: idéntico en todas las llamadas,
+# se envía como system message para aprovechar el prefix cache del proveedor
+QUALITY_SYSTEM_MESSAGE = """Eres un auditor experto de la Administración Pública Federal de México. Tu tarea es analizar puestos de trabajo y detectar problemas de calidad de manera exhaustiva y precisa.
+
+════════════════════════════════════════════════════════════════════════════════
+🔍 INSTRUCCIONES DE ANÁLISIS
+════════════════════════════════════════════════════════════════════════════════
+
+Detecta los siguientes problemas de calidad:
+
+### 1. DUPLICACIÓN SEMÁNTICA
+Analiza TODAS las funciones y compara entre sí para detectar:
+- Funciones que describen la misma actividad con palabras diferentes
+- Funciones con >80% de similitud semántica
+- Redundancias obvias (mismo verbo + objeto similar)
+
+**IMPORTANTE:** Compara TODAS contra TODAS. Si hay 10 funciones, debes comparar 45 pares.
+
+### 2. FUNCIONES MALFORMADAS
+Detecta funciones que tengan:
+- **VACÍAS**: Sin contenido o solo espacios
+- **PLACEHOLDERS**: Contienen solo "...", "N/A", "xxx", etc.
+- **MUY CORTAS**: Menos de 15 caracteres (probablemente incompletas)
+- **SIN VERBO**: No inician con un verbo de acción
+- **SIN COMPLEMENTO**: Solo verbo sin especificar QUÉ se hace
+- **SIN RESULTADO**: No explican PARA QUÉ se hace (finalidad)
+- **TEXTO SIN SENTIDO**: Palabras aleatorias, caracteres incoherentes
+
+### 3. PROBLEMAS DE MARCO LEGAL
+Analiza referencias legales y detecta:
+- **ORGANISMOS EXTINTOS**: Referencias a instituciones que ya no existen (ej: CONACYT reorganizado)
+- **LEYES OBSOLETAS**: Referencias a leyes derogadas o reformadas
+- **REFERENCIAS INVÁLIDAS**: Artículos que ya no existen
+- **INCONSISTENCIAS**: Conflictos entre referencias legales
+
+Si se proporciona normativa institucional, valida que las funciones estén alineadas con ella.
+
+### 4. OBJETIVO GENERAL
+Evalúa si el objetivo general es adecuado:
+- **MUY CORTO**: <30 caracteres (extremadamente incompleto)
+- **MUY LARGO**: >800 caracteres (excesivamente verboso - puestos de alto nivel pueden tener objetivos extensos)
+- **SIN VERBO**: No tiene verbo rector claro al inicio
+- **SIN FINALIDAD**: No explica el PARA QUÉ del puesto (cláusula con "a fin de", "para", "con el objetivo de")
+- **GENÉRICO**: Demasiado vago o aplicable a cualquier puesto
+- **INCOHERENTE**: No corresponde a la denominación del puesto
+
+**IMPORTANTE**: Puestos de alto nivel (Secretarías, Subsecretarías) típicamente tienen objetivos más extensos y detallados.
+Sé TOLERANTE con objetivos de 200-700 caracteres si están bien estructurados y son coherentes con el nivel del puesto.
+
+════════════════════════════════════════════════════════════════════════════════
+📤 FORMATO DE RESPUESTA
+════════════════════════════════════════════════════════════════════════════════
+
+Retorna un JSON con la siguiente estructura EXACTA:
+
+{
+  "duplicacion": {
+    "tiene_duplicados": boolean,
+    "total_duplicados": int,
+    "pares_duplicados": [
+      {
+        "funcion_1_id": int,
+        "funcion_2_id": int,
+        "similitud_porcentaje": int (0-100),
+        "descripcion": "string explicando POR QUÉ son similares",
+        "sugerencia": "string con recomendación"
+      }
+    ]
+  },
+  "malformacion": {
+    "tiene_malformadas": boolean,
+    "total_malformadas": int,
+    "funciones_problematicas": [
+      {
+        "funcion_id": int,
+        "problemas": [
+          {
+            "tipo": "string (VACIA|PLACEHOLDER|MUY_CORTA|SIN_VERBO|SIN_COMPLEMENTO|SIN_RESULTADO|SIN_SENTIDO)",
+            "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
+            "descripcion": "string explicando el problema",
+            "texto_problematico": "string con fragmento del texto (max 100 chars)"
+          }
+        ]
+      }
+    ]
+  },
+  "marco_legal": {
+    "tiene_problemas": boolean,
+    "total_problemas": int,
+    "problemas": [
+      {
+        "tipo": "string (ORGANISMO_EXTINTO|LEY_OBSOLETA|REFERENCIA_INVALIDA|INCONSISTENCIA)",
+        "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
+        "descripcion": "string explicando el problema detectado",
+        "referencia_problematica": "string con texto específico",
+        "sugerencia": "string con recomendación de corrección"
+      }
+    ]
+  },
+  "objetivo_general": {
+    "es_adecuado": boolean,
+    "calificacion": float (0.0-1.0),
+    "problemas": [
+      {
+        "tipo": "string (MUY_CORTO|MUY_LARGO|SIN_VERBO|SIN_FINALIDAD|GENERICO|INCOHERENTE)",
+        "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
+        "descripcion": "string explicando el problema"
+      }
+    ]
+  }
+}
+
+════════════════════════════════════════════════════════════════════════════════
+⚠️ IMPORTANTE
+════════════════════════════════════════════════════════════════════════════════
+
+1. SÉ EXHAUSTIVO: Revisa cada función detenidamente
+2. SÉ ESPECÍFICO: Explica claramente POR QUÉ algo es un problema
+3. SÉ PRECISO: Usa los IDs correctos de las funciones (1-indexed)
+4. SÉ CONSERVADOR: Si no estás seguro, NO lo marques como problema
+5. RETORNA JSON VÁLIDO: Sin comentarios, sin trailing commas
+
+**CRITERIOS DE SEVERIDAD PARA OBJETIVO GENERAL:**
+- CRITICAL: Solo si el objetivo está completamente vacío o es incomprensible
+- HIGH: Solo si falta verbo rector O finalidad (pero no ambos)
+- MODERATE: Si es muy largo (>800 chars) o genérico pero funcional
+- LOW: Si es largo (500-800 chars) pero bien estructurado y coherente
+
+**SÉ TOLERANTE**: Un objetivo de 500-700 caracteres en un puesto de Secretaría/Subsecretaría
+es NORMAL y APROPIADO. NO lo marques como problema a menos que sea realmente excesivo (>800).
+
+Si NO encuentras problemas en alguna categoría, retorna arrays vacíos:
+- "pares_duplicados": []
+- "funciones_problematicas": []
+- "problemas": []
+
+════════════════════════════════════════════════════════════════════════════════
+
+**FORMATO DE SALIDA:**
+RETORNA ÚNICAMENTE UN OBJETO JSON VÁLIDO CON LA ESTRUCTURA ESPECIFICADA ARRIBA.
+NO incluyas texto adicional, comentarios, ni markdown.
+SOLO el JSON puro.
+"""
+
+# Modo compacto: mismo análisis y estructura, textos cortos (menos tokens de salida)
+QUALITY_SYSTEM_MESSAGE_COMPACT = QUALITY_SYSTEM_MESSAGE + """
+**MODO COMPACTO:**
+- "descripcion" y "sugerencia": máximo 12 palabras cada una.
+- "texto_problematico" y "referencia_problematica": máximo 60 caracteres.
+- Reporta solo problemas detectados; no expliques lo que está correcto.
+"""
+
+
 @dataclass
 class QualityValidationResult:
     """Resultado completo de validación de calidad"""
@@ -57,14 +211,19 @@ class AdvancedQualityValidator:
     - Detecta patrones globales y correlaciones
     """
 
-    def __init__(self, context: APFContext):
+    MAX_TOKENS = 3000  # Respuesta JSON completa
+    COMPACT_MAX_TOKENS = 1200  # Textos cortos (QUALITY_SYSTEM_MESSAGE_COMPACT)
+
+    def __init__(self, context: APFContext, compact: bool = False):
         """
         Inicializa el validador.
 
         Args:
             context: APFContext con API keys y configuración
+            compact: Si True, pide descripciones y sugerencias cortas (misma estructura)
         """
         self.context = context
+        self.compact = compact
         logger.info("[AdvancedQualityValidator] Inicializado con análisis holístico v5.33")
 
     def validate_puesto_completo(
@@ -91,22 +250,20 @@ class AdvancedQualityValidator:
         """
         logger.info(f"[AdvancedQualityValidator] Analizando puesto {puesto_data.get('codigo', 'UNKNOWN')}")
 
-        # Construir prompt inteligente
+        # Construir prompt inteligente (solo datos del puesto; instrucciones en system message)
         prompt = self._build_analysis_prompt(puesto_data, normativa_text)
 
-        # Construir prompt completo con system message
-        full_prompt = """Eres un auditor experto de la Administración Pública Federal de México. Tu tarea es analizar puestos de trabajo y detectar problemas de calidad de manera exhaustiva y precisa.
-
-""" + prompt
-
         # Llamar a LLM con robust_openai_call
         try:
             response = robust_openai_call(
-                prompt=full_prompt,
+                prompt=prompt,
                 model="openai/gpt-4o-mini",  # Migrado a GPT-4o-mini (ahorro 94.6%)
                 temperature=0.1,  # Baja para consistencia
-                max_tokens=3000,  # Aumentar para respuesta JSON completa
-                context=self.context
+                max_tokens=self.COMPACT_MAX_TOKENS if self.compact else self.MAX_TOKENS,
+                context=self.context,
+                system_message=QUALITY_SYSTEM_MESSAGE_COMPACT if self.compact else QUALITY_SYSTEM_MESSAGE,
+                prompt_family="quality_holistic",
+                response_schema=QUALITY_VALIDATION_SCHEMA
             )
 
             # Parsear respuesta de robust_openai_call
@@ -136,7 +293,11 @@ class AdvancedQualityValidator:
             )
 
     def _build_analysis_prompt(self, puesto_data: Dict[str, Any], normativa_text: Optional[str]) -> str:
-        """Construye el prompt de análisis holístico"""
+        """
+        Construye la parte variable del prompt de análisis holístico (datos del puesto).
+
+        Las instrucciones y el formato de respuesta van en QUALITY_SYSTEM_MESSAGE.
+        """
 
         codigo = puesto_data.get("codigo", "N/A")
         denominacion = puesto_data.get("denominacion", "N/A")
@@ -175,145 +336,6 @@ Analiza EXHAUSTIVAMENTE este puesto de trabajo de la Administración Pública Fe
 {funciones_text}
 {normativa_context}
 
-════════════════════════════════════════════════════════════════════════════════
-🔍 INSTRUCCIONES DE ANÁLISIS
-════════════════════════════════════════════════════════════════════════════════
-
-Detecta los siguientes problemas de calidad:
-
-### 1. DUPLICACIÓN SEMÁNTICA
-Analiza TODAS las funciones y compara entre sí para detectar:
-- Funciones que describen la misma actividad con palabras diferentes
-- Funciones con >80% de similitud semántica
-- Redundancias obvias (mismo verbo + objeto similar)
-
-**IMPORTANTE:** Compara TODAS contra TODAS. Si hay 10 funciones, debes comparar 45 pares.
-
-### 2. FUNCIONES MALFORMADAS
-Detecta funciones que tengan:
-- **VACÍAS**: Sin contenido o solo espacios
-- **PLACEHOLDERS**: Contienen solo "...", "N/A", "xxx", etc.
-- **MUY CORTAS**: Menos de 15 caracteres (probablemente incompletas)
-- **SIN VERBO**: No inician con un verbo de acción
-- **SIN COMPLEMENTO**: Solo verbo sin especificar QUÉ se hace
-- **SIN RESULTADO**: No explican PARA QUÉ se hace (finalidad)
-- **TEXTO SIN SENTIDO**: Palabras aleatorias, caracteres incoherentes
-
-### 3. PROBLEMAS DE MARCO LEGAL
-Analiza referencias legales y detecta:
-- **ORGANISMOS EXTINTOS**: Referencias a instituciones que ya no existen (ej: CONACYT reorganizado)
-- **LEYES OBSOLETAS**: Referencias a leyes derogadas o reformadas
-- **REFERENCIAS INVÁLIDAS**: Artículos que ya no existen
-- **INCONSISTENCIAS**: Conflictos entre referencias legales
-
-Si se proporciona normativa institucional, valida que las funciones estén alineadas con ella.
-
-### 4. OBJETIVO GENERAL
-Evalúa si el objetivo general es adecuado:
-- **MUY CORTO**: <30 caracteres (extremadamente incompleto)
-- **MUY LARGO**: >800 caracteres (excesivamente verboso - puestos de alto nivel pueden tener objetivos extensos)
-- **SIN VERBO**: No tiene verbo rector claro al inicio
-- **SIN FINALIDAD**: No explica el PARA QUÉ del puesto (cláusula con "a fin de", "para", "con el objetivo de")
-- **GENÉRICO**: Demasiado vago o aplicable a cualquier puesto
-- **INCOHERENTE**: No corresponde a la denominación del puesto
-
-**IMPORTANTE**: Puestos de alto nivel (Secretarías, Subsecretarías) típicamente tienen objetivos más extensos y detallados.
-Sé TOLERANTE con objetivos de 200-700 caracteres si están bien estructurados y son coherentes con el nivel del puesto.
-
-════════════════════════════════════════════════════════════════════════════════
-📤 FORMATO DE RESPUESTA
-════════════════════════════════════════════════════════════════════════════════
-
-Retorna un JSON con la siguiente estructura EXACTA:
-
-{{
-  "duplicacion": {{
-    "tiene_duplicados": boolean,
-    "total_duplicados": int,
-    "pares_duplicados": [
-      {{
-        "funcion_1_id": int,
-        "funcion_2_id": int,
-        "similitud_porcentaje": int (0-100),
-        "descripcion": "string explicando POR QUÉ son similares",
-        "sugerencia": "string con recomendación"
-      }}
-    ]
-  }},
-  "malformacion": {{
-    "tiene_malformadas": boolean,
-    "total_malformadas": int,
-    "funciones_problematicas": [
-      {{
-        "funcion_id": int,
-        "problemas": [
-          {{
-            "tipo": "string (VACIA|PLACEHOLDER|MUY_CORTA|SIN_VERBO|SIN_COMPLEMENTO|SIN_RESULTADO|SIN_SENTIDO)",
-            "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
-            "descripcion": "string explicando el problema",
-            "texto_problematico": "string con fragmento del texto (max 100 chars)"
-          }}
-        ]
-      }}
-    ]
-  }},
-  "marco_legal": {{
-    "tiene_problemas": boolean,
-    "total_problemas": int,
-    "problemas": [
-      {{
-        "tipo": "string (ORGANISMO_EXTINTO|LEY_OBSOLETA|REFERENCIA_INVALIDA|INCONSISTENCIA)",
-        "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
-        "descripcion": "string explicando el problema detectado",
-        "referencia_problematica": "string con texto específico",
-        "sugerencia": "string con recomendación de corrección"
-      }}
-    ]
-  }},
-  "objetivo_general": {{
-    "es_adecuado": boolean,
-    "calificacion": float (0.0-1.0),
-    "problemas": [
-      {{
-        "tipo": "string (MUY_CORTO|MUY_LARGO|SIN_VERBO|SIN_FINALIDAD|GENERICO|INCOHERENTE)",
-        "severidad": "string (CRITICAL|HIGH|MODERATE|LOW)",
-        "descripcion": "string explicando el problema"
-      }}
-    ]
-  }}
-}}
-
-════════════════════════════════════════════════════════════════════════════════
-⚠️ IMPORTANTE
-════════════════════════════════════════════════════════════════════════════════
-
-1. SÉ EXHAUSTIVO: Revisa cada función detenidamente
-2. SÉ ESPECÍFICO: Explica claramente POR QUÉ algo es un problema
-3. SÉ PRECISO: Usa los IDs correctos de las funciones (1-indexed)
-4. SÉ CONSERVADOR: Si no estás seguro, NO lo marques como problema
-5. RETORNA JSON VÁLIDO: Sin comentarios, sin trailing commas
-
-**CRITERIOS DE SEVERIDAD PARA OBJETIVO GENERAL:**
-- CRITICAL: Solo si el objetivo está completamente vacío o es incomprensible
-- HIGH: Solo si falta verbo rector O finalidad (pero no ambos)
-- MODERATE: Si es muy largo (>800 chars) o genérico pero funcional
-- LOW: Si es largo (500-800 chars) pero bien estructurado y coherente
-
-**SÉ TOLERANTE**: Un objetivo de 500-700 caracteres en un puesto de Secretaría/Subsecretaría
-es NORMAL y APROPIADO. NO lo marques como problema a menos que sea realmente excesivo (>800).
-
-Si NO encuentras problemas en alguna categoría, retorna arrays vacíos:
-- "pares_duplicados": []
-- "funciones_problematicas": []
-- "problemas": []
-
-════════════════════════════════════════════════════════════════════════════════
-
-**FORMATO DE SALIDA:**
-RETORNA ÚNICAMENTE UN OBJETO JSON VÁLIDO CON LA ESTRUCTURA ESPECIFICADA ARRIBA.
-NO incluyas texto adicional, comentarios, ni markdown.
-SOLO el JSON puro.
-
 Procede con el análisis:
 """
 
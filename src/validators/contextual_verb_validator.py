@@ -24,6 +24,7 @@ from src.validators.shared_utilities import (
     APFContext, robust_openai_call, VERB_HIERARCHY, WEAK_VERBS,
     LOGGING_CONFIG
 )
+from src.validators.response_schemas import FUNCTION_DETAIL_SCHEMA, GLOBAL_VALIDATION_SCHEMA
 
 # ==========================================
 # CONFIGURACIÓN
@@ -363,7 +364,9 @@ RESPONDE EN JSON:
                 model="openai/gpt-4o-mini",  # Migrado a GPT-4o-mini (ahorro 94.6%)
                 max_tokens=VALIDATION_CONFIG["llm_max_tokens"],
                 temperature=VALIDATION_CONFIG["llm_temperature"],
-                context=self.context
+                context=self.context,
+                prompt_family="c2_global_validation",
+                response_schema=GLOBAL_VALIDATION_SCHEMA
             )
 
             # Verificar respuesta exitosa
@@ -484,7 +487,9 @@ RESPONDE EN JSON:
                 model="openai/gpt-4o-mini",  # Migrado a GPT-4o-mini (ahorro 94.6%)
                 max_tokens=VALIDATION_CONFIG["llm_max_tokens"],
                 temperature=VALIDATION_CONFIG["llm_temperature"],
-                context=self.context
+                context=self.context,
+                prompt_family="c2_function_detail",
+                response_schema=FUNCTION_DETAIL_SCHEMA
             )
 
             # Verificar respuesta exitosa
@@ -7,6 +7,9 @@ jerárquico del puesto, combinando:
 2. Coherencia de impacto usando RANGOS ACEPTABLES (no match exacto)
 3. Validación normativa de discrepancias CON LLM
 
+Las llamadas LLM se hacen por lotes: un análisis de impacto para todas las
+funciones del puesto y una búsqueda de respaldo solo para las discrepantes.
+
 Threshold DINÁMICO por nivel:
 - G/H (Secretaría/Subsecretaría): 80% tolerancia (v5.39: ajustado desde 75%)
 - J/K (Jefatura Unidad/DG Adjunto): 70% tolerancia
@@ -34,7 +37,7 @@ Versión: 5.39 (ajustes agresivos - si el Secretario no pasa, nadie pasará)
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
 from src.config.verb_hierarchy import (
@@ -46,13 +49,15 @@ from src.config.verb_hierarchy import (
 )
 from src.validators.impact_analyzer import ImpactAnalyzer
 from src.validators.hierarchical_impact_llm_validator import HierarchicalImpactLLMValidator
+from src.validators.function_memo import FunctionEvaluationMemo
 from src.validators.shared_utilities import APFContext
 from src.validators.models import (
     Criterion3Result,
     FunctionImpactAnalysis,
     ValidationResult,
     ValidationSeverity,
-    create_flag
+    create_flag,
+    threshold_outcome
 )
 
 logger = logging.getLogger(__name__)
@@ -65,13 +70,19 @@ class Criterion3Validator:
     Implementa lógica completa de validación con threshold del 50%
     """
 
+    # Tolerancia para casos límite (ej: 0.75 vs 0.7500001)
+    THRESHOLD_EPSILON = 0.001
+    # Funciones discrepantes por llamada de respaldo con terminación temprana
+    EARLY_BACKING_CHUNK_SIZE = 5
+
     def __init__(
         self,
         normativa_fragments: Optional[List[str]] = None,
         threshold: float = 0.50,
         context: Optional[APFContext] = None,
         use_llm: bool = True,
-        use_dynamic_threshold: bool = True
+        use_dynamic_threshold: bool = True,
+        function_memo: Optional[FunctionEvaluationMemo] = None
     ):
         """
         Inicializa el validador.
@@ -82,6 +93,7 @@ class Criterion3Validator:
             context: APFContext con API keys (requerido si use_llm=True)
             use_llm: Si True, usa LLM para análisis de impacto y búsqueda normativa
             use_dynamic_threshold: Si True, ajusta threshold según nivel jerárquico
+            function_memo: Memo de análisis de impacto entre puestos (None = sin memo)
         """
         self.normativa_fragments = normativa_fragments or []
         self.base_threshold = threshold
@@ -95,7 +107,7 @@ class Criterion3Validator:
                 logger.warning("[Criterio 3] use_llm=True pero no se proporcionó context. Desactivando LLM.")
                 self.use_llm = False
             else:
-                self.llm_validator = HierarchicalImpactLLMValidator(context)
+                self.llm_validator = HierarchicalImpactLLMValidator(context, memo=function_memo)
                 logger.info("[Criterio 3] Inicializado CON análisis LLM (GPT-4o-mini)")
 
     def _get_threshold_for_level(self, nivel_salarial: str) -> float:
@@ -167,7 +179,8 @@ class Criterion3Validator:
         self,
         puesto_codigo: str,
         nivel_salarial: str,
-        funciones: List[Dict[str, Any]]
+        funciones: List[Dict[str, Any]],
+        early_termination: bool = False
     ) -> Criterion3Result:
         """
         Valida el Criterio 3 para un puesto.
@@ -176,6 +189,8 @@ class Criterion3Validator:
             puesto_codigo: Código del puesto
             nivel_salarial: Nivel salarial (ej: "M1", "O21")
             funciones: Lista de funciones del puesto
+            early_termination: Si True, deja de llamar al LLM en cuanto el
+                PASS/FAIL ya no puede cambiar (funciones restantes sin evaluar)
 
         Returns:
             Criterion3Result con el resultado de la validación
@@ -191,20 +206,21 @@ class Criterion3Validator:
 
         logger.info(f"[Criterio 3] Perfil esperado: {expected_impact}")
 
-        # Analizar cada función
-        function_analyses = []
+        # Analizar todas las funciones (llamadas LLM por lotes)
+        function_analyses = self._analyze_functions(
+            funciones,
+            nivel_salarial,
+            expected_impact,
+            stop_threshold=threshold if early_termination else None
+        )
         critical_count = 0
         moderate_count = 0
+        not_evaluated_count = 0
 
-        for func in funciones:
-            analysis = self._analyze_function(
-                func,
-                nivel_salarial,
-                expected_impact
-            )
-            function_analyses.append(analysis)
-
-            if analysis.severity == ValidationSeverity.CRITICAL:
+        for analysis in function_analyses:
+            if not analysis.evaluated:
+                not_evaluated_count += 1
+            elif analysis.severity == ValidationSeverity.CRITICAL:
                 critical_count += 1
             elif analysis.severity == ValidationSeverity.MODERATE:
                 moderate_count += 1
@@ -214,9 +230,7 @@ class Criterion3Validator:
         critical_rate = critical_count / total_functions if total_functions > 0 else 0.0
 
         # Evaluar threshold (ahora dinámico) con tolerancia para casos límite
-        # Epsilon de 0.001 (0.1%) para manejar redondeos (ej: 0.75 vs 0.7500001)
-        epsilon = 0.001
-        is_passing = critical_rate <= (threshold + epsilon)
+        is_passing = critical_rate <= (threshold + self.THRESHOLD_EPSILON)
 
         # Construir reasoning
         reasoning = self._build_reasoning(
@@ -225,7 +239,8 @@ class Criterion3Validator:
             moderate_count,
             total_functions,
             critical_rate,
-            threshold
+            threshold,
+            not_evaluated_count
         )
 
         # Construir resultado
@@ -234,6 +249,7 @@ class Criterion3Validator:
             total_functions=total_functions,
             functions_critical=critical_count,
             functions_moderate=moderate_count,
+            functions_not_evaluated=not_evaluated_count,
             critical_rate=critical_rate,
             threshold=threshold,
             function_analyses=function_analyses,
@@ -269,154 +285,267 @@ class Criterion3Validator:
         Returns:
             FunctionImpactAnalysis
         """
-        func_id = func.get("id", "UNKNOWN")
-        descripcion = func.get("descripcion_completa", "")
-        que_hace = func.get("que_hace", "")
-        para_que = func.get("para_que_lo_hace", "")
-        funcion_text = f"{descripcion} {que_hace} {para_que}".strip()
-
-        # 1. Extraer verbo principal
-        verbo = self.analyzer.extract_main_verb(que_hace)
-
-        # 2. Verificar apropiación de verbo
-        es_apropiado = is_verb_appropriate(verbo, nivel)
-        es_prohibido = is_verb_forbidden(verbo, nivel)
-
-        # 3. Analizar impacto (CON LLM si está disponible)
-        if self.use_llm and self.llm_validator:
-            logger.debug(f"[Criterio 3] Analizando función {func_id} CON LLM")
-            llm_analysis = self.llm_validator.analyze_function_impact(
-                funcion_text,
-                nivel,
-                expected_impact
-            )
+        return self._analyze_functions([func], nivel, expected_impact)[0]
 
-            # Usar resultados del LLM
-            impact_scope = llm_analysis.scope_level
-            impact_consequences = llm_analysis.consequences_level
-            impact_complexity = llm_analysis.complexity_level
-
-            # Verificar coherencia usando RANGOS ACEPTABLES en lugar de match exacto
-            scope_coherent, cons_coherent, complexity_coherent = self._is_impact_within_acceptable_range(
-                impact_scope,
-                impact_consequences,
-                impact_complexity,
-                nivel
-            )
+    def _analyze_functions(
+        self,
+        funciones: List[Dict[str, Any]],
+        nivel: str,
+        expected_impact: Dict[str, str],
+        stop_threshold: Optional[float] = None
+    ) -> List[FunctionImpactAnalysis]:
+        """
+        Analiza todas las funciones de un puesto (CON o SIN LLM) por fases.
 
-            logger.debug(
-                f"[Criterio 3] F{func_id} - Impacto: scope={impact_scope}({scope_coherent}), "
-                f"cons={impact_consequences}({cons_coherent}), comp={impact_complexity}({complexity_coherent})"
-            )
+        Con LLM, el análisis de impacto de todas las funciones se hace en una
+        o pocas llamadas y la búsqueda de respaldo solo para las funciones
+        discrepantes en una llamada adicional (≈2 llamadas en lugar de 2N).
+
+        Con stop_threshold (terminación temprana, solo con LLM) se dejan de
+        hacer llamadas en cuanto el PASS/FAIL del criterio ya no puede
+        cambiar; las funciones omitidas quedan con evaluated=False.
+
+        Args:
+            funciones: Lista de funciones del puesto
+            nivel: Nivel salarial
+            expected_impact: Perfil de impacto esperado
+            stop_threshold: Threshold del criterio para terminación temprana (None = evaluar todo)
 
+        Returns:
+            Lista de FunctionImpactAnalysis en el mismo orden de entrada
+        """
+        use_llm = self.use_llm and self.llm_validator
+        early = use_llm and stop_threshold is not None
+        total = len(funciones)
+
+        # 1. Extraer texto y verbo principal; verificar apropiación de verbo
+        items = []
+        for func in funciones:
+            descripcion = func.get("descripcion_completa", "")
+            que_hace = func.get("que_hace", "")
+            para_que = func.get("para_que_lo_hace", "")
+            verbo = self.analyzer.extract_main_verb(que_hace)
+
+            items.append({
+                "func": func,
+                "func_id": func.get("id", "UNKNOWN"),
+                "descripcion": descripcion,
+                "que_hace": que_hace,
+                "para_que": para_que,
+                "funcion_text": f"{descripcion} {que_hace} {para_que}".strip(),
+                "verbo": verbo,
+                "es_apropiado": is_verb_appropriate(verbo, nivel),
+                "es_prohibido": is_verb_forbidden(verbo, nivel)
+            })
+
+        # 2. Analizar impacto (CON LLM por lotes si está disponible)
+        if use_llm:
+            logger.debug(f"[Criterio 3] Analizando {len(items)} funciones CON LLM (por lotes)")
+
+            should_stop = self._make_impact_stop(items, nivel, stop_threshold) if early else None
+            llm_analyses = self.llm_validator.analyze_functions_impact(
+                [item["funcion_text"] for item in items],
+                nivel,
+                expected_impact,
+                should_stop=should_stop
+            )
+            for item, llm_analysis in zip(items, llm_analyses):
+                item["impact"] = self._impact_tuple(llm_analysis) if llm_analysis is not None else None
         else:
             # Fallback: usar ImpactAnalyzer basado en reglas
-            logger.debug(f"[Criterio 3] Analizando función {func_id} SIN LLM (reglas)")
-            impact = self.analyzer.analyze_single_function(func)
-
-            impact_scope = impact.detected_scope
-            impact_consequences = impact.detected_consequences
-            impact_complexity = impact.detected_complexity
-
-            # Evaluar coherencia usando RANGOS ACEPTABLES (mismo que con LLM)
-            scope_coherent, cons_coherent, complexity_coherent = self._is_impact_within_acceptable_range(
-                impact_scope,
-                impact_consequences,
-                impact_complexity,
-                nivel
-            )
+            logger.debug(f"[Criterio 3] Analizando {len(items)} funciones SIN LLM (reglas)")
+            for item in items:
+                impact = self.analyzer.analyze_single_function(item["func"])
+                item["impact"] = (
+                    impact.detected_scope,
+                    impact.detected_consequences,
+                    impact.detected_complexity
+                )
+
+        # 3. Verificar coherencia usando RANGOS ACEPTABLES y determinar discrepancias
+        discrepant = []
+        for item in items:
+            if item["impact"] is None:
+                continue
+            impact_scope, impact_consequences, impact_complexity = item["impact"]
+            item["coherence"], has_discrepancy = self._impact_discrepancy(item, item["impact"], nivel)
+            scope_coherent, cons_coherent, complexity_coherent = item["coherence"]
 
             logger.debug(
-                f"[Criterio 3] F{func_id} - Impacto (reglas): scope={impact_scope}({scope_coherent}), "
+                f"[Criterio 3] F{item['func_id']} - Impacto{'' if use_llm else ' (reglas)'}: "
+                f"scope={impact_scope}({scope_coherent}), "
                 f"cons={impact_consequences}({cons_coherent}), comp={impact_complexity}({complexity_coherent})"
             )
 
-        # 5. Determinar si hay discrepancia
-        has_discrepancy = (
-            es_prohibido or
-            not es_apropiado or
-            not scope_coherent or
-            not cons_coherent or
-            not complexity_coherent
-        )
-
-        # 6. Buscar respaldo normativo si hay discrepancia (CON LLM si está disponible)
-        normative_backing = None
-        severity = ValidationSeverity.NONE
-        issue_detected = None
-
-        if has_discrepancy:
-            if self.use_llm and self.llm_validator:
-                # Búsqueda inteligente con LLM
-                discrepancy_desc = self._build_discrepancy_description(
-                    verbo, es_prohibido, es_apropiado,
+            if has_discrepancy:
+                item["discrepancy_desc"] = self._build_discrepancy_description(
+                    item["verbo"], item["es_prohibido"], item["es_apropiado"],
                     scope_coherent, cons_coherent, complexity_coherent
                 )
+                discrepant.append(item)
+
+        # 4. Buscar respaldo normativo solo para las discrepantes (CON LLM en una llamada)
+        if use_llm and discrepant:
+            if early:
+                # Por bloques, revisando antes de cada uno si el resultado ya está fijado
+                critical = 0
+                evaluated = sum(1 for item in items if item["impact"] is not None) - len(discrepant)
+                chunks = [
+                    discrepant[i:i + self.EARLY_BACKING_CHUNK_SIZE]
+                    for i in range(0, len(discrepant), self.EARLY_BACKING_CHUNK_SIZE)
+                ]
+            else:
+                chunks = [discrepant]
 
-                llm_backing = self.llm_validator.search_normative_backing(
-                    funcion_text,
-                    self.normativa_fragments,
-                    discrepancy_desc
-                )
+            for chunk in chunks:
+                if early and threshold_outcome(
+                    critical, evaluated, total, stop_threshold, self.THRESHOLD_EPSILON
+                ) is not None:
+                    break
 
-                if llm_backing.has_backing and llm_backing.relevance_score >= 0.7:
-                    # CON respaldo → MODERATE
-                    severity = ValidationSeverity.MODERATE
-                    normative_backing = llm_backing.backing_text
-                    logger.debug(
-                        f"[Criterio 3] Función {func_id}: Discrepancia MODERATE (con respaldo LLM, score={llm_backing.relevance_score:.2f})"
-                    )
-                else:
-                    # SIN respaldo → CRITICAL
-                    severity = ValidationSeverity.CRITICAL
-                    issue_detected = discrepancy_desc
-                    logger.debug(
-                        f"[Criterio 3] Función {func_id}: Discrepancia CRITICAL (sin respaldo LLM) - {issue_detected}"
+                backings = self.llm_validator.search_normative_backing_batch(
+                    [(item["funcion_text"], item["discrepancy_desc"]) for item in chunk],
+                    self.normativa_fragments
+                )
+                for item, llm_backing in zip(chunk, backings):
+                    if llm_backing.has_backing and llm_backing.relevance_score >= 0.7:
+                        # CON respaldo → MODERATE
+                        item["severity"] = ValidationSeverity.MODERATE
+                        item["normative_backing"] = llm_backing.backing_text
+                        logger.debug(
+                            f"[Criterio 3] Función {item['func_id']}: Discrepancia MODERATE (con respaldo LLM, score={llm_backing.relevance_score:.2f})"
+                        )
+                    else:
+                        # SIN respaldo → CRITICAL
+                        item["severity"] = ValidationSeverity.CRITICAL
+                        item["issue_detected"] = item["discrepancy_desc"]
+                        logger.debug(
+                            f"[Criterio 3] Función {item['func_id']}: Discrepancia CRITICAL (sin respaldo LLM) - {item['discrepancy_desc']}"
+                        )
+                if early:
+                    critical += sum(1 for item in chunk if item["severity"] == ValidationSeverity.CRITICAL)
+                    evaluated += len(chunk)
+
+            for item in discrepant:
+                if "severity" not in item:
+                    item["not_evaluated"] = True
+                    item["issue_detected"] = (
+                        f"{item['discrepancy_desc']} (respaldo normativo no evaluado: resultado ya decidido)"
                     )
-            else:
+        else:
+            for item in discrepant:
                 # Búsqueda simple basada en reglas (fallback)
                 backing_found = self._search_normative_backing(
-                    descripcion, que_hace, para_que
+                    item["descripcion"], item["que_hace"], item["para_que"]
                 )
 
                 if backing_found:
                     # CON respaldo → MODERATE
-                    severity = ValidationSeverity.MODERATE
-                    normative_backing = backing_found
+                    item["severity"] = ValidationSeverity.MODERATE
+                    item["normative_backing"] = backing_found
                     logger.debug(
-                        f"[Criterio 3] Función {func_id}: Discrepancia MODERATE (con respaldo reglas)"
+                        f"[Criterio 3] Función {item['func_id']}: Discrepancia MODERATE (con respaldo reglas)"
                     )
                 else:
                     # SIN respaldo → CRITICAL
-                    severity = ValidationSeverity.CRITICAL
-                    issue_detected = self._build_discrepancy_description(
-                        verbo, es_prohibido, es_apropiado,
-                        scope_coherent, cons_coherent, complexity_coherent
-                    )
+                    item["severity"] = ValidationSeverity.CRITICAL
+                    item["issue_detected"] = item["discrepancy_desc"]
                     logger.debug(
-                        f"[Criterio 3] Función {func_id}: Discrepancia CRITICAL (sin respaldo) - {issue_detected}"
+                        f"[Criterio 3] Función {item['func_id']}: Discrepancia CRITICAL (sin respaldo) - {item['discrepancy_desc']}"
                     )
 
-        # 7. Crear análisis
-        return FunctionImpactAnalysis(
-            funcion_id=func_id,
-            descripcion=descripcion,
-            que_hace=que_hace,
-            para_que_lo_hace=para_que,
-            verbo_principal=verbo,
-            es_verbo_apropiado=es_apropiado,
-            es_verbo_prohibido=es_prohibido,
-            detected_scope=impact_scope,
-            detected_consequences=impact_consequences,
-            detected_complexity=impact_complexity,
-            scope_coherent=scope_coherent,
-            consequences_coherent=cons_coherent,
-            complexity_coherent=complexity_coherent,
-            normative_backing=normative_backing,
-            severity=severity,
-            issue_detected=issue_detected
+        # 5. Crear análisis
+        analyses = []
+        for item in items:
+            if item["impact"] is None:
+                # Omitida en la fase de impacto (terminación temprana)
+                item["not_evaluated"] = True
+                item["impact"] = ("not_evaluated",) * 3
+                item["coherence"] = (True, True, True)
+                item["issue_detected"] = "No evaluada: resultado del criterio ya decidido (terminación temprana)"
+
+            impact_scope, impact_consequences, impact_complexity = item["impact"]
+            scope_coherent, cons_coherent, complexity_coherent = item["coherence"]
+
+            analyses.append(FunctionImpactAnalysis(
+                funcion_id=item["func_id"],
+                descripcion=item["descripcion"],
+                que_hace=item["que_hace"],
+                para_que_lo_hace=item["para_que"],
+                verbo_principal=item["verbo"],
+                es_verbo_apropiado=item["es_apropiado"],
+                es_verbo_prohibido=item["es_prohibido"],
+                detected_scope=impact_scope,
+                detected_consequences=impact_consequences,
+                detected_complexity=impact_complexity,
+                scope_coherent=scope_coherent,
+                consequences_coherent=cons_coherent,
+                complexity_coherent=complexity_coherent,
+                normative_backing=item.get("normative_backing"),
+                severity=item.get("severity", ValidationSeverity.NONE),
+                issue_detected=item.get("issue_detected"),
+                evaluated=not item.get("not_evaluated", False)
+            ))
+
+        return analyses
+
+    def _make_impact_stop(
+        self,
+        items: List[Dict[str, Any]],
+        nivel: str,
+        stop_threshold: float
+    ) -> Callable[[List[Optional[Any]]], bool]:
+        """
+        Condición de parada de la fase de impacto (terminación temprana).
+
+        En esta fase solo puede fijarse PASS: las funciones sin discrepancia
+        ya no pueden ser críticas.
+
+        Returns:
+            should_stop(parciales) para analyze_functions_impact
+        """
+        total = len(items)
+
+        def should_stop(partial: List[Optional[Any]]) -> bool:
+            resolved = sum(
+                1 for item, analysis in zip(items, partial)
+                if analysis is not None and not self._impact_discrepancy(
+                    item, self._impact_tuple(analysis), nivel
+                )[1]
+            )
+            return threshold_outcome(0, resolved, total, stop_threshold, self.THRESHOLD_EPSILON) is True
+
+        return should_stop
+
+    @staticmethod
+    def _impact_tuple(llm_analysis) -> Tuple[str, str, str]:
+        """(scope, consequences, complexity) de un análisis LLM"""
+        return (
+            llm_analysis.scope_level,
+            llm_analysis.consequences_level,
+            llm_analysis.complexity_level
         )
 
+    def _impact_discrepancy(
+        self,
+        item: Dict[str, Any],
+        impact: Tuple[str, str, str],
+        nivel: str
+    ) -> Tuple[Tuple[bool, bool, bool], bool]:
+        """
+        Coherencia del impacto con los rangos aceptables y si hay discrepancia.
+
+        Returns:
+            Tupla ((scope_ok, consequences_ok, complexity_ok), has_discrepancy)
+        """
+        coherence = self._is_impact_within_acceptable_range(*impact, nivel)
+        has_discrepancy = (
+            item["es_prohibido"] or
+            not item["es_apropiado"] or
+            not all(coherence)
+        )
+        return coherence, has_discrepancy
+
     def _search_normative_backing(
         self,
         descripcion: str,
@@ -522,11 +651,17 @@ class Criterion3Validator:
         moderate_count: int,
         total_functions: int,
         critical_rate: float,
-        threshold: float
+        threshold: float,
+        not_evaluated_count: int = 0
     ) -> str:
         """Construye explicación del resultado"""
         reasoning = f"Funciones CRÍTICAS (sin respaldo normativo): {critical_count}/{total_functions} ({critical_rate:.0%})\n"
         reasoning += f"Funciones MODERATE (con respaldo normativo): {moderate_count}/{total_functions}\n"
+        if not_evaluated_count:
+            reasoning += (
+                f"Funciones NO EVALUADAS (resultado ya decidido, terminación temprana): "
+                f"{not_evaluated_count}/{total_functions}\n"
+            )
         reasoning += f"Threshold: {threshold:.0%}\n"
 
         if is_passing:
@@ -0,0 +1,292 @@
+"""
+Memo de evaluaciones por función - reutilización entre puestos y corridas
+
+Los puestos de una misma UR comparten funciones idénticas o casi idénticas
+(plantillas copiadas que difieren en espacios, mayúsculas o puntuación).
+FunctionSemanticEvaluator (Criterio 1) y HierarchicalImpactLLMValidator
+(impacto del Criterio 3) consultan este memo antes de llamar al LLM: una
+función ya evaluada con la misma llave se reutiliza sin llamada.
+
+Llave = hash de (tipo de evaluación, versión del validador, texto canónico,
+verbo, letra del nivel, hash de la normativa, alcance, variante):
+- Texto canónico: Unicode NFC, minúsculas, sin puntuación, espacios colapsados
+- Variante: opciones del evaluador que cambian la forma del resultado
+  (p. ej. modo compacto del Criterio 1)
+
+Campos propios del puesto (POSITION_SPECIFIC_FIELDS):
+- denominacion: NUNCA entra en la llave, así que no debe decidir nada de lo
+  que la evaluación memorizada arrastra. Con memo, FunctionSemanticEvaluator
+  busca los fragmentos normativos sin la denominación (verbo + texto
+  canónico): los fragmentos, que se guardan con la evaluación, dependen solo
+  de campos de la llave. La denominación sí llega al prompt como contexto;
+  una evaluación reutilizada se generó con la del puesto de origen, que
+  queda registrada en el resultado ("memo.puesto_origen")
+- unidad_responsable: entra en la llave con alcance "ur" (default: solo se
+  reutiliza dentro de la misma UR); con alcance "global" se ignora
+
+Almacenamiento:
+- En memoria (siempre): reutilización entre puestos de la misma corrida
+- SQLite en memo_dir (opcional): reutilización entre corridas
+
+Se habilita con APF_FUNCTION_MEMO=true (en memoria) o APF_FUNCTION_MEMO_DIR
+(persistente); alcance en APF_FUNCTION_MEMO_SCOPE (ver .env.example).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+MEMO_SCOPES = ("ur", "global")
+
+MEMO_FILENAME = "function_memo.sqlite3"
+
+# Campos del puesto que llegan al prompt pero no identifican la evaluación
+POSITION_SPECIFIC_FIELDS = ("denominacion", "unidad_responsable")
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonicalize_function_text(text: str) -> str:
+    """
+    Forma canónica del texto de una función para la llave del memo.
+
+    Args:
+        text: Texto de la función (o verbo, unidad)
+
+    Returns:
+        Texto en NFC, minúsculas, sin puntuación y con espacios colapsados
+    """
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class FunctionEvaluationMemo:
+    """
+    Memo de evaluaciones por función (memoria + SQLite opcional).
+
+    Thread-safe: lo comparten las ramas y workers de IntegratedValidator.
+
+    Ejemplo:
+        >>> memo = FunctionEvaluationMemo(version="5.38")
+        >>> key = memo.key("c1", funcion_text, verbo, "G", normativa_hash, unidad=unidad)
+        >>> entry = memo.get(key)
+        >>> if entry is None:
+        ...     memo.set(key, evaluacion, origin=denominacion)
+    """
+
+    def __init__(
+        self,
+        version: str = "",
+        memo_dir: Optional[Union[str, Path]] = None,
+        scope: str = "ur"
+    ):
+        """
+        Args:
+            version: Versión del validador y sus prompts (parte de la llave)
+            memo_dir: Directorio de la base SQLite (None = solo en memoria)
+            scope: "ur" (reutiliza dentro de la misma unidad responsable) o
+                "global" (entre unidades)
+        """
+        if scope not in MEMO_SCOPES:
+            raise ValueError(f"scope inválido: '{scope}' (valores: {', '.join(MEMO_SCOPES)})")
+
+        self.version = version
+        self.scope = scope
+        self.db_path = None
+        if memo_dir:
+            Path(memo_dir).mkdir(parents=True, exist_ok=True)
+            self.db_path = Path(memo_dir) / MEMO_FILENAME
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._local = threading.local()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if self.db_path is not None:
+            self._init_db()
+
+    def key(
+        self,
+        kind: str,
+        funcion_text: str,
+        verbo: str,
+        nivel: str,
+        normativa_hash: str = "",
+        unidad: str = "",
+        variant: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Construye la llave de una evaluación.
+
+        Args:
+            kind: Tipo de evaluación ("c1", "c3_impacto")
+            funcion_text: Texto de la función (se canonicaliza)
+            verbo: Verbo principal
+            nivel: Nivel del puesto (solo cuenta la letra)
+            normativa_hash: Hash de la normativa ("" si la evaluación no la usa)
+            unidad: Unidad responsable (solo con alcance "ur")
+            variant: Opciones del evaluador que cambian el resultado
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        fields = [
+            kind,
+            self.version,
+            canonicalize_function_text(funcion_text),
+            canonicalize_function_text(verbo),
+            (nivel or "P")[0].upper(),
+            normativa_hash,
+            canonicalize_function_text(unidad) if self.scope == "ur" else "",
+            variant or {}
+        ]
+        payload = json.dumps(fields, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, kind: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Obtiene una evaluación memorizada.
+
+        Args:
+            key: Llave (key)
+            kind: Tipo de evaluación (solo para estadísticas)
+
+        Returns:
+            {"value": evaluación serializada, "origin": puesto de origen} o None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and self.db_path is not None:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+
+        self._record(kind, "hits" if entry is not None else "misses")
+        return entry
+
+    def set(self, key: str, value: Dict[str, Any], origin: str = "", kind: str = "") -> None:
+        """
+        Memoriza una evaluación.
+
+        Args:
+            key: Llave (key)
+            value: Evaluación serializable a JSON
+            origin: Puesto de origen (denominación o código)
+            kind: Tipo de evaluación (solo para estadísticas)
+        """
+        entry = {"value": value, "origin": origin}
+        with self._lock:
+            self._entries[key] = entry
+
+        if self.db_path is not None:
+            conn = self._get_connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO function_memo (key, kind, value, origin, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value, ensure_ascii=False, default=str), origin, time.time())
+                )
+        self._record(kind, "sets")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hits, misses y evaluaciones memorizadas por tipo"""
+        with self._lock:
+            by_kind = {kind: dict(counts) for kind, counts in self._stats.items()}
+            entries = len(self._entries)
+
+        hits = sum(counts.get("hits", 0) for counts in by_kind.values())
+        misses = sum(counts.get("misses", 0) for counts in by_kind.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "por_tipo": by_kind,
+            "entradas_en_memoria": entries,
+            "alcance": self.scope,
+            "db_path": str(self.db_path) if self.db_path else None
+        }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _record(self, kind: str, name: str) -> None:
+        """Incrementa un contador de estadísticas"""
+        with self._lock:
+            counts = self._stats.setdefault(kind or "general", {"hits": 0, "misses": 0, "sets": 0})
+            counts[name] += 1
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Lee una evaluación de SQLite (None si no existe o está corrupta)"""
+        row = self._get_connection().execute(
+            "SELECT value, origin FROM function_memo WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return {"value": json.loads(row[0]), "origin": row[1] or ""}
+        except json.JSONDecodeError:
+            logger.warning(f"[FunctionEvaluationMemo] Evaluación corrupta para {key[:12]}... (se reevalúa)")
+            return None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Conexión SQLite por hilo (las conexiones no se comparten entre hilos)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        """Crea el esquema si no existe"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS function_memo ("
+                " key TEXT PRIMARY KEY,"
+                " kind TEXT,"
+                " value TEXT NOT NULL,"
+                " origin TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+
+
+def function_memo_from_env(version: str = "") -> Optional[FunctionEvaluationMemo]:
+    """
+    Construye el memo a partir de variables de entorno.
+
+    Variables:
+        APF_FUNCTION_MEMO: true para memo en memoria (entre puestos de la corrida)
+        APF_FUNCTION_MEMO_DIR: Directorio SQLite (además, entre corridas)
+        APF_FUNCTION_MEMO_SCOPE: ur | global (default "ur")
+
+    Args:
+        version: Versión del validador y sus prompts
+
+    Returns:
+        FunctionEvaluationMemo o None si no está configurado
+    """
+    memo_dir = os.getenv("APF_FUNCTION_MEMO_DIR")
+    enabled = os.getenv("APF_FUNCTION_MEMO", "").strip().lower() in ("1", "true", "yes", "on")
+    if not memo_dir and not enabled:
+        return None
+
+    scope = os.getenv("APF_FUNCTION_MEMO_SCOPE", "ur").strip().lower() or "ur"
+    return FunctionEvaluationMemo(version=version, memo_dir=memo_dir or None, scope=scope)
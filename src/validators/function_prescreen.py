@@ -0,0 +1,420 @@
+"""
+Pre-filtro local de funciones - Criterio 1 en cascada
+
+FunctionSemanticEvaluator envía cada función al LLM aunque los datos
+deterministas de src/config/verb_hierarchy.py (verbos apropiados/prohibidos
+por nivel) y una revisión estructural VERBO+COMPLEMENTO+RESULTADO ya hagan
+obvio el resultado. FunctionPrescreener estima localmente los criterios que
+puede (verbo, estructura, jerarquía y, con los fragmentos normativos ya
+buscados, normativa) y calcula un score global estimado con los mismos pesos
+y escalas de la rúbrica SABG:
+
+- score < reject_below   -> RECHAZADO local (sin LLM)
+- score >= approve_above -> APROBADO local (sin LLM)
+- banda intermedia       -> se escala al LLM
+
+Modos del evaluador (APF_C1_PRESCREEN):
+- off: sin pre-filtro
+- shadow: todas las funciones van al LLM; cada resultado conserva la
+  decisión del pre-filtro para medir concordancia
+- cascade: las decisiones locales reemplazan la llamada LLM
+
+prescreen_agreement_report() compara decisiones del pre-filtro contra
+clasificaciones de corridas LLM completas (modo shadow) para varias bandas,
+y suggest_band() elige la banda de mayor cobertura con concordancia mínima.
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config.verb_hierarchy import is_verb_appropriate, is_verb_forbidden
+
+
+PRESCREEN_MODES = ("off", "shadow", "cascade")
+
+# Decisión de una función que el pre-filtro no resuelve
+ESCALATED = "ESCALADO"
+
+# Pesos de la rúbrica SABG (mismos que FunctionSemanticEvaluator.WEIGHTS)
+WEIGHTS = {
+    "verbo": 0.25,
+    "normativa": 0.25,
+    "estructura": 0.20,
+    "semantica": 0.20,
+    "jerarquica": 0.10
+}
+
+# Valor asumido para un criterio que no se puede estimar localmente
+NEUTRAL_SCORE = 0.5
+
+# Escala de la rúbrica para estructura: componentes presentes -> score
+STRUCTURE_SCORES = {3: 1.0, 2: 0.7, 1: 0.4, 0: 0.0}
+
+# Conectores que introducen el RESULTADO (para qué) de una función
+RESULT_MARKERS = re.compile(
+    r"\b(?:para|a fin de|con el fin de|con la finalidad de|con (?:el )?objeto de|"
+    r"con el propósito de|a efecto de|que permitan?|asegurando|garantizando|contribuyendo)\b",
+    re.IGNORECASE
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_INFINITIVE = re.compile(r"^\w+(?:ar|er|ir)(?:se)?$", re.IGNORECASE)
+
+# Bandas evaluadas por defecto en el reporte de concordancia
+DEFAULT_REPORT_BANDS: Tuple[Tuple[float, float], ...] = tuple(
+    (low, high)
+    for low in (0.15, 0.20, 0.25, 0.30, 0.35, 0.40)
+    for high in (0.80, 0.85, 0.90, 0.95)
+)
+
+
+@dataclass
+class PrescreenDecision:
+    """Estimación local de una función y decisión del pre-filtro"""
+    verbo: str
+    score: float  # Score global estimado (0.0 a 1.0)
+    decision: str  # APROBADO | RECHAZADO | ESCALADO
+    scores: Dict[str, Optional[float]]  # Por criterio; None = no estimable localmente
+    codes: Dict[str, str]
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def decided(self) -> bool:
+        """True si el pre-filtro resolvió la función sin LLM"""
+        return self.decision != ESCALATED
+
+    def to_dict(self, applied: bool = False) -> Dict[str, Any]:
+        """
+        Args:
+            applied: True si la decisión reemplazó a la evaluación LLM (cascade)
+        """
+        return {
+            "score": round(self.score, 3),
+            "decision": self.decision,
+            "resuelta_localmente": applied,
+            "scores": {
+                name: (round(score, 2) if score is not None else None)
+                for name, score in self.scores.items()
+            },
+            "codigos": dict(self.codes),
+            "motivos": list(self.reasons)
+        }
+
+
+class FunctionPrescreener:
+    """
+    Pre-filtro local (sin LLM) de funciones para el Criterio 1.
+
+    Ejemplo:
+        >>> prescreener = FunctionPrescreener(reject_below=0.30, approve_above=0.90)
+        >>> decision = prescreener.evaluate(
+        ...     "Capturar los oficios recibidos en el sistema", "capturar", "G")
+        >>> decision.decision
+        'RECHAZADO'
+    """
+
+    DEFAULT_REJECT_BELOW = 0.30
+    DEFAULT_APPROVE_ABOVE = 0.90
+
+    def __init__(
+        self,
+        reject_below: float = DEFAULT_REJECT_BELOW,
+        approve_above: float = DEFAULT_APPROVE_ABOVE,
+        relevance_floor: float = 0.20,
+        relevance_strong: float = 0.60
+    ):
+        """
+        Args:
+            reject_below: Scores estimados por debajo se rechazan localmente
+            approve_above: Scores estimados desde este valor se aprueban localmente
+            relevance_floor: Relevancia mínima de un fragmento para contar como respaldo
+            relevance_strong: Relevancia a partir de la cual el respaldo es directo
+                (si además el fragmento menciona el verbo)
+        """
+        if not 0.0 <= reject_below <= approve_above <= 1.0:
+            raise ValueError(
+                f"Banda inválida: se requiere 0 <= reject_below ({reject_below}) "
+                f"<= approve_above ({approve_above}) <= 1"
+            )
+        self.reject_below = reject_below
+        self.approve_above = approve_above
+        self.relevance_floor = relevance_floor
+        self.relevance_strong = relevance_strong
+
+        self._lock = threading.Lock()
+        self._stats = {"evaluated": 0, "approved": 0, "rejected": 0, "escalated": 0}
+
+    def evaluate(
+        self,
+        funcion_text: str,
+        verbo: str,
+        nivel_jerarquico: str,
+        fragments: Optional[Sequence[Tuple[str, float]]] = None
+    ) -> PrescreenDecision:
+        """
+        Estima la función localmente y decide si se escala al LLM.
+
+        Args:
+            funcion_text: Texto completo de la función
+            verbo: Verbo principal identificado
+            nivel_jerarquico: Nivel del puesto (G, H, J, K, etc.)
+            fragments: Fragmentos normativos ya buscados (snippet, relevancia);
+                None si no hay normativa cargada ([] = búsqueda sin resultados)
+
+        Returns:
+            PrescreenDecision
+        """
+        verb = (verbo or "").strip().lower()
+        reasons: List[str] = []
+        exception = self._has_normative_mention(verb, fragments)
+
+        # Verbo y jerarquía (verb_hierarchy)
+        if verb and is_verb_forbidden(verb, nivel_jerarquico):
+            if exception:
+                verbo_code, verbo_score, jerarquica_code, jerarquica_score = "EXCEPCION", 0.5, "AJUSTE", 0.5
+                reasons.append(f"Verbo '{verb}' prohibido para el nivel {nivel_jerarquico}, mencionado en la normativa")
+            else:
+                verbo_code, verbo_score, jerarquica_code, jerarquica_score = "NO_AUTORIZADO", 0.0, "INVERSION", 0.0
+                reasons.append(f"Verbo '{verb}' prohibido para el nivel {nivel_jerarquico}, sin excepción normativa")
+        elif verb and is_verb_appropriate(verb, nivel_jerarquico):
+            verbo_code, verbo_score, jerarquica_code, jerarquica_score = "AUTORIZADO", 1.0, "CORRESPONDE", 1.0
+            reasons.append(f"Verbo '{verb}' apropiado para el nivel {nivel_jerarquico}")
+        else:
+            verbo_code, verbo_score, jerarquica_code, jerarquica_score = "DESCONOCIDO", None, "DESCONOCIDO", None
+
+        # Estructura VERBO + COMPLEMENTO + RESULTADO
+        estructura_code = self.structure_code(funcion_text, verb)
+        estructura_score = STRUCTURE_SCORES[len(estructura_code)]
+        if estructura_code != "VCR":
+            reasons.append(f"Estructura incompleta ({estructura_code or 'NINGUNO'})")
+
+        # Normativa (relevancia de los fragmentos ya buscados)
+        normativa_code, normativa_score = self._normativa_estimate(fragments, exception)
+        if normativa_code == "NINGUNA":
+            reasons.append("Sin fragmentos normativos relevantes")
+
+        scores: Dict[str, Optional[float]] = {
+            "verbo": verbo_score,
+            "normativa": normativa_score,
+            "estructura": estructura_score,
+            # La alineación semántica requiere al LLM: se aproxima con el respaldo normativo
+            "semantica": None,
+            "jerarquica": jerarquica_score
+        }
+        score = self.estimate_global(scores)
+        decision = self._decide(score)
+
+        self._count(decision)
+        return PrescreenDecision(
+            verbo=verb,
+            score=score,
+            decision=decision,
+            scores=scores,
+            codes={
+                "verbo": verbo_code,
+                "normativa": normativa_code,
+                "estructura": estructura_code or "NINGUNO",
+                "jerarquica": jerarquica_code
+            },
+            reasons=reasons
+        )
+
+    @staticmethod
+    def estimate_global(scores: Dict[str, Optional[float]]) -> float:
+        """
+        Score global estimado con los pesos SABG.
+
+        Criterios no estimables: semántica toma el valor de normativa; el
+        resto, NEUTRAL_SCORE. Jerarquía 0.0 anula todo (igual que la rúbrica).
+        """
+        if scores.get("jerarquica") == 0.0:
+            return 0.0
+
+        filled = dict(scores)
+        if filled.get("semantica") is None:
+            filled["semantica"] = filled.get("normativa")
+        return sum(
+            weight * (filled[name] if filled.get(name) is not None else NEUTRAL_SCORE)
+            for name, weight in WEIGHTS.items()
+        )
+
+    @staticmethod
+    def structure_code(funcion_text: str, verbo: str = "") -> str:
+        """
+        Componentes estructurales presentes (V=verbo, C=complemento, R=resultado).
+
+        Returns:
+            Código en el formato de estructura_codigo del modo compacto
+            ("VCR", "VC", "VR", "CR", "V", "C", "R" o "")
+        """
+        text = (funcion_text or "").strip()
+        words = _WORD.findall(text)
+        if not words:
+            return ""
+
+        first = words[0].lower()
+        has_verb = (bool(verbo) and first == verbo.lower()) or bool(_INFINITIVE.match(first))
+
+        marker = RESULT_MARKERS.search(text)
+        body = text[:marker.start()] if marker else text
+        complement_words = _WORD.findall(body)[1 if has_verb else 0:]
+        result_words = _WORD.findall(text[marker.end():]) if marker else []
+
+        code = ""
+        if has_verb:
+            code += "V"
+        if len(complement_words) >= 2:
+            code += "C"
+        if len(result_words) >= 2:
+            code += "R"
+        return code
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Funciones evaluadas, resueltas localmente y escaladas"""
+        with self._lock:
+            stats = dict(self._stats)
+        decided = stats["approved"] + stats["rejected"]
+        stats["coverage"] = decided / stats["evaluated"] if stats["evaluated"] else 0.0
+        stats["band"] = [self.reject_below, self.approve_above]
+        return stats
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _decide(self, score: float) -> str:
+        if score < self.reject_below:
+            return "RECHAZADO"
+        if score >= self.approve_above:
+            return "APROBADO"
+        return ESCALATED
+
+    def _normativa_estimate(
+        self,
+        fragments: Optional[Sequence[Tuple[str, float]]],
+        mentions_verb: bool
+    ) -> Tuple[str, Optional[float]]:
+        """Código y score de normativa en la escala de la rúbrica"""
+        if fragments is None:
+            return "DESCONOCIDO", None
+        relevance = max((confidence for _, confidence in fragments), default=0.0)
+        if relevance < self.relevance_floor:
+            return "NINGUNA", 0.0
+        if mentions_verb and relevance >= self.relevance_strong:
+            return "DIRECTA", 1.0
+        if mentions_verb:
+            return "SEMANTICA", 0.7
+        return "LEJANA", 0.4
+
+    @staticmethod
+    def _has_normative_mention(verb: str, fragments: Optional[Sequence[Tuple[str, float]]]) -> bool:
+        """True si algún fragmento menciona el verbo (o su raíz: 'tramit' en 'trámite')"""
+        if not verb or not fragments:
+            return False
+        stem = verb[:-2] if len(verb) > 5 else verb
+        return any(stem in snippet.lower() for snippet, _ in fragments)
+
+    def _count(self, decision: str) -> None:
+        name = {"APROBADO": "approved", "RECHAZADO": "rejected"}.get(decision, "escalated")
+        with self._lock:
+            self._stats["evaluated"] += 1
+            self._stats[name] += 1
+
+
+def prescreen_agreement_report(
+    pairs: Iterable[Tuple[float, str]],
+    bands: Sequence[Tuple[float, float]] = DEFAULT_REPORT_BANDS
+) -> Dict[str, Any]:
+    """
+    Concordancia del pre-filtro contra clasificaciones LLM para varias bandas.
+
+    Con los scores de una corrida en modo shadow (todas las funciones por el
+    LLM) se simula cada banda sin volver a llamar al LLM: cobertura (funciones
+    que se resolverían localmente = llamadas ahorradas), concordancia de esas
+    decisiones y los desacuerdos por tipo.
+
+    Args:
+        pairs: (score estimado del pre-filtro, clasificación LLM) por función
+        bands: Bandas (reject_below, approve_above) a evaluar
+
+    Returns:
+        Dict con total de funciones y una fila por banda
+    """
+    pairs = [(float(score), str(clasificacion).upper()) for score, clasificacion in pairs]
+    rows = []
+    for reject_below, approve_above in bands:
+        decided = agree = false_approvals = false_rejections = 0
+        for score, clasificacion in pairs:
+            if score < reject_below:
+                local = "RECHAZADO"
+            elif score >= approve_above:
+                local = "APROBADO"
+            else:
+                continue
+            decided += 1
+            if local == clasificacion:
+                agree += 1
+            elif local == "APROBADO":
+                false_approvals += 1
+            else:
+                false_rejections += 1
+        rows.append({
+            "reject_below": reject_below,
+            "approve_above": approve_above,
+            "decided": decided,
+            "coverage": decided / len(pairs) if pairs else 0.0,
+            "agreement": agree / decided if decided else 1.0,
+            "false_approvals": false_approvals,
+            "false_rejections": false_rejections
+        })
+    return {"total": len(pairs), "bands": rows}
+
+
+def suggest_band(report: Dict[str, Any], min_agreement: float = 0.98) -> Optional[Dict[str, Any]]:
+    """
+    Banda de mayor cobertura cuya concordancia alcanza min_agreement.
+
+    Args:
+        report: Resultado de prescreen_agreement_report()
+        min_agreement: Concordancia mínima exigida (0-1)
+
+    Returns:
+        Fila de la banda elegida, o None si ninguna la alcanza
+    """
+    candidates = [row for row in report["bands"] if row["decided"] and row["agreement"] >= min_agreement]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda row: (row["coverage"], row["agreement"], -row["false_approvals"]))
+
+
+def prescreen_mode_from_env() -> str:
+    """
+    Modo del pre-filtro del Criterio 1 (APF_C1_PRESCREEN: off | shadow | cascade).
+
+    Returns:
+        Modo normalizado (default "off")
+    """
+    mode = os.getenv("APF_C1_PRESCREEN", "off").strip().lower() or "off"
+    if mode not in PRESCREEN_MODES:
+        raise ValueError(f"APF_C1_PRESCREEN inválido: '{mode}' (valores: {', '.join(PRESCREEN_MODES)})")
+    return mode
+
+
+def prescreener_from_env() -> FunctionPrescreener:
+    """
+    Construye el pre-filtro a partir de variables de entorno.
+
+    Variables:
+        APF_C1_PRESCREEN_BAND: Banda "reject_below,approve_above" (default "0.30,0.90")
+
+    Returns:
+        FunctionPrescreener
+    """
+    band = os.getenv("APF_C1_PRESCREEN_BAND")
+    if not band:
+        return FunctionPrescreener()
+    reject_below, approve_above = (float(value) for value in band.split(","))
+    return FunctionPrescreener(reject_below=reject_below, approve_above=approve_above)
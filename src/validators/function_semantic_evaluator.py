@@ -12,16 +12,143 @@ Fecha: 2025-11-07
 Versión: 5.20 - ANÁLISIS SEMÁNTICO CON LLM
 """
 
+import copy
 import logging
 import json
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
-
-from src.validators.shared_utilities import APFContext, robust_openai_call
+import textwrap
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, asdict, field
+
+from src.validators.shared_utilities import APFContext, call_failure_flags, robust_openai_call
+from src.validators.function_prescreen import FunctionPrescreener, PrescreenDecision, PRESCREEN_MODES
+from src.validators.function_memo import FunctionEvaluationMemo, canonicalize_function_text
+from src.validators.response_schemas import (
+    FUNCTION_EVALUATION_BATCH_SCHEMA,
+    FUNCTION_EVALUATION_COMPACT_BATCH_SCHEMA,
+    FUNCTION_EVALUATION_COMPACT_SCHEMA,
+    FUNCTION_EVALUATION_SCHEMA,
+    FUNCTION_REASONING_BATCH_SCHEMA
+)
 
 logger = logging.getLogger(__name__)
 
 
+# Campos JSON de una evaluación (compartidos por el prompt individual y por lotes)
+EVALUATION_JSON_FIELDS = """    "criterio_verbo": {
+        "score": 0.0,
+        "reasoning": "explicación breve (1-2 oraciones)",
+        "esta_autorizado": false,
+        "tiene_excepcion_normativa": false
+    },
+    "criterio_normativa": {
+        "score": 0.0,
+        "reasoning": "explicación",
+        "articulo_respaldo": "Fragmento X" o null,
+        "tipo_correspondencia": "DIRECTA|SEMANTICA|LEJANA|NINGUNA"
+    },
+    "criterio_estructura": {
+        "score": 0.0,
+        "reasoning": "explicación",
+        "tiene_verbo": false,
+        "tiene_complemento": false,
+        "tiene_resultado": false
+    },
+    "criterio_semantica": {
+        "score": 0.0,
+        "reasoning": "explicación",
+        "nucleo_semantico": "significado esencial de la función",
+        "nucleo_normativo": "significado esencial de la normativa",
+        "tipo_alineacion": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA"
+    },
+    "criterio_jerarquica": {
+        "score": 0.0,
+        "reasoning": "explicación",
+        "corresponde_nivel": false,
+        "hay_inversion_jerarquica": false
+    },
+    "score_global": 0.0,
+    "clasificacion": "APROBADO|OBSERVACION|RECHAZADO",
+    "razonamiento_final": "justificación integrada de 2-3 oraciones\""""
+
+# Instrucción de sistema (inicio del prefijo estático de ambos prompts)
+SYSTEM_INSTRUCTION = "Eres un experto en evaluación de descripciones de puestos de la Administración Pública Federal mexicana. Respondes únicamente en JSON válido."
+
+# Reglas de score global y clasificación
+SCORING_RULES = """CÁLCULO DE SCORE GLOBAL:
+score_global = (verbo×0.25) + (normativa×0.25) + (estructura×0.20) + (semantica×0.20) + (jerarquica×0.10)
+
+CLASIFICACIÓN:
+- Score >= 0.85: "APROBADO"
+- Score 0.60-0.84: "OBSERVACION"
+- Score < 0.60: "RECHAZADO"
+- Si jerarquica = 0.0: "RECHAZADO" (anula todo)"""
+
+# Modo compacto: scores y códigos enumerados, sin prosa. El score global y la
+# clasificación se calculan localmente con SCORING_RULES (WEIGHTS)
+COMPACT_JSON_FIELDS = """    "verbo": 0.0,
+    "verbo_codigo": "AUTORIZADO|EXCEPCION|NO_AUTORIZADO",
+    "normativa": 0.0,
+    "normativa_codigo": "DIRECTA|SEMANTICA|LEJANA|NINGUNA",
+    "fragmento_respaldo": 1 o null,
+    "estructura": 0.0,
+    "estructura_codigo": "VCR|VC|VR|CR|V|C|R|NINGUNO",
+    "semantica": 0.0,
+    "semantica_codigo": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA",
+    "jerarquica": 0.0,
+    "jerarquica_codigo": "CORRESPONDE|AJUSTE|INVERSION\""""
+
+COMPACT_RULES = """MODO COMPACTO:
+- NO incluyas razonamientos ni explicaciones: solo scores (0.0-1.0) y códigos.
+- estructura_codigo: componentes presentes (V=verbo, C=complemento, R=resultado).
+- fragmento_respaldo: número del fragmento que respalda la función, o null.
+- jerarquica_codigo: CORRESPONDE (1.0) | AJUSTE (0.5) | INVERSION (0.0)."""
+
+# Razonamiento bajo demanda (expand_reasoning) de funciones ya evaluadas
+REASONING_JSON_FIELDS = """    "verbo": "explicación breve (1-2 oraciones)",
+    "normativa": "explicación",
+    "estructura": "explicación",
+    "semantica": "explicación",
+    "jerarquica": "explicación",
+    "nucleo_semantico": "significado esencial de la función",
+    "nucleo_normativo": "significado esencial de la normativa",
+    "razonamiento_final": "justificación integrada de 2-3 oraciones\""""
+
+# Razonamiento provisional por código (modo compacto, antes de expand_reasoning)
+COMPACT_REASONING = {
+    "verbo": {
+        "AUTORIZADO": "Verbo autorizado para el nivel jerárquico.",
+        "EXCEPCION": "Verbo no típico del nivel, con excepción normativa válida.",
+        "NO_AUTORIZADO": "Verbo no autorizado para el nivel jerárquico."
+    },
+    "normativa": {
+        "DIRECTA": "Respaldo normativo directo.",
+        "SEMANTICA": "Respaldo normativo semántico (mismo concepto, otras palabras).",
+        "LEJANA": "Correspondencia normativa lejana.",
+        "NINGUNA": "Sin respaldo en los fragmentos normativos."
+    },
+    "estructura": {
+        "VCR": "Estructura completa: verbo, complemento y resultado.",
+        "NINGUNO": "Sin componentes estructurales identificables."
+    },
+    "semantica": {
+        "EQUIVALENTE": "Significado equivalente al de la normativa.",
+        "SUPERPONE_CLARA": "Superposición semántica clara con la normativa.",
+        "SUPERPONE_DEBIL": "Superposición semántica débil con la normativa.",
+        "DISTINTA": "Significado distinto al de la normativa."
+    },
+    "jerarquica": {
+        "CORRESPONDE": "Corresponde al nivel jerárquico del puesto.",
+        "AJUSTE": "Requiere ajuste para corresponder al nivel jerárquico.",
+        "INVERSION": "Inversión jerárquica: tarea propia de un nivel inferior."
+    }
+}
+
+_STRUCTURE_COMPONENTS = {"V": "verbo", "C": "complemento", "R": "resultado"}
+
+# Clasificación de funciones omitidas por terminación temprana (evaluate_functions_batch)
+NOT_EVALUATED = "NO_EVALUADA"
+
+
 @dataclass
 class CriterionScore:
     """Score de un criterio individual"""
@@ -45,9 +172,19 @@ class FunctionEvaluationResult:
 
     # Score global ponderado
     score_global: float  # 0.0 a 1.0
-    clasificacion: str  # APROBADO | OBSERVACION | RECHAZADO
+    clasificacion: str  # APROBADO | OBSERVACION | RECHAZADO | NO_EVALUADA
     razonamiento_final: str
 
+    # Modo compacto: razonamiento provisional por código hasta expand_reasoning()
+    reasoning_pending: bool = False
+    normativa_fragments: List[Tuple[str, float]] = field(default_factory=list, repr=False)
+
+    # Pre-filtro local (modos shadow/cascade): decisión y score estimado
+    prescreen: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    # Memo entre puestos: {"clave", "reutilizada", "puesto_origen"}
+    memo: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Convierte a diccionario para serialización COMPLETA.
@@ -55,7 +192,7 @@ class FunctionEvaluationResult:
         OBJETIVO: Máxima transparencia y auditabilidad.
         Documenta CÓMO se evaluó cada criterio y POR QUÉ se dio cada score.
         """
-        return {
+        data = {
             # ========== FUNCIÓN EVALUADA (COMPLETA) ==========
             "funcion_text": self.funcion_text,  # ✅ Función completa, sin truncar
             "verbo": self.verbo,
@@ -110,6 +247,16 @@ class FunctionEvaluationResult:
             }
         }
 
+        # ========== PRE-FILTRO LOCAL (shadow/cascade) ==========
+        if self.prescreen is not None:
+            data["prescreen"] = self.prescreen
+
+        # ========== MEMO ENTRE PUESTOS ==========
+        if self.memo is not None and self.memo.get("reutilizada"):
+            data["memo"] = {"reutilizada": True, "puesto_origen": self.memo.get("puesto_origen", "")}
+
+        return data
+
 
 class FunctionSemanticEvaluator:
     """
@@ -127,18 +274,65 @@ class FunctionSemanticEvaluator:
         "jerarquica": 0.10
     }
 
-    def __init__(self, normativa_loader, context: APFContext):
+    # Evaluación por lotes (evaluate_functions_batch)
+    DEFAULT_BATCH_SIZE = 6  # Funciones por request
+    DEFAULT_TOKEN_BUDGET = 12000  # Tokens estimados de prompt por request
+    OUTPUT_TOKENS_PER_FUNCTION = 1000  # Reserva de salida por función
+    MAX_OUTPUT_TOKENS = 16000  # Límite de salida de gpt-4o-mini
+
+    # Modo compacto (códigos y scores; prosa solo bajo demanda)
+    COMPACT_OUTPUT_TOKENS_PER_FUNCTION = 150  # Reserva de salida por función
+    COMPACT_MAX_TOKENS = 300  # Salida de una evaluación individual
+    REASONING_TOKENS_PER_FUNCTION = 700  # Reserva de salida por función en expand_reasoning
+    REASONING_CLASSIFICATIONS = ("OBSERVACION", "RECHAZADO")
+
+    def __init__(
+        self,
+        normativa_loader,
+        context: APFContext,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        compact: bool = False,
+        prescreen_mode: str = "off",
+        prescreener: Optional[FunctionPrescreener] = None,
+        memo: Optional[FunctionEvaluationMemo] = None
+    ):
         """
         Inicializa el evaluador semántico.
 
         Args:
             normativa_loader: NormativaLoader con documentos normativos cargados
             context: APFContext con configuración (API keys, etc.)
+            batch_size: Máximo de funciones por request en evaluate_functions_batch
+            token_budget: Máximo de tokens estimados de prompt por request en lote
+            compact: Si True, el LLM devuelve solo scores y códigos enumerados;
+                el razonamiento en prosa se pide después con expand_reasoning()
+            prescreen_mode: Pre-filtro local: "off", "shadow" (todo al LLM,
+                registrando la decisión local) o "cascade" (las funciones
+                claras se resuelven sin LLM)
+            prescreener: FunctionPrescreener con la banda de confianza
+                (default: banda por defecto)
+            memo: Memo de evaluaciones entre puestos (None = sin memo); las
+                funciones con la misma llave se reutilizan sin llamada LLM. Con
+                memo, la búsqueda de normativa no usa la denominación del puesto
         """
         self.normativa_loader = normativa_loader
         self.context = context
-
-        logger.info("[FunctionSemanticEvaluator] Inicializado con Protocolo SABG v1.1")
+        self.batch_size = max(1, batch_size)
+        self.token_budget = token_budget
+        self.compact = compact
+
+        if prescreen_mode not in PRESCREEN_MODES:
+            raise ValueError(f"prescreen_mode inválido: '{prescreen_mode}' (valores: {', '.join(PRESCREEN_MODES)})")
+        self.prescreen_mode = prescreen_mode
+        self.prescreener = prescreener or (FunctionPrescreener() if prescreen_mode != "off" else None)
+        self.memo = memo
+
+        logger.info(
+            f"[FunctionSemanticEvaluator] Inicializado con Protocolo SABG v1.1"
+            f"{' (modo compacto)' if compact else ''}"
+            f"{f' (pre-filtro {prescreen_mode})' if prescreen_mode != 'off' else ''}"
+        )
 
     def evaluate_function(
         self,
@@ -163,8 +357,29 @@ class FunctionSemanticEvaluator:
         """
         logger.debug(f"[FunctionSemanticEvaluator] Evaluando función con verbo '{verbo}'")
 
+        memorized = self._memo_lookup(funcion_text, verbo, nivel_jerarquico, unidad)
+        if memorized is not None:
+            return memorized
+
+        return self._evaluate_single(funcion_text, verbo, nivel_jerarquico, puesto_nombre, unidad)
+
+    def _evaluate_single(
+        self,
+        funcion_text: str,
+        verbo: str,
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> FunctionEvaluationResult:
+        """Evalúa una función (sin consultar el memo) y memoriza la evaluación LLM"""
         # Obtener contexto normativo relevante
-        contexto_normativo = self._get_normativa_context(funcion_text, verbo, puesto_nombre)
+        fragments, message = self._search_normativa_fragments(funcion_text, verbo, puesto_nombre)
+        contexto_normativo = self._format_normativa_context(fragments, message)
+
+        # Pre-filtro local: en modo cascade las funciones claras no llegan al LLM
+        decision = self._prescreen(funcion_text, verbo, nivel_jerarquico, fragments)
+        if decision is not None and decision.decided and self.prescreen_mode == "cascade":
+            return self._create_prescreen_result(funcion_text, verbo, decision, fragments)
 
         # Llamar a LLM con prompt de evaluación
         try:
@@ -178,7 +393,10 @@ class FunctionSemanticEvaluator:
             )
 
             # Parsear respuesta LLM
-            result = self._parse_llm_response(llm_response, funcion_text, verbo)
+            result = self._parse_evaluation(llm_response, funcion_text, verbo, fragments)
+            if decision is not None:
+                result.prescreen = decision.to_dict()
+            self._memo_store(result, nivel_jerarquico, puesto_nombre, unidad)
 
             logger.debug(
                 f"[FunctionSemanticEvaluator] Función evaluada: "
@@ -192,6 +410,361 @@ class FunctionSemanticEvaluator:
             # Fallback: clasificar como RECHAZADO con baja confianza
             return self._create_fallback_result(funcion_text, verbo, str(e))
 
+    def evaluate_functions_batch(
+        self,
+        funciones: List[Dict[str, str]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str,
+        batch_size: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        should_stop: Optional[Callable[[List[FunctionEvaluationResult]], bool]] = None
+    ) -> List[FunctionEvaluationResult]:
+        """
+        Evalúa varias funciones del mismo puesto con k funciones por request.
+
+        El contexto del puesto y la rúbrica se envían una vez por lote, y los
+        fragmentos normativos se deduplican entre las funciones del lote. La
+        respuesta es un arreglo JSON que se asocia por funcion_id; las
+        funciones ausentes o mal formadas en la respuesta se reintentan
+        individualmente. En modo cascade, las funciones que el pre-filtro
+        resuelve no entran a ningún lote. Con memo, las funciones ya
+        evaluadas (en este u otro puesto) se reutilizan sin búsqueda ni lote.
+
+        Con should_stop (terminación temprana), antes de cada lote se le pasan
+        los resultados obtenidos hasta ahora; si devuelve True, no se envían
+        más lotes y las funciones restantes quedan como NO_EVALUADA.
+
+        Args:
+            funciones: Lista de {"funcion_text": str, "verbo": str}
+            nivel_jerarquico: Nivel del puesto (G, H, J, K, etc.)
+            puesto_nombre: Denominación del puesto
+            unidad: Unidad responsable
+            batch_size: Funciones por request (default: self.batch_size)
+            token_budget: Tokens estimados de prompt por request (default: self.token_budget)
+            should_stop: Callback(resultados hasta ahora) -> True si el resto
+                de las funciones ya no puede cambiar el resultado del criterio
+
+        Returns:
+            Lista de FunctionEvaluationResult en el mismo orden de entrada
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        token_budget = token_budget or self.token_budget
+
+        # Memo entre puestos y fragmentos normativos por función (búsqueda local, sin LLM)
+        items = []
+        to_evaluate = []
+        results: Dict[str, FunctionEvaluationResult] = {}
+        for idx, funcion in enumerate(funciones, 1):
+            item = {
+                "funcion_id": f"F{idx}",
+                "funcion_text": funcion["funcion_text"],
+                "verbo": funcion["verbo"]
+            }
+            items.append(item)
+
+            memorized = self._memo_lookup(funcion["funcion_text"], funcion["verbo"], nivel_jerarquico, unidad)
+            if memorized is not None:
+                results[item["funcion_id"]] = memorized
+                continue
+
+            fragments, message = self._search_normativa_fragments(
+                funcion["funcion_text"], funcion["verbo"], puesto_nombre
+            )
+            item.update({
+                "fragments": fragments,
+                "message": message,
+                "prescreen": self._prescreen(funcion["funcion_text"], funcion["verbo"], nivel_jerarquico, fragments)
+            })
+            to_evaluate.append(item)
+
+        memo_hits = len(items) - len(to_evaluate)
+        pending = []
+        for item in to_evaluate:
+            decision = item["prescreen"]
+            if decision is not None and decision.decided and self.prescreen_mode == "cascade":
+                results[item["funcion_id"]] = self._create_prescreen_result(
+                    item["funcion_text"], item["verbo"], decision, item["fragments"]
+                )
+            else:
+                pending.append(item)
+
+        batches = self._plan_batches(pending, nivel_jerarquico, puesto_nombre, unidad, batch_size, token_budget)
+
+        logger.info(
+            f"[FunctionSemanticEvaluator] Evaluación por lotes: {len(items)} funciones "
+            f"({memo_hits} reutilizadas del memo, {len(to_evaluate) - len(pending)} resueltas por el pre-filtro) "
+            f"en {len(batches)} requests (batch_size={batch_size}, token_budget={token_budget})"
+        )
+
+        for index, batch in enumerate(batches):
+            if should_stop is not None and should_stop(list(results.values())):
+                skipped = [item for remaining in batches[index:] for item in remaining]
+                logger.info(
+                    f"[FunctionSemanticEvaluator] Terminación temprana: {len(skipped)} funciones "
+                    f"sin evaluar ({len(batches) - index} requests omitidos)"
+                )
+                for item in skipped:
+                    results[item["funcion_id"]] = self._create_not_evaluated_result(item["funcion_text"], item["verbo"])
+                break
+
+            if len(batch) == 1:
+                item = batch[0]
+                results[item["funcion_id"]] = self._evaluate_single(
+                    item["funcion_text"], item["verbo"], nivel_jerarquico, puesto_nombre, unidad
+                )
+                continue
+
+            results.update(self._evaluate_batch(batch, nivel_jerarquico, puesto_nombre, unidad))
+
+        for item in pending:
+            if item["prescreen"] is not None and results[item["funcion_id"]].clasificacion != NOT_EVALUATED:
+                results[item["funcion_id"]].prescreen = item["prescreen"].to_dict()
+
+        return [results[item["funcion_id"]] for item in items]
+
+    def expand_reasoning(
+        self,
+        results: List[FunctionEvaluationResult],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str,
+        clasificaciones: Optional[Tuple[str, ...]] = REASONING_CLASSIFICATIONS
+    ) -> int:
+        """
+        Solicita el razonamiento en prosa de resultados del modo compacto.
+
+        Por defecto solo para funciones OBSERVACION/RECHAZADO (las que el
+        reporte debe justificar); con clasificaciones=None se expanden todas
+        (p. ej. al renderizar un reporte completo). Los resultados se
+        actualizan en su lugar; si la llamada falla conservan el razonamiento
+        provisional por código.
+
+        Args:
+            results: Resultados de evaluate_function / evaluate_functions_batch
+            nivel_jerarquico: Nivel del puesto (G, H, J, K, etc.)
+            puesto_nombre: Denominación del puesto
+            unidad: Unidad responsable
+            clasificaciones: Clasificaciones a expandir (None = todas)
+
+        Returns:
+            Número de resultados expandidos
+        """
+        pending = [
+            result for result in results
+            if result is not None and result.reasoning_pending
+            and (clasificaciones is None or result.clasificacion in clasificaciones)
+        ]
+        expanded = 0
+
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            items = [
+                {
+                    "funcion_id": f"F{idx}",
+                    "funcion_text": result.funcion_text,
+                    "verbo": result.verbo,
+                    "fragments": result.normativa_fragments,
+                    "result": result
+                }
+                for idx, result in enumerate(chunk, 1)
+            ]
+
+            try:
+                razonamientos = self._call_llm_reasoning(items, nivel_jerarquico, puesto_nombre, unidad)
+            except Exception as e:
+                logger.warning(f"[FunctionSemanticEvaluator] Razonamiento de {len(items)} funciones no disponible: {e}")
+                continue
+
+            by_id = {
+                str(razonamiento.get("funcion_id", "")).strip(): razonamiento
+                for razonamiento in razonamientos
+                if isinstance(razonamiento, dict)
+            }
+            for item in items:
+                razonamiento = by_id.get(item["funcion_id"])
+                if razonamiento is not None and self._apply_reasoning(item["result"], razonamiento):
+                    expanded += 1
+                    # El memo guarda la evaluación ya con razonamiento
+                    self._memo_update(item["result"])
+
+        logger.debug(f"[FunctionSemanticEvaluator] Razonamiento expandido para {expanded}/{len(pending)} funciones")
+        return expanded
+
+    def _plan_batches(
+        self,
+        items: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str,
+        batch_size: int,
+        token_budget: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Agrupa funciones en lotes respetando batch_size y token_budget"""
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+
+        for item in items:
+            candidate = current + [item]
+            prompt = self._create_batch_evaluation_prompt(candidate, nivel_jerarquico, puesto_nombre, unidad)
+            estimated = self._estimate_tokens(self._create_system_message(batch=True) + prompt)
+            fits = len(candidate) <= batch_size and estimated <= token_budget
+
+            if current and not fits:
+                batches.append(current)
+                current = [item]
+            else:
+                current = candidate
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _evaluate_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> Dict[str, FunctionEvaluationResult]:
+        """
+        Evalúa un lote en un request; reintenta individualmente lo que falte.
+
+        Solo se reintentan las funciones ausentes o mal formadas en una
+        respuesta recibida. Si la llamada del lote falló (error agotado,
+        presupuesto, circuito abierto o diferida), todas las funciones quedan
+        con resultado de respaldo: reintentarlas una por una repetiría la
+        misma falla con una llamada por función.
+        """
+        results: Dict[str, FunctionEvaluationResult] = {}
+
+        response = self._call_llm_batch_evaluation(batch, nivel_jerarquico, puesto_nombre, unidad)
+        if response.get("status") != "success":
+            error_msg = response.get("error", "Error desconocido en llamada LLM")
+            logger.warning(f"[FunctionSemanticEvaluator] Lote de {len(batch)} funciones sin respuesta: {error_msg}")
+            flags = call_failure_flags(response)
+            return {
+                item["funcion_id"]: self._create_fallback_result(item["funcion_text"], item["verbo"], error_msg, flags)
+                for item in batch
+            }
+
+        by_id = {
+            str(evaluacion.get("funcion_id", "")).strip(): evaluacion
+            for evaluacion in response["data"]
+            if isinstance(evaluacion, dict)
+        }
+
+        for item in batch:
+            llm_data = by_id.get(item["funcion_id"])
+            if llm_data is not None:
+                try:
+                    results[item["funcion_id"]] = self._parse_evaluation(
+                        llm_data, item["funcion_text"], item["verbo"], item["fragments"]
+                    )
+                    self._memo_store(results[item["funcion_id"]], nivel_jerarquico, puesto_nombre, unidad)
+                    continue
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"[FunctionSemanticEvaluator] Evaluación {item['funcion_id']} mal formada: {e}")
+
+            # Ausente o mal formada: reintento individual
+            logger.debug(f"[FunctionSemanticEvaluator] Reintentando {item['funcion_id']} individualmente")
+            results[item["funcion_id"]] = self._evaluate_single(
+                item["funcion_text"], item["verbo"], nivel_jerarquico, puesto_nombre, unidad
+            )
+
+        return results
+
+    def _call_llm_batch_evaluation(
+        self,
+        batch: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> Dict[str, Any]:
+        """
+        Llama al LLM con el prompt de evaluación por lotes.
+
+        Returns:
+            Respuesta de robust_openai_call; si tuvo éxito, "data" es la lista
+            de evaluaciones (dicts con funcion_id), vacía si la respuesta no
+            trae el arreglo
+        """
+        prompt = self._create_batch_evaluation_prompt(batch, nivel_jerarquico, puesto_nombre, unidad)
+
+        if self.compact:
+            tokens_per_function = self.COMPACT_OUTPUT_TOKENS_PER_FUNCTION
+            prompt_family, schema, list_key = (
+                "c1_function_eval_compact_batch", FUNCTION_EVALUATION_COMPACT_BATCH_SCHEMA, "evaluaciones_compactas"
+            )
+        else:
+            tokens_per_function = self.OUTPUT_TOKENS_PER_FUNCTION
+            prompt_family, schema, list_key = "c1_function_eval_batch", FUNCTION_EVALUATION_BATCH_SCHEMA, "evaluaciones"
+
+        response = robust_openai_call(
+            prompt=prompt,
+            model="openai/gpt-4o-mini",
+            temperature=0.1,
+            max_tokens=min(self.MAX_OUTPUT_TOKENS, tokens_per_function * len(batch)),
+            context=self.context,
+            system_message=self._create_system_message(batch=True),
+            prompt_family=prompt_family,
+            response_schema=schema
+        )
+
+        if response.get("status") != "success":
+            return response
+
+        data = response["data"]
+        if isinstance(data, dict):
+            data = data.get(list_key, [])
+        if not isinstance(data, list):
+            logger.warning("[FunctionSemanticEvaluator] Respuesta por lotes sin arreglo de evaluaciones")
+            data = []
+
+        return {**response, "data": data}
+
+    def _call_llm_reasoning(
+        self,
+        items: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Llama al LLM para redactar el razonamiento de evaluaciones ya calculadas.
+
+        Returns:
+            Lista de razonamientos (dicts con funcion_id)
+        """
+        response = robust_openai_call(
+            prompt=self._create_reasoning_prompt(items, nivel_jerarquico, puesto_nombre, unidad),
+            model="openai/gpt-4o-mini",
+            temperature=0.1,
+            max_tokens=min(self.MAX_OUTPUT_TOKENS, self.REASONING_TOKENS_PER_FUNCTION * len(items)),
+            context=self.context,
+            system_message=self._create_reasoning_system_message(),
+            prompt_family="c1_reasoning_batch",
+            response_schema=FUNCTION_REASONING_BATCH_SCHEMA
+        )
+
+        if response.get("status") != "success":
+            error_msg = response.get("error", "Error desconocido en llamada LLM")
+            raise Exception(f"Error en razonamiento LLM: {error_msg}")
+
+        data = response["data"]
+        if isinstance(data, dict):
+            data = data.get("razonamientos", [])
+        if not isinstance(data, list):
+            raise Exception("Respuesta sin arreglo de razonamientos")
+
+        return data
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Estimación barata de tokens (~4 caracteres por token)"""
+        return len(text) // 4
+
     def _get_normativa_context(
         self,
         funcion_text: str,
@@ -209,32 +782,66 @@ class FunctionSemanticEvaluator:
         Returns:
             Texto con fragmentos de normativa relevantes
         """
+        fragments, message = self._search_normativa_fragments(funcion_text, verbo, puesto_nombre)
+        return self._format_normativa_context(fragments, message)
+
+    @staticmethod
+    def _format_normativa_context(fragments: List[Tuple[str, float]], message: str) -> str:
+        """Texto de contexto normativo de una función (fragmentos numerados desde 1)"""
+        if not fragments:
+            return message
+
+        # Construir contexto con los mejores fragmentos
+        context_parts = ["FRAGMENTOS NORMATIVOS RELEVANTES:\n"]
+        for i, (snippet, confidence) in enumerate(fragments, 1):
+            context_parts.append(f"\n[Fragmento {i}] (Relevancia: {confidence:.2f})")
+            context_parts.append(f"{snippet}\n")
+
+        return "\n".join(context_parts)
+
+    def _search_normativa_fragments(
+        self,
+        funcion_text: str,
+        verbo: str,
+        puesto_nombre: str
+    ) -> Tuple[List[Tuple[str, float]], str]:
+        """
+        Búsqueda semántica de fragmentos normativos para una función.
+
+        Con memo, la consulta usa solo verbo y texto canónicos: los fragmentos
+        se memorizan con la evaluación y deben depender solo de la llave (la
+        denominación no forma parte de ella).
+
+        Returns:
+            Tupla (lista de (snippet, relevancia), mensaje si no hay fragmentos)
+        """
         if not self.normativa_loader or not hasattr(self.normativa_loader, 'semantic_search'):
-            return "No hay normativa cargada para validación."
+            return [], "No hay normativa cargada para validación."
 
         try:
             # Buscar fragmentos relevantes usando búsqueda semántica
-            query = f"{puesto_nombre} {verbo} {funcion_text[:100]}"
+            if self.memo is not None:
+                query = f"{canonicalize_function_text(verbo)} {canonicalize_function_text(funcion_text)[:100]}"
+            else:
+                query = f"{puesto_nombre} {verbo} {funcion_text[:100]}"
             search_results = self.normativa_loader.semantic_search(
                 query=query,
                 max_results=15  # Aumentado para cobertura normativa completa (fix v5.26)
             )
 
             if not search_results:
-                return "No se encontraron fragmentos normativos relevantes."
+                return [], "No se encontraron fragmentos normativos relevantes."
 
-            # Construir contexto con los mejores fragmentos
-            context_parts = ["FRAGMENTOS NORMATIVOS RELEVANTES:\n"]
-            for i, match in enumerate(search_results, 1):
+            fragments = []
+            for match in search_results:
                 snippet = match.content_snippet[:400] if len(match.content_snippet) > 400 else match.content_snippet
-                context_parts.append(f"\n[Fragmento {i}] (Relevancia: {match.confidence_score:.2f})")
-                context_parts.append(f"{snippet}\n")
+                fragments.append((snippet, match.confidence_score))
 
-            return "\n".join(context_parts)
+            return fragments, ""
 
         except Exception as e:
             logger.warning(f"[FunctionSemanticEvaluator] Error buscando contexto normativo: {e}")
-            return "Error al buscar normativa relevante."
+            return [], "Error al buscar normativa relevante."
 
     def _call_llm_evaluation(
         self,
@@ -260,17 +867,16 @@ class FunctionSemanticEvaluator:
             contexto_normativo=contexto_normativo
         )
 
-        # Preparar prompt completo (system + user)
-        system_instruction = "Eres un experto en evaluación de descripciones de puestos de la Administración Pública Federal mexicana. Respondes únicamente en JSON válido."
-        full_prompt = f"{system_instruction}\n\n{prompt}"
-
-        # Llamar a OpenAI
+        # Llamar a OpenAI (rúbrica estática como system message: prefijo cacheable)
         response = robust_openai_call(
-            prompt=full_prompt,
+            prompt=prompt,
             model="openai/gpt-4o-mini",  # Migrado a GPT-4o-mini (ahorro 94.6%)
             temperature=0.1,  # Baja temperatura para mayor consistencia
-            max_tokens=1500,
-            context=self.context
+            max_tokens=self.COMPACT_MAX_TOKENS if self.compact else 1500,
+            context=self.context,
+            system_message=self._create_system_message(),
+            prompt_family="c1_function_eval_compact" if self.compact else "c1_function_eval",
+            response_schema=FUNCTION_EVALUATION_COMPACT_SCHEMA if self.compact else FUNCTION_EVALUATION_SCHEMA
         )
 
         # Verificar estado de respuesta
@@ -290,16 +896,15 @@ class FunctionSemanticEvaluator:
         unidad: str,
         contexto_normativo: str
     ) -> str:
-        """Crea el prompt de evaluación para el LLM"""
+        """
+        Crea la parte variable del prompt de evaluación.
 
-        return f"""Eres un experto en evaluación de descripciones de puestos de la APF mexicana.
+        La rúbrica y el formato de respuesta van en _create_system_message().
+        """
 
-TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
+        return f"""TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
 
-**CONTEXTO DEL PUESTO:**
-- Denominación: {puesto_nombre}
-- Nivel Jerárquico: {nivel_jerarquico} (G=Dirección General, H=Subdirección, J=Jefatura, K=Enlace)
-- Unidad: {unidad}
+{self._position_header(puesto_nombre, nivel_jerarquico, unidad)}
 
 **FUNCIÓN A EVALUAR:**
 "{funcion_text}"
@@ -308,13 +913,218 @@ TAREA: Evaluar esta función usando el Protocolo SABG v1.1 (5 criterios).
 
 **NORMATIVA APLICABLE:**
 {contexto_normativo}
+"""
+
+    def _create_batch_evaluation_prompt(
+        self,
+        batch: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> str:
+        """
+        Crea el prompt de evaluación de varias funciones del mismo puesto.
+
+        Los fragmentos normativos se deduplican y numeran una sola vez; cada
+        función indica qué fragmentos le son relevantes.
+        """
+        fragments_text, relevant_by_id = self._number_fragments(batch)
+        functions_text = "\n\n".join(
+            f'[{item["funcion_id"]}] "{item["funcion_text"]}"\n'
+            f'    Verbo principal: {item["verbo"]}\n'
+            f'    Fragmentos relevantes (relevancia): {relevant_by_id[item["funcion_id"]]}'
+            for item in batch
+        )
+
+        return f"""TAREA: Evaluar CADA UNA de las {len(batch)} funciones siguientes usando el Protocolo SABG v1.1 (5 criterios).
+Evalúa cada función de forma independiente, usando solo los fragmentos normativos que le correspondan.
+
+{self._position_header(puesto_nombre, nivel_jerarquico, unidad)}
+
+**NORMATIVA APLICABLE:**
+{fragments_text}
+
+**FUNCIONES A EVALUAR:**
+{functions_text}
+"""
+
+    @staticmethod
+    def _number_fragments(batch: List[Dict[str, Any]]) -> Tuple[str, Dict[str, str]]:
+        """
+        Deduplica y numera los fragmentos normativos de un lote.
+
+        Returns:
+            Tupla (texto de fragmentos, {funcion_id: "n (relevancia), ..."})
+        """
+        fragment_ids: Dict[str, int] = {}
+        fragment_lines = []
+        relevant_by_id = {}
+
+        for item in batch:
+            relevant = []
+            for snippet, confidence in item["fragments"]:
+                if snippet not in fragment_ids:
+                    fragment_ids[snippet] = len(fragment_ids) + 1
+                    fragment_lines.append(f"\n[Fragmento {fragment_ids[snippet]}]\n{snippet}\n")
+                relevant.append(f"{fragment_ids[snippet]} ({confidence:.2f})")
+
+            relevant_by_id[item["funcion_id"]] = ", ".join(relevant) if relevant else item.get("message") or "ninguno"
+
+        fragments_text = (
+            "FRAGMENTOS NORMATIVOS RELEVANTES:\n" + "\n".join(fragment_lines)
+            if fragment_lines else "No se encontraron fragmentos normativos relevantes."
+        )
+        return fragments_text, relevant_by_id
+
+    def _create_reasoning_prompt(
+        self,
+        items: List[Dict[str, Any]],
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> str:
+        """Parte variable del prompt de razonamiento: funciones con sus scores y códigos"""
+        fragments_text, relevant_by_id = self._number_fragments(items)
+        blocks = []
+        for item in items:
+            result = item["result"]
+            criterios = "; ".join(
+                f"{name}={criterion.score:.2f} ({criterion.metadata.get('codigo', '')})"
+                for name, criterion in self._criteria(result)
+            )
+            blocks.append(
+                f'[{item["funcion_id"]}] "{item["funcion_text"]}"\n'
+                f'    Verbo principal: {item["verbo"]}\n'
+                f'    Fragmentos relevantes (relevancia): {relevant_by_id[item["funcion_id"]]}\n'
+                f'    Evaluación: {criterios}\n'
+                f'    Score global: {result.score_global:.2f} → {result.clasificacion}'
+            )
+        functions_text = "\n\n".join(blocks)
+
+        return f"""TAREA: Explicar la evaluación de CADA UNA de las {len(items)} funciones siguientes.
+
+{self._position_header(puesto_nombre, nivel_jerarquico, unidad)}
+
+**NORMATIVA APLICABLE:**
+{fragments_text}
+
+**FUNCIONES EVALUADAS:**
+{functions_text}
+"""
+
+    def _create_reasoning_system_message(self) -> str:
+        """Prefijo estático del prompt de razonamiento (rúbrica + formato)"""
+        return f"""{SYSTEM_INSTRUCTION}
+
+Recibirás funciones de un puesto YA EVALUADAS con el Protocolo SABG v1.1 (scores y
+códigos por criterio). NO cambies los scores ni la clasificación: explica POR QUÉ
+se asignó cada score, citando la normativa cuando aplique.
+
+{self._criteria_instructions()}
+
+---
+
+RESPONDE EN JSON (sin comentarios adicionales), con un razonamiento por función
+identificada por su funcion_id (F1, F2, ...):
+{{
+    "razonamientos": [
+        {{
+            "funcion_id": "F1",
+{textwrap.indent(REASONING_JSON_FIELDS, " " * 8)}
+        }}
+    ]
+}}
+"""
+
+    def _create_system_message(self, batch: bool = False) -> str:
+        """
+        Prefijo estático del prompt: instrucción, rúbrica y formato de respuesta.
+
+        No depende del puesto ni de la función, de modo que es idéntico en
+        todas las llamadas de la misma familia y el proveedor puede servirlo
+        desde su prefix cache (ver LLMResponse.tokens_used["cached"]).
+
+        Args:
+            batch: Si True, formato de respuesta por lotes (arreglo "evaluaciones")
+        """
+        if self.compact:
+            return self._create_compact_system_message(batch)
+
+        if batch:
+            response_format = f"""RESPONDE EN JSON (sin comentarios adicionales), con una evaluación por función
+identificada por su funcion_id (F1, F2, ...):
+{{
+    "evaluaciones": [
+        {{
+            "funcion_id": "F1",
+{textwrap.indent(EVALUATION_JSON_FIELDS, " " * 8)}
+        }}
+    ]
+}}"""
+        else:
+            response_format = f"""RESPONDE EN JSON (sin comentarios adicionales):
+{{
+{EVALUATION_JSON_FIELDS}
+}}"""
+
+        return f"""{SYSTEM_INSTRUCTION}
+
+Recibirás el contexto de un puesto, la normativa aplicable y la(s) función(es) a evaluar.
+
+{self._criteria_instructions()}
 
 ---
 
-EVALÚA LOS 5 CRITERIOS CON ANÁLISIS SEMÁNTICO (NO LÉXICO):
+{response_format}
+
+{SCORING_RULES}
+"""
+
+    def _create_compact_system_message(self, batch: bool) -> str:
+        """Prefijo estático del modo compacto: misma rúbrica, respuesta solo con scores y códigos"""
+        if batch:
+            response_format = f"""RESPONDE EN JSON (sin comentarios adicionales), con una evaluación por función
+identificada por su funcion_id (F1, F2, ...):
+{{
+    "evaluaciones_compactas": [
+        {{
+            "funcion_id": "F1",
+{textwrap.indent(COMPACT_JSON_FIELDS, " " * 8)}
+        }}
+    ]
+}}"""
+        else:
+            response_format = f"""RESPONDE EN JSON (sin comentarios adicionales):
+{{
+{COMPACT_JSON_FIELDS}
+}}"""
+
+        return f"""{SYSTEM_INSTRUCTION}
+
+Recibirás el contexto de un puesto, la normativa aplicable y la(s) función(es) a evaluar.
+
+{self._criteria_instructions()}
+
+---
+
+{response_format}
+
+{COMPACT_RULES}
+"""
+
+    def _position_header(self, puesto_nombre: str, nivel_jerarquico: str, unidad: str) -> str:
+        """Bloque de contexto del puesto"""
+        return f"""**CONTEXTO DEL PUESTO:**
+- Denominación: {puesto_nombre}
+- Nivel Jerárquico: {nivel_jerarquico} (G=Dirección General, H=Subdirección, J=Jefatura, K=Enlace)
+- Unidad: {unidad}"""
+
+    def _criteria_instructions(self) -> str:
+        """Rúbrica de los 5 criterios SABG (independiente del nivel: parte del prefijo estático)"""
+        return """EVALÚA LOS 5 CRITERIOS CON ANÁLISIS SEMÁNTICO (NO LÉXICO):
 
 **1. CRITERIO VERBO (25%)**
-- ¿El verbo está autorizado para nivel {nivel_jerarquico}?
+- ¿El verbo está autorizado para el Nivel Jerárquico indicado en el CONTEXTO DEL PUESTO?
 - Verbos típicos DG (G): EMITIR, APROBAR, PROPONER, ESTABLECER, DIRIGIR, ORDENAR
 - ¿Hay excepción normativa explícita (ej: REFRENDAR, RESOLVER, DESIGNAR en fragmentos)?
 - Score: 1.0 (autorizado) | 0.5 (excepción válida) | 0.0 (no autorizado)
@@ -341,64 +1151,13 @@ EVALÚA LOS 5 CRITERIOS CON ANÁLISIS SEMÁNTICO (NO LÉXICO):
 - Score: 1.0 (equivalentes) | 0.7 (superposición clara) | 0.4 (superposición débil) | 0.0 (distintos)
 
 **5. CRITERIO JERÁRQUICA (10%)**
-- ¿Corresponde al nivel {nivel_jerarquico}?
+- ¿Corresponde al Nivel Jerárquico indicado en el CONTEXTO DEL PUESTO?
   * Nivel G (DG): Estratégico, políticas, decisiones de alto nivel
   * NO Nivel G: Operacional, ejecución, tareas administrativas
 - ¿Hay INVERSIÓN JERÁRQUICA? (Director hace tareas de operador)
   * Síntomas: "interpretar normas" (trabajo jurídico), "ejecutar", "compilar", "verificar"
 - Score: 1.0 (corresponde) | 0.5 (requiere ajuste) | 0.0 (inversión clara)
-- IMPORTANTE: Si score = 0.0, la función se RECHAZA automáticamente
-
----
-
-RESPONDE EN JSON (sin comentarios adicionales):
-{{
-    "criterio_verbo": {{
-        "score": 0.0,
-        "reasoning": "explicación breve (1-2 oraciones)",
-        "esta_autorizado": false,
-        "tiene_excepcion_normativa": false
-    }},
-    "criterio_normativa": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "articulo_respaldo": "Fragmento X" o null,
-        "tipo_correspondencia": "DIRECTA|SEMANTICA|LEJANA|NINGUNA"
-    }},
-    "criterio_estructura": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "tiene_verbo": false,
-        "tiene_complemento": false,
-        "tiene_resultado": false
-    }},
-    "criterio_semantica": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "nucleo_semantico": "significado esencial de la función",
-        "nucleo_normativo": "significado esencial de la normativa",
-        "tipo_alineacion": "EQUIVALENTE|SUPERPONE_CLARA|SUPERPONE_DEBIL|DISTINTA"
-    }},
-    "criterio_jerarquica": {{
-        "score": 0.0,
-        "reasoning": "explicación",
-        "corresponde_nivel": false,
-        "hay_inversion_jerarquica": false
-    }},
-    "score_global": 0.0,
-    "clasificacion": "APROBADO|OBSERVACION|RECHAZADO",
-    "razonamiento_final": "justificación integrada de 2-3 oraciones"
-}}
-
-CÁLCULO DE SCORE GLOBAL:
-score_global = (verbo×0.25) + (normativa×0.25) + (estructura×0.20) + (semantica×0.20) + (jerarquica×0.10)
-
-CLASIFICACIÓN:
-- Score >= 0.85: "APROBADO"
-- Score 0.60-0.84: "OBSERVACION"
-- Score < 0.60: "RECHAZADO"
-- Si jerarquica = 0.0: "RECHAZADO" (anula todo)
-"""
+- IMPORTANTE: Si score = 0.0, la función se RECHAZA automáticamente"""
 
     def _parse_llm_response(
         self,
@@ -474,18 +1233,314 @@ CLASIFICACIÓN:
             razonamiento_final=razonamiento_final
         )
 
+    def _parse_evaluation(
+        self,
+        llm_data: Dict[str, Any],
+        funcion_text: str,
+        verbo: str,
+        fragments: List[Tuple[str, float]]
+    ) -> FunctionEvaluationResult:
+        """Parsea una evaluación según el modo (completo o compacto)"""
+        if self.compact:
+            return self._parse_compact_response(llm_data, funcion_text, verbo, fragments)
+        return self._parse_llm_response(llm_data, funcion_text, verbo)
+
+    def _parse_compact_response(
+        self,
+        llm_data: Dict[str, Any],
+        funcion_text: str,
+        verbo: str,
+        fragments: List[Tuple[str, float]]
+    ) -> FunctionEvaluationResult:
+        """
+        Parsea una evaluación compacta a FunctionEvaluationResult.
+
+        La metadata por criterio se deriva de los códigos (mismas llaves que
+        el modo completo); el razonamiento es provisional (COMPACT_REASONING)
+        hasta expand_reasoning(). Score global y clasificación se calculan
+        localmente con WEIGHTS y SCORING_RULES.
+        """
+        scores = {name: float(llm_data[name]) for name in self.WEIGHTS}
+        codes = {name: str(llm_data[f"{name}_codigo"]).strip().upper() for name in self.WEIGHTS}
+        fragmento = llm_data.get("fragmento_respaldo")
+        estructura = "" if codes["estructura"] == "NINGUNO" else codes["estructura"]
+
+        def criterion(name: str, metadata: Dict[str, Any]) -> CriterionScore:
+            return CriterionScore(
+                score=scores[name],
+                reasoning=self._compact_reasoning(name, codes[name]),
+                metadata={**metadata, "codigo": codes[name]}
+            )
+
+        score_global = sum(scores[name] * weight for name, weight in self.WEIGHTS.items())
+        if scores["jerarquica"] == 0.0 or score_global < 0.60:
+            clasificacion = "RECHAZADO"
+        elif score_global >= 0.85:
+            clasificacion = "APROBADO"
+        else:
+            clasificacion = "OBSERVACION"
+
+        return FunctionEvaluationResult(
+            funcion_text=funcion_text,
+            verbo=verbo,
+            criterio_verbo=criterion("verbo", {
+                "esta_autorizado": codes["verbo"] == "AUTORIZADO",
+                "tiene_excepcion_normativa": codes["verbo"] == "EXCEPCION"
+            }),
+            criterio_normativa=criterion("normativa", {
+                "articulo_respaldo": f"Fragmento {fragmento}" if fragmento else None,
+                "tipo_correspondencia": codes["normativa"]
+            }),
+            criterio_estructura=criterion("estructura", {
+                "tiene_verbo": "V" in estructura,
+                "tiene_complemento": "C" in estructura,
+                "tiene_resultado": "R" in estructura
+            }),
+            criterio_semantica=criterion("semantica", {
+                "nucleo_semantico": "",
+                "nucleo_normativo": "",
+                "tipo_alineacion": codes["semantica"]
+            }),
+            criterio_jerarquica=criterion("jerarquica", {
+                "corresponde_nivel": codes["jerarquica"] == "CORRESPONDE",
+                "hay_inversion_jerarquica": codes["jerarquica"] == "INVERSION"
+            }),
+            score_global=score_global,
+            clasificacion=clasificacion,
+            razonamiento_final=(
+                f"{clasificacion} con score {score_global:.2f} "
+                f"(evaluación compacta; razonamiento detallado bajo demanda)."
+            ),
+            reasoning_pending=True,
+            normativa_fragments=list(fragments)
+        )
+
+    def _prescreen(
+        self,
+        funcion_text: str,
+        verbo: str,
+        nivel_jerarquico: str,
+        fragments: List[Tuple[str, float]]
+    ) -> Optional[PrescreenDecision]:
+        """Decisión del pre-filtro local, o None si está desactivado"""
+        if self.prescreener is None or self.prescreen_mode == "off":
+            return None
+        # Sin normativa cargada, el respaldo normativo no es estimable localmente
+        has_normativa = self.normativa_loader is not None and hasattr(self.normativa_loader, 'semantic_search')
+        return self.prescreener.evaluate(funcion_text, verbo, nivel_jerarquico, fragments if has_normativa else None)
+
+    def _memo_key(self, funcion_text: str, verbo: str, nivel_jerarquico: str, unidad: str) -> str:
+        """Llave del memo: texto canónico + verbo + nivel + normativa (+ UR según alcance) + modo"""
+        return self.memo.key(
+            "c1",
+            funcion_text,
+            verbo,
+            nivel_jerarquico,
+            normativa_hash=getattr(self.normativa_loader, "documents_hash", "") if self.normativa_loader else "",
+            unidad=unidad,
+            variant={"compacto": self.compact, "prescreen": self.prescreen_mode}
+        )
+
+    def _memo_lookup(
+        self,
+        funcion_text: str,
+        verbo: str,
+        nivel_jerarquico: str,
+        unidad: str
+    ) -> Optional[FunctionEvaluationResult]:
+        """Evaluación memorizada de la función (con el texto y verbo de este puesto) o None"""
+        if self.memo is None:
+            return None
+
+        key = self._memo_key(funcion_text, verbo, nivel_jerarquico, unidad)
+        entry = self.memo.get(key, kind="c1")
+        if entry is None:
+            return None
+
+        value = copy.deepcopy(entry["value"])
+        criterios = {
+            f"criterio_{name}": CriterionScore(**value.pop(f"criterio_{name}"))
+            for name in self.WEIGHTS
+        }
+        value["normativa_fragments"] = [tuple(fragment) for fragment in value.get("normativa_fragments", [])]
+        return FunctionEvaluationResult(
+            funcion_text=funcion_text,
+            verbo=verbo,
+            **criterios,
+            **value,
+            memo={"clave": key, "reutilizada": True, "puesto_origen": entry["origin"]}
+        )
+
+    def _memo_store(
+        self,
+        result: FunctionEvaluationResult,
+        nivel_jerarquico: str,
+        puesto_nombre: str,
+        unidad: str
+    ) -> None:
+        """Memoriza una evaluación LLM (la denominación del prompt queda como puesto de origen)"""
+        if self.memo is None:
+            return
+
+        result.memo = {
+            "clave": self._memo_key(result.funcion_text, result.verbo, nivel_jerarquico, unidad),
+            "reutilizada": False,
+            "puesto_origen": puesto_nombre
+        }
+        self._memo_update(result)
+
+    def _memo_update(self, result: FunctionEvaluationResult) -> None:
+        """Reescribe en el memo una evaluación memorizada (p. ej. tras expand_reasoning)"""
+        if self.memo is None or result.memo is None:
+            return
+
+        value = asdict(result)
+        for name in ("funcion_text", "verbo", "memo"):
+            value.pop(name)
+        self.memo.set(result.memo["clave"], value, origin=result.memo["puesto_origen"], kind="c1")
+
+    def _create_prescreen_result(
+        self,
+        funcion_text: str,
+        verbo: str,
+        decision: PrescreenDecision,
+        fragments: List[Tuple[str, float]]
+    ) -> FunctionEvaluationResult:
+        """
+        Resultado de una función resuelta por el pre-filtro (sin LLM).
+
+        Los criterios no estimables localmente llevan el valor usado en el
+        score estimado y lo indican en su razonamiento.
+        """
+        codes = decision.codes
+        estructura = "" if codes["estructura"] == "NINGUNO" else codes["estructura"]
+        normativa = decision.scores["normativa"]
+
+        def criterion(name: str, metadata: Dict[str, Any]) -> CriterionScore:
+            score = decision.scores[name]
+            code = codes.get(name, "DESCONOCIDO")
+            if score is None:
+                estimated = normativa if name == "semantica" and normativa is not None else 0.5
+                return CriterionScore(
+                    score=estimated,
+                    reasoning="No estimable sin LLM; valor asumido por el pre-filtro local.",
+                    metadata={**metadata, "codigo": code}
+                )
+            return CriterionScore(
+                score=score,
+                reasoning=self._compact_reasoning(name, code),
+                metadata={**metadata, "codigo": code}
+            )
+
+        return FunctionEvaluationResult(
+            funcion_text=funcion_text,
+            verbo=verbo,
+            criterio_verbo=criterion("verbo", {
+                "esta_autorizado": codes["verbo"] == "AUTORIZADO",
+                "tiene_excepcion_normativa": codes["verbo"] == "EXCEPCION"
+            }),
+            criterio_normativa=criterion("normativa", {
+                "articulo_respaldo": None,
+                "tipo_correspondencia": codes["normativa"]
+            }),
+            criterio_estructura=criterion("estructura", {
+                "tiene_verbo": "V" in estructura,
+                "tiene_complemento": "C" in estructura,
+                "tiene_resultado": "R" in estructura
+            }),
+            criterio_semantica=criterion("semantica", {
+                "nucleo_semantico": "",
+                "nucleo_normativo": "",
+                "tipo_alineacion": "DESCONOCIDO"
+            }),
+            criterio_jerarquica=criterion("jerarquica", {
+                "corresponde_nivel": codes["jerarquica"] == "CORRESPONDE",
+                "hay_inversion_jerarquica": codes["jerarquica"] == "INVERSION"
+            }),
+            score_global=decision.score,
+            clasificacion=decision.decision,
+            razonamiento_final=(
+                f"{decision.decision} por pre-filtro local con score estimado {decision.score:.2f} "
+                f"(sin evaluación LLM): {'; '.join(decision.reasons) or 'criterios deterministas concluyentes'}."
+            ),
+            normativa_fragments=list(fragments),
+            prescreen=decision.to_dict(applied=True)
+        )
+
+    @staticmethod
+    def _compact_reasoning(name: str, code: str) -> str:
+        """Razonamiento provisional de un criterio a partir de su código"""
+        text = COMPACT_REASONING.get(name, {}).get(code)
+        if text:
+            return text
+        if name == "estructura":
+            presentes = [_STRUCTURE_COMPONENTS[c] for c in code if c in _STRUCTURE_COMPONENTS]
+            faltantes = [v for c, v in _STRUCTURE_COMPONENTS.items() if c not in code]
+            return f"Estructura parcial: tiene {', '.join(presentes) or 'ningún componente'}; falta {', '.join(faltantes)}."
+        return f"Código {code}."
+
+    @staticmethod
+    def _criteria(result: FunctionEvaluationResult) -> List[Tuple[str, CriterionScore]]:
+        """Criterios de un resultado en el orden de WEIGHTS"""
+        return [
+            ("verbo", result.criterio_verbo),
+            ("normativa", result.criterio_normativa),
+            ("estructura", result.criterio_estructura),
+            ("semantica", result.criterio_semantica),
+            ("jerarquica", result.criterio_jerarquica)
+        ]
+
+    def _apply_reasoning(self, result: FunctionEvaluationResult, razonamiento: Dict[str, Any]) -> bool:
+        """Reemplaza el razonamiento provisional por el del LLM; False si viene incompleto"""
+        texts = {name: razonamiento.get(name) for name, _ in self._criteria(result)}
+        if not all(isinstance(text, str) and text.strip() for text in texts.values()):
+            return False
+
+        for name, criterion in self._criteria(result):
+            criterion.reasoning = texts[name].strip()
+        result.criterio_semantica.metadata["nucleo_semantico"] = razonamiento.get("nucleo_semantico", "")
+        result.criterio_semantica.metadata["nucleo_normativo"] = razonamiento.get("nucleo_normativo", "")
+        result.razonamiento_final = razonamiento.get("razonamiento_final") or result.razonamiento_final
+        result.reasoning_pending = False
+        return True
+
+    def _create_not_evaluated_result(self, funcion_text: str, verbo: str) -> FunctionEvaluationResult:
+        """Resultado de una función omitida por terminación temprana (sin LLM)"""
+        not_evaluated = CriterionScore(
+            score=0.0,
+            reasoning="No evaluada: el resultado del criterio ya estaba decidido.",
+            metadata={}
+        )
+
+        return FunctionEvaluationResult(
+            funcion_text=funcion_text,
+            verbo=verbo,
+            criterio_verbo=not_evaluated,
+            criterio_normativa=not_evaluated,
+            criterio_estructura=not_evaluated,
+            criterio_semantica=not_evaluated,
+            criterio_jerarquica=not_evaluated,
+            score_global=0.0,
+            clasificacion=NOT_EVALUATED,
+            razonamiento_final=(
+                "Función no evaluada (terminación temprana): las funciones restantes ya no podían "
+                "cambiar el resultado del Criterio 1. Usar evaluación completa para el detalle por función."
+            )
+        )
+
     def _create_fallback_result(
         self,
         funcion_text: str,
         verbo: str,
-        error_msg: str
+        error_msg: str,
+        flags: Optional[Dict[str, bool]] = None
     ) -> FunctionEvaluationResult:
-        """Crea un resultado fallback en caso de error"""
+        """Crea un resultado fallback en caso de error (flags: señales de la llamada fallida)"""
 
         fallback_score = CriterionScore(
             score=0.0,
             reasoning=f"Error en evaluación LLM: {error_msg}",
-            metadata={}
+            metadata=dict(flags or {})
         )
 
         return FunctionEvaluationResult(
@@ -4,6 +4,15 @@ Validador LLM de Impacto Jerárquico para Criterio 3
 Este módulo complementa el ImpactAnalyzer basado en reglas con análisis LLM
 para obtener mejor comprensión semántica del impacto y respaldo normativo.
 
+LLAMADAS POR LOTES:
+- analyze_functions_impact: todas las funciones del puesto en una o pocas
+  llamadas, con la guía de rangos del nivel enviada una sola vez
+- search_normative_backing_batch: respaldo normativo solo para las funciones
+  discrepantes, en una llamada
+
+Con memo (FunctionEvaluationMemo), el análisis de impacto de una función ya
+analizada para el mismo nivel (en este u otro puesto) se reutiliza sin llamada.
+
 MEJORAS v5.37:
 - Prompt con RANGOS DE IMPACTO ACEPTABLES específicos por nivel
 - No requiere match exacto con perfil ideal - acepta variedad legítima
@@ -17,14 +26,71 @@ Fecha: 2025-11-11
 """
 
 import logging
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
-
-from src.validators.shared_utilities import APFContext, robust_openai_call
+import textwrap
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from dataclasses import asdict, dataclass
+
+from src.validators.shared_utilities import APFContext, call_failure_flags, robust_openai_call
+from src.validators.function_memo import FunctionEvaluationMemo
+from src.validators.response_schemas import (
+    IMPACT_ANALYSIS_BATCH_SCHEMA,
+    IMPACT_ANALYSIS_SCHEMA,
+    NORMATIVE_BACKING_BATCH_SCHEMA,
+    NORMATIVE_BACKING_SCHEMA
+)
 
 logger = logging.getLogger(__name__)
 
 
+# Instrucciones de clasificación de impacto (compartidas por el prompt individual y por lotes)
+IMPACT_INSTRUCTIONS = """**INSTRUCCIONES:**
+1. Analiza el ALCANCE real de esta función:
+   - local: afecta solo al departamento/área
+   - institutional: afecta a toda la institución
+   - interinstitutional: afecta a múltiples instituciones
+   - strategic_national: afecta a nivel nacional
+
+2. Analiza las CONSECUENCIAS de errores en esta función:
+   - operational: afecta operaciones diarias
+   - tactical: compromete metas/proyectos
+   - strategic: afecta objetivos estratégicos
+   - systemic: afecta sistema nacional
+
+3. Analiza la COMPLEJIDAD de esta función:
+   - routine: tareas repetitivas/procedimientos
+   - analytical: análisis/evaluación
+   - strategic: diseño/planeación estratégica
+   - transformational: transformación/reestructuración
+   - innovative: creación/innovación
+
+4. Determina si el impacto es APROPIADO para el nivel del puesto"""
+
+# Campos JSON de un análisis de impacto
+IMPACT_JSON_FIELDS = """  "scope_level": "local|institutional|interinstitutional|strategic_national",
+  "consequences_level": "operational|tactical|strategic|systemic",
+  "complexity_level": "routine|analytical|strategic|transformational|innovative",
+  "is_appropriate": true/false,
+  "confidence": 0.0-1.0,
+  "reasoning": "Explicación concisa de por qué es/no es apropiado",
+  "issues": ["lista", "de", "problemas"] // vacío si is_appropriate=true"""
+
+
+# Instrucciones de búsqueda de respaldo normativo
+BACKING_INSTRUCTIONS = """**INSTRUCCIONES:**
+Busca si algún fragmento respalda explícitamente que la función (a pesar de la discrepancia detectada) es legítima según la normativa institucional.
+
+Por ejemplo:
+- Si el verbo parece inapropiado pero la normativa lo menciona explícitamente
+- Si el alcance parece excesivo pero la normativa lo autoriza
+- Si hay herencia jerárquica de atribuciones de niveles superiores"""
+
+# Campos JSON de un resultado de respaldo normativo
+BACKING_JSON_FIELDS = """  "has_backing": true/false,
+  "backing_text": "texto exacto del fragmento que respalda" o null,
+  "relevance_score": 0.0-1.0,
+  "reasoning": "Explicación de por qué sí/no hay respaldo\""""
+
+
 @dataclass
 class LLMImpactAnalysis:
     """Resultado del análisis LLM de impacto jerárquico"""
@@ -56,14 +122,22 @@ class HierarchicalImpactLLMValidator:
     3. Evaluar coherencia con nivel jerárquico
     """
 
-    def __init__(self, context: APFContext):
+    # Llamadas por lotes (analyze_functions_impact / search_normative_backing_batch)
+    IMPACT_BATCH_SIZE = 15  # Funciones por llamada de análisis de impacto
+    IMPACT_TOKENS_PER_FUNCTION = 300  # Reserva de salida por función
+    BACKING_TOKENS_PER_FUNCTION = 400  # Reserva de salida por función discrepante
+    MAX_OUTPUT_TOKENS = 16000  # Límite de salida de gpt-4o-mini
+
+    def __init__(self, context: APFContext, memo: Optional[FunctionEvaluationMemo] = None):
         """
         Inicializa el validador LLM.
 
         Args:
             context: APFContext con API keys y configuración
+            memo: Memo de análisis de impacto entre puestos (None = sin memo)
         """
         self.context = context
+        self.memo = memo
         logger.info("[HierarchicalImpactLLMValidator] Inicializado con GPT-4o-mini")
 
     def analyze_function_impact(
@@ -88,6 +162,19 @@ class HierarchicalImpactLLMValidator:
         Returns:
             LLMImpactAnalysis con el análisis completo
         """
+        memorized = self._memo_lookup(funcion_text, nivel_salarial, expected_impact)
+        if memorized is not None:
+            return memorized
+
+        return self._analyze_single(funcion_text, nivel_salarial, expected_impact)
+
+    def _analyze_single(
+        self,
+        funcion_text: str,
+        nivel_salarial: str,
+        expected_impact: Dict[str, str]
+    ) -> LLMImpactAnalysis:
+        """Analiza el impacto de una función (sin consultar el memo) y memoriza el análisis LLM"""
         prompt = self._build_impact_analysis_prompt(
             funcion_text,
             nivel_salarial,
@@ -100,21 +187,16 @@ class HierarchicalImpactLLMValidator:
                 model="openai/gpt-4o-mini",
                 temperature=0.1,
                 max_tokens=800,
-                context=self.context
+                context=self.context,
+                system_message=self._build_impact_system_message(),
+                prompt_family="c3_impact",
+                response_schema=IMPACT_ANALYSIS_SCHEMA
             )
 
             if response.get("status") == "success":
-                result = response["data"]
-
-                return LLMImpactAnalysis(
-                    scope_level=result.get("scope_level", "local"),
-                    consequences_level=result.get("consequences_level", "operational"),
-                    complexity_level=result.get("complexity_level", "routine"),
-                    is_appropriate_for_level=result.get("is_appropriate", False),
-                    confidence=result.get("confidence", 0.0),
-                    reasoning=result.get("reasoning", ""),
-                    detected_issues=result.get("issues", [])
-                )
+                analysis = self._impact_analysis_from_dict(response["data"])
+                self._memo_store(funcion_text, nivel_salarial, expected_impact, analysis)
+                return analysis
             else:
                 logger.error(f"[HierarchicalImpactLLMValidator] Error en LLM: {response.get('error')}")
                 return self._create_fallback_analysis()
@@ -160,7 +242,10 @@ class HierarchicalImpactLLMValidator:
                 model="openai/gpt-4o-mini",
                 temperature=0.1,
                 max_tokens=600,
-                context=self.context
+                context=self.context,
+                system_message=self._build_backing_system_message(),
+                prompt_family="c3_backing",
+                response_schema=NORMATIVE_BACKING_SCHEMA
             )
 
             if response.get("status") == "success":
@@ -180,13 +265,307 @@ class HierarchicalImpactLLMValidator:
             logger.error(f"[HierarchicalImpactLLMValidator] Excepción en búsqueda: {e}")
             return self._create_fallback_backing()
 
+    def analyze_functions_impact(
+        self,
+        funciones: List[str],
+        nivel_salarial: str,
+        expected_impact: Dict[str, str],
+        batch_size: Optional[int] = None,
+        should_stop: Optional[Callable[[List[Optional[LLMImpactAnalysis]]], bool]] = None
+    ) -> List[Optional[LLMImpactAnalysis]]:
+        """
+        Analiza el impacto de todas las funciones de un puesto en una o pocas llamadas.
+
+        La guía de rangos aceptables del nivel se envía una sola vez por
+        llamada. Las funciones ausentes o mal formadas en la respuesta se
+        reintentan individualmente; si la llamada del lote falla, todo el
+        lote queda con el análisis de respaldo, sin reintentos. Con memo, las funciones ya analizadas
+        para el mismo nivel no entran a ningún lote.
+
+        Con should_stop (terminación temprana), antes de cada lote se le pasan
+        los análisis hasta ahora (None = pendiente); si devuelve True no se
+        envían más lotes y las funciones restantes quedan en None.
+
+        Args:
+            funciones: Textos completos de las funciones
+            nivel_salarial: Nivel del puesto (ej: "M1", "K12")
+            expected_impact: Perfil de impacto esperado para el nivel
+            batch_size: Funciones por llamada (default: IMPACT_BATCH_SIZE)
+            should_stop: Callback(análisis hasta ahora) -> True para no analizar más
+
+        Returns:
+            Lista de LLMImpactAnalysis en el mismo orden de entrada (None en
+            las funciones omitidas por should_stop)
+        """
+        batch_size = max(1, batch_size or self.IMPACT_BATCH_SIZE)
+        results: List[Optional[LLMImpactAnalysis]] = [
+            self._memo_lookup(funcion_text, nivel_salarial, expected_impact) for funcion_text in funciones
+        ]
+        pending = [i for i, analysis in enumerate(results) if analysis is None]
+        if len(pending) < len(funciones):
+            logger.debug(f"[HierarchicalImpactLLMValidator] {len(funciones) - len(pending)} funciones reutilizadas del memo")
+
+        for start in range(0, len(pending), batch_size):
+            if should_stop is not None and any(results) and should_stop(list(results)):
+                logger.debug(f"[HierarchicalImpactLLMValidator] Terminación temprana: {len(pending) - start} funciones sin analizar")
+                break
+
+            indices = pending[start:start + batch_size]
+
+            if len(indices) == 1:
+                results[indices[0]] = self._analyze_single(
+                    funciones[indices[0]], nivel_salarial, expected_impact
+                )
+                continue
+
+            prompt = self._build_batch_impact_analysis_prompt(
+                [(f"F{i + 1}", funciones[i]) for i in indices],
+                nivel_salarial,
+                expected_impact
+            )
+            response = self._call_batch(
+                prompt, "analisis",
+                max_tokens=min(self.MAX_OUTPUT_TOKENS, self.IMPACT_TOKENS_PER_FUNCTION * len(indices)),
+                system_message=self._build_impact_system_message(batch=True),
+                prompt_family="c3_impact_batch",
+                response_schema=IMPACT_ANALYSIS_BATCH_SCHEMA
+            )
+            if response.get("status") != "success":
+                # Reintentar función por función repetiría la misma falla
+                flags = call_failure_flags(response)
+                for i in indices:
+                    results[i] = self._create_fallback_analysis(flags)
+                continue
+
+            by_id = response["data"]
+            for i in indices:
+                result = by_id.get(f"F{i + 1}")
+                if result is not None:
+                    results[i] = self._impact_analysis_from_dict(result)
+                    self._memo_store(funciones[i], nivel_salarial, expected_impact, results[i])
+                else:
+                    logger.debug(f"[HierarchicalImpactLLMValidator] F{i + 1} ausente en lote, reintentando individualmente")
+                    results[i] = self._analyze_single(funciones[i], nivel_salarial, expected_impact)
+
+        return results
+
+    def _memo_key(self, funcion_text: str, nivel_salarial: str, expected_impact: Dict[str, str]) -> str:
+        """Llave del memo: texto canónico + nivel + perfil esperado (el análisis no usa normativa ni UR)"""
+        return self.memo.key("c3_impacto", funcion_text, "", nivel_salarial, variant=dict(expected_impact))
+
+    def _memo_lookup(
+        self,
+        funcion_text: str,
+        nivel_salarial: str,
+        expected_impact: Dict[str, str]
+    ) -> Optional[LLMImpactAnalysis]:
+        """Análisis de impacto memorizado de la función o None"""
+        if self.memo is None:
+            return None
+        entry = self.memo.get(self._memo_key(funcion_text, nivel_salarial, expected_impact), kind="c3_impacto")
+        if entry is None:
+            return None
+        return LLMImpactAnalysis(**{**entry["value"], "detected_issues": list(entry["value"]["detected_issues"])})
+
+    def _memo_store(
+        self,
+        funcion_text: str,
+        nivel_salarial: str,
+        expected_impact: Dict[str, str],
+        analysis: LLMImpactAnalysis
+    ) -> None:
+        """Memoriza un análisis de impacto obtenido del LLM"""
+        if self.memo is None:
+            return
+        self.memo.set(
+            self._memo_key(funcion_text, nivel_salarial, expected_impact),
+            asdict(analysis),
+            kind="c3_impacto"
+        )
+
+    def search_normative_backing_batch(
+        self,
+        discrepancias: List[Tuple[str, str]],
+        normativa_fragments: List[str]
+    ) -> List[LLMNormativeBackingResult]:
+        """
+        Busca respaldo normativo para varias funciones discrepantes en una llamada.
+
+        Los fragmentos de normativa se envían una sola vez. Las funciones
+        ausentes o mal formadas en la respuesta se reintentan con
+        search_normative_backing(); si la llamada del lote falla, todas
+        quedan con el resultado de respaldo, sin reintentos.
+
+        Args:
+            discrepancias: Lista de (texto de la función, descripción de la discrepancia)
+            normativa_fragments: Fragmentos de normativa disponibles
+
+        Returns:
+            Lista de LLMNormativeBackingResult en el mismo orden de entrada
+        """
+        if not discrepancias:
+            return []
+
+        if not normativa_fragments or len(discrepancias) == 1:
+            return [
+                self.search_normative_backing(funcion_text, normativa_fragments, discrepancy)
+                for funcion_text, discrepancy in discrepancias
+            ]
+
+        prompt = self._build_batch_normative_search_prompt(
+            [(f"F{i + 1}", funcion_text, discrepancy) for i, (funcion_text, discrepancy) in enumerate(discrepancias)],
+            normativa_fragments[:5]  # Limitar a 5 fragmentos más relevantes
+        )
+        response = self._call_batch(
+            prompt, "respaldos",
+            max_tokens=min(self.MAX_OUTPUT_TOKENS, self.BACKING_TOKENS_PER_FUNCTION * len(discrepancias)),
+            system_message=self._build_backing_system_message(batch=True),
+            prompt_family="c3_backing_batch",
+            response_schema=NORMATIVE_BACKING_BATCH_SCHEMA
+        )
+        if response.get("status") != "success":
+            flags = call_failure_flags(response)
+            return [self._create_fallback_backing(flags) for _ in discrepancias]
+
+        by_id = response["data"]
+        results = []
+        for i, (funcion_text, discrepancy) in enumerate(discrepancias):
+            result = by_id.get(f"F{i + 1}")
+            if result is not None:
+                results.append(LLMNormativeBackingResult(
+                    has_backing=result.get("has_backing", False),
+                    backing_text=result.get("backing_text"),
+                    relevance_score=result.get("relevance_score", 0.0),
+                    reasoning=result.get("reasoning", "")
+                ))
+            else:
+                results.append(self.search_normative_backing(funcion_text, normativa_fragments, discrepancy))
+
+        return results
+
+    def _call_batch(
+        self,
+        prompt: str,
+        list_key: str,
+        max_tokens: int,
+        system_message: Optional[str] = None,
+        prompt_family: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta una llamada por lotes y indexa la respuesta por funcion_id.
+
+        Returns:
+            Respuesta de robust_openai_call; si tuvo éxito, "data" es el dict
+            funcion_id -> resultado (vacío si la respuesta no trae el arreglo)
+        """
+        try:
+            response = robust_openai_call(
+                prompt=prompt,
+                model="openai/gpt-4o-mini",
+                temperature=0.1,
+                max_tokens=max_tokens,
+                context=self.context,
+                system_message=system_message,
+                prompt_family=prompt_family,
+                response_schema=response_schema
+            )
+        except Exception as e:
+            logger.error(f"[HierarchicalImpactLLMValidator] Excepción en llamada por lotes: {e}")
+            return {"status": "error", "error": str(e)}
+
+        if response.get("status") != "success":
+            logger.error(f"[HierarchicalImpactLLMValidator] Error en llamada por lotes: {response.get('error')}")
+            return response
+
+        data = response["data"]
+        if isinstance(data, dict):
+            data = data.get(list_key, [])
+        if not isinstance(data, list):
+            data = []
+
+        return {
+            **response,
+            "data": {
+                str(item.get("funcion_id", "")).strip(): item
+                for item in data
+                if isinstance(item, dict)
+            }
+        }
+
+    def _impact_analysis_from_dict(self, result: Dict[str, Any]) -> LLMImpactAnalysis:
+        """Convierte la respuesta JSON de análisis de impacto en LLMImpactAnalysis"""
+        return LLMImpactAnalysis(
+            scope_level=result.get("scope_level", "local"),
+            consequences_level=result.get("consequences_level", "operational"),
+            complexity_level=result.get("complexity_level", "routine"),
+            is_appropriate_for_level=result.get("is_appropriate", False),
+            confidence=result.get("confidence", 0.0),
+            reasoning=result.get("reasoning", ""),
+            detected_issues=result.get("issues", [])
+        )
+
+    def _build_impact_system_message(self, batch: bool = False) -> str:
+        """
+        Prefijo estático del análisis de impacto (idéntico entre llamadas).
+
+        Args:
+            batch: Si True, formato de respuesta por lotes (arreglo "analisis")
+        """
+        if batch:
+            response_format = f"""Responde en JSON, con un análisis por función identificado por su funcion_id (F1, F2, ...):
+{{
+  "analisis": [
+    {{
+      "funcion_id": "F1",
+{textwrap.indent(IMPACT_JSON_FIELDS, "    ")}
+    }}
+  ]
+}}"""
+        else:
+            response_format = f"""Responde en JSON:
+{{
+{IMPACT_JSON_FIELDS}
+}}"""
+
+        return f"""Eres un experto en análisis de puestos de la Administración Pública Federal mexicana.
+
+**TAREA:** Analiza el impacto jerárquico de la(s) función(es) indicada(s) y determina si es apropiada para el nivel del puesto. Si son varias, analiza cada función de forma independiente.
+
+Recibirás el nivel del puesto, su perfil de impacto y rangos aceptables, y la(s) función(es) a analizar.
+
+{IMPACT_INSTRUCTIONS}
+
+{response_format}"""
+
     def _build_impact_analysis_prompt(
         self,
         funcion_text: str,
         nivel: str,
         expected_impact: Dict[str, str]
     ) -> str:
-        """Construye el prompt para análisis de impacto"""
+        """Construye la parte variable del prompt de análisis de impacto"""
+
+        return f"""{self._build_level_guidance(nivel, expected_impact)}
+**FUNCIÓN A ANALIZAR:**
+{funcion_text}"""
+
+    def _build_batch_impact_analysis_prompt(
+        self,
+        funciones: List[Tuple[str, str]],
+        nivel: str,
+        expected_impact: Dict[str, str]
+    ) -> str:
+        """Construye la parte variable del prompt de impacto de varias funciones (guía del nivel una sola vez)"""
+
+        functions_text = "\n\n".join(f"[{funcion_id}] {funcion_text}" for funcion_id, funcion_text in funciones)
+
+        return f"""{self._build_level_guidance(nivel, expected_impact)}
+**FUNCIONES A ANALIZAR ({len(funciones)}):**
+{functions_text}"""
+
+    def _build_level_guidance(self, nivel: str, expected_impact: Dict[str, str]) -> str:
+        """Construye el bloque de nivel, perfil ideal y RANGOS DE IMPACTO ACEPTABLES"""
 
         # Determinar si es nivel estratégico y obtener rangos aceptables
         from src.config.verb_hierarchy import extract_level_letter, get_acceptable_impact_ranges
@@ -208,52 +587,44 @@ NO es necesario que coincida exactamente con el perfil ideal - los rangos reflej
 legítima de funciones que puede tener un puesto de este nivel.
 """
 
-        return f"""Eres un experto en análisis de puestos de la Administración Pública Federal mexicana.
-
-**TAREA:** Analiza el impacto jerárquico de esta función y determina si es apropiada para el nivel del puesto.
-
-**NIVEL DEL PUESTO:** {nivel}
+        return f"""**NIVEL DEL PUESTO:** {nivel}
 
 **PERFIL DE IMPACTO IDEAL (referencia):**
 - Alcance de decisiones: {expected_impact.get('decision_scope', 'N/A')}
 - Consecuencias de errores: {expected_impact.get('error_consequences', 'N/A')}
 - Complejidad: {expected_impact.get('complexity_level', 'N/A')}
-{ranges_guidance}
-**FUNCIÓN A ANALIZAR:**
-{funcion_text}
+{ranges_guidance}"""
 
-**INSTRUCCIONES:**
-1. Analiza el ALCANCE real de esta función:
-   - local: afecta solo al departamento/área
-   - institutional: afecta a toda la institución
-   - interinstitutional: afecta a múltiples instituciones
-   - strategic_national: afecta a nivel nacional
+    def _build_backing_system_message(self, batch: bool = False) -> str:
+        """
+        Prefijo estático de la búsqueda de respaldo normativo.
 
-2. Analiza las CONSECUENCIAS de errores en esta función:
-   - operational: afecta operaciones diarias
-   - tactical: compromete metas/proyectos
-   - strategic: afecta objetivos estratégicos
-   - systemic: afecta sistema nacional
+        Args:
+            batch: Si True, formato de respuesta por lotes (arreglo "respaldos")
+        """
+        if batch:
+            response_format = f"""Responde en JSON, con un resultado por función identificado por su funcion_id (F1, F2, ...):
+{{
+  "respaldos": [
+    {{
+      "funcion_id": "F1",
+{textwrap.indent(BACKING_JSON_FIELDS, "    ")}
+    }}
+  ]
+}}"""
+        else:
+            response_format = f"""Responde en JSON:
+{{
+{BACKING_JSON_FIELDS}
+}}"""
 
-3. Analiza la COMPLEJIDAD de esta función:
-   - routine: tareas repetitivas/procedimientos
-   - analytical: análisis/evaluación
-   - strategic: diseño/planeación estratégica
-   - transformational: transformación/reestructuración
-   - innovative: creación/innovación
+        return f"""Eres un experto en normativa de la Administración Pública Federal mexicana.
 
-4. Determina si el impacto es APROPIADO para el nivel del puesto
+**TAREA:** Para cada función recibida, determina si algún fragmento de normativa respalda la discrepancia detectada.
 
-Responde en JSON:
-{{
-  "scope_level": "local|institutional|interinstitutional|strategic_national",
-  "consequences_level": "operational|tactical|strategic|systemic",
-  "complexity_level": "routine|analytical|strategic|transformational|innovative",
-  "is_appropriate": true/false,
-  "confidence": 0.0-1.0,
-  "reasoning": "Explicación concisa de por qué es/no es apropiado",
-  "issues": ["lista", "de", "problemas"] // vacío si is_appropriate=true
-}}"""
+{BACKING_INSTRUCTIONS}
+
+{response_format}"""
 
     def _build_normative_search_prompt(
         self,
@@ -261,44 +632,45 @@ Responde en JSON:
         normativa_fragments: List[str],
         discrepancy: str
     ) -> str:
-        """Construye el prompt para búsqueda de respaldo normativo"""
-
-        fragments_text = "\n\n".join([
-            f"**Fragmento {i+1}:**\n{frag[:500]}"
-            for i, frag in enumerate(normativa_fragments)
-        ])
-
-        return f"""Eres un experto en normativa de la Administración Pública Federal mexicana.
+        """Construye la parte variable del prompt de búsqueda de respaldo normativo"""
 
-**TAREA:** Determina si algún fragmento de normativa respalda la discrepancia detectada en esta función.
+        return f"""**FRAGMENTOS DE NORMATIVA DISPONIBLES:**
+{self._format_fragments(normativa_fragments)}
 
 **FUNCIÓN:**
 {funcion_text}
 
 **DISCREPANCIA DETECTADA:**
-{discrepancy}
+{discrepancy}"""
 
-**FRAGMENTOS DE NORMATIVA DISPONIBLES:**
-{fragments_text}
+    def _build_batch_normative_search_prompt(
+        self,
+        discrepancias: List[Tuple[str, str, str]],
+        normativa_fragments: List[str]
+    ) -> str:
+        """Construye la parte variable de la búsqueda de respaldo para varias funciones (fragmentos una sola vez)"""
 
-**INSTRUCCIONES:**
-Busca si algún fragmento respalda explícitamente que esta función (a pesar de la discrepancia detectada) es legítima según la normativa institucional.
+        functions_text = "\n\n".join(
+            f"[{funcion_id}] {funcion_text}\n    Discrepancia detectada: {discrepancy}"
+            for funcion_id, funcion_text, discrepancy in discrepancias
+        )
 
-Por ejemplo:
-- Si el verbo parece inapropiado pero la normativa lo menciona explícitamente
-- Si el alcance parece excesivo pero la normativa lo autoriza
-- Si hay herencia jerárquica de atribuciones de niveles superiores
+        return f"""**FRAGMENTOS DE NORMATIVA DISPONIBLES:**
+{self._format_fragments(normativa_fragments)}
 
-Responde en JSON:
-{{
-  "has_backing": true/false,
-  "backing_text": "texto exacto del fragmento que respalda" o null,
-  "relevance_score": 0.0-1.0,
-  "reasoning": "Explicación de por qué sí/no hay respaldo"
-}}"""
+**FUNCIONES CON DISCREPANCIA ({len(discrepancias)}):**
+{functions_text}"""
+
+    @staticmethod
+    def _format_fragments(normativa_fragments: List[str]) -> str:
+        """Numera los fragmentos de normativa (truncados a 500 caracteres)"""
+        return "\n\n".join([
+            f"**Fragmento {i+1}:**\n{frag[:500]}"
+            for i, frag in enumerate(normativa_fragments)
+        ])
 
-    def _create_fallback_analysis(self) -> LLMImpactAnalysis:
-        """Crea un análisis fallback en caso de error"""
+    def _create_fallback_analysis(self, flags: Optional[Dict[str, bool]] = None) -> LLMImpactAnalysis:
+        """Crea un análisis fallback en caso de error (flags: señales de la llamada fallida)"""
         return LLMImpactAnalysis(
             scope_level="local",
             consequences_level="operational",
@@ -306,14 +678,17 @@ Responde en JSON:
             is_appropriate_for_level=False,
             confidence=0.0,
             reasoning="Error en análisis LLM - usando fallback conservador",
-            detected_issues=["Error en llamada LLM"]
+            detected_issues=["Error en llamada LLM"] + [f"Llamada LLM fallida: {flag}" for flag in flags or {}]
         )
 
-    def _create_fallback_backing(self) -> LLMNormativeBackingResult:
-        """Crea un resultado fallback en caso de error"""
+    def _create_fallback_backing(self, flags: Optional[Dict[str, bool]] = None) -> LLMNormativeBackingResult:
+        """Crea un resultado fallback en caso de error (flags: señales de la llamada fallida)"""
+        reasoning = "Error en búsqueda LLM - asumiendo sin respaldo por seguridad"
+        if flags:
+            reasoning += f" ({', '.join(flags)})"
         return LLMNormativeBackingResult(
             has_backing=False,
             backing_text=None,
             relevance_score=0.0,
-            reasoning="Error en búsqueda LLM - asumiendo sin respaldo por seguridad"
+            reasoning=reasoning
         )
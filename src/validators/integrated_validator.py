@@ -21,28 +21,53 @@ Fecha: 2025-11-11
 Versión: 5.38 - Con caché de normativa para análisis múltiples
 """
 
+import contextvars
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 
 from src.validators.criterion_3_validator import Criterion3Validator
 from src.validators.contextual_verb_validator import ContextualVerbValidator
 from src.validators.verb_semantic_analyzer import VerbSemanticAnalyzer
-from src.validators.function_semantic_evaluator import FunctionSemanticEvaluator
+from src.validators.function_semantic_evaluator import FunctionSemanticEvaluator, NOT_EVALUATED
+from src.validators.function_prescreen import prescreen_mode_from_env, prescreener_from_env
+from src.validators.function_memo import FunctionEvaluationMemo, function_memo_from_env
 from src.validators.advanced_quality_validator import AdvancedQualityValidator
 from src.validators.shared_utilities import APFContext
 from src.validators.in_memory_normativa_adapter import create_loader_from_fragments
+from src.utils.batch_journal import BatchJournal, input_hash
+from src.utils.results_store import ValidationResultsStore, results_store_from_env
+from src.providers.usage_meter import (
+    BudgetLimits,
+    UsageLedger,
+    budget_limits_from_env,
+    current_ledger,
+    use_ledger
+)
 from src.validators.models import (
     Criterion1Result,
     Criterion2Result,
     Criterion3Result,
     FinalDecision,
     ValidationResult,
-    calculate_final_decision
+    calculate_final_decision,
+    fixed_decision,
+    threshold_outcome
 )
 
 logger = logging.getLogger(__name__)
 
+# Ejecutores de validate_batch en paralelo
+BATCH_EXECUTORS = ("thread", "process")
+
+# Versión del validador y sus prompts en la llave de resultados persistentes:
+# incrementar al cambiar prompts, modelos o reglas de decisión para que los
+# resultados almacenados con la versión anterior no se reutilicen
+VALIDATOR_VERSION = "5.38"
+
 
 class IntegratedValidator:
     """
@@ -59,11 +84,27 @@ class IntegratedValidator:
     _normativa_cache = {}
     _normativa_cache_key = None
 
+    # Modo decisión primero: criterios del más barato al más caro en llamadas
+    # LLM (C2: una llamada global; C3: impacto por lotes + respaldo; C1:
+    # evaluación por lotes con fragmentos normativos por función)
+    CRITERIA_COST_ORDER = ("criterio_2", "criterio_3", "criterio_1")
+
     def __init__(
         self,
         normativa_fragments: Optional[List[str]] = None,
         openai_api_key: Optional[str] = None,
-        use_normativa_cache: bool = True
+        use_normativa_cache: bool = True,
+        batch_budget: Optional[BudgetLimits] = None,
+        position_budget: Optional[BudgetLimits] = None,
+        compact_evaluation: Optional[bool] = None,
+        prescreen_mode: Optional[str] = None,
+        decision_first: Optional[bool] = None,
+        early_termination: Optional[bool] = None,
+        concurrent_criteria: Optional[bool] = None,
+        batch_workers: Optional[int] = None,
+        batch_executor: Optional[str] = None,
+        results_store: Optional[ValidationResultsStore] = None,
+        function_memo: Optional[FunctionEvaluationMemo] = None
     ):
         """
         Inicializa el validador integrado.
@@ -72,10 +113,76 @@ class IntegratedValidator:
             normativa_fragments: Fragmentos de normativa para validación
             openai_api_key: API key de OpenAI (para validadores LLM)
             use_normativa_cache: Si True, reutiliza NormativaLoader de caché (default: True)
+            batch_budget: Topes de tokens/costo por corrida de validate_batch
+                (default: APF_LLM_BATCH_MAX_TOKENS / APF_LLM_BATCH_MAX_COST)
+            position_budget: Topes de tokens/costo por puesto
+                (default: APF_LLM_POSITION_MAX_TOKENS / APF_LLM_POSITION_MAX_COST)
+            compact_evaluation: Criterio 1 y calidad en modo compacto (códigos y
+                scores; razonamiento solo para funciones OBSERVACION/RECHAZADO)
+                (default: APF_LLM_COMPACT_EVALUATION)
+            prescreen_mode: Pre-filtro local del Criterio 1: off | shadow | cascade
+                (default: APF_C1_PRESCREEN; banda en APF_C1_PRESCREEN_BAND)
+            decision_first: Evalúa los criterios en CRITERIA_COST_ORDER y omite
+                el tercero (NOT_EVALUATED) si los dos primeros coinciden
+                (default: APF_DECISION_FIRST; full_detail=True lo anula por llamada)
+            early_termination: Criterios 1 y 3 dejan de evaluar funciones (y de
+                llamar al LLM) cuando las restantes ya no pueden cambiar PASS/FAIL;
+                las omitidas quedan marcadas como no evaluadas
+                (default: APF_EARLY_TERMINATION; full_detail=True lo anula por llamada)
+            concurrent_criteria: Ejecuta calidad y criterios de cada puesto en
+                hilos paralelos (latencia ≈ rama más lenta en lugar de la suma)
+                (default: APF_CONCURRENT_CRITERIA)
+            batch_workers: Puestos validados en paralelo por validate_batch
+                (default: APF_BATCH_WORKERS, 1 = secuencial)
+            batch_executor: "thread" (I/O LLM, default) o "process" (un
+                validador por proceso) (default: APF_BATCH_EXECUTOR)
+            results_store: Almacén persistente de resultados; validate_batch
+                solo valida puestos nuevos o modificados
+                (default: APF_RESULTS_STORE_DIR; sin variable = deshabilitado)
+            function_memo: Memo de evaluaciones por función entre puestos y
+                corridas (Criterio 1 e impacto del Criterio 3); en modo
+                "process" cada worker usa el configurado por entorno
+                (default: APF_FUNCTION_MEMO / APF_FUNCTION_MEMO_DIR)
         """
         self.normativa_fragments = normativa_fragments or []
         self.openai_api_key = openai_api_key
         self.use_normativa_cache = use_normativa_cache
+        self.batch_budget = batch_budget or budget_limits_from_env("BATCH")
+        self.position_budget = position_budget or budget_limits_from_env("POSITION")
+        if compact_evaluation is None:
+            compact_evaluation = os.getenv("APF_LLM_COMPACT_EVALUATION", "").strip().lower() in ("1", "true", "yes", "on")
+        self.compact_evaluation = compact_evaluation
+        self.prescreen_mode = prescreen_mode or prescreen_mode_from_env()
+        if decision_first is None:
+            decision_first = os.getenv("APF_DECISION_FIRST", "").strip().lower() in ("1", "true", "yes", "on")
+        self.decision_first = decision_first
+        if early_termination is None:
+            early_termination = os.getenv("APF_EARLY_TERMINATION", "").strip().lower() in ("1", "true", "yes", "on")
+        self.early_termination = early_termination
+        if concurrent_criteria is None:
+            concurrent_criteria = os.getenv("APF_CONCURRENT_CRITERIA", "").strip().lower() in ("1", "true", "yes", "on")
+        self.concurrent_criteria = concurrent_criteria
+        self.batch_workers = max(1, batch_workers or int(os.getenv("APF_BATCH_WORKERS", "1")))
+        self.batch_executor = (batch_executor or os.getenv("APF_BATCH_EXECUTOR", "thread")).strip().lower()
+        if self.batch_executor not in BATCH_EXECUTORS:
+            raise ValueError(f"batch_executor inválido: {self.batch_executor} (opciones: {', '.join(BATCH_EXECUTORS)})")
+        self.results_store = results_store or results_store_from_env()
+        self.function_memo = function_memo or function_memo_from_env(VALIDATOR_VERSION)
+
+        # Argumentos para reconstruir el validador en procesos de validate_batch
+        self._worker_kwargs = {
+            "normativa_fragments": normativa_fragments,
+            "openai_api_key": openai_api_key,
+            "use_normativa_cache": use_normativa_cache,
+            "batch_budget": self.batch_budget,
+            "position_budget": self.position_budget,
+            "compact_evaluation": self.compact_evaluation,
+            "prescreen_mode": self.prescreen_mode,
+            "decision_first": self.decision_first,
+            "early_termination": self.early_termination,
+            "concurrent_criteria": self.concurrent_criteria,
+            "batch_workers": 1
+        }
 
         # Crear contexto APF para validadores v4
         self.context = APFContext()
@@ -128,7 +235,11 @@ class IntegratedValidator:
         # Inicializar FunctionSemanticEvaluator v5.20 (Protocolo SABG)
         self.function_evaluator = FunctionSemanticEvaluator(
             normativa_loader=self.normativa_loader,
-            context=self.context
+            context=self.context,
+            compact=self.compact_evaluation,
+            prescreen_mode=self.prescreen_mode,
+            prescreener=prescreener_from_env() if self.prescreen_mode != "off" else None,
+            memo=self.function_memo
         )
 
         # Inicializar Criterion3Validator v5.34 (CON LLM para análisis de impacto)
@@ -136,21 +247,97 @@ class IntegratedValidator:
             normativa_fragments=normativa_fragments,
             threshold=0.50,
             context=self.context,  # Pasar context para habilitar LLM
-            use_llm=True  # Activar análisis LLM
+            use_llm=True,  # Activar análisis LLM
+            function_memo=self.function_memo
         )
 
         # Inicializar AdvancedQualityValidator v5.33-new (análisis holístico de calidad)
-        self.quality_validator = AdvancedQualityValidator(context=self.context)
+        self.quality_validator = AdvancedQualityValidator(context=self.context, compact=self.compact_evaluation)
 
         logger.info("[IntegratedValidator] Inicializado con validadores LLM v4 + FunctionEvaluator v5.20 + Criterion3 v5.34 CON LLM + QualityValidator v5.33")
 
     def validate_puesto(
         self,
-        puesto_data: Dict[str, Any]
+        puesto_data: Dict[str, Any],
+        full_detail: bool = False
     ) -> Dict[str, Any]:
         """
         Valida un puesto completo usando los 3 criterios + validaciones de calidad.
 
+        El uso LLM del puesto (tokens, costo, latencia) se mide en un ledger
+        propio, anidado en el del lote si lo hay, y se agrega al resultado en
+        "uso_llm". Si el presupuesto del puesto o del lote se agota durante la
+        validación, el resultado queda como DIFERIDO. Las llamadas LLM sin
+        respuesta utilizable (error, circuito abierto, diferidas a batch job)
+        se cuentan en "ejecucion.fallas_llm": esos criterios usaron su
+        respaldo conservador y el resultado no se reutiliza (ver is_reusable_result).
+
+        Args:
+            puesto_data: Diccionario con datos del puesto (ver _validate_puesto_criteria)
+            full_detail: Si True, evaluación completa aunque el validador esté
+                en modo decisión primero o con terminación temprana (auditorías,
+                detalle por función para reportes RHNet)
+
+        Returns:
+            Diccionario con resultados completos de validación
+        """
+        codigo = puesto_data.get("codigo", "UNKNOWN")
+        ledger = UsageLedger(f"puesto:{codigo}", self.position_budget, parent=current_ledger())
+
+        with use_ledger(ledger):
+            result = self._validate_puesto_criteria(puesto_data, full_detail)
+
+        usage = ledger.get_summary()
+        self._record_position_usage(codigo, usage)
+
+        if ledger.exceeded_reason is not None:
+            logger.warning(f"[IntegratedValidator] Puesto {codigo} diferido: {ledger.exceeded_reason}")
+            return self._deferred_result(puesto_data, ledger.exceeded_reason, usage)
+
+        result["uso_llm"] = usage
+        result.setdefault("ejecucion", {})["fallas_llm"] = ledger.failed_calls
+        if ledger.failed_calls:
+            logger.warning(
+                f"[IntegratedValidator] Puesto {codigo}: {ledger.failed_calls} llamadas LLM fallidas "
+                f"({usage['fallas_por_tipo']}); resultado con respaldos, no se registra ni se almacena"
+            )
+        return result
+
+    @staticmethod
+    def is_reusable_result(result: Dict[str, Any]) -> bool:
+        """
+        Indica si un resultado puede registrarse en bitácora o almacén.
+
+        No son reutilizables los DIFERIDO/ERROR ni los que tuvieron llamadas
+        LLM fallidas (ejecucion.fallas_llm > 0): sus criterios usaron el
+        respaldo conservador y deben validarse de nuevo.
+
+        Args:
+            result: Resultado de validate_puesto
+
+        Returns:
+            True si el resultado es una evaluación completa del LLM
+        """
+        if result.get("validacion", {}).get("resultado") in ("DIFERIDO", "ERROR"):
+            return False
+        return not result.get("ejecucion", {}).get("fallas_llm")
+
+    def _validate_puesto_criteria(
+        self,
+        puesto_data: Dict[str, Any],
+        full_detail: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta calidad + 3 criterios y calcula la decisión final de un puesto.
+
+        En modo decisión primero (y sin full_detail), los criterios se evalúan
+        en CRITERIA_COST_ORDER y el tercero queda NOT_EVALUATED si los dos
+        primeros ya fijan la matriz 2-of-3. Con terminación temprana (y sin
+        full_detail), los Criterios 1 y 3 omiten las funciones que ya no
+        pueden cambiar su resultado. Con concurrent_criteria, calidad y
+        criterios se ejecutan en hilos paralelos; la duración de cada rama
+        queda en "ejecucion".
+
         Args:
             puesto_data: Diccionario con datos del puesto
                 {
@@ -161,6 +348,7 @@ class IntegratedValidator:
                     "funciones": List[Dict],
                     "objetivo_general": str (opcional)
                 }
+            full_detail: Si True, evalúa siempre los 3 criterios y todas las funciones
 
         Returns:
             Diccionario con resultados completos de validación
@@ -171,8 +359,130 @@ class IntegratedValidator:
 
         logger.info(f"[IntegratedValidator] Validando puesto {codigo}")
 
-        # Ejecutar análisis de calidad holístico (v5.33-new)
-        # Este análisis detecta: duplicados, malformadas, problemas legales, objetivo inadecuado
+        # Ramas independientes: análisis de calidad holístico (v5.33-new) y 3 criterios CON LLM
+        early_termination = self.early_termination and not full_detail
+        evaluators = {
+            "criterio_1": lambda: self._validate_criterion_1(
+                codigo, funciones, nivel, puesto_data, early_termination=early_termination
+            ),
+            "criterio_2": lambda: self._validate_criterion_2(codigo, puesto_data),
+            "criterio_3": lambda: self.criterion3_validator.validate(
+                puesto_codigo=codigo,
+                nivel_salarial=nivel,
+                funciones=funciones,
+                early_termination=early_termination
+            )
+        }
+        decision_first = self.decision_first and not full_detail
+        order = list(self.CRITERIA_COST_ORDER if decision_first else sorted(evaluators))
+        # En decisión primero, el tercer criterio espera a los dos primeros
+        upfront = order[:2] if decision_first else order
+        criteria: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        start = time.monotonic()
+
+        def run_remaining():
+            for name in order[len(upfront):]:
+                evaluated = [criterion.result for criterion in criteria.values()]
+                if fixed_decision(evaluated) is not None:
+                    logger.info(f"[IntegratedValidator] {name} no evaluado: decisión 2-of-3 ya fijada")
+                    criteria[name] = self._not_evaluated_criterion(name)
+                    continue
+                criteria[name] = self._timed_branch(name, evaluators[name], timings)
+
+        if self.concurrent_criteria:
+            # Cada rama en su hilo con copia del contexto (ledger de presupuesto activo)
+            with ThreadPoolExecutor(max_workers=len(upfront) + 1, thread_name_prefix="apf-rama") as pool:
+                quality_future = pool.submit(
+                    contextvars.copy_context().run,
+                    self._timed_branch, "calidad", lambda: self._run_quality_analysis(puesto_data), timings
+                )
+                futures = {
+                    name: pool.submit(
+                        contextvars.copy_context().run,
+                        self._timed_branch, name, evaluators[name], timings
+                    )
+                    for name in upfront
+                }
+                for name in upfront:
+                    criteria[name] = futures[name].result()
+                run_remaining()
+                quality_result = quality_future.result()
+        else:
+            quality_result = self._timed_branch("calidad", lambda: self._run_quality_analysis(puesto_data), timings)
+            for name in upfront:
+                criteria[name] = self._timed_branch(name, evaluators[name], timings)
+            run_remaining()
+
+        total_time = time.monotonic() - start
+        logger.info(
+            f"[IntegratedValidator] Puesto {codigo} en {total_time:.2f}s "
+            f"({'concurrente' if self.concurrent_criteria else 'secuencial'}): "
+            + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
+        )
+
+        criterion_1 = criteria["criterio_1"]
+        criterion_2 = criteria["criterio_2"]
+        criterion_3 = criteria["criterio_3"]
+
+        # Calcular decisión final
+        final_decision = calculate_final_decision(
+            criterion_1,
+            criterion_2,
+            criterion_3
+        )
+
+        # Construir resultado con estructura robusta
+        result = {
+            "puesto": {
+                "codigo": codigo,
+                "denominacion": puesto_data.get("denominacion", ""),
+                "nivel": nivel,  # Campo principal
+                "nivel_salarial": nivel,  # Alias para compatibilidad (evita KeyError)
+                "unidad_responsable": puesto_data.get("unidad_responsable", "")
+            },
+            "validacion": {
+                "resultado": final_decision.resultado,
+                "clasificacion": final_decision.clasificacion.value,
+                "criterios_aprobados": final_decision.criteria_passed,
+                "total_criterios": 3,  # Evitar hardcoding (v5.33)
+                "criterios_no_evaluados": final_decision.criteria_not_evaluated,
+                "modo_evaluacion": "decision_primero" if decision_first else "completo",
+                "terminacion_temprana": early_termination,
+                "confianza": round(final_decision.confidence_global, 2),
+                "criterios": {
+                    "criterio_1_verbos": self._format_criterion_1(criterion_1, quality_result),
+                    "criterio_2_contextual": self._format_criterion_2(criterion_2, quality_result),
+                    "criterio_3_impacto": self._format_criterion_3(criterion_3)
+                },
+                "accion_requerida": final_decision.accion_requerida,
+                "razonamiento": final_decision.reasoning
+            },
+            "ejecucion": {
+                "modo": "concurrente" if self.concurrent_criteria else "secuencial",
+                "tiempos_ramas": {name: round(seconds, 3) for name, seconds in timings.items()},
+                "tiempo_total": round(total_time, 3)
+            }
+        }
+
+        return result
+
+    @staticmethod
+    def _timed_branch(name: str, func: Callable[[], Any], timings: Dict[str, float]) -> Any:
+        """Ejecuta una rama de la validación y registra su duración en timings"""
+        start = time.monotonic()
+        try:
+            return func()
+        finally:
+            timings[name] = time.monotonic() - start
+
+    def _run_quality_analysis(self, puesto_data: Dict[str, Any]):
+        """
+        Análisis de calidad holístico del puesto (v5.33-new).
+
+        Detecta duplicados, malformadas, problemas legales y objetivo
+        inadecuado. Si falla, devuelve un resultado vacío.
+        """
         logger.info(f"[IntegratedValidator] Ejecutando análisis de calidad holístico...")
         try:
             # Obtener texto completo de normativa si está disponible
@@ -213,60 +523,37 @@ class IntegratedValidator:
                 flags_low=0
             )
 
-        # Ejecutar 3 criterios CON LLM
-        criterion_1 = self._validate_criterion_1(codigo, funciones, nivel, puesto_data)
-        criterion_2 = self._validate_criterion_2(codigo, puesto_data)
-        criterion_3 = self.criterion3_validator.validate(
-            puesto_codigo=codigo,
-            nivel_salarial=nivel,
-            funciones=funciones
-        )
+        return quality_result
 
-        # Calcular decisión final
-        final_decision = calculate_final_decision(
-            criterion_1,
-            criterion_2,
-            criterion_3
+    @staticmethod
+    def _not_evaluated_criterion(name: str):
+        """Resultado NOT_EVALUATED de un criterio omitido en modo decisión primero"""
+        reasoning = (
+            "No evaluado: los otros dos criterios ya fijan la decisión 2-of-3 "
+            "(modo decisión primero). Usar evaluación completa para auditoría."
         )
-
-        # Construir resultado con estructura robusta
-        result = {
-            "puesto": {
-                "codigo": codigo,
-                "denominacion": puesto_data.get("denominacion", ""),
-                "nivel": nivel,  # Campo principal
-                "nivel_salarial": nivel,  # Alias para compatibilidad (evita KeyError)
-                "unidad_responsable": puesto_data.get("unidad_responsable", "")
-            },
-            "validacion": {
-                "resultado": final_decision.resultado,
-                "clasificacion": final_decision.clasificacion.value,
-                "criterios_aprobados": final_decision.criteria_passed,
-                "total_criterios": 3,  # Evitar hardcoding (v5.33)
-                "confianza": round(final_decision.confidence_global, 2),
-                "criterios": {
-                    "criterio_1_verbos": self._format_criterion_1(criterion_1, quality_result),
-                    "criterio_2_contextual": self._format_criterion_2(criterion_2, quality_result),
-                    "criterio_3_impacto": self._format_criterion_3(criterion_3)
-                },
-                "accion_requerida": final_decision.accion_requerida,
-                "razonamiento": final_decision.reasoning
-            }
-        }
-
-        return result
+        if name == "criterio_1":
+            return Criterion1Result(result=ValidationResult.NOT_EVALUATED, threshold=0.50, reasoning=reasoning)
+        if name == "criterio_2":
+            return Criterion2Result(
+                result=ValidationResult.NOT_EVALUATED,
+                alignment_classification="NOT_EVALUATED",
+                reasoning=reasoning
+            )
+        return Criterion3Result(result=ValidationResult.NOT_EVALUATED, threshold=0.50, reasoning=reasoning)
 
     def _validate_criterion_1(
         self,
         codigo: str,
         funciones: List[Dict[str, Any]],
         nivel_salarial: str = "P",
-        puesto_data: Optional[Dict[str, Any]] = None
+        puesto_data: Optional[Dict[str, Any]] = None,
+        early_termination: bool = False
     ) -> Criterion1Result:
         """
         Criterio 1 v5.20: Análisis Semántico Contextual con LLM (Protocolo SABG).
 
-        Evalúa cada función usando 5 criterios:
+        Evalúa las funciones por lotes (evaluate_functions_batch) usando 5 criterios:
         1. Verbo (25%) - ¿Autorizado para el nivel?
         2. Normativa (25%) - ¿Respaldo en reglamento?
         3. Estructura (20%) - ¿VERBO+COMPLEMENTO+RESULTADO?
@@ -278,6 +565,8 @@ class IntegratedValidator:
             funciones: Lista de funciones del puesto
             nivel_salarial: Nivel jerárquico (G11, H, J, K, etc.)
             puesto_data: Datos completos del puesto (denominación, unidad, etc.)
+            early_termination: Si True, deja de enviar lotes al LLM en cuanto
+                las funciones restantes ya no pueden cambiar PASS/FAIL
 
         Returns:
             Criterion1Result con evaluación semántica completa
@@ -292,42 +581,66 @@ class IntegratedValidator:
         aprobadas = []
         observadas = []
         rechazadas = []
+        no_evaluadas = []
 
-        # Evaluar cada función con FunctionSemanticEvaluator
-        for idx, func in enumerate(funciones, 1):
-            try:
-                # Obtener texto completo de la función
-                funcion_text = func.get("descripcion_completa", "") or func.get("que_hace", "")
-                verbo = func.get("verbo_accion", "").strip()
-
-                # Fallback: extraer primer verbo si no está explícito
-                if not verbo and funcion_text:
-                    verbo = funcion_text.split()[0] if funcion_text.split() else "DESCONOCIDO"
-
-                # Evaluar función completa con 5 criterios LLM
-                evaluation = self.function_evaluator.evaluate_function(
-                    funcion_text=funcion_text,
-                    verbo=verbo,
-                    nivel_jerarquico=nivel_salarial[0] if nivel_salarial else "P",
-                    puesto_nombre=puesto_nombre,
-                    unidad=unidad
-                )
+        # Preparar funciones (texto completo + verbo principal)
+        funciones_input = []
+        for func in funciones:
+            funcion_text = func.get("descripcion_completa", "") or func.get("que_hace", "")
+            verbo = func.get("verbo_accion", "").strip()
+
+            # Fallback: extraer primer verbo si no está explícito
+            if not verbo and funcion_text:
+                verbo = funcion_text.split()[0] if funcion_text.split() else "DESCONOCIDO"
 
-                # Clasificar según resultado
-                if evaluation.clasificacion == "APROBADO":
-                    aprobadas.append(evaluation)
-                    logger.debug(f"   Función {idx}: APROBADO (score={evaluation.score_global:.2f})")
-                elif evaluation.clasificacion == "OBSERVACION":
-                    observadas.append(evaluation)
-                    logger.debug(f"   Función {idx}: OBSERVACION (score={evaluation.score_global:.2f})")
-                else:  # RECHAZADO
-                    rechazadas.append(evaluation)
-                    logger.warning(f"   Función {idx}: RECHAZADO (score={evaluation.score_global:.2f}) - {verbo}")
-
-            except Exception as e:
-                logger.error(f"[Criterio 1 v5.20] Error evaluando función {idx}: {e}")
-                # Fallback: clasificar como RECHAZADO
+            funciones_input.append({"funcion_text": funcion_text, "verbo": verbo})
+
+        # Terminación temprana: FAIL si > 50% RECHAZADO; se detiene cuando ni
+        # el peor caso de las funciones restantes cambia el resultado
+        def decided(done) -> bool:
+            critical = sum(1 for evaluation in done if evaluation.clasificacion == "RECHAZADO")
+            return threshold_outcome(critical, len(done), total_functions, 0.50) is not None
+
+        # Evaluar funciones por lotes con FunctionSemanticEvaluator (k funciones por request)
+        try:
+            evaluations = self.function_evaluator.evaluate_functions_batch(
+                funciones_input,
+                nivel_jerarquico=nivel_salarial[0] if nivel_salarial else "P",
+                puesto_nombre=puesto_nombre,
+                unidad=unidad,
+                should_stop=decided if early_termination else None
+            )
+        except Exception as e:
+            logger.error(f"[Criterio 1 v5.20] Error en evaluación por lotes: {e}")
+            # Fallback: clasificar como RECHAZADO
+            evaluations = [None] * total_functions
+
+        # Modo compacto: razonamiento en prosa solo para funciones observadas/rechazadas
+        if self.compact_evaluation:
+            self.function_evaluator.expand_reasoning(
+                evaluations,
+                nivel_jerarquico=nivel_salarial[0] if nivel_salarial else "P",
+                puesto_nombre=puesto_nombre,
+                unidad=unidad
+            )
+
+        for idx, (evaluation, func_input) in enumerate(zip(evaluations, funciones_input), 1):
+            if evaluation is None:
                 rechazadas.append(None)  # Placeholder para contar
+                continue
+
+            # Clasificar según resultado
+            if evaluation.clasificacion == NOT_EVALUATED:
+                no_evaluadas.append(evaluation)
+            elif evaluation.clasificacion == "APROBADO":
+                aprobadas.append(evaluation)
+                logger.debug(f"   Función {idx}: APROBADO (score={evaluation.score_global:.2f})")
+            elif evaluation.clasificacion == "OBSERVACION":
+                observadas.append(evaluation)
+                logger.debug(f"   Función {idx}: OBSERVACION (score={evaluation.score_global:.2f})")
+            else:  # RECHAZADO
+                rechazadas.append(evaluation)
+                logger.warning(f"   Función {idx}: RECHAZADO (score={evaluation.score_global:.2f}) - {func_input['verbo']}")
 
         # Calcular tasas
         tasa_aprobadas = len(aprobadas) / total_functions if total_functions > 0 else 0.0
@@ -339,16 +652,25 @@ class IntegratedValidator:
         logger.info(
             f"[Criterio 1 v5.27 SABG] Aprobadas: {len(aprobadas)} ({tasa_aprobadas:.0%}), "
             f"Observadas: {len(observadas)} ({len(observadas)/total_functions:.0%}), "
-            f"Rechazadas: {len(rechazadas)} ({tasa_rechazadas:.0%}) → "
+            f"Rechazadas: {len(rechazadas)} ({tasa_rechazadas:.0%}), No evaluadas: {len(no_evaluadas)} → "
             f"{'PASS' if is_passing else 'FAIL'} (umbral: críticas ≤ 50%)"
         )
 
+        details = {
+            "aprobadas": [e.to_dict() for e in aprobadas if e],
+            "observadas": [e.to_dict() for e in observadas if e],
+            "rechazadas": [e.to_dict() for e in rechazadas if e]
+        }
+        if no_evaluadas:
+            details["no_evaluadas"] = [e.to_dict() for e in no_evaluadas]
+
         return Criterion1Result(
             result=ValidationResult.PASS if is_passing else ValidationResult.FAIL,
             total_functions=total_functions,
             functions_approved=len(aprobadas),
             functions_moderate=len(observadas),
             functions_critical=len(rechazadas),
+            functions_not_evaluated=len(no_evaluadas),
             approval_rate=tasa_aprobadas,
             critical_rate=tasa_rechazadas,
             threshold=0.50,
@@ -358,12 +680,13 @@ class IntegratedValidator:
                 f"({tasa_aprobadas:.0%}), {len(observadas)} observadas ({len(observadas)/total_functions:.0%}), "
                 f"{len(rechazadas)} rechazadas ({tasa_rechazadas:.0%}). "
                 f"Umbral: funciones críticas ≤ 50%. Resultado: {'PASS' if is_passing else 'FAIL'}."
+                + (
+                    f" {len(no_evaluadas)} funciones no evaluadas: el resultado ya estaba decidido "
+                    f"(terminación temprana)."
+                    if no_evaluadas else ""
+                )
             ),
-            details={
-                "aprobadas": [e.to_dict() for e in aprobadas if e],
-                "observadas": [e.to_dict() for e in observadas if e],
-                "rechazadas": [e.to_dict() for e in rechazadas if e]
-            }
+            details=details
         )
 
     def _validate_criterion_2(
@@ -451,6 +774,7 @@ class IntegratedValidator:
             "funciones_aprobadas": criterion.functions_approved,
             "funciones_observadas": criterion.functions_moderate,
             "funciones_rechazadas": criterion.functions_critical,
+            "funciones_no_evaluadas": criterion.functions_not_evaluated,
             "total_funciones": criterion.total_functions,
             "metodo": "Análisis Semántico Protocolo SABG v1.1"
         }
@@ -576,6 +900,7 @@ class IntegratedValidator:
                 "total_funciones": criterion.total_functions,
                 "funciones_critical": criterion.functions_critical,  # Sin respaldo normativo
                 "funciones_moderate": criterion.functions_moderate,  # Con respaldo (anotación)
+                "funciones_no_evaluadas": criterion.functions_not_evaluated,  # Terminación temprana
                 "funciones_con_verbo_inapropiado": criterion.functions_with_inappropriate_verbs,
                 "funciones_con_verbo_prohibido": criterion.functions_with_forbidden_verbs,
                 "funciones_con_alcance_discrepante": criterion.functions_with_scope_discrepancy,
@@ -615,6 +940,7 @@ class IntegratedValidator:
                     },
 
                     "severidad": fa.severity.value,
+                    "evaluada": fa.evaluated,
                     "problema_detectado": fa.issue_detected,
                     "solucion_sugerida": fa.suggested_fix
                 }
@@ -694,43 +1020,438 @@ class IntegratedValidator:
     def validate_batch(
         self,
         puestos: List[Dict[str, Any]],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        full_detail: bool = False,
+        workers: Optional[int] = None,
+        executor: Optional[str] = None,
+        journal_path: Optional[str] = None,
+        resume: bool = False,
+        revalidate: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Valida múltiples puestos en lote.
 
+        El uso LLM de la corrida se acumula en un ledger de lote con los topes
+        de batch_budget. Al agotarse el presupuesto no se programan más
+        llamadas: el puesto en curso y los pendientes quedan como DIFERIDO.
+
+        Con varios workers, los puestos se reparten dinámicamente (cada
+        worker toma el siguiente al terminar, los de más funciones primero)
+        y los resultados conservan el orden de entrada. El resultado de cada
+        puesto no depende del número de workers; solo cuáles quedan DIFERIDO
+        al agotarse el presupuesto depende del orden de terminación.
+
+        Con journal_path, cada puesto completado (is_reusable_result: no
+        DIFERIDO ni ERROR, sin llamadas LLM fallidas) se registra en una
+        bitácora JSONL al terminar; con resume=True, los puestos ya
+        registrados con la misma entrada y configuración se toman
+        de la bitácora sin volver a validarse.
+
+        Con results_store (revalidación incremental), los puestos cuyo
+        contenido normalizado, normativa, versión y opciones coinciden con un
+        resultado almacenado se toman del almacén; solo los nuevos o
+        modificados se validan, y se almacenan solo los reutilizables
+        (is_reusable_result: sin llamadas LLM fallidas ni diferidas). El
+        reporte de reutilizados, validados y tiempo ahorrado queda en el
+        contexto como "revalidacion_incremental". Con function_memo, las estadísticas
+        acumuladas del memo de funciones (hits/misses por tipo) quedan en
+        "memo_funciones".
+
         Args:
             puestos: Lista de puestos a validar
             progress_callback: Callback(progreso_pct) para reportar progreso
+                (siempre desde el hilo que llama, con valores crecientes)
+            full_detail: Si True, evalúa los 3 criterios de cada puesto aunque
+                el validador esté en modo decisión primero
+            workers: Puestos en paralelo (default: self.batch_workers)
+            executor: "thread" o "process" (default: self.batch_executor)
+            journal_path: Bitácora JSONL de puestos completados (None = sin bitácora)
+            resume: Si True, reanuda desde la bitácora; si False, la reinicia
+            revalidate: Si True, valida todos los puestos aunque tengan
+                resultado almacenado (el almacén se actualiza)
 
         Returns:
             Lista de resultados de validación
         """
-        results = []
         total = len(puestos)
+        workers = max(1, workers or self.batch_workers)
+        executor = executor or self.batch_executor
+        batch_ledger = UsageLedger("lote", self.batch_budget)
+        journal = BatchJournal(journal_path, resume=resume) if journal_path else None
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        done = 0
+
+        def finish(idx: int, result: Dict[str, Any]) -> None:
+            """Guarda el resultado de un puesto (hilo que llama), lo registra y reporta progreso"""
+            nonlocal done
+            results[idx] = result
+            puesto = puestos[idx]
+            codigo = puesto.get("codigo", "UNKNOWN")
+            if self.is_reusable_result(result):
+                if journal is not None:
+                    journal.record(codigo, self._journal_input(puesto, full_detail), result)
+                if self.results_store is not None:
+                    self.results_store.set(
+                        self._store_key(puesto, full_detail), codigo, result,
+                        result.get("ejecucion", {}).get("tiempo_total", 0.0)
+                    )
+
+            # Reportar progreso
+            done += 1
+            if progress_callback:
+                progress_callback(int(done / total * 100))
 
+        pending = []
         for idx, puesto in enumerate(puestos):
-            try:
-                result = self.validate_puesto(puesto)
-                results.append(result)
-
-                # Reportar progreso
-                if progress_callback:
-                    progress_pct = int((idx + 1) / total * 100)
-                    progress_callback(progress_pct)
-
-            except Exception as e:
-                logger.error(f"Error validando puesto {puesto.get('codigo')}: {e}")
-                # Agregar resultado de error
-                results.append({
-                    "puesto": {
-                        "codigo": puesto.get("codigo", "UNKNOWN"),
-                        "error": str(e)
-                    },
-                    "validacion": {
-                        "resultado": "ERROR",
-                        "mensaje": f"Error al procesar: {str(e)}"
-                    }
-                })
+            cached = journal.get(puesto.get("codigo", "UNKNOWN"), self._journal_input(puesto, full_detail)) if journal else None
+            if cached is None:
+                pending.append(idx)
+            else:
+                results[idx] = cached
+                done += 1
+
+        if journal is not None:
+            logger.info(
+                f"[IntegratedValidator] Bitácora {journal.path}: {done} puestos reanudados, "
+                f"{len(pending)} por validar"
+            )
+            if done and progress_callback:
+                progress_callback(int(done / total * 100))
+
+        if self.results_store is not None:
+            resumed = done
+            stored_hits = 0
+            time_saved = 0.0
+            changed = []
+            for idx in pending:
+                stored = None if revalidate else self.results_store.get(self._store_key(puestos[idx], full_detail))
+                if stored is None:
+                    changed.append(idx)
+                    continue
+                results[idx] = stored
+                stored_hits += 1
+                time_saved += stored.get("ejecucion", {}).get("tiempo_total", 0.0)
+                done += 1
+            pending = changed
+
+            incremental_report = {
+                "total": total,
+                "reutilizados": stored_hits,
+                "validados": len(pending),
+                "reanudados_bitacora": resumed,
+                "tiempo_ahorrado_s": round(time_saved, 3),
+                "version": VALIDATOR_VERSION,
+                "normativa_hash": self._normativa_hash()[:16]
+            }
+            self.context.set_data("revalidacion_incremental", incremental_report, "IntegratedValidator")
+            logger.info(
+                f"[IntegratedValidator] Revalidación incremental: {stored_hits} reutilizados, "
+                f"{len(pending)} nuevos o modificados (~{time_saved:.1f}s ahorrados)"
+            )
+            if stored_hits and progress_callback:
+                progress_callback(int(done / total * 100))
+
+        if workers == 1 or len(pending) <= 1:
+            for idx in pending:
+                finish(idx, self._validate_batch_item(puestos[idx], batch_ledger, full_detail))
+            batch_usage = batch_ledger.get_summary()
+        elif executor == "process":
+            batch_usage = self._validate_batch_processes(puestos, pending, workers, full_detail, finish)
+        else:
+            self._validate_batch_threads(puestos, pending, batch_ledger, workers, full_detail, finish)
+            batch_usage = batch_ledger.get_summary()
+
+        self.context.set_data("uso_llm_lote", batch_usage, "IntegratedValidator")
+        if self.function_memo is not None:
+            memo_stats = self.function_memo.get_stats()
+            self.context.set_data("memo_funciones", memo_stats, "IntegratedValidator")
+            logger.info(
+                f"[IntegratedValidator] Memo de funciones: {memo_stats['hits']} reutilizadas, "
+                f"{memo_stats['misses']} evaluadas (alcance {memo_stats['alcance']})"
+            )
+        if journal is not None:
+            self.context.set_data("bitacora_lote", journal.get_stats(), "IntegratedValidator")
+        logger.info(
+            f"[IntegratedValidator] Uso LLM del lote: {batch_usage['calls']} llamadas, "
+            f"{batch_usage['total_tokens']} tokens ({batch_usage['cached_tokens']} cacheados), "
+            f"${batch_usage['cost']:.4f}"
+        )
+
+        return results
+
+    def _journal_input(self, puesto: Dict[str, Any], full_detail: bool) -> Dict[str, Any]:
+        """Entrada que identifica un resultado en la bitácora: puesto + normativa + modos que lo afectan"""
+        return {
+            "puesto": puesto,
+            "normativa": input_hash(self.normativa_fragments),
+            "opciones": self._result_options(full_detail)
+        }
+
+    def _store_key(self, puesto: Dict[str, Any], full_detail: bool) -> str:
+        """Llave del almacén: puesto normalizado + hash de normativa + versión + modos que lo afectan"""
+        return ValidationResultsStore.build_key(
+            puesto, self._normativa_hash(), VALIDATOR_VERSION, self._result_options(full_detail)
+        )
+
+    def _result_options(self, full_detail: bool) -> Dict[str, Any]:
+        """Opciones de validación que cambian el resultado de un puesto"""
+        return {
+            "full_detail": full_detail,
+            "decision_first": self.decision_first,
+            "early_termination": self.early_termination,
+            "compact_evaluation": self.compact_evaluation,
+            "prescreen_mode": self.prescreen_mode
+        }
+
+    def _normativa_hash(self) -> str:
+        """Hash de contenido de la normativa (NormativaLoader.documents_hash o de los fragmentos)"""
+        if self.normativa_loader is not None and getattr(self.normativa_loader, "documents_hash", ""):
+            return self.normativa_loader.documents_hash
+        return input_hash(self.normativa_fragments)
+
+    def _validate_batch_item(
+        self,
+        puesto: Dict[str, Any],
+        batch_ledger: UsageLedger,
+        full_detail: bool
+    ) -> Dict[str, Any]:
+        """Valida un puesto del lote; los errores quedan aislados en un resultado ERROR"""
+        try:
+            if batch_ledger.is_exhausted():
+                return self._deferred_result(puesto, batch_ledger.exceeded_reason)
+            with use_ledger(batch_ledger):
+                return self.validate_puesto(puesto, full_detail)
+        except Exception as e:
+            logger.error(f"Error validando puesto {puesto.get('codigo')}: {e}")
+            return self._error_result(puesto, e)
+
+    @staticmethod
+    def _schedule_order(puestos: List[Dict[str, Any]], indices: List[int]) -> List[int]:
+        """Índices a validar, los puestos de más funciones primero (reduce la cola del lote)"""
+        return sorted(indices, key=lambda idx: -len(puestos[idx].get("funciones") or []))
+
+    def _validate_batch_threads(
+        self,
+        puestos: List[Dict[str, Any]],
+        indices: List[int],
+        batch_ledger: UsageLedger,
+        workers: int,
+        full_detail: bool,
+        finish: Callable[[int, Dict[str, Any]], None]
+    ) -> None:
+        """Valida los puestos indicados en un pool de hilos (llamadas LLM: I/O)"""
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apf-lote") as pool:
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run,
+                    self._validate_batch_item, puestos[idx], batch_ledger, full_detail
+                ): idx
+                for idx in self._schedule_order(puestos, indices)
+            }
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+
+    def _validate_batch_processes(
+        self,
+        puestos: List[Dict[str, Any]],
+        indices: List[int],
+        workers: int,
+        full_detail: bool,
+        finish: Callable[[int, Dict[str, Any]], None]
+    ) -> Dict[str, Any]:
+        """
+        Valida los puestos indicados en un pool de procesos, cada uno con su
+        propio validador.
+
+        Los procesos no comparten el ledger del lote: el presupuesto del lote
+        se controla aquí con el uso reportado por cada puesto terminado. Hay a
+        lo sumo un puesto en curso por worker; al agotarse el presupuesto no se
+        envían más y los restantes quedan DIFERIDO (los que ya estaban en
+        curso terminan, por lo que el lote puede excederse en hasta `workers`
+        puestos).
+
+        Returns:
+            Resumen de uso LLM del lote (suma de los puestos)
+        """
+        batch_usage = {"ambito": "lote", "calls": 0, "cache_hits": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                       "completion_tokens": 0, "total_tokens": 0, "cost": 0.0, "duration": 0.0,
+                       "presupuesto_excedido": None}
+        limits = self.batch_budget
+
+        order = iter(self._schedule_order(puestos, indices))
+        in_flight: Dict[Any, int] = {}
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(self._worker_kwargs,)
+        ) as pool:
+            def submit_next() -> None:
+                idx = next(order, None)
+                if idx is not None:
+                    in_flight[pool.submit(_validate_puesto_in_worker, puestos[idx], full_detail)] = idx
+
+            for _ in range(workers):
+                submit_next()
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    idx = in_flight.pop(future)
+                    puesto = puestos[idx]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error validando puesto {puesto.get('codigo')}: {e}")
+                        result = self._error_result(puesto, e)
+
+                    usage = result.get("uso_llm")
+                    if usage:
+                        self._record_position_usage(puesto.get("codigo", "UNKNOWN"), usage)
+                        for key in ("calls", "cache_hits", "prompt_tokens", "cached_tokens",
+                                    "completion_tokens", "total_tokens", "cost", "duration"):
+                            batch_usage[key] += usage.get(key, 0)
+
+                    if batch_usage["presupuesto_excedido"] is None:
+                        if limits.max_tokens is not None and batch_usage["total_tokens"] > limits.max_tokens:
+                            batch_usage["presupuesto_excedido"] = (
+                                f"Presupuesto de tokens agotado en 'lote': "
+                                f"{batch_usage['total_tokens']} > {limits.max_tokens}"
+                            )
+                        elif limits.max_cost is not None and batch_usage["cost"] > limits.max_cost:
+                            batch_usage["presupuesto_excedido"] = (
+                                f"Presupuesto de costo agotado en 'lote': "
+                                f"${batch_usage['cost']:.4f} > ${limits.max_cost:.4f}"
+                            )
+
+                    # Nuevo puesto solo si queda presupuesto (cada worker toma el siguiente)
+                    if batch_usage["presupuesto_excedido"] is None:
+                        submit_next()
+
+                    finish(idx, result)
+
+        for idx in order:
+            finish(idx, self._deferred_result(puestos[idx], batch_usage["presupuesto_excedido"]))
+
+        return batch_usage
+
+    @staticmethod
+    def _error_result(puesto: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Resultado de un puesto cuya validación falló (no interrumpe el lote)"""
+        return {
+            "puesto": {
+                "codigo": puesto.get("codigo", "UNKNOWN"),
+                "error": str(error)
+            },
+            "validacion": {
+                "resultado": "ERROR",
+                "mensaje": f"Error al procesar: {str(error)}"
+            }
+        }
+
+    def validate_batch_offline(
+        self,
+        puestos: List[Dict[str, Any]],
+        work_dir: str = "./data/batch_jobs",
+        backend: Optional[Any] = None,
+        poll_interval: float = 30.0,
+        max_phases: int = 6,
+        progress_callback: Optional[callable] = None,
+        full_detail: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Valida múltiples puestos en modo offline, vía batch jobs del proveedor.
+
+        Cada fase re-ejecuta validate_batch: los requests LLM nuevos se
+        recolectan en un JSONL y se envían como batch job; al terminar, la
+        fase siguiente los sirve. Las llamadas dependientes (respaldo
+        normativo del Criterio 3 tras el análisis de impacto, razonamiento
+        del modo compacto tras la evaluación) se resuelven en fases
+        posteriores. El reporte de fases queda en el contexto (lote_offline).
+
+        Con results_store, un puesto con llamadas diferidas en una fase tiene
+        respaldos en lugar de evaluaciones (ejecucion.fallas_llm > 0) y no se
+        almacena: solo se almacena en la fase en que ya no difiere llamadas.
+
+        Args:
+            puestos: Lista de puestos a validar
+            work_dir: Directorio de los JSONL de cada fase (permite reanudar)
+            backend: IBatchJobBackend (default: OpenAIBatchBackend con la API key del validador)
+            poll_interval: Segundos entre consultas de estado del batch job
+            max_phases: Máximo de fases
+            progress_callback: Callback(progreso_pct), llamado al terminar
+            full_detail: Si True, evalúa los 3 criterios (anula decisión primero)
+
+        Returns:
+            Lista de resultados de validación (los de la fase final)
+        """
+        from src.providers.offline_batch import OfflineBatchRunner, OpenAIBatchBackend
+
+        runner = OfflineBatchRunner(
+            backend or OpenAIBatchBackend(api_key=self.openai_api_key),
+            work_dir,
+            poll_interval=poll_interval,
+            max_phases=max_phases
+        )
+        # Hilos: el colector de requests del runner vive en el registro de este proceso
+        results = runner.run(lambda: self.validate_batch(puestos, full_detail=full_detail, executor="thread"))
+
+        report = runner.get_report()
+        self.context.set_data("lote_offline", report, "IntegratedValidator")
+        logger.info(
+            f"[IntegratedValidator] Lote offline: {len(report['phases'])} fases, "
+            f"{report['total_requests']} requests en batch jobs (convergió: {report['converged']})"
+        )
 
+        if progress_callback:
+            progress_callback(100)
         return results
+
+    def _record_position_usage(self, codigo: str, usage: Dict[str, Any]) -> None:
+        """Acumula el uso LLM de un puesto en el contexto (uso_llm_puestos)"""
+        self.context.update_data(
+            "uso_llm_puestos",
+            lambda usage_by_position: {**(usage_by_position or {}), codigo: usage},
+            "IntegratedValidator"
+        )
+
+    def _deferred_result(
+        self,
+        puesto_data: Dict[str, Any],
+        reason: Optional[str],
+        usage: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Resultado de un puesto diferido por presupuesto LLM agotado"""
+        nivel = puesto_data.get("nivel_salarial", "P")
+        result = {
+            "puesto": {
+                "codigo": puesto_data.get("codigo", "UNKNOWN"),
+                "denominacion": puesto_data.get("denominacion", ""),
+                "nivel": nivel,
+                "nivel_salarial": nivel,
+                "unidad_responsable": puesto_data.get("unidad_responsable", "")
+            },
+            "validacion": {
+                "resultado": "DIFERIDO",
+                "mensaje": "Presupuesto LLM agotado; el puesto debe procesarse en otra corrida",
+                "motivo": reason
+            }
+        }
+        if usage is not None:
+            result["uso_llm"] = usage
+        return result
+
+
+# Validador de cada proceso del pool de validate_batch (executor "process")
+_worker_validator: Optional[IntegratedValidator] = None
+
+
+def _init_batch_worker(validator_kwargs: Dict[str, Any]) -> None:
+    """Inicializador del proceso: construye su propio IntegratedValidator"""
+    global _worker_validator
+    _worker_validator = IntegratedValidator(**validator_kwargs)
+
+
+def _validate_puesto_in_worker(puesto: Dict[str, Any], full_detail: bool) -> Dict[str, Any]:
+    """Valida un puesto en el proceso actual (presupuesto por puesto; el del lote lo controla el padre)"""
+    return _worker_validator.validate_puesto(puesto, full_detail)
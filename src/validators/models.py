@@ -27,6 +27,7 @@ class ValidationResult(str, Enum):
     """Resultado de un criterio"""
     PASS = "PASS"
     FAIL = "FAIL"
+    NOT_EVALUATED = "NOT_EVALUATED"  # Omitido: la decisión 2-of-3 ya estaba fijada
 
 
 class DecisionClassification(str, Enum):
@@ -90,6 +91,7 @@ class Criterion1Result:
     functions_critical: int = 0  # Sin respaldo / RECHAZADAS
     functions_moderate: int = 0  # Con respaldo / OBSERVACIONES
     functions_approved: int = 0  # APROBADAS (v5.20+)
+    functions_not_evaluated: int = 0  # NO_EVALUADAS (terminación temprana)
 
     critical_rate: float = 0.0
     approval_rate: float = 0.0  # Tasa de aprobación (v5.20+)
@@ -165,6 +167,9 @@ class FunctionImpactAnalysis:
     issue_detected: Optional[str] = None
     suggested_fix: Optional[str] = None
 
+    # False si la terminación temprana omitió su análisis (o su respaldo normativo)
+    evaluated: bool = True
+
 
 @dataclass
 class Criterion3Result:
@@ -180,6 +185,7 @@ class Criterion3Result:
     functions_with_consequences_discrepancy: int = 0
     functions_critical: int = 0  # Sin respaldo normativo
     functions_moderate: int = 0  # Con respaldo (anotación)
+    functions_not_evaluated: int = 0  # Omitidas por terminación temprana
 
     # Threshold
     critical_rate: float = 0.0
@@ -210,6 +216,7 @@ class FinalDecision:
 
     criteria_passed: int  # 0, 1, 2, 3
     criteria_results: Dict[str, ValidationResult] = field(default_factory=dict)
+    criteria_not_evaluated: List[str] = field(default_factory=list)  # Modo decisión primero
 
     accion_requerida: str = ""
     confidence_global: float = 0.0
@@ -254,10 +261,47 @@ DECISION_MATRIX: Dict[int, Dict[str, str]] = {
 }
 
 
+# Decisión con un criterio NO evaluado (modo decisión primero): los 2
+# evaluados coinciden, así que el resultado está fijado; la clasificación es
+# la que garantizan los criterios evaluados. Con 2 aprobados el resultado es
+# APROBADO_CON_OBSERVACIONES (la observación es el criterio no evaluado):
+# "APROBADO" queda reservado para 3 de 3 (EXCELENTE)
+PARTIAL_DECISION_MATRIX: Dict[int, Dict[str, str]] = {
+    2: {
+        "resultado": "APROBADO_CON_OBSERVACIONES",
+        "clasificacion": "ACEPTABLE",
+        "accion": "Puesto aprobado con observaciones: cumple los 2 criterios evaluados. El tercero no se evaluó (decisión ya fijada); solicitar evaluación completa para auditoría."
+    },
+    0: {
+        "resultado": "RECHAZADO",
+        "clasificacion": "DEFICIENTE",
+        "accion": "Revisión sustancial requerida - fallan los 2 criterios evaluados. El tercero no se evaluó (decisión ya fijada); solicitar evaluación completa para auditoría."
+    }
+}
+
+
 # ==========================================
 # FUNCIONES HELPER
 # ==========================================
 
+def fixed_decision(results: List[ValidationResult]) -> Optional[bool]:
+    """
+    Indica si la matriz 2-of-3 ya está decidida con los resultados disponibles.
+
+    Args:
+        results: Resultados de los criterios evaluados hasta ahora
+
+    Returns:
+        True (aprobado) si 2 criterios pasan, False (rechazado) si 2 fallan,
+        None si el resultado aún depende de otro criterio
+    """
+    if sum(result == ValidationResult.PASS for result in results) >= 2:
+        return True
+    if sum(result == ValidationResult.FAIL for result in results) >= 2:
+        return False
+    return None
+
+
 def create_flag(
     flag_id: str,
     severity: ValidationSeverity,
@@ -292,6 +336,41 @@ def create_evidence(
     )
 
 
+def threshold_outcome(
+    critical: int,
+    evaluated: int,
+    total: int,
+    threshold: float,
+    epsilon: float = 0.0
+) -> Optional[bool]:
+    """
+    Indica si PASS/FAIL de un criterio por tasa crítica ya está decidido.
+
+    El criterio pasa si critical_rate <= threshold (+ epsilon). Con funciones
+    pendientes de evaluar, la decisión está fijada si ni siquiera el peor
+    caso (todas las pendientes críticas) la cambia, o si las críticas ya
+    confirmadas superan el umbral.
+
+    Args:
+        critical: Funciones críticas confirmadas
+        evaluated: Funciones ya evaluadas (críticas o no)
+        total: Total de funciones del criterio
+        threshold: Tasa crítica máxima para pasar
+        epsilon: Tolerancia de la comparación
+
+    Returns:
+        True (PASS fijado), False (FAIL fijado) o None si aún depende de las pendientes
+    """
+    if total <= 0:
+        return True
+    remaining = total - evaluated
+    if (critical + remaining) / total <= threshold + epsilon:
+        return True
+    if critical / total > threshold + epsilon:
+        return False
+    return None
+
+
 def calculate_final_decision(
     criterion_1: Criterion1Result,
     criterion_2: Criterion2Result,
@@ -300,6 +379,10 @@ def calculate_final_decision(
     """
     Calcula la decisión final usando la matriz 2-of-3.
 
+    Un criterio NOT_EVALUATED (modo decisión primero) no cuenta: con los
+    otros dos coincidiendo, la decisión sale de PARTIAL_DECISION_MATRIX y
+    la confianza global promedia solo los criterios evaluados.
+
     Args:
         criterion_1: Resultado de Criterio 1
         criterion_2: Resultado de Criterio 2
@@ -315,8 +398,20 @@ def calculate_final_decision(
         criterion_3.result == ValidationResult.PASS
     ])
 
+    criteria = {
+        "CRITERIO_1": criterion_1.result,
+        "CRITERIO_2": criterion_2.result,
+        "CRITERIO_3": criterion_3.result
+    }
+    not_evaluated = [name for name, result in criteria.items() if result == ValidationResult.NOT_EVALUATED]
+
     # Obtener decisión de matriz
-    decision_data = DECISION_MATRIX[criteria_passed]
+    if not_evaluated:
+        if fixed_decision(list(criteria.values())) is None:
+            raise ValueError(f"Criterios no evaluados {not_evaluated} con una decisión 2-of-3 no fijada")
+        decision_data = PARTIAL_DECISION_MATRIX[criteria_passed]
+    else:
+        decision_data = DECISION_MATRIX[criteria_passed]
 
     # Clasificación
     classification_map = {
@@ -338,19 +433,28 @@ def calculate_final_decision(
     all_evidence.extend(criterion_2.evidence_found)
     all_evidence.extend(criterion_3.evidence_found)
 
-    # Confianza global (promedio)
-    confidence_global = (
-        criterion_1.confidence +
-        criterion_2.alignment_confidence +
-        criterion_3.confidence
-    ) / 3
+    # Confianza global (promedio de los criterios evaluados)
+    confidences = [
+        confidence
+        for name, confidence in (
+            ("CRITERIO_1", criterion_1.confidence),
+            ("CRITERIO_2", criterion_2.alignment_confidence),
+            ("CRITERIO_3", criterion_3.confidence)
+        )
+        if name not in not_evaluated
+    ]
+    confidence_global = sum(confidences) / len(confidences)
 
     # Generar reasoning
     reasoning_parts = []
-    reasoning_parts.append(f"Criterios aprobados: {criteria_passed}/3")
+    reasoning_parts.append(f"Criterios aprobados: {criteria_passed}/{3 - len(not_evaluated)}")
     reasoning_parts.append(f"Criterio 1 (Verbos): {criterion_1.result.value}")
     reasoning_parts.append(f"Criterio 2 (Contextual): {criterion_2.result.value}")
     reasoning_parts.append(f"Criterio 3 (Impacto): {criterion_3.result.value}")
+    if not_evaluated:
+        reasoning_parts.append(
+            f"⏭️ {', '.join(not_evaluated)} no evaluado: la matriz 2-of-3 ya estaba decidida"
+        )
 
     if criteria_passed >= 2:
         reasoning_parts.append("✅ Puesto APROBADO según matriz 2-of-3")
@@ -361,11 +465,8 @@ def calculate_final_decision(
         resultado=decision_data["resultado"],
         clasificacion=classification_map[decision_data["clasificacion"]],
         criteria_passed=criteria_passed,
-        criteria_results={
-            "CRITERIO_1": criterion_1.result,
-            "CRITERIO_2": criterion_2.result,
-            "CRITERIO_3": criterion_3.result
-        },
+        criteria_results=criteria,
+        criteria_not_evaluated=not_evaluated,
         accion_requerida=decision_data["accion"],
         confidence_global=confidence_global,
         all_flags=all_flags,
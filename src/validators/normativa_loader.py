@@ -10,8 +10,8 @@ import json
 import re
 import hashlib
 import pickle
+import threading
 import numpy as np  # AGREGADO para embeddings
-import hashlib
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union, Set, Any
 from dataclasses import dataclass, field
@@ -373,13 +373,15 @@ class NormativeDocument:
 # ==========================================
 
 class IntelligentCache:
-    """Sistema de caché inteligente para búsquedas normativas"""
+    """Sistema de caché inteligente para búsquedas normativas (thread-safe)"""
     
     def __init__(self, cache_file: str = None):
         self.cache_file = Path(cache_file or CACHE_CONFIG["cache_file"])
         self.cache_data = self._load_cache()
         self.hit_count = 0
         self.miss_count = 0
+        # Criterios concurrentes comparten el loader: get/set/guardado bajo lock
+        self._lock = threading.RLock()
     
     def _load_cache(self) -> Dict[str, Any]:
         """Carga caché desde archivo"""
@@ -425,27 +427,23 @@ class IntelligentCache:
         if not CACHE_CONFIG["enable_cache"]:
             return None
         
-        if query_hash in self.cache_data["queries"]:
-            entry = self.cache_data["queries"][query_hash]
-            
-            # Verificar si la entrada es válida
-            entry_age = datetime.now() - entry["timestamp"]
-            if entry_age.total_seconds() < CACHE_CONFIG["cache_duration_hours"] * 3600:
-                self.hit_count += 1
-                return entry["results"]
-        
-        self.miss_count += 1
-        return None
+        with self._lock:
+            entry = self.cache_data["queries"].get(query_hash)
+            if entry is not None:
+                # Verificar si la entrada es válida
+                entry_age = datetime.now() - entry["timestamp"]
+                if entry_age.total_seconds() < CACHE_CONFIG["cache_duration_hours"] * 3600:
+                    self.hit_count += 1
+                    return entry["results"]
+
+            self.miss_count += 1
+            return None
     
     def set(self, query_hash: str, results: List[SemanticMatch]) -> None:
         """Almacena resultado en caché"""
         if not CACHE_CONFIG["enable_cache"]:
             return
         
-        # Limpiar caché si es muy grande
-        if len(self.cache_data["queries"]) >= CACHE_CONFIG["max_cache_entries"]:
-            self._cleanup_cache()
-        
         # Convertir SemanticMatch a dict para serialización
         serializable_results = []
         for match in results:
@@ -460,12 +458,17 @@ class IntelligentCache:
                 "supporting_evidence": match.supporting_evidence
             })
         
-        self.cache_data["queries"][query_hash] = {
-            "results": serializable_results,
-            "timestamp": datetime.now()
-        }
-        
-        self._save_cache()
+        with self._lock:
+            # Limpiar caché si es muy grande
+            if len(self.cache_data["queries"]) >= CACHE_CONFIG["max_cache_entries"]:
+                self._cleanup_cache()
+
+            self.cache_data["queries"][query_hash] = {
+                "results": serializable_results,
+                "timestamp": datetime.now()
+            }
+
+            self._save_cache()
     
     def _cleanup_cache(self) -> None:
         """Limpia entradas antiguas del caché"""
@@ -802,11 +805,17 @@ class NormativaLoader(APFAgent):
                 self.global_keyword_index[keyword].add(doc_id)
     
     def _create_documents_hash(self) -> str:
-        """Crea hash único para el conjunto de documentos cargados"""
+        """
+        Crea hash único para el conjunto de documentos cargados.
+
+        Depende solo del contenido (no de la hora de carga): es estable entre
+        corridas y sirve de llave para resultados persistentes.
+        """
         doc_signatures = []
         for doc_id in sorted(self.documents.keys()):
             doc = self.documents[doc_id]
-            signature = f"{doc_id}:{doc.word_count}:{doc.processed_at.isoformat()}"
+            content_hash = hashlib.sha256(doc.content.encode("utf-8")).hexdigest()
+            signature = f"{doc_id}:{doc.word_count}:{content_hash}"
             doc_signatures.append(signature)
         
         combined_signature = "|".join(doc_signatures)
@@ -0,0 +1,285 @@
+"""
+Response Schemas - JSON schemas de las respuestas LLM de cada validador
+
+Cada schema describe exactamente el JSON que el prompt pide en prosa, en el
+formato {"name", "schema"} de structured outputs (modo estricto: todas las
+propiedades requeridas y additionalProperties=false; los opcionales se
+declaran como nullable).
+
+Se envían en LLMRequest.response_schema (robust_openai_call(response_schema=...));
+el provider usa salida estructurada nativa si el backend la soporta y, si no,
+los ignora y el parsing sigue como antes.
+"""
+
+from typing import Any, Dict, List
+
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Objeto estricto: todas las propiedades requeridas, sin extras"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+def _array(items: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "array", "items": items}
+
+
+def _enum(*values: str) -> Dict[str, Any]:
+    return {"type": "string", "enum": list(values)}
+
+
+def _nullable(schema_type: str) -> Dict[str, Any]:
+    return {"type": [schema_type, "null"]}
+
+
+def _schema(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": name, "schema": schema}
+
+
+def _batch(name: str, list_key: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Variante por lotes: arreglo de items identificados por funcion_id"""
+    batch_item = _object({"funcion_id": STRING, **item["properties"]})
+    return _schema(name, _object({list_key: _array(batch_item)}))
+
+
+STRING = {"type": "string"}
+NUMBER = {"type": "number"}
+INTEGER = {"type": "integer"}
+BOOLEAN = {"type": "boolean"}
+STRING_LIST = _array(STRING)
+SEVERITY = _enum("CRITICAL", "HIGH", "MODERATE", "LOW")
+
+
+# ==========================================
+# CRITERIO 1: FunctionSemanticEvaluator
+# ==========================================
+
+_FUNCTION_EVALUATION = _object({
+    "criterio_verbo": _object({
+        "score": NUMBER,
+        "reasoning": STRING,
+        "esta_autorizado": BOOLEAN,
+        "tiene_excepcion_normativa": BOOLEAN
+    }),
+    "criterio_normativa": _object({
+        "score": NUMBER,
+        "reasoning": STRING,
+        "articulo_respaldo": _nullable("string"),
+        "tipo_correspondencia": _enum("DIRECTA", "SEMANTICA", "LEJANA", "NINGUNA")
+    }),
+    "criterio_estructura": _object({
+        "score": NUMBER,
+        "reasoning": STRING,
+        "tiene_verbo": BOOLEAN,
+        "tiene_complemento": BOOLEAN,
+        "tiene_resultado": BOOLEAN
+    }),
+    "criterio_semantica": _object({
+        "score": NUMBER,
+        "reasoning": STRING,
+        "nucleo_semantico": STRING,
+        "nucleo_normativo": STRING,
+        "tipo_alineacion": _enum("EQUIVALENTE", "SUPERPONE_CLARA", "SUPERPONE_DEBIL", "DISTINTA")
+    }),
+    "criterio_jerarquica": _object({
+        "score": NUMBER,
+        "reasoning": STRING,
+        "corresponde_nivel": BOOLEAN,
+        "hay_inversion_jerarquica": BOOLEAN
+    }),
+    "score_global": NUMBER,
+    "clasificacion": _enum("APROBADO", "OBSERVACION", "RECHAZADO"),
+    "razonamiento_final": STRING
+})
+
+FUNCTION_EVALUATION_SCHEMA = _schema("function_evaluation", _FUNCTION_EVALUATION)
+FUNCTION_EVALUATION_BATCH_SCHEMA = _batch("function_evaluation_batch", "evaluaciones", _FUNCTION_EVALUATION)
+
+# Modo compacto: solo scores y códigos enumerados (sin prosa)
+_FUNCTION_EVALUATION_COMPACT = _object({
+    "verbo": NUMBER,
+    "verbo_codigo": _enum("AUTORIZADO", "EXCEPCION", "NO_AUTORIZADO"),
+    "normativa": NUMBER,
+    "normativa_codigo": _enum("DIRECTA", "SEMANTICA", "LEJANA", "NINGUNA"),
+    "fragmento_respaldo": _nullable("integer"),
+    "estructura": NUMBER,
+    "estructura_codigo": _enum("VCR", "VC", "VR", "CR", "V", "C", "R", "NINGUNO"),
+    "semantica": NUMBER,
+    "semantica_codigo": _enum("EQUIVALENTE", "SUPERPONE_CLARA", "SUPERPONE_DEBIL", "DISTINTA"),
+    "jerarquica": NUMBER,
+    "jerarquica_codigo": _enum("CORRESPONDE", "AJUSTE", "INVERSION")
+})
+
+FUNCTION_EVALUATION_COMPACT_SCHEMA = _schema("function_evaluation_compact", _FUNCTION_EVALUATION_COMPACT)
+FUNCTION_EVALUATION_COMPACT_BATCH_SCHEMA = _batch(
+    "function_evaluation_compact_batch", "evaluaciones_compactas", _FUNCTION_EVALUATION_COMPACT
+)
+
+# Razonamiento en prosa solicitado bajo demanda (expand_reasoning)
+FUNCTION_REASONING_BATCH_SCHEMA = _batch("function_reasoning_batch", "razonamientos", _object({
+    "verbo": STRING,
+    "normativa": STRING,
+    "estructura": STRING,
+    "semantica": STRING,
+    "jerarquica": STRING,
+    "nucleo_semantico": STRING,
+    "nucleo_normativo": STRING,
+    "razonamiento_final": STRING
+}))
+
+
+# ==========================================
+# CRITERIO 3: HierarchicalImpactLLMValidator
+# ==========================================
+
+_IMPACT_ANALYSIS = _object({
+    "scope_level": _enum("local", "institutional", "interinstitutional", "strategic_national"),
+    "consequences_level": _enum("operational", "tactical", "strategic", "systemic"),
+    "complexity_level": _enum("routine", "analytical", "strategic", "transformational", "innovative"),
+    "is_appropriate": BOOLEAN,
+    "confidence": NUMBER,
+    "reasoning": STRING,
+    "issues": STRING_LIST
+})
+
+IMPACT_ANALYSIS_SCHEMA = _schema("impact_analysis", _IMPACT_ANALYSIS)
+IMPACT_ANALYSIS_BATCH_SCHEMA = _batch("impact_analysis_batch", "analisis", _IMPACT_ANALYSIS)
+
+_NORMATIVE_BACKING = _object({
+    "has_backing": BOOLEAN,
+    "backing_text": _nullable("string"),
+    "relevance_score": NUMBER,
+    "reasoning": STRING
+})
+
+NORMATIVE_BACKING_SCHEMA = _schema("normative_backing", _NORMATIVE_BACKING)
+NORMATIVE_BACKING_BATCH_SCHEMA = _batch("normative_backing_batch", "respaldos", _NORMATIVE_BACKING)
+
+
+# ==========================================
+# CRITERIO 2: ContextualVerbValidator
+# ==========================================
+
+GLOBAL_VALIDATION_SCHEMA = _schema("global_validation", _object({
+    "alignment_level": _enum("ALIGNED", "PARTIALLY_ALIGNED", "NOT_ALIGNED"),
+    "confidence": NUMBER,
+    "reasoning": STRING,
+    "institutional_references_match": BOOLEAN,
+    "references_found_in_puesto": STRING_LIST,
+    "references_found_in_normativa": STRING_LIST,
+    "has_hierarchical_backing": BOOLEAN,
+    "hierarchical_reasoning": STRING,
+    "normativa_mismatches": STRING_LIST,
+    "strengths": STRING_LIST,
+    "improvement_areas": STRING_LIST
+}))
+
+FUNCTION_DETAIL_SCHEMA = _schema("function_detail_validation", _object({
+    "normative_backed": BOOLEAN,
+    "backing_type": _enum("DIRECT", "DERIVED", "HIERARCHICAL", "NOT_BACKED"),
+    "normative_source": STRING,
+    "appropriate_for_level": BOOLEAN,
+    "actual_alcance": INTEGER,
+    "severity": _enum("MINOR", "MODERATE", "CRITICAL"),
+    "suggested_alternative": STRING,
+    "reasoning": STRING,
+    "confidence": NUMBER
+}))
+
+
+# ==========================================
+# CALIDAD: AdvancedQualityValidator
+# ==========================================
+
+def _problem(tipos: List[str], extra: Dict[str, Any]) -> Dict[str, Any]:
+    return _object({"tipo": _enum(*tipos), "severidad": SEVERITY, "descripcion": STRING, **extra})
+
+
+QUALITY_VALIDATION_SCHEMA = _schema("quality_validation", _object({
+    "duplicacion": _object({
+        "tiene_duplicados": BOOLEAN,
+        "total_duplicados": INTEGER,
+        "pares_duplicados": _array(_object({
+            "funcion_1_id": INTEGER,
+            "funcion_2_id": INTEGER,
+            "similitud_porcentaje": INTEGER,
+            "descripcion": STRING,
+            "sugerencia": STRING
+        }))
+    }),
+    "malformacion": _object({
+        "tiene_malformadas": BOOLEAN,
+        "total_malformadas": INTEGER,
+        "funciones_problematicas": _array(_object({
+            "funcion_id": INTEGER,
+            "problemas": _array(_problem(
+                ["VACIA", "PLACEHOLDER", "MUY_CORTA", "SIN_VERBO", "SIN_COMPLEMENTO", "SIN_RESULTADO", "SIN_SENTIDO"],
+                {"texto_problematico": STRING}
+            ))
+        }))
+    }),
+    "marco_legal": _object({
+        "tiene_problemas": BOOLEAN,
+        "total_problemas": INTEGER,
+        "problemas": _array(_problem(
+            ["ORGANISMO_EXTINTO", "LEY_OBSOLETA", "REFERENCIA_INVALIDA", "INCONSISTENCIA"],
+            {"referencia_problematica": STRING, "sugerencia": STRING}
+        ))
+    }),
+    "objetivo_general": _object({
+        "es_adecuado": BOOLEAN,
+        "calificacion": NUMBER,
+        "problemas": _array(_problem(
+            ["MUY_CORTO", "MUY_LARGO", "SIN_VERBO", "SIN_FINALIDAD", "GENERICO", "INCOHERENTE"],
+            {}
+        ))
+    })
+}))
+
+
+# ==========================================
+# VERBOS: VerbSemanticAnalyzer
+# ==========================================
+
+VERB_SYNONYMS_SCHEMA = _schema("verb_synonyms", _object({
+    "synonyms": STRING_LIST,
+    "category": STRING,
+    "reasoning": STRING
+}))
+
+VERB_AMBIGUITY_SCHEMA = _schema("verb_ambiguity", _object({
+    "is_weak": BOOLEAN,
+    "confidence": NUMBER,
+    "reasoning": STRING
+}))
+
+VERB_LEVEL_SCHEMA = _schema("verb_level", _object({
+    "is_appropriate": BOOLEAN,
+    "confidence": NUMBER,
+    "reasoning": STRING,
+    "alternative_if_inappropriate": STRING_LIST
+}))
+
+
+# Schema por familia de prompt (prompt_family de robust_openai_call)
+SCHEMAS_BY_FAMILY: Dict[str, Dict[str, Any]] = {
+    "c1_function_eval": FUNCTION_EVALUATION_SCHEMA,
+    "c1_function_eval_batch": FUNCTION_EVALUATION_BATCH_SCHEMA,
+    "c1_function_eval_compact": FUNCTION_EVALUATION_COMPACT_SCHEMA,
+    "c1_function_eval_compact_batch": FUNCTION_EVALUATION_COMPACT_BATCH_SCHEMA,
+    "c1_reasoning_batch": FUNCTION_REASONING_BATCH_SCHEMA,
+    "c3_impact": IMPACT_ANALYSIS_SCHEMA,
+    "c3_impact_batch": IMPACT_ANALYSIS_BATCH_SCHEMA,
+    "c3_backing": NORMATIVE_BACKING_SCHEMA,
+    "c3_backing_batch": NORMATIVE_BACKING_BATCH_SCHEMA,
+    "c2_global_validation": GLOBAL_VALIDATION_SCHEMA,
+    "c2_function_detail": FUNCTION_DETAIL_SCHEMA,
+    "quality_holistic": QUALITY_VALIDATION_SCHEMA,
+    "verb_synonyms": VERB_SYNONYMS_SCHEMA,
+    "verb_ambiguity": VERB_AMBIGUITY_SCHEMA,
+    "verb_level": VERB_LEVEL_SCHEMA,
+}
@@ -5,15 +5,15 @@ Utilidades compartidas entre todos los agentes del sistema
 Base común unificada con manejo de contexto consolidado
 """
 
-import json
 import time
 import traceback
 import os
 import re
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Callable, Dict, Any, List, Optional, Union, Tuple
 from dataclasses import dataclass, field
 
 # Importaciones para procesamiento de documentos
@@ -38,6 +38,32 @@ except ImportError:
     DOCX_AVAILABLE = False
     print("Warning: python-docx no disponible - procesamiento DOCX limitado")
 
+# Provider v5 compartido (pool de conexiones) para robust_openai_call
+try:
+    from src.providers.provider_registry import get_pooled_provider, configure_provider_pool
+    from src.interfaces.llm_provider import (
+        LLMRequest, LLMProviderError, LLMProviderBudgetError, LLMProviderJSONError,
+        LLMProviderAuthError, LLMProviderBadRequestError, LLMProviderCircuitOpenError,
+        LLMProviderTimeoutError, LLMProviderDeferredError, LLMProviderRateLimitError
+    )
+    from src.providers.usage_meter import current_ledger
+    from src.utils.json_scanner import extract_json, strip_markdown_fence
+
+    # Errores tras los que no se intenta el fallback con complete(): otra
+    # llamada no cambia el resultado, o repetiría los reintentos ya agotados
+    # (429) y excedería el deadline. Una llamada lógica = una política de
+    # reintentos y un deadline
+    _NO_FALLBACK_ERRORS = (
+        LLMProviderBudgetError, LLMProviderAuthError, LLMProviderBadRequestError,
+        LLMProviderCircuitOpenError, LLMProviderTimeoutError, LLMProviderDeferredError,
+        LLMProviderRateLimitError
+    )
+    V5_PROVIDER_AVAILABLE = True
+    V5_PROVIDER_IMPORT_ERROR = None
+except ImportError as e:
+    V5_PROVIDER_AVAILABLE = False
+    V5_PROVIDER_IMPORT_ERROR = str(e)
+
 # ==========================================
 # CONFIGURACIÓN GLOBAL DEL SISTEMA
 # ==========================================
@@ -57,6 +83,10 @@ LOGGING_CONFIG = {
     "log_errors_only": False
 }
 
+# Los providers del pool compartido heredan la configuración de logging
+if V5_PROVIDER_AVAILABLE:
+    configure_provider_pool(enable_logging=LOGGING_CONFIG["log_openai_calls"])
+
 # ==========================================
 # JERARQUÍA DE VERBOS UNIFICADA
 # ==========================================
@@ -205,21 +235,31 @@ class APFContext:
     """
     Contexto unificado para todo el sistema APF.
     Reemplaza ActionContext y SharedActionContext con funcionalidad consolidada.
+
+    Thread-safe: los criterios de un puesto pueden ejecutarse en hilos
+    paralelos compartiendo el mismo contexto (ver IntegratedValidator).
     """
     
     def __init__(self, context_id: str = None):
         self.context_id = context_id or self._generate_context_id()
         self.created_at = datetime.now()
+
+        # Protege datos, pasos, errores y uso LLM ante ramas concurrentes
+        self._lock = threading.RLock()
         
         # Datos principales
         self.data = {}
         
         # Estado de procesamiento
         self.processing_steps = {}
+        self._step_counters = {}
         
         # Errores y warnings
         self.errors = []
         self.warnings = []
+
+        # Uso LLM acumulado por familia de prompt (ver record_llm_usage)
+        self.llm_usage = {}
         
         # Metadatos
         self.metadata = {
@@ -243,11 +283,12 @@ class APFContext:
             value: Valor a almacenar
             agent_name: Nombre del agente que establece el dato
         """
-        self.data[key] = value
-        self.metadata["last_updated"] = datetime.now()
-        
-        if agent_name and agent_name not in self.metadata["agents_involved"]:
-            self.metadata["agents_involved"].append(agent_name)
+        with self._lock:
+            self.data[key] = value
+            self.metadata["last_updated"] = datetime.now()
+
+            if agent_name and agent_name not in self.metadata["agents_involved"]:
+                self.metadata["agents_involved"].append(agent_name)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[CONTEXT {self.context_id}] Set {key}: {type(value).__name__}")
@@ -263,7 +304,25 @@ class APFContext:
         Returns:
             Valor almacenado o default
         """
-        return self.data.get(key, default)
+        with self._lock:
+            return self.data.get(key, default)
+
+    def update_data(self, key: str, updater: Callable[[Any], Any], agent_name: str = None) -> Any:
+        """
+        Actualiza un valor del contexto de forma atómica (leer-modificar-escribir).
+
+        Args:
+            key: Clave del dato
+            updater: Función(valor actual o None) -> nuevo valor
+            agent_name: Nombre del agente que actualiza el dato
+
+        Returns:
+            Nuevo valor almacenado
+        """
+        with self._lock:
+            value = updater(self.data.get(key))
+            self.set_data(key, value, agent_name)
+            return value
     
     def start_step(self, step_name: str, agent_name: str = None) -> None:
         """Inicia un paso de procesamiento"""
@@ -272,33 +331,52 @@ class APFContext:
             status="running",
             start_time=datetime.now()
         )
-        self.processing_steps[step_name] = step
-        
-        if agent_name and agent_name not in self.metadata["agents_involved"]:
-            self.metadata["agents_involved"].append(agent_name)
+        with self._lock:
+            self.processing_steps[step_name] = step
+
+            if agent_name and agent_name not in self.metadata["agents_involved"]:
+                self.metadata["agents_involved"].append(agent_name)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[STEP] {step_name} iniciado por {agent_name or 'sistema'}")
     
+    def start_unique_step(self, base_name: str, agent_name: str = None) -> str:
+        """
+        Inicia un paso con nombre único (base_name#n) y retorna ese nombre.
+
+        Para pasos que se repiten o corren en ramas concurrentes sobre el mismo
+        contexto (p. ej. llamadas LLM): cada uno conserva su inicio, fin y estado
+        en lugar de sobrescribir el de otra rama.
+        """
+        with self._lock:
+            count = self._step_counters.get(base_name, 0) + 1
+            self._step_counters[base_name] = count
+            step_name = f"{base_name}#{count}"
+            self.start_step(step_name, agent_name)
+        return step_name
+
     def complete_step(self, step_name: str, result_summary: str = None) -> None:
         """Completa un paso de procesamiento"""
-        if step_name in self.processing_steps:
-            step = self.processing_steps[step_name]
-            step.status = "completed"
-            step.end_time = datetime.now()
-            step.result_summary = result_summary
-            
+        with self._lock:
+            step = self.processing_steps.get(step_name)
+            if step is not None:
+                step.status = "completed"
+                step.end_time = datetime.now()
+                step.result_summary = result_summary
+
+        if step is not None:
             if LOGGING_CONFIG["enable_detailed_logging"]:
                 duration = (step.end_time - step.start_time).total_seconds()
                 print(f"[STEP] {step_name} completado en {duration:.2f}s")
     
     def fail_step(self, step_name: str, error: str) -> None:
         """Marca un paso como fallido"""
-        if step_name in self.processing_steps:
-            step = self.processing_steps[step_name]
-            step.status = "failed"
-            step.end_time = datetime.now()
-            step.error = error
+        with self._lock:
+            step = self.processing_steps.get(step_name)
+            if step is not None:
+                step.status = "failed"
+                step.end_time = datetime.now()
+                step.error = error
         
         self.add_error(f"Step {step_name} failed: {error}")
     
@@ -309,11 +387,87 @@ class APFContext:
             "timestamp": datetime.now(),
             "agent": agent_name
         }
-        self.errors.append(error_entry)
+        with self._lock:
+            self.errors.append(error_entry)
         
         if LOGGING_CONFIG["log_errors_only"] or LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[ERROR] {agent_name or 'Sistema'}: {error}")
     
+    def record_llm_usage(self, prompt_family: Optional[str], model: str,
+                         tokens_used: Dict[str, int], duration: float,
+                         cache_hit: bool = False, json_parse: Optional[str] = None) -> None:
+        """
+        Acumula tokens y latencia de una llamada LLM por familia de prompt.
+
+        Args:
+            prompt_family: Familia del prompt (None = "sin_familia")
+            model: Modelo usado
+            tokens_used: {"prompt", "completion", "total", "cached"}
+            duration: Latencia de la llamada en segundos
+            cache_hit: Si la respuesta vino del cache local de respuestas
+            json_parse: Método de parsing de la respuesta ("direct",
+                "markdown", "salvage" o "failed"), si se conoce
+        """
+        with self._lock:
+            family = prompt_family or "sin_familia"
+            stats = self.llm_usage.setdefault(family, {
+                "calls": 0,
+                "local_cache_hits": 0,
+                "prompt_tokens": 0,
+                "cached_prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_duration": 0.0,
+                "json_recovered": 0,
+                "parse_failures": 0,
+                "models": []
+            })
+
+            stats["calls"] += 1
+            stats["total_duration"] += duration
+            if model not in stats["models"]:
+                stats["models"].append(model)
+
+            if json_parse == "failed":
+                stats["parse_failures"] += 1
+            elif json_parse in ("markdown", "salvage"):
+                stats["json_recovered"] += 1
+
+            if cache_hit:
+                # Servida desde cache local: no consumió tokens del proveedor
+                stats["local_cache_hits"] += 1
+                return
+
+            stats["prompt_tokens"] += tokens_used.get("prompt", 0)
+            stats["cached_prompt_tokens"] += tokens_used.get("cached", 0)
+            stats["completion_tokens"] += tokens_used.get("completion", 0)
+
+    def get_llm_usage_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Resumen de uso LLM por familia de prompt.
+
+        Returns:
+            Dict familia -> totales, latencia media, proporción de tokens de
+            prompt servidos desde el prefix cache del proveedor, tokens de
+            salida promedio y tasa de fallas de parsing JSON
+        """
+        with self._lock:
+            summary = {}
+            for family, stats in self.llm_usage.items():
+                summary[family] = {
+                    **stats,
+                    "avg_latency": stats["total_duration"] / stats["calls"] if stats["calls"] else 0.0,
+                    "cached_prompt_ratio": (
+                        stats["cached_prompt_tokens"] / stats["prompt_tokens"]
+                        if stats["prompt_tokens"] else 0.0
+                    ),
+                    "avg_completion_tokens": (
+                        stats["completion_tokens"] / (stats["calls"] - stats["local_cache_hits"])
+                        if stats["calls"] > stats["local_cache_hits"] else 0.0
+                    ),
+                    "parse_failure_rate": stats["parse_failures"] / stats["calls"] if stats["calls"] else 0.0
+                }
+        return summary
+
     def add_warning(self, warning: str, agent_name: str = None) -> None:
         """Añade un warning al contexto"""
         warning_entry = {
@@ -321,50 +475,53 @@ class APFContext:
             "timestamp": datetime.now(),
             "agent": agent_name
         }
-        self.warnings.append(warning_entry)
+        with self._lock:
+            self.warnings.append(warning_entry)
         
         if LOGGING_CONFIG["enable_detailed_logging"]:
             print(f"[WARNING] {agent_name or 'Sistema'}: {warning}")
     
     def get_summary(self) -> Dict[str, Any]:
         """Obtiene resumen completo del contexto"""
-        completed_steps = len([s for s in self.processing_steps.values() if s.status == "completed"])
-        failed_steps = len([s for s in self.processing_steps.values() if s.status == "failed"])
+        with self._lock:
+            completed_steps = len([s for s in self.processing_steps.values() if s.status == "completed"])
+            failed_steps = len([s for s in self.processing_steps.values() if s.status == "failed"])
         
-        return {
-            "context_id": self.context_id,
-            "created_at": self.created_at.isoformat(),
-            "duration": (datetime.now() - self.created_at).total_seconds(),
-            "data_keys": list(self.data.keys()),
-            "processing_steps": {
-                "total": len(self.processing_steps),
-                "completed": completed_steps,
-                "failed": failed_steps,
-                "success_rate": (completed_steps / len(self.processing_steps) * 100) if self.processing_steps else 0
-            },
-            "errors": len(self.errors),
-            "warnings": len(self.warnings),
-            "agents_involved": self.metadata["agents_involved"]
-        }
+            return {
+                "context_id": self.context_id,
+                "created_at": self.created_at.isoformat(),
+                "duration": (datetime.now() - self.created_at).total_seconds(),
+                "data_keys": list(self.data.keys()),
+                "processing_steps": {
+                    "total": len(self.processing_steps),
+                    "completed": completed_steps,
+                    "failed": failed_steps,
+                    "success_rate": (completed_steps / len(self.processing_steps) * 100) if self.processing_steps else 0
+                },
+                "errors": len(self.errors),
+                "warnings": len(self.warnings),
+                "agents_involved": self.metadata["agents_involved"]
+            }
     
     def export_full_context(self) -> Dict[str, Any]:
         """Exporta contexto completo para debugging"""
-        return {
-            "context_id": self.context_id,
-            "metadata": self.metadata,
-            "data": {k: str(type(v)) if not isinstance(v, (str, int, float, bool, list, dict)) else v 
-                    for k, v in self.data.items()},
-            "processing_steps": {name: {
-                "step_name": step.step_name,
-                "status": step.status,
-                "start_time": step.start_time.isoformat() if step.start_time else None,
-                "end_time": step.end_time.isoformat() if step.end_time else None,
-                "error": step.error,
-                "result_summary": step.result_summary
-            } for name, step in self.processing_steps.items()},
-            "errors": self.errors,
-            "warnings": self.warnings
-        }
+        with self._lock:
+            return {
+                "context_id": self.context_id,
+                "metadata": self.metadata,
+                "data": {k: str(type(v)) if not isinstance(v, (str, int, float, bool, list, dict)) else v 
+                        for k, v in self.data.items()},
+                "processing_steps": {name: {
+                    "step_name": step.step_name,
+                    "status": step.status,
+                    "start_time": step.start_time.isoformat() if step.start_time else None,
+                    "end_time": step.end_time.isoformat() if step.end_time else None,
+                    "error": step.error,
+                    "result_summary": step.result_summary
+                } for name, step in self.processing_steps.items()},
+                "errors": self.errors,
+                "warnings": self.warnings
+            }
 
 # ==========================================
 # CLASE BASE PARA AGENTES
@@ -527,56 +684,201 @@ def extract_hierarchical_level(codigo_puesto: str = None,
         # Si no se puede determinar, retornar UNKNOWN
         return 'UNKNOWN'
 
+def _get_call_provider(model: str, context: APFContext = None):
+    """Obtiene el provider compartido usando la API key del contexto (si existe)"""
+    api_key = None
+    if context and hasattr(context, 'data'):
+        api_key = context.data.get('openai_api_key') or context.data.get('api_key')
+
+    return get_pooled_provider(api_key=api_key, model=model)
+
+
+def _complete_json_with_response(provider, request) -> Tuple[Any, Any]:
+    """complete_json conservando la LLMResponse (si el provider lo soporta)"""
+    if hasattr(provider, "complete_json_with_response"):
+        return provider.complete_json_with_response(request)
+    return provider.complete_json(request), None
+
+
+async def _acomplete_json_with_response(provider, request) -> Tuple[Any, Any]:
+    """Versión asíncrona de _complete_json_with_response"""
+    if hasattr(provider, "acomplete_json_with_response"):
+        return await provider.acomplete_json_with_response(request)
+    return await provider.acomplete_json(request), None
+
+
+def _record_call_usage(context: APFContext, prompt_family: Optional[str], model: str,
+                       response: Any, duration: float) -> Dict[str, int]:
+    """Registra tokens y latencia de la llamada en el contexto; retorna tokens_used"""
+    tokens_used = dict(response.tokens_used or {}) if response is not None else {}
+
+    if context and hasattr(context, "record_llm_usage"):
+        metadata = (response.metadata or {}) if response is not None else {}
+        context.record_llm_usage(
+            prompt_family, model, tokens_used, duration,
+            cache_hit=bool(metadata.get("cache_hit")),
+            json_parse=metadata.get("json_parse")
+        )
+
+    return tokens_used
+
+
+def _record_call_failure(kind: str) -> None:
+    """Cuenta la llamada fallida en el ledger activo (el llamador usará su respaldo)"""
+    ledger = current_ledger()
+    if ledger is not None:
+        ledger.record_failure(kind)
+
+
+def _call_error_result(error: Exception, context: APFContext = None,
+                       step_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resultado de error de robust_openai_call (y su versión async).
+
+    Marca el paso como fallido, cuenta la falla en el ledger activo y
+    señala las fallas sin llamada enviada: presupuesto agotado
+    (budget_exceeded), endpoint caído (circuit_open) o request diferido a
+    batch job en modo offline (deferred).
+    """
+    if isinstance(error, LLMProviderBudgetError):
+        error_msg = f"Llamada OpenAI no enviada: {str(error)}"
+        kind, flags = "presupuesto", {"budget_exceeded": True}
+    elif isinstance(error, LLMProviderCircuitOpenError):
+        error_msg = f"Llamada OpenAI no enviada: {str(error)}"
+        kind, flags = "circuito_abierto", {"circuit_open": True}
+    elif isinstance(error, LLMProviderDeferredError):
+        error_msg = f"Llamada OpenAI diferida a batch job: {str(error)}"
+        kind, flags = "diferida", {"deferred": True}
+    else:
+        error_msg = f"Error en llamada OpenAI: {str(error)}"
+        kind, flags = "error", {}
+
+    if context:
+        context.fail_step(step_name, error_msg)
+    _record_call_failure(kind)
+    return {"status": "error", "error": error_msg, **flags}
+
+
+def call_failure_flags(response: Dict[str, Any]) -> Dict[str, bool]:
+    """Señales de una respuesta fallida de robust_openai_call (budget_exceeded, circuit_open, deferred)"""
+    return {flag: True for flag in ("budget_exceeded", "circuit_open", "deferred") if response.get(flag)}
+
+
+def _success_call_result(result: Any, model: str, duration: float,
+                         context: APFContext = None,
+                         tokens_used: Optional[Dict[str, int]] = None,
+                         prompt_family: Optional[str] = None,
+                         step_name: str = "openai_call") -> Dict[str, Any]:
+    """Construye el resultado exitoso de robust_openai_call"""
+    if context:
+        context.complete_step(step_name, f"JSON parseado exitosamente en {duration:.2f}s")
+
+    if LOGGING_CONFIG.get("log_openai_calls", True):
+        print(f"[OpenAI] Respuesta recibida en {duration:.2f}s")
+
+    return {
+        "status": "success",
+        "data": result,
+        "metadata": {
+            "model": model,
+            "duration": duration,
+            "tokens_used": tokens_used or {},
+            "prompt_family": prompt_family
+        }
+    }
+
+
+def _parse_fallback_content(content: str, parse_error: Exception, model: str,
+                            duration: float, context: APFContext = None,
+                            tokens_used: Optional[Dict[str, int]] = None,
+                            prompt_family: Optional[str] = None,
+                            step_name: str = "openai_call") -> Dict[str, Any]:
+    """Rescate del contenido ya recibido cuando complete_json no lo pudo parsear"""
+    if not content:
+        error_msg = "OpenAI devolvió respuesta vacía"
+        if context:
+            context.fail_step(step_name, error_msg)
+        _record_call_failure("respuesta_invalida")
+        return {"status": "error", "error": error_msg}
+
+    # Wrapper markdown + bloque balanceado (json_scanner, tiempo lineal)
+    result = extract_json(content)
+    if result is not None:
+        if context:
+            context.complete_step(step_name, f"JSON rescatado del contenido en {duration:.2f}s")
+        return {
+            "status": "success",
+            "data": result,
+            "metadata": {
+                "model": model,
+                "duration": duration,
+                "tokens_used": tokens_used or {},
+                "prompt_family": prompt_family,
+                "json_recovered": True
+            }
+        }
+
+    error_msg = f"No se pudo parsear JSON: {str(parse_error)}"
+    if context:
+        context.fail_step(step_name, error_msg)
+    _record_call_failure("respuesta_invalida")
+    return {
+        "status": "partial",
+        "raw_content": strip_markdown_fence(content),
+        "error": error_msg
+    }
+
+
 def robust_openai_call(prompt: str,
                       max_tokens: int = 800,
                       model: str = "openai/gpt-4o",
                       temperature: float = 0.1,
-                      context: APFContext = None) -> Dict[str, Any]:
+                      context: APFContext = None,
+                      system_message: Optional[str] = None,
+                      prompt_family: Optional[str] = None,
+                      response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Llamada robusta a OpenAI con manejo mejorado y logging.
     ADAPTADO PARA V5: Usa OpenAIProvider en lugar de litellm directamente.
 
+    El provider se obtiene del registro compartido (get_pooled_provider), de
+    modo que todas las llamadas del proceso reutilizan la misma instancia y
+    su pool de conexiones HTTP.
+
     Mantiene la firma original para compatibilidad con validadores v4.
+    Opcionalmente acepta:
+    - system_message: texto estático (instrucciones/rúbrica) enviado como
+      mensaje de sistema, para que el proveedor pueda cachear el prefijo
+    - prompt_family: etiqueta del tipo de prompt (ej: "c1_function_eval"),
+      usada para acumular tokens (incluidos los cacheados) y latencia por
+      validador en el contexto (APFContext.get_llm_usage_summary)
+    - response_schema: JSON schema de la respuesta ({"name", "schema"}, ver
+      response_schemas.py); el provider usa salida estructurada nativa si
+      el backend la soporta
     """
-    # Importar OpenAIProvider de v5
-    try:
-        import sys
-        import os
-        # Agregar path raíz del proyecto para imports
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        if project_root not in sys.path:
-            sys.path.insert(0, project_root)
-
-        from src.providers.openai_provider import OpenAIProvider
-        from src.interfaces.llm_provider import LLMRequest, LLMProviderError
-    except ImportError as e:
-        error_msg = f"No se pudo importar OpenAIProvider de v5: {str(e)}"
+    if not V5_PROVIDER_AVAILABLE:
+        error_msg = f"No se pudo importar OpenAIProvider de v5: {V5_PROVIDER_IMPORT_ERROR}"
         if context:
             context.add_error(error_msg)
         return {"status": "error", "error": error_msg}
 
-    if context:
-        context.start_step("openai_call")
+    # Nombre de paso propio por llamada: las ramas concurrentes de un puesto
+    # comparten el contexto y no deben sobrescribir el paso de otra
+    step_name = context.start_unique_step(f"openai_call:{prompt_family or 'sin_familia'}") if context else None
 
     try:
-        # Extraer API key del contexto si existe
-        api_key = None
-        if context and hasattr(context, 'data'):
-            api_key = context.data.get('openai_api_key') or context.data.get('api_key')
-
-        # Crear provider de v5
-        provider = OpenAIProvider(
-            api_key=api_key,
-            default_model=model,
-            enable_logging=LOGGING_CONFIG.get("log_openai_calls", True)
-        )
+        # Obtener provider de larga vida del pool compartido
+        provider = _get_call_provider(model, context)
 
         # Crear request de v5
         request = LLMRequest(
             prompt=prompt,
             model=model,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            system_message=system_message,
+            metadata={"prompt_family": prompt_family} if prompt_family else None,
+            response_schema=response_schema
         )
 
         if LOGGING_CONFIG.get("log_openai_calls", True):
@@ -586,98 +888,122 @@ def robust_openai_call(prompt: str,
 
         # Llamar a provider usando complete_json para obtener dict directamente
         try:
-            result = provider.complete_json(request)
+            result, response = _complete_json_with_response(provider, request)
             duration = time.time() - start_time
+            tokens_used = _record_call_usage(context, prompt_family, model, response, duration)
+            return _success_call_result(result, model, duration, context, tokens_used, prompt_family, step_name)
 
-            if context:
-                context.complete_step("openai_call", f"JSON parseado exitosamente en {duration:.2f}s")
-
-            if LOGGING_CONFIG.get("log_openai_calls", True):
-                print(f"[OpenAI] Respuesta recibida en {duration:.2f}s")
+        except _NO_FALLBACK_ERRORS:
+            raise
 
-            return {
-                "status": "success",
-                "data": result,
-                "metadata": {
-                    "model": model,
-                    "duration": duration
-                }
-            }
+        except LLMProviderJSONError as e:
+            # La respuesta ya llegó: se rescata su contenido sin otra llamada
+            duration = time.time() - start_time
+            tokens_used = _record_call_usage(context, prompt_family, model, e.response, duration)
+            return _parse_fallback_content(
+                e.raw_content, e, model, duration, context, tokens_used, prompt_family, step_name
+            )
 
         except LLMProviderError as e:
-            # Si complete_json falla, intentar con complete y parsing manual
+            # Providers con complete_json_with_response ya agotaron su política
+            # de reintentos y su deadline (y adjuntan el contenido en
+            # LLMProviderJSONError): el error es terminal, sin otra llamada
+            if hasattr(provider, "complete_json_with_response"):
+                raise
+
+            # Providers legacy que no adjuntan el contenido: complete y parsing manual
             if LOGGING_CONFIG.get("log_openai_calls", True):
-                print(f"[OpenAI] complete_json falló, intentando complete normal...")
+                print("[OpenAI] complete_json falló, intentando complete normal...")
 
             response = provider.complete(request)
             duration = time.time() - start_time
-            content = response.content
-
-            if not content:
-                error_msg = "OpenAI devolvió respuesta vacía"
-                if context:
-                    context.fail_step("openai_call", error_msg)
-                return {"status": "error", "error": error_msg}
-
-            # Intentar parsear como JSON manualmente
-            content_cleaned = content.strip()
-
-            # Limpiar markdown wrapper
-            if content_cleaned.startswith('```json'):
-                content_cleaned = content_cleaned[7:]
-                if content_cleaned.endswith('```'):
-                    content_cleaned = content_cleaned[:-3]
-                content_cleaned = content_cleaned.strip()
-            elif content_cleaned.startswith('```'):
-                lines = content_cleaned.split('\n')
-                if len(lines) > 2 and lines[-1].strip() == '```':
-                    content_cleaned = '\n'.join(lines[1:-1])
-
-            try:
-                result = json.loads(content_cleaned)
-                if context:
-                    context.complete_step("openai_call", f"JSON parseado manualmente en {duration:.2f}s")
-                return {
-                    "status": "success",
-                    "data": result,
-                    "metadata": {
-                        "model": model,
-                        "duration": duration
-                    }
-                }
-            except json.JSONDecodeError:
-                # Fallback: buscar JSON con regex
-                json_patterns = [
-                    r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',
-                    r'\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]'
-                ]
-
-                for pattern in json_patterns:
-                    matches = re.findall(pattern, content_cleaned, re.DOTALL)
-                    for match in matches:
-                        try:
-                            result = json.loads(match)
-                            if context:
-                                context.complete_step("openai_call", "JSON extraído con regex")
-                            return {"status": "success", "data": result}
-                        except:
-                            continue
-
-                error_msg = f"No se pudo parsear JSON: {str(e)}"
-                if context:
-                    context.fail_step("openai_call", error_msg)
-                return {
-                    "status": "partial",
-                    "raw_content": content_cleaned,
-                    "error": error_msg
-                }
+            tokens_used = _record_call_usage(context, prompt_family, model, response, duration)
+            return _parse_fallback_content(
+                response.content, e, model, duration, context, tokens_used, prompt_family, step_name
+            )
 
     except Exception as e:
-        error_msg = f"Error en llamada OpenAI: {str(e)}"
+        return _call_error_result(e, context, step_name)
+
+
+async def robust_openai_call_async(prompt: str,
+                                   max_tokens: int = 800,
+                                   model: str = "openai/gpt-4o",
+                                   temperature: float = 0.1,
+                                   context: APFContext = None,
+                                   system_message: Optional[str] = None,
+                                   prompt_family: Optional[str] = None,
+                                   response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Versión asíncrona de robust_openai_call.
+
+    Misma firma y mismo formato de resultado, pero usa acomplete_json del
+    provider compartido: ni la llamada ni el backoff bloquean el event loop,
+    por lo que puede combinarse con BoundedLLMExecutor para mantener muchas
+    llamadas en vuelo desde un solo proceso.
+    """
+    if not V5_PROVIDER_AVAILABLE:
+        error_msg = f"No se pudo importar OpenAIProvider de v5: {V5_PROVIDER_IMPORT_ERROR}"
         if context:
-            context.fail_step("openai_call", error_msg)
+            context.add_error(error_msg)
         return {"status": "error", "error": error_msg}
 
+    # Nombre de paso propio por llamada: las ramas concurrentes de un puesto
+    # comparten el contexto y no deben sobrescribir el paso de otra
+    step_name = context.start_unique_step(f"openai_call:{prompt_family or 'sin_familia'}") if context else None
+
+    try:
+        provider = _get_call_provider(model, context)
+
+        request = LLMRequest(
+            prompt=prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system_message=system_message,
+            metadata={"prompt_family": prompt_family} if prompt_family else None,
+            response_schema=response_schema
+        )
+
+        if LOGGING_CONFIG.get("log_openai_calls", True):
+            print(f"[OpenAI] Llamada async iniciada - Model: {model}, Max tokens: {max_tokens}")
+
+        start_time = time.time()
+
+        try:
+            result, response = await _acomplete_json_with_response(provider, request)
+            duration = time.time() - start_time
+            tokens_used = _record_call_usage(context, prompt_family, model, response, duration)
+            return _success_call_result(result, model, duration, context, tokens_used, prompt_family, step_name)
+
+        except _NO_FALLBACK_ERRORS:
+            raise
+
+        except LLMProviderJSONError as e:
+            duration = time.time() - start_time
+            tokens_used = _record_call_usage(context, prompt_family, model, e.response, duration)
+            return _parse_fallback_content(
+                e.raw_content, e, model, duration, context, tokens_used, prompt_family, step_name
+            )
+
+        except LLMProviderError as e:
+            # Terminal salvo en providers legacy (ver robust_openai_call)
+            if hasattr(provider, "acomplete_json_with_response"):
+                raise
+
+            if LOGGING_CONFIG.get("log_openai_calls", True):
+                print("[OpenAI] acomplete_json falló, intentando acomplete normal...")
+
+            response = await provider.acomplete(request)
+            duration = time.time() - start_time
+            tokens_used = _record_call_usage(context, prompt_family, model, response, duration)
+            return _parse_fallback_content(
+                response.content, e, model, duration, context, tokens_used, prompt_family, step_name
+            )
+
+    except Exception as e:
+        return _call_error_result(e, context, step_name)
+
 # ==========================================
 # PROCESAMIENTO DE DOCUMENTOS UNIFICADO
 # ==========================================
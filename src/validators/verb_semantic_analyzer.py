@@ -16,6 +16,11 @@ from src.validators.shared_utilities import (
     APFContext, robust_openai_call, VERB_HIERARCHY, WEAK_VERBS,
     LOGGING_CONFIG
 )
+from src.validators.response_schemas import (
+    VERB_AMBIGUITY_SCHEMA,
+    VERB_LEVEL_SCHEMA,
+    VERB_SYNONYMS_SCHEMA
+)
 
 # ==========================================
 # CONFIGURACIÓN
@@ -165,7 +170,9 @@ Responde en formato JSON:
             prompt=prompt,
             max_tokens=300,
             temperature=0.1,
-            context=self.context
+            context=self.context,
+            prompt_family="verb_synonyms",
+            response_schema=VERB_SYNONYMS_SCHEMA
         )
 
         if llm_result["status"] == "success":
@@ -238,7 +245,9 @@ Responde en formato JSON:
             prompt=prompt,
             max_tokens=200,
             temperature=0.1,
-            context=self.context
+            context=self.context,
+            prompt_family="verb_ambiguity",
+            response_schema=VERB_AMBIGUITY_SCHEMA
         )
 
         if llm_result["status"] == "success":
@@ -416,7 +425,9 @@ Responde en formato JSON:
             prompt=prompt,
             max_tokens=400,
             temperature=0.1,
-            context=self.context
+            context=self.context,
+            prompt_family="verb_level",
+            response_schema=VERB_LEVEL_SCHEMA
         )
 
         if llm_result["status"] == "success":
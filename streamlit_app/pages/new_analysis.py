@@ -10,6 +10,7 @@ import sys
 import time
 import json
 import os
+import re
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -467,7 +468,21 @@ def step_3_analysis_options():
         help="Identifica este análisis para encontrarlo después"
     )
 
+    resume = st.checkbox(
+        "♻️ Reanudar si un análisis con este nombre se interrumpió",
+        value=True,
+        help="Los puestos ya validados (misma entrada y opciones) se toman de la bitácora output/journal/<nombre>.jsonl sin repetir llamadas LLM"
+    )
+
+    incremental = st.checkbox(
+        "🔁 Reutilizar resultados de puestos sin cambios",
+        value=True,
+        help="Los puestos con el mismo contenido, normativa y versión del validador que en corridas anteriores se toman del almacén (APF_RESULTS_STORE_DIR, por defecto output/resultados); solo se validan los nuevos o modificados"
+    )
+
     st.session_state.analysis_options['name'] = analysis_name
+    st.session_state.analysis_options['resume'] = resume
+    st.session_state.analysis_options['incremental'] = incremental
 
     st.markdown("---")
 
@@ -508,9 +523,16 @@ def step_3_analysis_options():
         help="Detecta verbos sin potencia normativa"
     )
 
+    full_detail = st.checkbox(
+        "📋 Evaluación completa (detalle por función para reportes RHNet)",
+        value=False,
+        help="Evalúa todas las funciones y criterios aunque el resultado ya esté decidido (más llamadas LLM)"
+    )
+
     st.session_state.analysis_options.update({
         'contextual_validation': contextual_validation,
         'weak_verbs_analysis': weak_verbs_analysis,
+        'full_detail': full_detail,
     })
 
     st.markdown("---")
@@ -673,6 +695,7 @@ def execute_analysis():
     try:
         # Importar validador
         from src.validators.integrated_validator import IntegratedValidator
+        from src.utils.results_store import ValidationResultsStore, results_store_from_env
         from src.adapters.sidegor_adapter import SidegorAdapter
 
         # Crear containers para progreso
@@ -923,15 +946,26 @@ def execute_analysis():
             st.error("❌ OPENAI_API_KEY no configurada en .env")
             return
 
+        # Almacén de resultados solo con revalidación incremental
+        results_store = None
+        if st.session_state.analysis_options.get('incremental', True):
+            results_store = results_store_from_env() or ValidationResultsStore("output/resultados")
+
+        # Modo texto (un puesto): criterios en paralelo, latencia ≈ rama más lenta
         validator = IntegratedValidator(
             normativa_fragments=normativa_fragments,
-            openai_api_key=openai_api_key
+            openai_api_key=openai_api_key,
+            concurrent_criteria=True if input_mode == 'txt' else None,
+            results_store=results_store
         )
 
         # Paso 5: Validar puestos
         status_text.text(f"🔍 Validando {len(puestos_to_validate)} puestos...")
         progress_bar.progress(50)
 
+        # Bitácora por nombre de análisis: permite reanudar si la sesión se interrumpe
+        journal_name = re.sub(r'[^\w\-]+', '_', st.session_state.analysis_options.get('name') or 'analisis')
+
         def update_progress(pct):
             # Mapear 0-100 a 50-90
             adjusted = 50 + int(pct * 0.4)
@@ -940,8 +974,13 @@ def execute_analysis():
 
         resultados = validator.validate_batch(
             puestos_to_validate,
-            progress_callback=update_progress
+            progress_callback=update_progress,
+            full_detail=st.session_state.analysis_options.get('full_detail', False),
+            journal_path=str(Path("output/journal") / f"{journal_name}.jsonl"),
+            resume=st.session_state.analysis_options.get('resume', True),
+            revalidate=not st.session_state.analysis_options.get('incremental', True)
         )
+        incremental_report = validator.context.get_data("revalidacion_incremental")
 
         # Paso 6: Guardar resultados
         status_text.text("💾 Guardando resultados...")
@@ -988,6 +1027,13 @@ def execute_analysis():
 
         st.balloons()
 
+        if incremental_report and incremental_report['reutilizados']:
+            st.info(
+                f"🔁 Revalidación incremental: **{incremental_report['reutilizados']}** puestos sin cambios "
+                f"reutilizados, **{incremental_report['validados']}** nuevos o modificados validados "
+                f"(~{incremental_report['tiempo_ahorrado_s']:.0f}s ahorrados)"
+            )
+
         # Mostrar resumen rápido
         aprobados = sum(1 for r in resultados if r['validacion']['resultado'] in ['APROBADO', 'APROBADO_CON_OBSERVACIONES'])
         rechazados = len(resultados) - aprobados
@@ -508,6 +508,8 @@ def show():
                 st.markdown("**Criterio 1: Verbos Débiles**")
                 if c1_data.get('resultado') == 'PASS':
                     st.success("✅ PASS")
+                elif c1_data.get('resultado') == 'NOT_EVALUATED':
+                    st.info("⏭️ NO EVALUADO (decisión ya fijada)")
                 else:
                     st.error("❌ FAIL")
                 st.metric("Tasa Crítica", f"{c1_data.get('tasa_critica', 0):.0%}")
@@ -519,6 +521,8 @@ def show():
                 st.markdown("**Criterio 2: Contextual**")
                 if c2_data.get('resultado') == 'PASS':
                     st.success("✅ PASS")
+                elif c2_data.get('resultado') == 'NOT_EVALUATED':
+                    st.info("⏭️ NO EVALUADO (decisión ya fijada)")
                 else:
                     st.error("❌ FAIL")
                 st.metric("Confianza", f"{c2_data.get('alineacion', {}).get('confianza', 0.0):.2f}")
@@ -530,6 +534,8 @@ def show():
                 st.markdown("**Criterio 3: Impacto**")
                 if c3_data.get('resultado') == 'PASS':
                     st.success("✅ PASS")
+                elif c3_data.get('resultado') == 'NOT_EVALUATED':
+                    st.info("⏭️ NO EVALUADO (decisión ya fijada)")
                 else:
                     st.error("❌ FAIL")
                 st.metric("Tasa Crítica", f"{c3_data.get('metricas', {}).get('tasa_critica', 0):.0%}")